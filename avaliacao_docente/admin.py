@@ -1,7 +1,10 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as DefaultUserAdmin
 from django.contrib.auth.models import User
-from rolepermissions.checkers import has_role
+from .jobs import enfileirar
+from .relatorios import gerar_snapshot
+from .role_cache import user_has_role as has_role
+from .utils import get_role_display_name
 from .models import (
     PerfilAluno,
     PerfilProfessor,
@@ -21,6 +24,7 @@ from .models import (
     RespostaAvaliacao,
     # Modelos deprecated (manter compatibilidade)
     ConfiguracaoSite,
+    user_role_annotations,
 )
 
 
@@ -58,30 +62,27 @@ class CustomUserAdmin(DefaultUserAdmin):
     )
     list_filter = ("is_active", "date_joined")
 
+    def get_queryset(self, request):
+        """Anota roles e perfis para evitar has_role() por linha da listagem"""
+        return super().get_queryset(request).annotate(**user_role_annotations())
+
     def get_user_role(self, obj):
         """Retorna a role do usuário"""
-        if has_role(obj, "admin"):
-            return "Administrador"
-        elif has_role(obj, "coordenador"):
-            return "Coordenador"
-        elif has_role(obj, "professor"):
-            return "Professor"
-        elif has_role(obj, "aluno"):
-            return "Aluno"
-        return "Sem role"
+        return get_role_display_name(obj.role_principal)
 
     get_user_role.short_description = "Role"
+    get_user_role.admin_order_field = "role_principal"
 
     def get_user_profile(self, obj):
         """Retorna o tipo de perfil do usuário"""
         # Admins não devem ter perfis específicos
-        if has_role(obj, "admin"):
+        if obj.role_principal == "admin":
             return "Admin (sem perfil)"
 
         profiles = []
-        if hasattr(obj, "perfil_aluno"):
+        if obj.tem_perfil_aluno:
             profiles.append("Aluno")
-        if hasattr(obj, "perfil_professor"):
+        if obj.tem_perfil_professor:
             profiles.append("Professor")
 
         if profiles:
@@ -99,7 +100,7 @@ class CustomUserAdmin(DefaultUserAdmin):
             return []  # Admins não têm perfis
         elif obj and has_role(obj, "aluno"):
             return [PerfilAlunoInline]
-        elif obj and (has_role(obj, "professor") or has_role(obj, "coordenador")):
+        elif obj and has_role(obj, ["professor", "coordenador"]):
             return [PerfilProfessorInline]
         return []
 
@@ -181,6 +182,7 @@ class CicloAvaliacaoAdmin(admin.ModelAdmin):
     search_fields = ("nome",)
     ordering = ("-data_inicio",)
     date_hierarchy = "data_inicio"
+    actions = ["regenerar_relatorio", "recalcular_ranking"]
 
     def status_display(self, obj):
         status_colors = {
@@ -199,6 +201,33 @@ class CicloAvaliacaoAdmin(admin.ModelAdmin):
 
     total_avaliacoes.short_description = "Total de Avaliações"
 
+    @admin.action(description="Regenerar relatório congelado dos ciclos encerrados")
+    def regenerar_relatorio(self, request, queryset):
+        encerrados = [ciclo for ciclo in queryset if ciclo.encerrado]
+        for ciclo in encerrados:
+            gerar_snapshot(ciclo)
+
+        self.message_user(
+            request, f"{len(encerrados)} relatório(s) regenerado(s).", messages.SUCCESS
+        )
+        ignorados = len(queryset) - len(encerrados)
+        if ignorados:
+            self.message_user(
+                request,
+                f"{ignorados} ciclo(s) ainda aberto(s) ignorado(s).",
+                messages.WARNING,
+            )
+
+    @admin.action(description="Recalcular ranking dos professores (em segundo plano)")
+    def recalcular_ranking(self, request, queryset):
+        for ciclo in queryset:
+            enfileirar("ranking_professores", {"ciclo": ciclo.id}, request.user)
+        self.message_user(
+            request,
+            f"Ranking de {len(queryset)} ciclo(s) enviado para processamento.",
+            messages.SUCCESS,
+        )
+
     def save_model(self, request, obj, form, change):
         if not change:  # Novo objeto
             obj.criado_por = request.user
@@ -222,6 +251,7 @@ class AvaliacaoDocenteAdmin(admin.ModelAdmin):
         "status",
         "total_respostas",
         "percentual_participacao_display",
+        "media_geral_display",
     )
     list_filter = (
         "status",
@@ -245,6 +275,10 @@ class AvaliacaoDocenteAdmin(admin.ModelAdmin):
     )
     inlines = [RespostaAvaliacaoInline]
 
+    def get_queryset(self, request):
+        # Participação e média calculadas em SQL para toda a página
+        return super().get_queryset(request).with_participation().with_scores()
+
     def percentual_participacao_display(self, obj):
         percentual = obj.percentual_participacao()
         color = "green" if percentual >= 70 else "orange" if percentual >= 50 else "red"
@@ -262,6 +296,7 @@ class AvaliacaoDocenteAdmin(admin.ModelAdmin):
 
     media_geral_display.allow_tags = True
     media_geral_display.short_description = "Média Geral"
+    media_geral_display.admin_order_field = "media_respostas"
 
 
 @admin.register(RespostaAvaliacao)
@@ -93,6 +93,11 @@ def apply_suap_user_type(
     # Aplica a nova role
     assign_role(user, role_target)
 
+    # Invalida o cache de roles (a role do usuário pode ter mudado)
+    from .role_cache import bump_role_version
+
+    bump_role_version(user)
+
     # Gerencia perfis
     try:
         from avaliacao_docente.models import PerfilAluno, PerfilProfessor
@@ -0,0 +1,180 @@
+"""
+Busca textual nos comentários (RespostaAvaliacao.valor_texto).
+
+O índice depende do banco:
+
+    - PostgreSQL: índice GIN sobre to_tsvector('portuguese', valor_texto);
+      a busca usa a mesma expressão (SearchVector), então o planner usa o
+      índice, e a relevância vem de ts_rank (SearchRank)
+    - SQLite (desenvolvimento): tabela virtual FTS5 com conteúdo externo,
+      mantida por triggers; relevância por bm25()
+    - Outros bancos: icontains, sem ordenação por relevância
+
+O índice é criado pela migration 0015; manage.py rebuild_search_index o
+recria (no SQLite, recriações de tabela feitas por migrations descartam os
+triggers).
+
+Uso:
+    from avaliacao_docente.busca import buscar_comentarios
+
+    pagina = buscar_comentarios("didática", ciclo_id=3).page(1)
+"""
+
+import re
+
+from django.db import OperationalError, connection
+from django.db.models import F, FloatField, Value
+from django.db.models.expressions import RawSQL
+
+CONFIG_BUSCA = "portuguese"
+NOME_INDICE_GIN = "resposta_texto_busca_gin"
+TABELA_FTS = "avaliacao_docente_resposta_fts"
+
+RESULTADOS_POR_PAGINA = 20
+
+_TERMO = re.compile(r"\w+", re.UNICODE)
+
+
+def _indice_gin():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    return GinIndex(
+        SearchVector("valor_texto", config=CONFIG_BUSCA), name=NOME_INDICE_GIN
+    )
+
+
+def criar_indice(conexao, modelo):
+    """
+    Cria (ou recria) o índice de busca de RespostaAvaliacao.
+
+    Args:
+        conexao: Conexão do banco (connection ou schema_editor.connection)
+        modelo: Modelo RespostaAvaliacao (pode ser o histórico da migration)
+    """
+    remover_indice(conexao, modelo)
+    tabela = modelo._meta.db_table
+
+    if conexao.vendor == "postgresql":
+        with conexao.schema_editor() as schema_editor:
+            schema_editor.add_index(modelo, _indice_gin())
+    elif conexao.vendor == "sqlite":
+        with conexao.cursor() as cursor:
+            try:
+                cursor.execute(
+                    f"""CREATE VIRTUAL TABLE {TABELA_FTS} USING fts5(
+                        valor_texto, content='{tabela}', content_rowid='id',
+                        tokenize='unicode61 remove_diacritics 2'
+                    )"""
+                )
+            except OperationalError:
+                # SQLite compilado sem FTS5: a busca usa icontains
+                return
+            for sql in (
+                f"""CREATE TRIGGER {TABELA_FTS}_ai AFTER INSERT ON {tabela}
+                BEGIN
+                    INSERT INTO {TABELA_FTS}(rowid, valor_texto)
+                    VALUES (new.id, new.valor_texto);
+                END""",
+                f"""CREATE TRIGGER {TABELA_FTS}_ad AFTER DELETE ON {tabela}
+                BEGIN
+                    INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, valor_texto)
+                    VALUES ('delete', old.id, old.valor_texto);
+                END""",
+                f"""CREATE TRIGGER {TABELA_FTS}_au AFTER UPDATE OF valor_texto
+                ON {tabela} BEGIN
+                    INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, valor_texto)
+                    VALUES ('delete', old.id, old.valor_texto);
+                    INSERT INTO {TABELA_FTS}(rowid, valor_texto)
+                    VALUES (new.id, new.valor_texto);
+                END""",
+                f"INSERT INTO {TABELA_FTS}({TABELA_FTS}) VALUES ('rebuild')",
+            ):
+                cursor.execute(sql)
+
+
+def remover_indice(conexao, modelo):
+    """Remove o índice de busca, se existir"""
+    with conexao.cursor() as cursor:
+        if conexao.vendor == "postgresql":
+            cursor.execute(f"DROP INDEX IF EXISTS {NOME_INDICE_GIN}")
+        elif conexao.vendor == "sqlite":
+            for sufixo in ("ai", "ad", "au"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {TABELA_FTS}_{sufixo}")
+            cursor.execute(f"DROP TABLE IF EXISTS {TABELA_FTS}")
+
+
+def _consulta_fts(termo):
+    """
+    Converte o texto digitado em uma consulta FTS5 segura: cada palavra vira
+    um termo entre aspas (todas obrigatórias), sem operadores do usuário.
+    """
+    return " ".join(f'"{palavra}"' for palavra in _TERMO.findall(termo))
+
+
+def _fts_disponivel():
+    return TABELA_FTS in connection.introspection.table_names()
+
+
+def buscar_comentarios(termo, ciclo_id=None, professor_id=None):
+    """
+    Comentários que contêm o termo, dos mais aos menos relevantes.
+
+    Args:
+        termo: Texto digitado (palavras separadas por espaço)
+        ciclo_id: Restringe ao ciclo (opcional)
+        professor_id: Restringe ao professor avaliado (opcional)
+
+    Retorna:
+        QuerySet: RespostaAvaliacao anotadas com relevancia (float), pronto
+            para Paginator; vazio se o termo não tiver palavras
+    """
+    from .models import RespostaAvaliacao
+
+    comentarios = RespostaAvaliacao.objects.filter(valor_texto__gt="")
+    if ciclo_id:
+        comentarios = comentarios.filter(avaliacao__ciclo_id=ciclo_id)
+    if professor_id:
+        comentarios = comentarios.filter(avaliacao__professor_id=professor_id)
+
+    if not _TERMO.search(termo or ""):
+        return comentarios.none().annotate(relevancia=Value(0.0))
+
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.search import (
+            SearchQuery,
+            SearchRank,
+            SearchVector,
+        )
+
+        documento = SearchVector("valor_texto", config=CONFIG_BUSCA)
+        consulta = SearchQuery(termo, config=CONFIG_BUSCA, search_type="websearch")
+        comentarios = comentarios.annotate(documento=documento).filter(
+            documento=consulta
+        )
+        comentarios = comentarios.annotate(
+            relevancia=SearchRank(F("documento"), consulta)
+        )
+    elif connection.vendor == "sqlite" and _fts_disponivel():
+        tabela = RespostaAvaliacao._meta.db_table
+        consulta = _consulta_fts(termo)
+        comentarios = comentarios.filter(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {TABELA_FTS} WHERE {TABELA_FTS} MATCH %s",
+                [consulta],
+            )
+        ).annotate(
+            # bm25() é menor para os mais relevantes
+            relevancia=RawSQL(
+                f"SELECT -bm25({TABELA_FTS}) FROM {TABELA_FTS} "
+                f"WHERE {TABELA_FTS} MATCH %s AND rowid = {tabela}.id",
+                [consulta],
+                output_field=FloatField(),
+            )
+        )
+    else:
+        for palavra in _TERMO.findall(termo):
+            comentarios = comentarios.filter(valor_texto__icontains=palavra)
+        comentarios = comentarios.annotate(relevancia=Value(0.0))
+
+    return comentarios.order_by("-relevancia", "-pk")
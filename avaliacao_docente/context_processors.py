@@ -0,0 +1,62 @@
+"""
+Context processors do avaliacao_docente.
+"""
+
+from functools import cached_property
+
+from django.contrib.auth.context_processors import PermWrapper
+
+from .role_cache import get_role_flags
+
+
+class RolePermWrapper(PermWrapper):
+    """
+    PermWrapper do Django acrescido das flags de roles do usuário.
+
+    Mantém {{ perms.app_label.codename }} funcionando e adiciona
+    {{ perms.is_admin }}, {{ perms.can_manage }}, {{ perms.role_name }}, etc.
+    As flags são resolvidas uma única vez por requisição, e apenas se
+    algum template as utilizar.
+    """
+
+    FLAG_NAMES = frozenset(
+        (
+            "is_admin",
+            "is_coordenador",
+            "is_professor",
+            "is_aluno",
+            "is_servidor",
+            "can_manage",
+            "role",
+            "role_name",
+            "role_class",
+        )
+    )
+
+    @cached_property
+    def flags(self):
+        return get_role_flags(self.user)
+
+    def __getitem__(self, name):
+        # Templates resolvem perms.x via perms["x"] antes de getattr()
+        if name in self.FLAG_NAMES:
+            return getattr(self.flags, name)
+        return super().__getitem__(name)
+
+    def __getattr__(self, name):
+        if name in self.FLAG_NAMES:
+            return getattr(self.flags, name)
+        raise AttributeError(name)
+
+
+def role_flags(request):
+    """
+    Disponibiliza `perms` com as flags de roles do usuário logado.
+
+    Deve vir depois de django.contrib.auth.context_processors.auth, cujo
+    `perms` é substituído (e estendido) por este.
+    """
+    user = getattr(request, "user", None)
+    if user is None:
+        return {}
+    return {"perms": RolePermWrapper(user)}
@@ -0,0 +1,204 @@
+"""
+Estatísticas de perguntas de escala (Likert e NPS) a partir de histogramas.
+
+Cada pergunta é representada por um vetor de contagens de tamanho fixo:
+
+    - likert: 5 posições (valores 1..5)
+    - nps: 11 posições (valores 0..10)
+
+calcular_estatisticas() processa milhares de vetores de uma vez, sem
+consultar o banco; estatisticas_por_pergunta() monta os vetores a partir
+de HistogramaResposta com uma única query.
+
+Uso:
+    from avaliacao_docente.estatisticas import estatisticas_por_pergunta
+
+    stats = estatisticas_por_pergunta(avaliacoes)
+    stats[(avaliacao.id, pergunta.id)].mediana
+"""
+
+import math
+from collections import defaultdict
+
+ESCALAS = {
+    "likert": tuple(range(1, 6)),
+    "nps": tuple(range(0, 11)),
+}
+
+PERCENTIS_PADRAO = (25, 50, 75, 90)
+
+
+class EstatisticasEscala:
+    """
+    Estatísticas de uma pergunta de escala, calculadas de um vetor de contagens.
+
+    Atributos:
+        tipo: "likert" ou "nps"
+        contagens: vetor de contagens (uma posição por valor da escala)
+        total: número de respostas
+        soma: soma dos valores respondidos
+        media, mediana, desvio_padrao, moda: None se total = 0
+        percentis: {p: valor} pelo método nearest-rank
+        top2box: % de respostas nos dois valores mais altos da escala
+        nps: % promotores (9-10) - % detratores (0-6); apenas para NPS
+    """
+
+    __slots__ = (
+        "tipo",
+        "contagens",
+        "total",
+        "soma",
+        "media",
+        "mediana",
+        "desvio_padrao",
+        "moda",
+        "percentis",
+        "top2box",
+        "nps",
+    )
+
+    def as_dict(self):
+        """Representação serializável (JSON)"""
+        dados = {nome: getattr(self, nome) for nome in self.__slots__}
+        dados["contagens"] = list(self.contagens)
+        dados["percentis"] = {str(p): v for p, v in self.percentis.items()}
+        return dados
+
+
+def vetor_contagens(tipo, contagens):
+    """
+    Converte o mapa {valor: quantidade} de um histograma no vetor da escala.
+
+    Valores fora da escala são ignorados.
+    """
+    return [int(contagens.get(str(valor), 0)) for valor in ESCALAS[tipo]]
+
+
+def _percentil(acumulado, valores, total, p):
+    """Menor valor cuja frequência acumulada atinge p% (nearest-rank)"""
+    posicao = max(1, math.ceil(p / 100 * total))
+    for valor, soma in zip(valores, acumulado):
+        if soma >= posicao:
+            return valor
+    return valores[-1]
+
+
+def calcular_estatisticas(tipo, vetores, percentis=PERCENTIS_PADRAO):
+    """
+    Calcula as estatísticas de vários vetores de contagens da mesma escala.
+
+    Args:
+        tipo: "likert" ou "nps"
+        vetores: Iterável de vetores de contagens (ver vetor_contagens)
+        percentis: Percentis a calcular
+
+    Retorna:
+        list[EstatisticasEscala]: Na mesma ordem dos vetores
+    """
+    valores = ESCALAS[tipo]
+    quadrados = [valor * valor for valor in valores]
+    tamanho = len(valores)
+    resultados = []
+
+    for vetor in vetores:
+        vetor = list(vetor)
+        if len(vetor) != tamanho:
+            raise ValueError(
+                f"Vetor de {tipo} deve ter {tamanho} posições (recebido {len(vetor)})"
+            )
+
+        stats = EstatisticasEscala()
+        stats.tipo = tipo
+        stats.contagens = vetor
+        stats.total = total = sum(vetor)
+        stats.soma = soma = sum(c * v for c, v in zip(vetor, valores))
+        stats.nps = None
+
+        if not total:
+            stats.media = stats.mediana = stats.desvio_padrao = stats.moda = None
+            stats.percentis = {p: None for p in percentis}
+            stats.top2box = 0.0
+            resultados.append(stats)
+            continue
+
+        soma_quadrados = sum(c * q for c, q in zip(vetor, quadrados))
+        media = soma / total
+        variancia = max(soma_quadrados / total - media * media, 0.0)
+
+        acumulado = []
+        corrente = 0
+        for contagem in vetor:
+            corrente += contagem
+            acumulado.append(corrente)
+
+        # Mediana: média dos dois elementos centrais quando total é par
+        meio = _percentil(acumulado, valores, total, 50)
+        if total % 2 == 0:
+            posicao = total // 2 + 1
+            seguinte = next(
+                v for v, s in zip(valores, acumulado) if s >= posicao
+            )
+            mediana = (meio + seguinte) / 2
+        else:
+            mediana = meio
+
+        stats.media = round(media, 2)
+        stats.mediana = mediana
+        stats.desvio_padrao = round(math.sqrt(variancia), 2)
+        stats.moda = valores[vetor.index(max(vetor))]
+        stats.percentis = {
+            p: _percentil(acumulado, valores, total, p) for p in percentis
+        }
+        stats.top2box = round(sum(vetor[-2:]) / total * 100, 2)
+        if tipo == "nps":
+            promotores = sum(vetor[9:])
+            detratores = sum(vetor[:7])
+            stats.nps = round((promotores - detratores) / total * 100, 2)
+
+        resultados.append(stats)
+
+    return resultados
+
+
+def estatisticas_por_pergunta(avaliacoes, agrupar_por_avaliacao=True):
+    """
+    Estatísticas de todas as perguntas de escala das avaliações informadas.
+
+    Lê HistogramaResposta em uma única query e soma os vetores por chave.
+
+    Args:
+        avaliacoes: Queryset (ou lista de ids) de AvaliacaoDocente
+        agrupar_por_avaliacao: Se True, as chaves são
+            (avaliacao_id, pergunta_id); se False, pergunta_id (somando
+            todas as avaliações)
+
+    Retorna:
+        dict: chave -> EstatisticasEscala
+    """
+    from .models import HistogramaResposta
+
+    linhas = HistogramaResposta.objects.filter(
+        avaliacao__in=avaliacoes, pergunta__tipo__in=tuple(ESCALAS)
+    ).values_list("avaliacao_id", "pergunta_id", "pergunta__tipo", "contagens")
+
+    vetores = {}
+    tipos = {}
+    for avaliacao_id, pergunta_id, tipo, contagens in linhas:
+        chave = (avaliacao_id, pergunta_id) if agrupar_por_avaliacao else pergunta_id
+        vetor = vetor_contagens(tipo, contagens)
+        if chave in vetores:
+            vetores[chave] = [a + b for a, b in zip(vetores[chave], vetor)]
+        else:
+            vetores[chave] = vetor
+            tipos[chave] = tipo
+
+    # Processa cada escala em lote
+    por_tipo = defaultdict(list)
+    for chave, tipo in tipos.items():
+        por_tipo[tipo].append(chave)
+
+    resultado = {}
+    for tipo, chaves in por_tipo.items():
+        stats = calcular_estatisticas(tipo, (vetores[chave] for chave in chaves))
+        resultado.update(zip(chaves, stats))
+    return resultado
@@ -0,0 +1,261 @@
+"""
+Exportações em streaming (CSV e JSON Lines) a partir de querysets anotados.
+
+Uma exportação é declarada como um queryset (com as contagens e campos
+relacionados já anotados em SQL) mais uma lista de colunas. As linhas são
+lidas com values().iterator(chunk_size), sem queries por linha, e enviadas
+ao cliente à medida que são geradas.
+
+feed_respostas() usa o mesmo mecanismo para entregar, em JSON Lines, uma
+linha por pergunta respondida nos envios gravados após um cursor opaco
+(leitura incremental para BI).
+
+Uso:
+    exportacao = Exportacao(
+        "cursos",
+        Curso.objects.annotate(total=Count("disciplinas")),
+        [
+            Coluna("ID", "id"),
+            Coluna("Nome", "curso_nome"),
+            Coluna("Total", "total"),
+        ],
+    )
+    return exportacao.resposta(request.GET.get("formato", "csv"))
+"""
+
+import binascii
+import csv
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+from django.utils.text import slugify
+
+FORMATOS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "jsonl": ("application/x-ndjson; charset=utf-8", "jsonl"),
+}
+
+TAMANHO_LOTE = 2000
+
+
+class _Eco:
+    """Pseudo-buffer para csv.writer: devolve a linha em vez de guardá-la"""
+
+    def write(self, valor):
+        return valor
+
+
+class Coluna:
+    """
+    Coluna de uma exportação.
+
+    Args:
+        titulo: Cabeçalho no CSV
+        *campos: Campos (ou anotações) do queryset lidos pela coluna
+        formatar: Função que recebe os valores dos campos, na ordem, e
+            retorna o valor exportado. Sem formatar, exporta o primeiro
+            campo como está. Sem campos, formatar() é chamada sem
+            argumentos (colunas constantes).
+        chave: Nome no JSON Lines (padrão: título em snake_case)
+    """
+
+    __slots__ = ("titulo", "campos", "formatar", "chave")
+
+    def __init__(self, titulo, *campos, formatar=None, chave=None):
+        if not campos and formatar is None:
+            raise ValueError(f"Coluna '{titulo}' sem campos nem formatar")
+        self.titulo = titulo
+        self.campos = campos
+        self.formatar = formatar
+        self.chave = chave or slugify(titulo).replace("-", "_")
+
+    def valor(self, registro):
+        valores = [registro[campo] for campo in self.campos]
+        if self.formatar is None:
+            return valores[0]
+        return self.formatar(*valores)
+
+
+class Exportacao:
+    """
+    Exportação declarativa: queryset anotado + colunas.
+
+    Args:
+        nome: Prefixo do nome do arquivo
+        queryset: Queryset já filtrado, anotado e ordenado
+        colunas: Lista de Coluna
+        tamanho_lote: chunk_size de iterator() (cursor no servidor no
+            PostgreSQL)
+    """
+
+    def __init__(self, nome, queryset, colunas, tamanho_lote=TAMANHO_LOTE):
+        self.nome = nome
+        self.queryset = queryset
+        self.colunas = colunas
+        self.tamanho_lote = tamanho_lote
+
+    def campos(self):
+        """Campos lidos do banco, sem repetição e na ordem das colunas"""
+        return list(dict.fromkeys(c for coluna in self.colunas for c in coluna.campos))
+
+    def linhas(self):
+        """Valores de cada registro, na ordem das colunas (uma única query)"""
+        registros = self.queryset.values(*self.campos()).iterator(
+            chunk_size=self.tamanho_lote
+        )
+        for registro in registros:
+            yield [coluna.valor(registro) for coluna in self.colunas]
+
+    def csv(self):
+        """Texto CSV, linha a linha (com BOM para o Excel)"""
+        writer = csv.writer(_Eco())
+        yield "\ufeff"
+        yield writer.writerow([coluna.titulo for coluna in self.colunas])
+        for linha in self.linhas():
+            yield writer.writerow(linha)
+
+    def jsonl(self):
+        """Um objeto JSON por linha, com as chaves das colunas"""
+        chaves = [coluna.chave for coluna in self.colunas]
+        for linha in self.linhas():
+            registro = dict(zip(chaves, linha))
+            yield json.dumps(registro, cls=DjangoJSONEncoder, ensure_ascii=False)
+            yield "\n"
+
+    def resposta(self, formato="csv"):
+        """
+        StreamingHttpResponse no formato pedido ("csv" ou "jsonl").
+
+        Raises:
+            ValueError: Se o formato não for suportado
+        """
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de exportação inválido: {formato}")
+
+        content_type, extensao = FORMATOS[formato]
+        nome_arquivo = (
+            f"{self.nome}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extensao}"
+        )
+        conteudo = self.csv() if formato == "csv" else self.jsonl()
+        response = StreamingHttpResponse(conteudo, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{nome_arquivo}"'
+        return response
+
+
+def contagem(queryset, campo):
+    """
+    Subquery com a contagem de queryset correlacionada por campo.
+
+    Evita o produto cartesiano de vários Count() sobre relações diferentes
+    no mesmo queryset.
+
+    Uso:
+        PeriodoLetivo.objects.annotate(
+            total=contagem(AvaliacaoDocente.objects.all(), "ciclo__periodo_letivo")
+        )
+    """
+    subquery = (
+        queryset.filter(**{campo: OuterRef("pk")})
+        .order_by()
+        .values(campo)
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(subquery, output_field=IntegerField()), Value(0))
+
+
+# ============ FEED INCREMENTAL DE RESPOSTAS ============
+
+# Envios por lote (cada envio rende uma linha por pergunta respondida)
+LIMITE_FEED = 500
+
+COLUNAS_FEED = [
+    Coluna("Submissão", "submissao_id", chave="submissao_id"),
+    Coluna("Avaliação", "avaliacao_id", chave="avaliacao_id"),
+    Coluna("Ciclo", "avaliacao__ciclo_id", chave="ciclo_id"),
+    Coluna("Turma", "avaliacao__turma_id", chave="turma_id"),
+    Coluna("Disciplina", "avaliacao__disciplina_id", chave="disciplina_id"),
+    Coluna("Professor", "avaliacao__professor_id", chave="professor_id"),
+    Coluna("Pergunta", "pergunta_id", chave="pergunta_id"),
+    Coluna("Tipo", "pergunta__tipo", chave="pergunta_tipo"),
+    Coluna("Valor Numérico", "valor_numerico", chave="valor_numerico"),
+    Coluna("Valor Booleano", "valor_boolean", chave="valor_boolean"),
+    Coluna("Valor Texto", "valor_texto", chave="valor_texto"),
+    Coluna("Anônima", "anonima", chave="anonima"),
+    Coluna("Data", "data_resposta", chave="data_resposta"),
+]
+
+
+def codificar_cursor_feed(ultimo_id):
+    """Cursor opaco apontando para depois da submissão ultimo_id"""
+    return urlsafe_b64encode(f"submissoes|{ultimo_id}".encode("ascii")).decode(
+        "ascii"
+    )
+
+
+def decodificar_cursor_feed(cursor):
+    """
+    Retorna o id da última submissão já entregue pelo cursor.
+
+    Raises:
+        ValueError: Se o cursor for inválido
+    """
+    try:
+        texto = urlsafe_b64decode(cursor.encode("ascii")).decode("ascii")
+        prefixo, ultimo_id = texto.split("|")
+        ultimo_id = int(ultimo_id)
+    except (ValueError, UnicodeError, binascii.Error) as erro:
+        raise ValueError("Cursor inválido") from erro
+    if prefixo != "submissoes" or ultimo_id < 0:
+        raise ValueError("Cursor inválido")
+    return ultimo_id
+
+
+def feed_respostas(apos=None, limite=LIMITE_FEED):
+    """
+    Próximo lote do feed de respostas, em ordem de submissão, após o cursor.
+
+    O lote é formado por envios inteiros (SubmissaoAvaliacao), entregues
+    como uma linha por pergunta respondida (RespostaUnificada). O limite
+    superior do lote é fixado antes da leitura (uma query pelo índice da
+    chave primária de SubmissaoAvaliacao), de modo que o cursor seguinte é
+    conhecido antes de as linhas serem transmitidas.
+
+    Observação: ids são atribuídos no INSERT, não no COMMIT; uma
+    transação longa pode gravar um id menor que o de um envio já
+    entregue. Como os envios são gravados em transações curtas, isso
+    só é relevante para leituras concorrentes com o envio.
+
+    Args:
+        apos: Cursor devolvido pela chamada anterior (None = desde o início)
+        limite: Número máximo de envios no lote
+
+    Retorna:
+        tuple: (Exportacao, cursor seguinte)
+
+    Raises:
+        ValueError: Se o cursor for inválido
+    """
+    from .models import RespostaUnificada, SubmissaoAvaliacao
+
+    ultimo_id = decodificar_cursor_feed(apos) if apos else 0
+    envios = SubmissaoAvaliacao.objects.filter(pk__gt=ultimo_id).order_by("pk")
+    respostas = RespostaUnificada.objects.filter(submissao_id__gt=ultimo_id).order_by(
+        "submissao_id", "id"
+    )
+
+    ids = envios.values_list("pk", flat=True)
+    fim = ids[limite - 1 : limite].first() or envios.aggregate(fim=Max("pk"))["fim"]
+    if fim is None:
+        respostas = respostas.none()
+        fim = ultimo_id
+    else:
+        respostas = respostas.filter(submissao_id__lte=fim)
+
+    exportacao = Exportacao("respostas", respostas, COLUNAS_FEED)
+    return exportacao, codificar_cursor_feed(fim)
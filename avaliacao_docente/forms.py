@@ -17,7 +17,10 @@ from .models import (
     QuestionarioPergunta,
     CicloAvaliacao,
     RespostaAvaliacao,
+    SubmissaoAvaliacao,
 )
+from .questionarios import esquema_questionario
+from .submissoes import gravar_submissao
 
 
 class DateTimeLocalInput(forms.DateTimeInput):
@@ -762,102 +765,56 @@ class RespostaAvaliacaoForm(forms.Form):
         super().__init__(*args, **kwargs)
         self.avaliacao = avaliacao
 
-        # Busca as perguntas do questionário do ciclo
-        perguntas = avaliacao.ciclo.questionario.perguntas.select_related(
-            "pergunta", "pergunta__categoria"
-        ).order_by("ordem_no_questionario")
-
-        for questionario_pergunta in perguntas:
-            pergunta = questionario_pergunta.pergunta
-            field_name = f"pergunta_{pergunta.id}"
-
-            if pergunta.tipo == "likert":
-                self.fields[field_name] = forms.ChoiceField(
-                    label=pergunta.enunciado,
-                    choices=[
-                        (1, "1 - Discordo totalmente"),
-                        (2, "2 - Discordo parcialmente"),
-                        (3, "3 - Neutro"),
-                        (4, "4 - Concordo parcialmente"),
-                        (5, "5 - Concordo totalmente"),
-                    ],
-                    widget=forms.RadioSelect(attrs={"class": "form-check-input"}),
-                    required=pergunta.obrigatoria,
-                )
-
-            elif pergunta.tipo == "nps":
-                self.fields[field_name] = forms.ChoiceField(
-                    label=pergunta.enunciado,
-                    choices=[(i, str(i)) for i in range(11)],
-                    widget=forms.RadioSelect(attrs={"class": "form-check-input"}),
-                    required=pergunta.obrigatoria,
-                )
-
-            elif pergunta.tipo == "sim_nao":
-                self.fields[field_name] = forms.ChoiceField(
-                    label=pergunta.enunciado,
-                    choices=[("true", "Sim"), ("false", "Não")],
-                    widget=forms.RadioSelect(attrs={"class": "form-check-input"}),
-                    required=pergunta.obrigatoria,
-                )
-
-            elif pergunta.tipo == "multipla_escolha":
-                if pergunta.opcoes_multipla_escolha:
-                    choices = [
-                        (opcao, opcao) for opcao in pergunta.opcoes_multipla_escolha
-                    ]
-                    self.fields[field_name] = forms.ChoiceField(
-                        label=pergunta.enunciado,
-                        choices=choices,
-                        widget=forms.RadioSelect(attrs={"class": "form-check-input"}),
-                        required=pergunta.obrigatoria,
-                    )
-
-            else:  # texto_livre
-                self.fields[field_name] = forms.CharField(
-                    label=pergunta.enunciado,
-                    widget=forms.Textarea(attrs={"class": "form-control", "rows": 3}),
-                    required=pergunta.obrigatoria,
-                )
+        # Campos compilados do questionário do ciclo (sem consultar perguntas)
+        self.esquema = esquema_questionario(avaliacao.ciclo.questionario)
+        self.fields.update(self.esquema.campos_formulario())
 
-    def save(self, aluno=None, session_key=None, anonima=False):
+    def save(self, aluno=None, session_key=None, anonima=False, token=None):
         """
-        Salva as respostas da avaliação
+        Salva o envio com gravar_submissao(): respostas fechadas compactadas
+        em SubmissaoAvaliacao, texto livre em RespostaAvaliacao e histogramas
+        atualizados na mesma transação.
+
+        Se o aluno já tiver enviado, levanta IntegrityError e nada é gravado;
+        também nos envios anônimos, que guardam só a chave do aluno.
         """
-        respostas_salvas = []
+        respostas = []
 
         for field_name, valor in self.cleaned_data.items():
-            if field_name.startswith("pergunta_"):
-                pergunta_id = int(field_name.split("_")[1])
-                pergunta = PerguntaAvaliacao.objects.get(id=pergunta_id)
-
-                # Cria a resposta
-                resposta = RespostaAvaliacao(
-                    avaliacao=self.avaliacao,
-                    pergunta=pergunta,
-                    anonima=anonima,
-                    session_key=session_key or "",
-                )
+            if not field_name.startswith("pergunta_") or valor in ("", None):
+                continue
+            pergunta = self.esquema.por_campo[field_name].modelo()
 
-                # Define o aluno se não for anônima
-                if not anonima and aluno:
-                    resposta.aluno = aluno
+            resposta = RespostaAvaliacao(
+                avaliacao=self.avaliacao,
+                pergunta=pergunta,
+                anonima=anonima,
+                session_key=session_key or "",
+            )
 
-                # Define o valor baseado no tipo da pergunta
-                if pergunta.tipo in ["likert", "nps", "multipla_escolha"]:
-                    if pergunta.tipo == "multipla_escolha":
-                        resposta.valor_texto = valor
-                    else:
-                        resposta.valor_numerico = int(valor)
-                elif pergunta.tipo == "sim_nao":
-                    resposta.valor_boolean = valor == "true"
-                else:  # texto_livre
-                    resposta.valor_texto = valor
+            # Define o aluno se não for anônima
+            if not anonima and aluno:
+                resposta.aluno = aluno
+
+            # Define o valor baseado no tipo da pergunta
+            if pergunta.tipo in ["likert", "nps"]:
+                resposta.valor_numerico = int(valor)
+            elif pergunta.tipo == "sim_nao":
+                resposta.valor_boolean = valor == "true"
+            else:  # texto_livre e multipla_escolha
+                resposta.valor_texto = valor
+
+            respostas.append(resposta)
 
-                resposta.save()
-                respostas_salvas.append(resposta)
+        submissao = SubmissaoAvaliacao(
+            avaliacao=self.avaliacao, aluno=None if anonima else aluno, anonima=anonima
+        )
+        submissao.preencher_chave_aluno(aluno)
+        if token:
+            submissao.token = token
+        gravar_submissao(submissao, respostas)
 
-        return respostas_salvas
+        return respostas
 
         return comentario
 
@@ -0,0 +1,205 @@
+"""
+Manutenção dos histogramas de respostas (HistogramaResposta).
+
+Cada par (avaliação, pergunta) tem uma linha com o total de respostas, a
+soma dos valores numéricos e a contagem por valor. Relatórios leem essas
+linhas (O(perguntas)) em vez de varrer todas as RespostaAvaliacao.
+
+Uso:
+    from avaliacao_docente.histogramas import registrar_respostas
+
+    with transaction.atomic():
+        respostas = [RespostaAvaliacao.objects.create(...), ...]
+        registrar_respostas(respostas)
+
+As respostas e o histograma devem ser gravados na mesma transação.
+registrar_respostas() bloqueia as linhas afetadas (select_for_update),
+então envios simultâneos para a mesma avaliação não perdem incrementos.
+"""
+
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+
+TIPOS_NUMERICOS = ("likert", "nps")
+
+
+def chave_resposta(tipo, valor_numerico=None, valor_boolean=None, valor_texto=""):
+    """
+    Retorna a chave do histograma para um valor de resposta.
+
+    Retorna None quando a resposta não tem valor (não é contabilizada) e ""
+    para texto livre (contabilizado apenas no total).
+    """
+    if tipo in TIPOS_NUMERICOS:
+        return None if valor_numerico is None else str(valor_numerico)
+    if tipo == "sim_nao":
+        if valor_boolean is None:
+            return None
+        return "Sim" if valor_boolean else "Não"
+    if not valor_texto:
+        return None
+    return valor_texto if tipo == "multipla_escolha" else ""
+
+
+class _Acumulador:
+    """Incrementos pendentes de um par (avaliação, pergunta)"""
+
+    __slots__ = ("total", "soma", "contagens")
+
+    def __init__(self):
+        self.total = 0
+        self.soma = 0
+        self.contagens = Counter()
+
+    def adicionar(self, chave, quantidade=1, valor_numerico=None):
+        self.total += quantidade
+        if valor_numerico is not None:
+            self.soma += valor_numerico * quantidade
+        if chave:
+            self.contagens[chave] += quantidade
+
+
+def registrar_respostas(respostas):
+    """
+    Incrementa os histogramas com as respostas recém-gravadas.
+
+    Args:
+        respostas: RespostaAvaliacao do envio, com a pergunta carregada
+            (inclusive as compactadas na submissão, que não são salvas)
+
+    Custo fixo em queries, independentemente do número de perguntas.
+    """
+    deltas = defaultdict(_Acumulador)
+    for resposta in respostas:
+        chave = chave_resposta(
+            resposta.pergunta.tipo,
+            resposta.valor_numerico,
+            resposta.valor_boolean,
+            resposta.valor_texto,
+        )
+        if chave is None:
+            continue
+        deltas[(resposta.avaliacao_id, resposta.pergunta_id)].adicionar(
+            chave, valor_numerico=resposta.valor_numerico
+        )
+
+    if deltas:
+        _aplicar(deltas)
+
+
+def _aplicar(deltas):
+    """Aplica os incrementos com as linhas bloqueadas"""
+    from .models import HistogramaResposta
+
+    avaliacao_ids = {avaliacao_id for avaliacao_id, _ in deltas}
+    pergunta_ids = {pergunta_id for _, pergunta_id in deltas}
+
+    with transaction.atomic():
+        # Garante que as linhas existam antes de bloqueá-las
+        HistogramaResposta.objects.bulk_create(
+            [
+                HistogramaResposta(avaliacao_id=avaliacao_id, pergunta_id=pergunta_id)
+                for avaliacao_id, pergunta_id in deltas
+            ],
+            ignore_conflicts=True,
+        )
+        histogramas = HistogramaResposta.objects.select_for_update().filter(
+            avaliacao_id__in=avaliacao_ids, pergunta_id__in=pergunta_ids
+        )
+
+        alterados = []
+        for histograma in histogramas:
+            delta = deltas.get((histograma.avaliacao_id, histograma.pergunta_id))
+            if delta is None:
+                continue
+            contagens = Counter(histograma.contagens)
+            contagens.update(delta.contagens)
+            histograma.contagens = dict(contagens)
+            histograma.total += delta.total
+            histograma.soma += delta.soma
+            alterados.append(histograma)
+
+        HistogramaResposta.objects.bulk_update(
+            alterados, ["total", "soma", "contagens"]
+        )
+
+
+def reconstruir_histogramas(avaliacoes=None):
+    """
+    Recalcula os histogramas do zero a partir das respostas por pergunta
+    (RespostaUnificada: linhas e respostas compactadas).
+
+    Args:
+        avaliacoes: Queryset/lista de ids de avaliações (None = todas)
+
+    Retorna:
+        int: Número de histogramas gravados
+    """
+    from .models import HistogramaResposta, RespostaUnificada
+
+    respostas = RespostaUnificada.objects.all()
+    histogramas = HistogramaResposta.objects.all()
+    if avaliacoes is not None:
+        respostas = respostas.filter(avaliacao__in=avaliacoes)
+        histogramas = histogramas.filter(avaliacao__in=avaliacoes)
+
+    deltas = defaultdict(_Acumulador)
+
+    # Perguntas com valores enumeráveis: uma linha por valor distinto
+    valores = (
+        respostas.exclude(pergunta__tipo="texto_livre")
+        .values(
+            "avaliacao_id",
+            "pergunta_id",
+            "pergunta__tipo",
+            "valor_numerico",
+            "valor_boolean",
+            "valor_texto",
+        )
+        .annotate(quantidade=Count("id"))
+        .order_by()
+    )
+    for linha in valores:
+        chave = chave_resposta(
+            linha["pergunta__tipo"],
+            linha["valor_numerico"],
+            linha["valor_boolean"],
+            linha["valor_texto"],
+        )
+        if chave is None:
+            continue
+        deltas[(linha["avaliacao_id"], linha["pergunta_id"])].adicionar(
+            chave, linha["quantidade"], linha["valor_numerico"]
+        )
+
+    # Texto livre: apenas o total de respostas preenchidas
+    textos = (
+        respostas.filter(pergunta__tipo="texto_livre")
+        .exclude(valor_texto="")
+        .values("avaliacao_id", "pergunta_id")
+        .annotate(quantidade=Count("id"))
+        .order_by()
+    )
+    for linha in textos:
+        deltas[(linha["avaliacao_id"], linha["pergunta_id"])].adicionar(
+            "", linha["quantidade"]
+        )
+
+    with transaction.atomic():
+        histogramas.delete()
+        HistogramaResposta.objects.bulk_create(
+            [
+                HistogramaResposta(
+                    avaliacao_id=avaliacao_id,
+                    pergunta_id=pergunta_id,
+                    total=delta.total,
+                    soma=delta.soma,
+                    contagens=dict(delta.contagens),
+                )
+                for (avaliacao_id, pergunta_id), delta in deltas.items()
+            ],
+            batch_size=500,
+        )
+    return len(deltas)
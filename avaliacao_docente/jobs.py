@@ -0,0 +1,265 @@
+"""
+Jobs em segundo plano com a fila no próprio banco (sem broker externo).
+
+Fluxo:
+    1. A view chama enfileirar() e devolve a URL de acompanhamento
+    2. O worker (manage.py run_jobs) reserva jobs pendentes com
+       select_for_update(skip_locked=True): vários workers podem rodar ao
+       mesmo tempo sem pegar o mesmo job
+    3. A função do tipo do job (TAREFAS) gera o arquivo, gravado em partes
+       (ParteResultadoJob) à medida que é produzido
+    4. O navegador consulta o status até o job terminar e baixa o arquivo,
+       transmitido parte a parte
+
+Uso:
+    from avaliacao_docente.jobs import enfileirar
+
+    job = enfileirar("relatorio_avaliacoes_csv", {"ciclo": 3}, request.user)
+
+Para um novo tipo de job, registre em TAREFAS uma função que recebe o Job e
+retorna (partes, nome_arquivo, content_type), ou None se o job não gera
+arquivo. partes é um iterável de bytes, consumido e gravado aos poucos (ver
+em_partes()); atualizar_progresso() informa o andamento.
+
+Cada progresso e cada parte gravada renovam iniciado_em: só um worker que
+parou de dar sinal por PRAZO_EXECUCAO perde o job para outro. A reserva é
+identificada pelo número da tentativa; o worker que a perdeu abandona o job
+sem tocar nas partes nem no status gravados pelo novo dono.
+"""
+
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# tipo -> função que executa o job (caminho para import_string)
+TAREFAS = {
+    "relatorio_avaliacoes_csv": "avaliacao_docente.relatorios.csv_relatorio",
+    "ranking_professores": "avaliacao_docente.ranking.ranking_job",
+}
+
+# Jobs "executando" há mais tempo que isso são considerados abandonados
+# (worker interrompido) e voltam para a fila
+PRAZO_EXECUCAO = timedelta(minutes=30)
+MAX_TENTATIVAS = 3
+
+# Tamanho aproximado de cada ParteResultadoJob
+TAMANHO_PARTE = 512 * 1024
+
+
+class ReservaPerdida(Exception):
+    """O job foi reservado de novo por outro worker (tentativa mais nova)"""
+
+
+def enfileirar(tipo, parametros=None, usuario=None):
+    """
+    Cria um job pendente.
+
+    Raises:
+        ValueError: Se o tipo não estiver em TAREFAS
+    """
+    from .models import Job
+
+    if tipo not in TAREFAS:
+        raise ValueError(f"Tipo de job desconhecido: {tipo}")
+    return Job.objects.create(
+        tipo=tipo, parametros=parametros or {}, criado_por=usuario
+    )
+
+
+def reservar_job():
+    """
+    Reserva o próximo job pendente (ou abandonado) para este worker.
+
+    Retorna:
+        Job | None: Job já marcado como "executando"
+    """
+    from .models import Job
+
+    while True:
+        agora = timezone.now()
+        with transaction.atomic():
+            job = (
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(
+                    Q(status="pendente")
+                    | Q(status="executando", iniciado_em__lt=agora - PRAZO_EXECUCAO)
+                )
+                .order_by("criado_em", "pk")
+                .first()
+            )
+            if job is None:
+                return None
+
+            if job.tentativas >= MAX_TENTATIVAS:
+                job.status = "falhou"
+                job.erro = "Tempo de execução esgotado"
+                job.concluido_em = agora
+                job.save(update_fields=["status", "erro", "concluido_em"])
+                continue
+
+            job.status = "executando"
+            job.progresso = 0
+            job.tentativas += 1
+            job.iniciado_em = agora
+            job.save(update_fields=["status", "progresso", "tentativas", "iniciado_em"])
+            return job
+
+
+def _da_reserva(job):
+    """Queryset do job enquanto ainda reservado para esta tentativa"""
+    from .models import Job
+
+    return Job.objects.filter(
+        pk=job.pk, status="executando", tentativas=job.tentativas
+    )
+
+
+def _renovar_reserva(job, **campos):
+    """
+    Renova iniciado_em (sinal de vida) e grava os campos informados.
+
+    Raises:
+        ReservaPerdida: Se outro worker já reservou o job
+    """
+    job.iniciado_em = timezone.now()
+    if not _da_reserva(job).update(iniciado_em=job.iniciado_em, **campos):
+        raise ReservaPerdida(f"Job {job.pk} reservado por outro worker")
+
+
+def atualizar_progresso(job, progresso):
+    """
+    Grava o progresso (0 a 100) sem tocar nos demais campos.
+
+    Raises:
+        ReservaPerdida: Se outro worker já reservou o job
+    """
+    job.progresso = max(0, min(int(progresso), 100))
+    _renovar_reserva(job, progresso=job.progresso)
+
+
+def em_partes(textos, tamanho=None):
+    """
+    Agrupa os textos (ex.: linhas de um CSV) em partes UTF-8 de
+    aproximadamente `tamanho` bytes (padrão: TAMANHO_PARTE).
+    """
+    tamanho = tamanho or TAMANHO_PARTE
+    buffer = []
+    acumulado = 0
+    for texto in textos:
+        buffer.append(texto)
+        acumulado += len(texto)
+        if acumulado >= tamanho:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+            acumulado = 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def _gravar_partes(job, partes):
+    """
+    Grava as partes do arquivo uma a uma, sem acumulá-las em memória.
+
+    Cada parte é gravada com a linha do job travada pela renovação da
+    reserva: um worker que reserve o job no meio do caminho não a vê.
+    """
+    from .models import ParteResultadoJob
+
+    for ordem, conteudo in enumerate(partes):
+        with transaction.atomic():
+            _renovar_reserva(job)
+            ParteResultadoJob.objects.create(job=job, ordem=ordem, conteudo=conteudo)
+
+
+def executar_job(job):
+    """
+    Executa um job reservado e grava o resultado ou o erro.
+
+    Se outro worker reservar o job durante a execução (ver PRAZO_EXECUCAO),
+    esta execução é abandonada sem alterar o job.
+    """
+    # Partes de uma tentativa anterior interrompida
+    job.partes.all().delete()
+    try:
+        funcao = import_string(TAREFAS[job.tipo])
+        arquivo = funcao(job)
+        if arquivo is not None:
+            partes, job.nome_arquivo, job.content_type = arquivo
+            _gravar_partes(job, partes)
+    except ReservaPerdida:
+        logger.warning("Job %s (%s) reservado por outro worker", job.pk, job.tipo)
+        return job
+    except Exception:
+        logger.exception("Job %s (%s) falhou", job.pk, job.tipo)
+        job.status = "falhou"
+        job.erro = traceback.format_exc()
+    else:
+        job.status = "concluido"
+        job.progresso = 100
+        job.erro = ""
+    job.concluido_em = timezone.now()
+
+    with transaction.atomic():
+        finalizado = _da_reserva(job).update(
+            status=job.status,
+            progresso=job.progresso,
+            erro=job.erro,
+            nome_arquivo=job.nome_arquivo,
+            content_type=job.content_type,
+            concluido_em=job.concluido_em,
+        )
+        if not finalizado:
+            logger.warning("Job %s (%s) reservado por outro worker", job.pk, job.tipo)
+        elif job.status == "falhou":
+            job.partes.all().delete()
+    return job
+
+
+def executar_pendentes(limite=None):
+    """
+    Executa jobs até a fila esvaziar (ou até limite jobs).
+
+    Retorna:
+        int: Número de jobs executados
+    """
+    executados = 0
+    while limite is None or executados < limite:
+        job = reservar_job()
+        if job is None:
+            break
+        executar_job(job)
+        executados += 1
+    return executados
+
+
+def partes_do_resultado(job):
+    """
+    Conteúdo do arquivo de um job, parte a parte (uma query por parte, para
+    que a transmissão do download não carregue o arquivo inteiro).
+    """
+    from .models import ParteResultadoJob
+
+    ids = list(job.partes.order_by("ordem").values_list("pk", flat=True))
+    for pk in ids:
+        conteudo = ParteResultadoJob.objects.values_list("conteudo", flat=True).get(
+            pk=pk
+        )
+        yield bytes(conteudo)
+
+
+def remover_antigos(dias):
+    """Remove os jobs (e arquivos gerados) finalizados há mais de N dias"""
+    from .models import Job
+
+    limite = timezone.now() - timedelta(days=dias)
+    removidos, _ = Job.objects.filter(
+        status__in=("concluido", "falhou"), concluido_em__lt=limite
+    ).delete()
+    return removidos
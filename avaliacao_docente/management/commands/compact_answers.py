@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from avaliacao_docente.submissoes import (
+    LOTE_COMPACTACAO,
+    compactar_respostas_antigas,
+    criar_view,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compacta em SubmissaoAvaliacao as respostas fechadas gravadas uma "
+        "por linha em RespostaAvaliacao (dados anteriores à migration 0017)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=LOTE_COMPACTACAO,
+            help=f"Submissões por transação (padrão: {LOTE_COMPACTACAO})",
+        )
+        parser.add_argument(
+            "--recriar-view",
+            action="store_true",
+            help="Recria a view de RespostaUnificada antes de compactar",
+        )
+
+    def handle(self, *args, **options):
+        lote = options["lote"]
+        if lote < 1:
+            raise CommandError("--lote deve ser maior que zero")
+
+        if options["recriar_view"]:
+            criar_view(connection)
+            self.stdout.write(f"View de respostas recriada ({connection.vendor})")
+
+        self.stdout.write(
+            self.style.SUCCESS("=== Compactando respostas por submissão ===")
+        )
+        submissoes, linhas = compactar_respostas_antigas(lote)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Submissões compactadas: {submissoes}; "
+                f"linhas removidas de RespostaAvaliacao: {linhas}"
+            )
+        )
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from avaliacao_docente.exportacao import LIMITE_FEED, feed_respostas
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta em JSON Lines as respostas gravadas após um cursor "
+        "(feed incremental para BI)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--apos",
+            help="Cursor da exportação anterior (padrão: desde o início)",
+        )
+        parser.add_argument(
+            "--arquivo-cursor",
+            help=(
+                "Arquivo com o cursor: lido antes da exportação (se existir) "
+                "e atualizado com o cursor seguinte ao final"
+            ),
+        )
+        parser.add_argument(
+            "--limite",
+            type=int,
+            default=LIMITE_FEED,
+            help=f"Máximo de envios exportados (padrão: {LIMITE_FEED})",
+        )
+        parser.add_argument(
+            "--saida",
+            help="Arquivo de saída (padrão: saída padrão)",
+        )
+
+    def handle(self, *args, **options):
+        apos = options["apos"]
+        arquivo_cursor = options["arquivo_cursor"]
+        limite = options["limite"]
+
+        if limite < 1:
+            raise CommandError("--limite deve ser maior que zero")
+        if arquivo_cursor and not apos and Path(arquivo_cursor).exists():
+            apos = Path(arquivo_cursor).read_text().strip() or None
+
+        try:
+            exportacao, proximo = feed_respostas(apos, limite)
+        except ValueError as erro:
+            raise CommandError(str(erro)) from erro
+
+        if options["saida"]:
+            with open(options["saida"], "w", encoding="utf-8") as saida:
+                saida.writelines(exportacao.jsonl())
+        else:
+            for parte in exportacao.jsonl():
+                self.stdout.write(parte, ending="")
+
+        if arquivo_cursor:
+            Path(arquivo_cursor).write_text(proximo + "\n")
+        self.stderr.write(f"Próximo cursor: {proximo}")
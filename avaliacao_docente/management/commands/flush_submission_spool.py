@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from avaliacao_docente.spool import LOTE_SPOOL, descarregar, spool_ativo
+
+
+class Command(BaseCommand):
+    help = (
+        "Descarrega no banco os envios de respostas gravados no spool local "
+        "(AVALIACAO_SPOOL_ENVIOS). Rode continuamente ou com --uma-vez"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--uma-vez",
+            action="store_true",
+            help="Descarrega os envios pendentes e sai",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=LOTE_SPOOL,
+            help=f"Envios por transação (padrão: {LOTE_SPOOL})",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=1.0,
+            help="Segundos de espera quando o spool está vazio (padrão: 1)",
+        )
+
+    def handle(self, *args, **options):
+        if not spool_ativo():
+            raise CommandError("AVALIACAO_SPOOL_ENVIOS não está configurado")
+        lote = options["lote"]
+        if lote < 1:
+            raise CommandError("--lote deve ser maior que zero")
+
+        total = 0
+        while True:
+            descarregados = descarregar(lote)
+            total += descarregados
+            if descarregados:
+                self.stdout.write(f"Envios descarregados: {descarregados}")
+
+            # Lote incompleto: o spool esvaziou
+            if descarregados < lote:
+                if options["uma_vez"]:
+                    break
+                time.sleep(options["intervalo"])
+
+        self.stdout.write(self.style.SUCCESS(f"Total de envios descarregados: {total}"))
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
+from avaliacao_docente.role_cache import bump_role_version
 from avaliacao_docente.utils import (
     is_role_manually_changed,
     reset_role_manual_flag,
@@ -102,6 +103,8 @@ class Command(BaseCommand):
         if reset_count == 0:
             self.stdout.write("✅ Nenhuma flag manual encontrada")
         else:
+            if not dry_run:
+                bump_role_version()
             status_msg = "seriam removidas" if dry_run else "removidas"
             self.stdout.write(
                 self.style.SUCCESS(f"\n{reset_count} flags manuais {status_msg}")
@@ -119,6 +122,7 @@ class Command(BaseCommand):
 
                 if not dry_run:
                     reset_role_manual_flag(user)
+                    bump_role_version(user)
             else:
                 self.stdout.write(
                     self.style.WARNING(
@@ -141,6 +145,7 @@ class Command(BaseCommand):
 
                 if not dry_run:
                     mark_role_manually_changed(user)
+                    bump_role_version(user)
             else:
                 self.stdout.write(
                     self.style.WARNING(
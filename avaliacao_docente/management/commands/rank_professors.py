@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from avaliacao_docente.models import CicloAvaliacao
+from avaliacao_docente.ranking import calcular_ranking
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula o ranking percentual dos professores por curso e período "
+        "letivo (RankingProfessor)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ciclo",
+            type=int,
+            help="Recalcula apenas o ciclo informado (id); padrão: todos",
+        )
+
+    def handle(self, *args, **options):
+        ciclos = CicloAvaliacao.objects.order_by("data_inicio")
+        ciclo_id = options.get("ciclo")
+
+        if ciclo_id:
+            ciclos = ciclos.filter(pk=ciclo_id)
+            if not ciclos.exists():
+                raise CommandError(f"Ciclo {ciclo_id} não encontrado")
+
+        self.stdout.write(
+            self.style.SUCCESS("=== Calculando ranking dos professores ===")
+        )
+        for ciclo in ciclos:
+            total = calcular_ranking(ciclo)
+            self.stdout.write(f"{ciclo.nome}: {total} professor(es) ranqueado(s)")
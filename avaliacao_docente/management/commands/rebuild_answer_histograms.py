@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from avaliacao_docente.histogramas import reconstruir_histogramas
+from avaliacao_docente.models import AvaliacaoDocente, CicloAvaliacao
+
+
+class Command(BaseCommand):
+    help = "Recalcula do zero os histogramas de respostas (HistogramaResposta)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ciclo",
+            type=int,
+            help="Recalcula apenas as avaliações do ciclo informado (id)",
+        )
+
+    def handle(self, *args, **options):
+        avaliacoes = None
+        ciclo_id = options.get("ciclo")
+
+        if ciclo_id:
+            if not CicloAvaliacao.objects.filter(pk=ciclo_id).exists():
+                raise CommandError(f"Ciclo {ciclo_id} não encontrado")
+            avaliacoes = AvaliacaoDocente.objects.filter(ciclo_id=ciclo_id).values(
+                "pk"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS("=== Reconstruindo histogramas de respostas ===")
+        )
+        total = reconstruir_histogramas(avaliacoes)
+        self.stdout.write(self.style.SUCCESS(f"Histogramas gravados: {total}"))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from avaliacao_docente.busca import criar_indice
+from avaliacao_docente.models import RespostaAvaliacao
+
+
+class Command(BaseCommand):
+    help = (
+        "Recria o índice de busca textual dos comentários (GIN no PostgreSQL, "
+        "FTS5 no SQLite)"
+    )
+
+    def handle(self, *args, **options):
+        criar_indice(connection, RespostaAvaliacao)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Índice de busca recriado ({connection.vendor}): "
+                f"{RespostaAvaliacao.objects.filter(valor_texto__gt='').count()} "
+                "comentário(s)"
+            )
+        )
@@ -1,7 +1,6 @@
 from django.core.management.base import BaseCommand
-from django.contrib.auth.models import User
-from rolepermissions.checkers import has_role
 from avaliacao_docente.models import MatriculaTurma
+from avaliacao_docente.role_bitmask import role_q
 
 
 class Command(BaseCommand):
@@ -26,28 +25,27 @@ class Command(BaseCommand):
                 self.style.WARNING("MODO SIMULAÇÃO - Nenhuma mudança será aplicada")
             )
 
-        # Buscar todas as matrículas ativas
-        matriculas = MatriculaTurma.objects.filter(status="ativa").select_related(
-            "aluno__user", "turma"
+        # Buscar matrículas ativas de admins (filtro feito no banco)
+        matriculas = (
+            MatriculaTurma.objects.filter(status="ativa")
+            .filter(role_q("admin", "aluno__user__"))
+            .select_related("aluno__user", "turma")
         )
 
         removed_count = 0
 
         for matricula in matriculas:
             user = matricula.aluno.user
+            removed_count += 1
 
-            # Verificar se o usuário é admin
-            if has_role(user, "admin"):
-                removed_count += 1
-
-                status = "SIMULAÇÃO" if dry_run else "REMOVIDO"
-                self.stdout.write(
-                    f"[{status}] Admin {user.username} ({user.get_full_name()}) "
-                    f"removido da turma {matricula.turma.codigo_turma}"
-                )
+            status = "SIMULAÇÃO" if dry_run else "REMOVIDO"
+            self.stdout.write(
+                f"[{status}] Admin {user.username} ({user.get_full_name()}) "
+                f"removido da turma {matricula.turma.codigo_turma}"
+            )
 
-                if not dry_run:
-                    matricula.delete()
+            if not dry_run:
+                matricula.delete()
 
         # Resumo
         self.stdout.write(self.style.SUCCESS(f"\n=== Resumo ==="))
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from avaliacao_docente.jobs import executar_pendentes, remover_antigos
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker de jobs em segundo plano (fila no banco). Rode continuamente "
+        "ou periodicamente com --uma-vez (ex.: cron)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--uma-vez",
+            action="store_true",
+            help="Executa os jobs pendentes e sai",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=2.0,
+            help="Segundos de espera quando a fila está vazia (padrão: 2)",
+        )
+        parser.add_argument(
+            "--max-jobs",
+            type=int,
+            help="Sai depois de executar este número de jobs",
+        )
+        parser.add_argument(
+            "--limpar-dias",
+            type=int,
+            help="Remove antes os jobs finalizados há mais de N dias",
+        )
+
+    def handle(self, *args, **options):
+        max_jobs = options["max_jobs"]
+        if max_jobs is not None and max_jobs < 1:
+            raise CommandError("--max-jobs deve ser maior que zero")
+
+        if options["limpar_dias"] is not None:
+            removidos = remover_antigos(options["limpar_dias"])
+            self.stdout.write(f"Jobs antigos removidos: {removidos}")
+
+        total = 0
+        while True:
+            restantes = None if max_jobs is None else max_jobs - total
+            executados = executar_pendentes(restantes)
+            total += executados
+            if executados:
+                self.stdout.write(f"Jobs executados: {executados}")
+
+            if options["uma_vez"] or (max_jobs is not None and total >= max_jobs):
+                break
+            if not executados:
+                time.sleep(options["intervalo"])
+
+        self.stdout.write(self.style.SUCCESS(f"Total de jobs executados: {total}"))
@@ -0,0 +1,97 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from avaliacao_docente.models import PerfilAcesso
+from avaliacao_docente.role_bitmask import find_inconsistencies
+
+
+class Command(BaseCommand):
+    help = (
+        "Preenche/corrige as máscaras de roles e permissões (PerfilAcesso) "
+        "a partir dos grupos e permissões dos usuários"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Apenas verifica a consistência (falha se houver divergências)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Simula as mudanças sem aplicá-las no banco",
+        )
+
+    def handle(self, *args, **options):
+        check = options["check"]
+        dry_run = options["dry_run"]
+
+        self.stdout.write(
+            self.style.SUCCESS("=== Verificando perfis de acesso ===")
+        )
+
+        if dry_run and not check:
+            self.stdout.write(
+                self.style.WARNING("MODO SIMULAÇÃO - Nenhuma mudança será aplicada")
+            )
+
+        divergencias = find_inconsistencies()
+
+        for user_id, (roles, permissoes), encontrado in divergencias:
+            atual = "ausente" if encontrado is None else (
+                f"roles={encontrado[0]}, permissoes={encontrado[1]}"
+            )
+            self.stdout.write(
+                f"Usuário {user_id}: esperado roles={roles}, "
+                f"permissoes={permissoes} (atual: {atual})"
+            )
+
+        # Resumo
+        self.stdout.write(self.style.SUCCESS("\n=== Resumo ==="))
+        self.stdout.write(f"Divergências encontradas: {len(divergencias)}")
+
+        if not divergencias:
+            self.stdout.write(
+                self.style.SUCCESS("Perfis de acesso consistentes!")
+            )
+            return
+
+        if check:
+            raise CommandError(
+                "Perfis de acesso inconsistentes. Execute sync_access_bits "
+                "sem --check para corrigi-los."
+            )
+
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING(
+                    "Execute novamente sem --dry-run para aplicar as mudanças"
+                )
+            )
+            return
+
+        self._aplicar(divergencias)
+        self.stdout.write(self.style.SUCCESS("Perfis de acesso sincronizados!"))
+
+    def _aplicar(self, divergencias):
+        """Cria os perfis ausentes e atualiza os divergentes em lote"""
+        novos = []
+        alterados = {}
+        for user_id, (roles, permissoes), encontrado in divergencias:
+            if encontrado is None:
+                novos.append(
+                    PerfilAcesso(user_id=user_id, roles=roles, permissoes=permissoes)
+                )
+            else:
+                alterados[user_id] = (roles, permissoes)
+
+        with transaction.atomic():
+            PerfilAcesso.objects.bulk_create(novos, batch_size=500)
+
+            perfis = list(PerfilAcesso.objects.filter(user_id__in=alterados))
+            for perfil in perfis:
+                perfil.roles, perfil.permissoes = alterados[perfil.user_id]
+            PerfilAcesso.objects.bulk_update(
+                perfis, ["roles", "permissoes"], batch_size=500
+            )
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.6 on 2026-10-17 02:16
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Cópia de role_bitmask.ROLE_BITS e PERMISSION_BITS nesta data: a migration
+# não depende do código atual da aplicação
+ROLE_BITS = {"admin": 1, "coordenador": 2, "professor": 4, "aluno": 8}
+PERMISSION_BITS = {
+    "view_avaliacao": 1,
+    "edit_avaliacao": 2,
+    "delete_avaliacao": 4,
+    "add_avaliacao": 8,
+}
+ALL_PERMISSIONS = 15
+
+
+def preencher_perfis_acesso(apps, schema_editor):
+    """
+    Cria o PerfilAcesso dos usuários existentes a partir dos grupos e
+    permissões, com o mesmo mapeamento de role_bitmask.expected_access_bits.
+
+    Todas as roles de setup/roles.py liberam as quatro permissões, então
+    um usuário com alguma role mantém as permissões que possui; sem role,
+    nenhuma. Superusuários recebem admin e todas as permissões.
+    """
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    PerfilAcesso = apps.get_model("avaliacao_docente", "PerfilAcesso")
+    superpoderes = getattr(settings, "ROLEPERMISSIONS_SUPERUSER_SUPERPOWERS", True)
+
+    roles = defaultdict(int)
+    grupos = User.groups.through.objects.filter(group__name__in=ROLE_BITS)
+    for user_id, nome in grupos.values_list("user_id", "group__name"):
+        roles[user_id] |= ROLE_BITS[nome]
+
+    permissoes = defaultdict(int)
+    concedidas = User.user_permissions.through.objects.filter(
+        permission__codename__in=PERMISSION_BITS
+    )
+    for user_id, codename in concedidas.values_list(
+        "user_id", "permission__codename"
+    ):
+        permissoes[user_id] |= PERMISSION_BITS[codename]
+
+    perfis = []
+    usuarios = User.objects.values_list("pk", "is_superuser")
+    for user_id, is_superuser in usuarios.iterator(chunk_size=500):
+        if is_superuser and superpoderes:
+            mascaras = (roles[user_id] | ROLE_BITS["admin"], ALL_PERMISSIONS)
+        elif roles[user_id]:
+            mascaras = (roles[user_id], permissoes[user_id])
+        else:
+            mascaras = (0, 0)
+        perfis.append(
+            PerfilAcesso(user_id=user_id, roles=mascaras[0], permissoes=mascaras[1])
+        )
+    PerfilAcesso.objects.bulk_create(perfis, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avaliacao_docente', '0008_remover_campos_redundantes_turma'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerfilAcesso',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('roles', models.PositiveIntegerField(db_index=True, default=0)),
+                ('permissoes', models.PositiveIntegerField(db_index=True, default=0)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='perfil_acesso', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Perfil de Acesso',
+                'verbose_name_plural': 'Perfis de Acesso',
+            },
+        ),
+        migrations.RunPython(
+            preencher_perfis_acesso, migrations.RunPython.noop
+        ),
+    ]
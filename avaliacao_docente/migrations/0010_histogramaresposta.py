@@ -0,0 +1,103 @@
+# Generated by Django 5.2.6 on 2026-10-17 02:32
+
+from collections import Counter, defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+# Cópia de histogramas.chave_resposta nesta data: a migration não depende do
+# código atual da aplicação
+TIPOS_NUMERICOS = ("likert", "nps")
+
+
+def chave_resposta(tipo, valor_numerico, valor_boolean, valor_texto):
+    if tipo in TIPOS_NUMERICOS:
+        return None if valor_numerico is None else str(valor_numerico)
+    if tipo == "sim_nao":
+        if valor_boolean is None:
+            return None
+        return "Sim" if valor_boolean else "Não"
+    if not valor_texto:
+        return None
+    return valor_texto if tipo == "multipla_escolha" else ""
+
+
+def preencher_histogramas(apps, schema_editor):
+    """Calcula os histogramas das respostas já existentes"""
+    HistogramaResposta = apps.get_model("avaliacao_docente", "HistogramaResposta")
+    RespostaAvaliacao = apps.get_model("avaliacao_docente", "RespostaAvaliacao")
+
+    totais = defaultdict(int)
+    somas = defaultdict(int)
+    contagens = defaultdict(Counter)
+
+    # Uma linha por valor distinto de cada (avaliação, pergunta)
+    valores = (
+        RespostaAvaliacao.objects.values(
+            "avaliacao_id",
+            "pergunta_id",
+            "pergunta__tipo",
+            "valor_numerico",
+            "valor_boolean",
+            "valor_texto",
+        )
+        .annotate(quantidade=Count("id"))
+        .order_by()
+    )
+    for linha in valores.iterator():
+        chave = chave_resposta(
+            linha["pergunta__tipo"],
+            linha["valor_numerico"],
+            linha["valor_boolean"],
+            linha["valor_texto"],
+        )
+        if chave is None:
+            continue
+        par = (linha["avaliacao_id"], linha["pergunta_id"])
+        totais[par] += linha["quantidade"]
+        if linha["valor_numerico"] is not None:
+            somas[par] += linha["valor_numerico"] * linha["quantidade"]
+        if chave:
+            contagens[par][chave] += linha["quantidade"]
+
+    HistogramaResposta.objects.bulk_create(
+        [
+            HistogramaResposta(
+                avaliacao_id=avaliacao_id,
+                pergunta_id=pergunta_id,
+                total=total,
+                soma=somas[(avaliacao_id, pergunta_id)],
+                contagens=dict(contagens[(avaliacao_id, pergunta_id)]),
+            )
+            for (avaliacao_id, pergunta_id), total in totais.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avaliacao_docente', '0009_perfilacesso'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistogramaResposta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('soma', models.BigIntegerField(default=0)),
+                ('contagens', models.JSONField(blank=True, default=dict)),
+                ('avaliacao', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='histogramas', to='avaliacao_docente.avaliacaodocente')),
+                ('pergunta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='histogramas', to='avaliacao_docente.perguntaavaliacao')),
+            ],
+            options={
+                'verbose_name': 'Histograma de Respostas',
+                'verbose_name_plural': 'Histogramas de Respostas',
+                'unique_together': {('avaliacao', 'pergunta')},
+            },
+        ),
+        migrations.RunPython(preencher_histogramas, migrations.RunPython.noop),
+    ]
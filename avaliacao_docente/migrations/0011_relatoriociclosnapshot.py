@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-17 02:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avaliacao_docente', '0010_histogramaresposta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatorioCicloSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('versao', models.PositiveSmallIntegerField(default=1)),
+                ('dados', models.BinaryField()),
+                ('gerado_em', models.DateTimeField(auto_now=True)),
+                ('ciclo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='relatorio_snapshot', to='avaliacao_docente.cicloavaliacao')),
+            ],
+            options={
+                'verbose_name': 'Snapshot de Relatório do Ciclo',
+                'verbose_name_plural': 'Snapshots de Relatórios dos Ciclos',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 02:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avaliacao_docente', '0011_relatoriociclosnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='relatoriociclosnapshot',
+            name='detalhes',
+            field=models.BinaryField(default=b''),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-17 03:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avaliacao_docente', '0013_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingProfessor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('media', models.FloatField()),
+                ('respostas', models.PositiveIntegerField()),
+                ('avaliacoes', models.PositiveIntegerField()),
+                ('percentil', models.FloatField()),
+                ('professores_no_grupo', models.PositiveIntegerField()),
+                ('calculado_em', models.DateTimeField(auto_now=True)),
+                ('ciclo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='avaliacao_docente.cicloavaliacao')),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='avaliacao_docente.curso')),
+                ('periodo_letivo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='avaliacao_docente.periodoletivo')),
+                ('professor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='avaliacao_docente.perfilprofessor')),
+            ],
+            options={
+                'verbose_name': 'Ranking de Professor',
+                'verbose_name_plural': 'Rankings de Professores',
+                'indexes': [models.Index(fields=['ciclo', 'professor'], name='avaliacao_d_ciclo_i_915da5_idx')],
+                'unique_together': {('ciclo', 'curso', 'periodo_letivo', 'professor')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+def criar_indice_busca(apps, schema_editor):
+    """GIN (PostgreSQL) ou FTS5 (SQLite) sobre RespostaAvaliacao.valor_texto"""
+    from avaliacao_docente.busca import criar_indice
+
+    modelo = apps.get_model("avaliacao_docente", "RespostaAvaliacao")
+    criar_indice(schema_editor.connection, modelo)
+
+
+def remover_indice_busca(apps, schema_editor):
+    from avaliacao_docente.busca import remover_indice
+
+    modelo = apps.get_model("avaliacao_docente", "RespostaAvaliacao")
+    remover_indice(schema_editor.connection, modelo)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avaliacao_docente', '0014_rankingprofessor'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indice_busca, remover_indice_busca),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.6 on 2026-10-17 03:38
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+from django.db.models import Min, OuterRef, Subquery
+
+
+def registrar_envios_existentes(apps, schema_editor):
+    """Uma submissão por (avaliação, aluno) que já tem respostas"""
+    RespostaAvaliacao = apps.get_model("avaliacao_docente", "RespostaAvaliacao")
+    SubmissaoAvaliacao = apps.get_model("avaliacao_docente", "SubmissaoAvaliacao")
+
+    pares = (
+        RespostaAvaliacao.objects.filter(aluno__isnull=False)
+        .order_by()
+        .values_list("avaliacao_id", "aluno_id")
+        .distinct()
+    )
+    SubmissaoAvaliacao.objects.bulk_create(
+        (
+            SubmissaoAvaliacao(avaliacao_id=avaliacao_id, aluno_id=aluno_id)
+            for avaliacao_id, aluno_id in pares.iterator()
+        ),
+        batch_size=1000,
+    )
+
+    # auto_now_add preencheu enviada_em com a data da migration
+    primeira_resposta = (
+        RespostaAvaliacao.objects.filter(
+            avaliacao_id=OuterRef("avaliacao_id"), aluno_id=OuterRef("aluno_id")
+        )
+        .order_by()
+        .values("avaliacao_id")
+        .annotate(primeira=Min("data_resposta"))
+        .values("primeira")
+    )
+    SubmissaoAvaliacao.objects.update(enviada_em=Subquery(primeira_resposta))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avaliacao_docente', '0015_indice_busca_comentarios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissaoAvaliacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('enviada_em', models.DateTimeField(auto_now_add=True)),
+                ('aluno', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='submissoes', to='avaliacao_docente.perfilaluno')),
+                ('avaliacao', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submissoes', to='avaliacao_docente.avaliacaodocente')),
+            ],
+            options={
+                'verbose_name': 'Submissão de Avaliação',
+                'verbose_name_plural': 'Submissões de Avaliação',
+                'constraints': [models.UniqueConstraint(fields=('avaliacao', 'aluno'), name='submissao_unica_por_aluno')],
+            },
+        ),
+        migrations.RunPython(
+            registrar_envios_existentes, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,231 @@
+# Generated by Django 5.2.6 on 2026-10-17 03:49
+
+import django.db.models.deletion
+from django.db import NotSupportedError, migrations, models
+from django.db.models import Exists, Max, Min, OuterRef, Subquery
+
+# Cópia do SQL de submissoes.criar_view nesta data: a migration não depende
+# do código atual da aplicação (manage.py compact_answers --recriar-view
+# recria a view com a versão atual)
+NOME_VIEW = "avaliacao_docente_resposta_unificada"
+
+SQL_LINHAS = """
+    SELECT 'r' || r.id AS id, r.id AS resposta_id, r.submissao_id,
+        r.avaliacao_id, r.aluno_id, r.pergunta_id, r.valor_texto,
+        r.valor_numerico, r.valor_boolean, r.data_resposta, r.anonima
+    FROM avaliacao_docente_respostaavaliacao r
+"""
+
+SQL_COMPACTADAS = {
+    "postgresql": """
+    SELECT 's' || s.id || '.' || e.posicao, NULL, s.id,
+        s.avaliacao_id, s.aluno_id, e.pergunta::bigint,
+        CASE WHEN jsonb_typeof(e.valor) = 'string'
+            THEN e.valor #>> '{}' ELSE '' END,
+        CASE WHEN jsonb_typeof(e.valor) = 'number'
+            THEN (e.valor #>> '{}')::integer END,
+        CASE WHEN jsonb_typeof(e.valor) = 'boolean'
+            THEN (e.valor #>> '{}')::boolean END,
+        s.enviada_em, s.anonima
+    FROM avaliacao_docente_submissaoavaliacao s
+    CROSS JOIN LATERAL ROWS FROM (
+        jsonb_array_elements_text(s.perguntas), jsonb_array_elements(s.valores)
+    ) WITH ORDINALITY AS e(pergunta, valor, posicao)
+    """,
+    "sqlite": """
+    SELECT 's' || s.id || '.' || p.key, NULL, s.id,
+        s.avaliacao_id, s.aluno_id, p.value,
+        CASE WHEN v.type = 'text' THEN v.value ELSE '' END,
+        CASE WHEN v.type = 'integer' THEN v.value END,
+        CASE v.type WHEN 'true' THEN 1 WHEN 'false' THEN 0 END,
+        s.enviada_em, s.anonima
+    FROM avaliacao_docente_submissaoavaliacao s
+    JOIN json_each(s.perguntas) p
+    JOIN json_each(s.valores) v ON v.key = p.key
+    """,
+}
+
+LOTE = 500
+
+
+def vincular_respostas_existentes(apps, schema_editor):
+    """
+    Liga cada resposta existente à submissão do seu envio: por (avaliação,
+    aluno) ou, sem aluno, por (avaliação, session_key)
+    """
+    RespostaAvaliacao = apps.get_model("avaliacao_docente", "RespostaAvaliacao")
+    SubmissaoAvaliacao = apps.get_model("avaliacao_docente", "SubmissaoAvaliacao")
+    avulsas = RespostaAvaliacao.objects.filter(submissao__isnull=True)
+
+    pares = (
+        avulsas.filter(aluno__isnull=False)
+        .order_by()
+        .values_list("avaliacao_id", "aluno_id")
+        .distinct()
+    )
+    SubmissaoAvaliacao.objects.bulk_create(
+        (
+            SubmissaoAvaliacao(avaliacao_id=avaliacao_id, aluno_id=aluno_id)
+            for avaliacao_id, aluno_id in pares.iterator()
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    avulsas.filter(aluno__isnull=False).update(
+        submissao=Subquery(
+            SubmissaoAvaliacao.objects.filter(
+                avaliacao_id=OuterRef("avaliacao_id"), aluno_id=OuterRef("aluno_id")
+            ).values("pk")[:1]
+        )
+    )
+
+    grupos = (
+        avulsas.filter(aluno__isnull=True)
+        .order_by()
+        .values_list("avaliacao_id", "session_key")
+        .distinct()
+    )
+    for avaliacao_id, session_key in list(grupos):
+        submissao = SubmissaoAvaliacao.objects.create(
+            avaliacao_id=avaliacao_id, anonima=True
+        )
+        avulsas.filter(
+            avaliacao_id=avaliacao_id, aluno__isnull=True, session_key=session_key
+        ).update(submissao=submissao)
+
+    # auto_now_add preencheu enviada_em com a data da migration
+    respostas = RespostaAvaliacao.objects.filter(submissao=OuterRef("pk"))
+    SubmissaoAvaliacao.objects.filter(
+        Exists(respostas.filter(data_resposta__lt=OuterRef("enviada_em")))
+    ).update(
+        enviada_em=Subquery(
+            respostas.order_by()
+            .values("submissao")
+            .annotate(primeira=Min("data_resposta"))
+            .values("primeira")
+        )
+    )
+    SubmissaoAvaliacao.objects.filter(anonima=False).filter(
+        Exists(respostas.filter(anonima=True))
+    ).update(anonima=True)
+
+
+def desempacotar_respostas(apps, schema_editor):
+    """
+    Reverso: volta a gravar em RespostaAvaliacao (uma linha por pergunta) as
+    respostas fechadas compactadas nas submissões, antes que perguntas e
+    valores sejam removidos
+    """
+    RespostaAvaliacao = apps.get_model("avaliacao_docente", "RespostaAvaliacao")
+    SubmissaoAvaliacao = apps.get_model("avaliacao_docente", "SubmissaoAvaliacao")
+    PerguntaAvaliacao = apps.get_model("avaliacao_docente", "PerguntaAvaliacao")
+
+    tipos = dict(PerguntaAvaliacao.objects.values_list("pk", "tipo"))
+    ultima = RespostaAvaliacao.objects.aggregate(ultima=Max("pk"))["ultima"] or 0
+
+    linhas = []
+    submissoes = SubmissaoAvaliacao.objects.values_list(
+        "pk", "avaliacao_id", "aluno_id", "anonima", "perguntas", "valores"
+    )
+    for pk, avaliacao_id, aluno_id, anonima, perguntas, valores in (
+        submissoes.iterator(chunk_size=LOTE)
+    ):
+        for pergunta_id, valor in zip(perguntas or [], valores or []):
+            tipo = tipos.get(pergunta_id)
+            if tipo is None:
+                continue  # Pergunta excluída depois do envio
+            resposta = RespostaAvaliacao(
+                avaliacao_id=avaliacao_id,
+                aluno_id=aluno_id,
+                pergunta_id=pergunta_id,
+                anonima=anonima,
+                submissao_id=pk,
+            )
+            if tipo in ("likert", "nps"):
+                resposta.valor_numerico = valor
+            elif tipo == "sim_nao":
+                resposta.valor_boolean = valor
+            else:
+                resposta.valor_texto = valor
+            linhas.append(resposta)
+        if len(linhas) >= LOTE:
+            RespostaAvaliacao.objects.bulk_create(linhas)
+            linhas = []
+    RespostaAvaliacao.objects.bulk_create(linhas)
+
+    # auto_now_add preencheu data_resposta com a data atual
+    RespostaAvaliacao.objects.filter(pk__gt=ultima).update(
+        data_resposta=Subquery(
+            SubmissaoAvaliacao.objects.filter(pk=OuterRef("submissao_id")).values(
+                "enviada_em"
+            )[:1]
+        )
+    )
+
+
+def criar_view_respostas(apps, schema_editor):
+    """View de RespostaUnificada (linhas + respostas compactadas)"""
+    conexao = schema_editor.connection
+    if conexao.vendor not in SQL_COMPACTADAS:
+        raise NotSupportedError(
+            f"Respostas compactadas não suportadas em {conexao.vendor}"
+        )
+    schema_editor.execute(f"DROP VIEW IF EXISTS {NOME_VIEW}")
+    schema_editor.execute(
+        f"CREATE VIEW {NOME_VIEW} AS {SQL_LINHAS} UNION ALL "
+        f"{SQL_COMPACTADAS[conexao.vendor]}"
+    )
+
+
+def remover_view_respostas(apps, schema_editor):
+    schema_editor.execute(f"DROP VIEW IF EXISTS {NOME_VIEW}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avaliacao_docente', '0016_submissaoavaliacao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RespostaUnificada',
+            fields=[
+                ('id', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('resposta_id', models.BigIntegerField(null=True)),
+                ('valor_texto', models.TextField(blank=True)),
+                ('valor_numerico', models.IntegerField(null=True)),
+                ('valor_boolean', models.BooleanField(null=True)),
+                ('data_resposta', models.DateTimeField()),
+                ('anonima', models.BooleanField(default=False)),
+            ],
+            options={
+                'verbose_name': 'Resposta (unificada)',
+                'verbose_name_plural': 'Respostas (unificadas)',
+                'db_table': 'avaliacao_docente_resposta_unificada',
+                'managed': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='respostaavaliacao',
+            name='submissao',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='respostas', to='avaliacao_docente.submissaoavaliacao'),
+        ),
+        migrations.AddField(
+            model_name='submissaoavaliacao',
+            name='anonima',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='submissaoavaliacao',
+            name='perguntas',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='submissaoavaliacao',
+            name='valores',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(vincular_respostas_existentes, desempacotar_respostas),
+        migrations.RunPython(criar_view_respostas, remover_view_respostas),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 04:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avaliacao_docente', '0017_respostas_compactadas'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='job',
+            name='resultado',
+        ),
+        migrations.CreateModel(
+            name='ParteResultadoJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ordem', models.PositiveIntegerField()),
+                ('conteudo', models.BinaryField()),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='partes', to='avaliacao_docente.job')),
+            ],
+            options={
+                'verbose_name': 'Parte do Resultado de Job',
+                'verbose_name_plural': 'Partes do Resultado de Jobs',
+                'ordering': ['job', 'ordem'],
+                'constraints': [models.UniqueConstraint(fields=('job', 'ordem'), name='parte_resultado_job_unica')],
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.6 on 2026-10-17 04:48
+
+from django.db import migrations, models
+from django.utils.crypto import salted_hmac
+
+# Cópia de SubmissaoAvaliacao.calcular_chave_aluno nesta data: a migration
+# não depende do código atual da aplicação
+
+
+def calcular_chave_aluno(avaliacao_id, aluno_id):
+    return salted_hmac(
+        "avaliacao_docente.SubmissaoAvaliacao.chave_aluno",
+        f"{avaliacao_id}:{aluno_id}",
+        algorithm="sha256",
+    ).hexdigest()
+
+
+def preencher_chaves(apps, schema_editor):
+    """
+    Chave das submissões existentes com aluno. Envios anônimos antigos não
+    guardaram o aluno e ficam sem chave.
+    """
+    SubmissaoAvaliacao = apps.get_model("avaliacao_docente", "SubmissaoAvaliacao")
+
+    lote = []
+    submissoes = SubmissaoAvaliacao.objects.filter(aluno__isnull=False).only(
+        "avaliacao_id", "aluno_id"
+    )
+    for submissao in submissoes.iterator(chunk_size=500):
+        submissao.chave_aluno = calcular_chave_aluno(
+            submissao.avaliacao_id, submissao.aluno_id
+        )
+        lote.append(submissao)
+        if len(lote) >= 500:
+            SubmissaoAvaliacao.objects.bulk_update(lote, ["chave_aluno"])
+            lote = []
+    SubmissaoAvaliacao.objects.bulk_update(lote, ["chave_aluno"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avaliacao_docente', '0018_job_resultado_em_partes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submissaoavaliacao',
+            name='chave_aluno',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(preencher_chaves, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='submissaoavaliacao',
+            constraint=models.UniqueConstraint(condition=models.Q(('chave_aluno__isnull', False)), fields=('avaliacao', 'chave_aluno'), name='submissao_unica_por_chave_aluno'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 05:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avaliacao_docente', '0019_submissaoavaliacao_chave_aluno'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionarioavaliacao',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-17 05:20
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def criar_tabela_cache(apps, schema_editor):
+    """
+    Cria a tabela do cache compartilhado (DatabaseCache, o padrão de CACHES
+    em setup/settings.py): um deploy que só executa migrate não fica sem
+    ela. Não faz nada com outro backend ou se a tabela já existir.
+    """
+    call_command(
+        "createcachetable", database=schema_editor.connection.alias, verbosity=0
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avaliacao_docente', '0020_questionarioavaliacao_atualizado_em'),
+    ]
+
+    operations = [
+        # Sem reversão: a tabela continua em uso enquanto CACHES apontar
+        # para ela
+        migrations.RunPython(criar_tabela_cache, migrations.RunPython.noop),
+    ]
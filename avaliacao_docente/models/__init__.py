@@ -22,12 +22,15 @@ from .mixins import (
 from .managers import (
     SoftDeleteManager,
     ActiveManager,
+    user_role_annotations,
+    with_roles,
 )
 
 # Models concretos (existentes)
 from .models_originais import (
     PerfilAluno,
     PerfilProfessor,
+    PerfilAcesso,
     Curso,
     PeriodoLetivo,
     Disciplina,
@@ -41,6 +44,13 @@ from .models_originais import (
     CicloAvaliacao,
     AvaliacaoDocente,
     RespostaAvaliacao,
+    SubmissaoAvaliacao,
+    RespostaUnificada,
+    HistogramaResposta,
+    RelatorioCicloSnapshot,
+    RankingProfessor,
+    Job,
+    ParteResultadoJob,
     ConfiguracaoSite,
 )
 
@@ -53,9 +63,12 @@ __all__ = [
     "OrderingMixin",
     "SoftDeleteManager",
     "ActiveManager",
+    "user_role_annotations",
+    "with_roles",
     # Models concretos
     "PerfilAluno",
     "PerfilProfessor",
+    "PerfilAcesso",
     "Curso",
     "PeriodoLetivo",
     "Disciplina",
@@ -69,5 +82,12 @@ __all__ = [
     "CicloAvaliacao",
     "AvaliacaoDocente",
     "RespostaAvaliacao",
+    "SubmissaoAvaliacao",
+    "RespostaUnificada",
+    "HistogramaResposta",
+    "RelatorioCicloSnapshot",
+    "RankingProfessor",
+    "Job",
+    "ParteResultadoJob",
     "ConfiguracaoSite",
 ]
@@ -116,3 +116,328 @@ class ActiveManager(models.Manager):
     def get_queryset(self):
         """Retorna apenas registros ativos."""
         return super().get_queryset().filter(ativo=True)
+
+
+def user_role_annotations():
+    """
+    Retorna as anotações de roles e perfis para um queryset de User.
+
+    Campos anotados:
+        - is_admin, is_coordenador, is_professor, is_aluno: possui a role
+        - tem_perfil_professor, tem_perfil_aluno: possui o perfil correspondente
+        - role_manual: role alterada manualmente (flag no social auth do SUAP)
+        - role_principal: role de maior precedência
+          (admin > coordenador > professor > aluno), ou "" se não houver.
+          Superusuários contam como admin, como no has_role do rolepermissions.
+
+    As roles vêm da máscara de PerfilAcesso (role_q, uma coluna indexada) e
+    os perfis de subqueries correlacionadas: a listagem continua sendo uma
+    única instrução SQL, independentemente do número de usuários.
+    """
+    from django.db.models import (
+        BooleanField,
+        Case,
+        CharField,
+        Exists,
+        ExpressionWrapper,
+        OuterRef,
+        Q,
+        Value,
+        When,
+    )
+    from social_django.models import UserSocialAuth
+
+    from avaliacao_docente.role_bitmask import role_q
+
+    from .models_originais import PerfilAluno, PerfilProfessor
+
+    def possui_role(role):
+        return ExpressionWrapper(role_q(role), output_field=BooleanField())
+
+    return {
+        "is_admin": possui_role("admin"),
+        "is_coordenador": possui_role("coordenador"),
+        "is_professor": possui_role("professor"),
+        "is_aluno": possui_role("aluno"),
+        "tem_perfil_professor": Exists(
+            PerfilProfessor.objects.filter(user_id=OuterRef("pk"))
+        ),
+        "tem_perfil_aluno": Exists(PerfilAluno.objects.filter(user_id=OuterRef("pk"))),
+        "role_manual": Exists(
+            UserSocialAuth.objects.filter(
+                user_id=OuterRef("pk"),
+                provider="suap",
+                extra_data__role_manually_changed=True,
+            )
+        ),
+        "role_principal": Case(
+            When(Q(is_superuser=True) | Q(is_admin=True), then=Value("admin")),
+            When(is_coordenador=True, then=Value("coordenador")),
+            When(is_professor=True, then=Value("professor")),
+            When(is_aluno=True, then=Value("aluno")),
+            default=Value(""),
+            output_field=CharField(),
+        ),
+    }
+
+
+def with_roles(queryset=None):
+    """
+    Anota roles e perfis em um queryset de User (ver user_role_annotations).
+
+    Substitui chamadas a has_role() por usuário em listagens.
+
+    Uso:
+        for usuario in with_roles().order_by("username"):
+            print(usuario.username, usuario.role_principal)
+
+        # Filtrar por role direto no SQL
+        with_roles().filter(is_aluno=True)
+    """
+    if queryset is None:
+        from django.contrib.auth.models import User
+
+        queryset = User.objects.all()
+    return queryset.annotate(**user_role_annotations())
+
+
+# Tipos de pergunta cujas respostas entram nas médias
+TIPOS_PERGUNTA_NUMERICOS = ("likert", "nps")
+
+
+def _arredondar(expressao, casas=2):
+    """
+    ROUND(expressao, casas) como float, portável entre bancos.
+
+    O PostgreSQL só aceita ROUND com casas decimais sobre numeric, por isso
+    o valor passa por DecimalField antes de ser arredondado.
+    """
+    from django.db.models import DecimalField, FloatField
+    from django.db.models.functions import Cast, Round
+
+    decimal = Cast(expressao, DecimalField(max_digits=20, decimal_places=6))
+    return Cast(Round(decimal, casas), FloatField())
+
+
+def _percentual(parte, total):
+    """Expressão SQL de round(parte / total * 100, 2), ou 0 se total = 0"""
+    from django.db.models import Case, ExpressionWrapper, FloatField, Value, When
+
+    percentual = _arredondar(
+        ExpressionWrapper(
+            models.F(parte) * 100.0 / models.F(total), output_field=FloatField()
+        )
+    )
+    return Case(
+        When(**{f"{total}__gt": 0}, then=percentual),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+class AvaliacaoDocenteQuerySet(models.QuerySet):
+    """
+    QuerySet de AvaliacaoDocente com estatísticas de participação e notas.
+    """
+
+    def with_participation(self):
+        """
+        Anota a participação de cada avaliação via subqueries correlacionadas.
+
+        Campos anotados:
+            - alunos_aptos_count: matrículas ativas da turma, exceto admins
+            - respondentes_count: alunos distintos com envio registrado
+            - participacao_percentual: respondentes / aptos * 100 (2 casas)
+        """
+        from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+        from django.db.models.functions import Coalesce
+
+        from avaliacao_docente.role_bitmask import role_q
+
+        from .models_originais import MatriculaTurma, SubmissaoAvaliacao
+
+        aptos = (
+            MatriculaTurma.objects.filter(turma=OuterRef("turma"), status="ativa")
+            .exclude(role_q("admin", "aluno__user__"))
+            .order_by()
+            .values("turma")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        # Um envio por (avaliação, aluno), anônimo ou não: contar submissões
+        # com a chave do aluno basta
+        respondentes = (
+            SubmissaoAvaliacao.objects.filter(
+                avaliacao=OuterRef("pk"), chave_aluno__isnull=False
+            )
+            .order_by()
+            .values("avaliacao")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+
+        return self.annotate(
+            alunos_aptos_count=Coalesce(
+                Subquery(aptos, output_field=IntegerField()), Value(0)
+            ),
+            respondentes_count=Coalesce(
+                Subquery(respondentes, output_field=IntegerField()), Value(0)
+            ),
+        ).annotate(
+            participacao_percentual=_percentual(
+                "respondentes_count", "alunos_aptos_count"
+            )
+        )
+
+    def with_scores(self):
+        """
+        Anota a média geral de cada avaliação (AVG em SQL).
+
+        Campos anotados:
+            - media_respostas: média de valor_numerico das perguntas de
+              escala (likert e nps), com 2 casas; None se não houver respostas
+
+        Uso:
+            for avaliacao in AvaliacaoDocente.objects.with_scores():
+                print(avaliacao, avaliacao.media_geral())
+        """
+        from django.db.models import Avg, FloatField, OuterRef, Subquery
+
+        from .models_originais import RespostaUnificada
+
+        media = (
+            RespostaUnificada.objects.filter(
+                avaliacao=OuterRef("pk"),
+                pergunta__tipo__in=TIPOS_PERGUNTA_NUMERICOS,
+                valor_numerico__isnull=False,
+            )
+            .order_by()
+            .values("avaliacao")
+            .annotate(media=_arredondar(Avg("valor_numerico")))
+            .values("media")
+        )
+        return self.annotate(
+            media_respostas=Subquery(media, output_field=FloatField())
+        )
+
+    def medias_por_categoria(self):
+        """
+        Calcula a média por categoria de todas as avaliações do queryset.
+
+        Uma única query agrupada por (avaliação, categoria), considerando
+        apenas categorias ativas e perguntas de escala.
+
+        Retorna:
+            dict: {avaliacao_id: {nome_da_categoria: media}}, com as
+            categorias na ordem de CategoriaPergunta
+        """
+        from django.db.models import Avg
+
+        from .models_originais import RespostaUnificada
+
+        linhas = (
+            RespostaUnificada.objects.filter(
+                avaliacao__in=self.order_by().values("pk"),
+                pergunta__tipo__in=TIPOS_PERGUNTA_NUMERICOS,
+                pergunta__categoria__ativa=True,
+                valor_numerico__isnull=False,
+            )
+            .values("avaliacao_id", "pergunta__categoria__nome")
+            .annotate(media=_arredondar(Avg("valor_numerico")))
+            .order_by(
+                "avaliacao_id",
+                "pergunta__categoria__ordem",
+                "pergunta__categoria__nome",
+            )
+        )
+
+        medias = {}
+        for linha in linhas:
+            medias.setdefault(linha["avaliacao_id"], {})[
+                linha["pergunta__categoria__nome"]
+            ] = linha["media"]
+        return medias
+
+    def respondidas_por(self, aluno, respondidas=True):
+        """
+        Avaliações que o aluno já enviou (ou, com respondidas=False, as que
+        ainda não enviou), inclusive de forma anônima.
+
+        O envio é identificado pela chave_aluno da submissão, um HMAC
+        calculado em Python (ver SubmissaoAvaliacao.calcular_chave_aluno):
+        as chaves das avaliações do queryset são calculadas antes (1 query)
+        e comparadas no banco.
+        """
+        from django.db.models import Exists, OuterRef
+
+        from .models_originais import SubmissaoAvaliacao
+
+        chaves = [
+            SubmissaoAvaliacao.calcular_chave_aluno(avaliacao_id, aluno.pk)
+            for avaliacao_id in self.values_list("pk", flat=True)
+        ]
+        enviada = Exists(
+            SubmissaoAvaliacao.objects.filter(
+                avaliacao=OuterRef("pk"), chave_aluno__in=chaves
+            )
+        )
+        return self.filter(enviada if respondidas else ~enviada)
+
+    def com_respostas(self):
+        """Avaliações com ao menos um envio ou uma resposta registrada"""
+        from django.db.models import Exists, OuterRef
+
+        from .models_originais import RespostaAvaliacao, SubmissaoAvaliacao
+
+        return self.filter(
+            Exists(SubmissaoAvaliacao.objects.filter(avaliacao=OuterRef("pk")))
+            | Exists(RespostaAvaliacao.objects.filter(avaliacao=OuterRef("pk")))
+        )
+
+
+class CicloAvaliacaoQuerySet(models.QuerySet):
+    """
+    QuerySet de CicloAvaliacao com estatísticas de participação.
+    """
+
+    def with_participation(self):
+        """
+        Anota a participação agregada de cada ciclo em uma única instrução SQL.
+
+        Campos anotados:
+            - alunos_previstos: soma, por avaliação do ciclo, dos alunos aptos
+              (matrículas ativas da turma, exceto admins)
+            - alunos_respondentes: soma, por avaliação, dos alunos que
+              responderam
+            - participacao_percentual: respondentes / previstos * 100 (2 casas)
+
+        Uso:
+            for ciclo in CicloAvaliacao.objects.with_participation():
+                print(ciclo.nome, ciclo.participacao_percentual)
+        """
+        from django.db.models import IntegerField, OuterRef, Subquery, Sum, Value
+        from django.db.models.functions import Coalesce
+
+        from .models_originais import AvaliacaoDocente
+
+        def soma_por_ciclo(campo):
+            subquery = (
+                AvaliacaoDocente.objects.with_participation()
+                .filter(ciclo=OuterRef("pk"))
+                .order_by()
+                .values("ciclo")
+                .annotate(total=Sum(campo))
+                .values("total")
+            )
+            return Coalesce(
+                Subquery(subquery, output_field=IntegerField()), Value(0)
+            )
+
+        return self.annotate(
+            alunos_previstos=soma_por_ciclo("alunos_aptos_count"),
+            alunos_respondentes=soma_por_ciclo("respondentes_count"),
+        ).annotate(
+            participacao_percentual=_percentual(
+                "alunos_respondentes", "alunos_previstos"
+            )
+        )
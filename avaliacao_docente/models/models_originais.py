@@ -1,24 +1,31 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.utils.crypto import salted_hmac
+
+from .managers import AvaliacaoDocenteQuerySet, CicloAvaliacaoQuerySet
+
+
+def _usuario_admin_q():
+    """
+    Condição "o user do perfil é admin", resolvida no próprio SQL.
+
+    Predicado sobre a máscara de roles de PerfilAcesso, em vez de percorrer
+    todos os usuários chamando has_role(). Superusuários também têm o bit
+    de admin, como no has_role do rolepermissions.
+    """
+    from avaliacao_docente.role_bitmask import role_q
+
+    return role_q("admin", "user__")
 
 
 class PerfilProfessorManager(models.Manager):
     """Manager customizado para excluir usuários admin"""
 
     def get_queryset(self):
-        from rolepermissions.checkers import has_role
-
-        # Obter IDs de admins de forma lazy
-        try:
-            admin_ids = [
-                user.id for user in User.objects.all() if has_role(user, "admin")
-            ]
-        except Exception:
-            # Se houver erro (tabelas não existem), retorna queryset vazio de exclusão
-            admin_ids = []
-
-        return super().get_queryset().exclude(user__id__in=admin_ids)
+        return super().get_queryset().exclude(_usuario_admin_q())
 
     def non_admin(self):
         """Retorna apenas professores que não são admin"""
@@ -29,18 +36,7 @@ class PerfilAlunoManager(models.Manager):
     """Manager customizado para excluir usuários admin"""
 
     def get_queryset(self):
-        from rolepermissions.checkers import has_role
-
-        # Obter IDs de admins de forma lazy
-        try:
-            admin_ids = [
-                user.id for user in User.objects.all() if has_role(user, "admin")
-            ]
-        except Exception:
-            # Se houver erro (tabelas não existem), retorna queryset vazio de exclusão
-            admin_ids = []
-
-        return super().get_queryset().exclude(user__id__in=admin_ids)
+        return super().get_queryset().exclude(_usuario_admin_q())
 
     def non_admin(self):
         """Retorna apenas alunos que não são admin"""
@@ -93,6 +89,31 @@ class PerfilProfessor(models.Model):
         return f"{self.user.get_full_name()} ({self.registro_academico})"
 
 
+class PerfilAcesso(models.Model):
+    """
+    Roles e permissões materializadas de um usuário, em máscaras de bits.
+
+    Espelha os grupos e permissões do rolepermissions (setup/roles.py) para
+    que filtros como "é admin" ou "é aluno" sejam predicados sobre uma única
+    coluna indexada. Mantido em sincronia pelos signals de User.groups e
+    User.user_permissions (ver avaliacao_docente.role_bitmask).
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, related_name="perfil_acesso"
+    )
+    roles = models.PositiveIntegerField(default=0, db_index=True)
+    permissoes = models.PositiveIntegerField(default=0, db_index=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Perfil de Acesso"
+        verbose_name_plural = "Perfis de Acesso"
+
+    def __str__(self):
+        return f"{self.user.username} (roles={self.roles}, permissoes={self.permissoes})"
+
+
 class Curso(models.Model):
     curso_nome = models.CharField(max_length=45)
     curso_sigla = models.CharField(max_length=10)
@@ -217,13 +238,13 @@ class Turma(models.Model):
         """
         Conta apenas alunos matriculados (exclui admins)
         """
-        from rolepermissions.checkers import has_role
+        from avaliacao_docente.role_bitmask import role_q
 
-        count = 0
-        for matricula in self.matriculas.filter(status="ativa"):
-            if not has_role(matricula.aluno.user, "admin"):
-                count += 1
-        return count
+        return (
+            self.matriculas.filter(status="ativa")
+            .exclude(role_q("admin", "aluno__user__"))
+            .count()
+        )
 
 
 class MatriculaTurma(models.Model):
@@ -297,6 +318,9 @@ class QuestionarioAvaliacao(models.Model):
     descricao = models.TextField(blank=True)
     ativo = models.BooleanField(default=True)
     data_criacao = models.DateTimeField(auto_now_add=True)
+    # Também atualizado quando as perguntas mudam: versão do esquema
+    # compilado (ver avaliacao_docente.questionarios)
+    atualizado_em = models.DateTimeField(auto_now=True)
     criado_por = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="questionarios_criados"
     )
@@ -425,6 +449,8 @@ class CicloAvaliacao(models.Model):
         User, on_delete=models.CASCADE, related_name="ciclos_criados"
     )
 
+    objects = CicloAvaliacaoQuerySet.as_manager()
+
     class Meta:
         ordering = ["-data_inicio"]
         verbose_name = "Ciclo de Avaliação"
@@ -475,24 +501,40 @@ class CicloAvaliacao(models.Model):
         else:
             return "em_andamento"
 
+    @property
+    def encerrado(self):
+        """Ciclo encerrado manualmente ou com data_fim já passada"""
+        from django.utils import timezone
+
+        return not self.ativo or timezone.now() > self.data_fim
+
+    def _participacao(self, campo):
+        """
+        Lê um campo de CicloAvaliacao.objects.with_participation().
+
+        Usa a anotação se o objeto já veio de with_participation();
+        caso contrário, executa uma única query agregada.
+        """
+        if hasattr(self, campo):
+            return getattr(self, campo)
+        return (
+            CicloAvaliacao.objects.with_participation()
+            .filter(pk=self.pk)
+            .values_list(campo, flat=True)
+            .get()
+        )
+
     def total_avaliacoes_previstas(self):
-        """Calcula quantas avaliações deveriam ser feitas"""
-        total = 0
-        for avaliacao in self.avaliacoes.all():
-            total += avaliacao.turma.count_alunos_matriculados()
-        return total
+        """Calcula quantas avaliações deveriam ser feitas (aluno x avaliação)"""
+        return self._participacao("alunos_previstos")
 
     def total_avaliacoes_respondidas(self):
-        """Conta quantas avaliações foram efetivamente respondidas"""
-        return self.avaliacoes.filter(respostas__isnull=False).distinct().count()
+        """Conta quantas avaliações (aluno x avaliação) foram respondidas"""
+        return self._participacao("alunos_respondentes")
 
     def percentual_participacao(self):
         """Calcula o percentual de participação na avaliação"""
-        previstas = self.total_avaliacoes_previstas()
-        if previstas == 0:
-            return 0
-        respondidas = self.total_avaliacoes_respondidas()
-        return round((respondidas / previstas) * 100, 2)
+        return self._participacao("participacao_percentual")
 
 
 class AvaliacaoDocente(models.Model):
@@ -526,6 +568,8 @@ class AvaliacaoDocente(models.Model):
     data_criacao = models.DateTimeField(auto_now_add=True)
     data_atualizacao = models.DateTimeField(auto_now=True)
 
+    objects = AvaliacaoDocenteQuerySet.as_manager()
+
     class Meta:
         unique_together = ["ciclo", "turma", "professor", "disciplina"]
         ordering = ["-data_criacao"]
@@ -537,78 +581,48 @@ class AvaliacaoDocente(models.Model):
 
     def total_respostas(self):
         """Conta o total de alunos que responderam esta avaliação"""
-        return self.respostas.values("aluno").distinct().count()
+        if hasattr(self, "respondentes_count"):
+            return self.respondentes_count
+        return self.submissoes.filter(chave_aluno__isnull=False).count()
 
     def alunos_aptos(self):
         """Retorna alunos matriculados na turma que podem avaliar"""
-        from rolepermissions.checkers import has_role
+        from avaliacao_docente.role_bitmask import role_q
 
-        alunos_matriculados = []
-        for matricula in self.turma.matriculas.filter(status="ativa"):
-            if not has_role(matricula.aluno.user, "admin"):
-                alunos_matriculados.append(matricula.aluno)
-        return alunos_matriculados
+        matriculas = (
+            self.turma.matriculas.filter(status="ativa")
+            .exclude(role_q("admin", "aluno__user__"))
+            .select_related("aluno__user")
+        )
+        return [matricula.aluno for matricula in matriculas]
 
     def percentual_participacao(self):
         """Calcula percentual de participação nesta avaliação específica"""
-        total_alunos = len(self.alunos_aptos())
-        if total_alunos == 0:
-            return 0
-
-        total_respostas = self.total_respostas()
-        return round((total_respostas / total_alunos) * 100, 2)
+        if hasattr(self, "participacao_percentual"):
+            return self.participacao_percentual
+        return (
+            AvaliacaoDocente.objects.with_participation()
+            .filter(pk=self.pk)
+            .values_list("participacao_percentual", flat=True)
+            .get()
+        )
 
     def media_geral(self):
         """Calcula a média geral das respostas numéricas"""
-        from django.db.models import Avg
-
-        # Considera apenas perguntas de escala (likert e nps)
-        respostas_numericas = self.respostas.filter(
-            pergunta__tipo__in=["likert", "nps"]
+        # Considera apenas perguntas de escala (likert e nps), via AVG em SQL
+        if hasattr(self, "media_respostas"):
+            return self.media_respostas
+        return (
+            AvaliacaoDocente.objects.with_scores()
+            .filter(pk=self.pk)
+            .values_list("media_respostas", flat=True)
+            .get()
         )
 
-        if not respostas_numericas.exists():
-            return None
-
-        # Converte respostas para valores numéricos e calcula média
-        total = 0
-        count = 0
-
-        for resposta in respostas_numericas:
-            try:
-                valor = float(resposta.valor_numerico or resposta.valor_texto)
-                total += valor
-                count += 1
-            except (ValueError, TypeError):
-                continue
-
-        return round(total / count, 2) if count > 0 else None
-
     def get_media_por_categoria(self):
         """Retorna a média por categoria de pergunta"""
-        from django.db.models import Avg
-
-        categorias = {}
-        for categoria in CategoriaPergunta.objects.filter(ativa=True):
-            respostas = self.respostas.filter(
-                pergunta__categoria=categoria, pergunta__tipo__in=["likert", "nps"]
-            )
-
-            if respostas.exists():
-                total = 0
-                count = 0
-                for resposta in respostas:
-                    try:
-                        valor = float(resposta.valor_numerico or resposta.valor_texto)
-                        total += valor
-                        count += 1
-                    except (ValueError, TypeError):
-                        continue
-
-                if count > 0:
-                    categorias[categoria.nome] = round(total / count, 2)
-
-        return categorias
+        medias = AvaliacaoDocente.objects.filter(pk=self.pk).medias_por_categoria()
+        return medias.get(self.pk, {})
 
 
 class RespostaAvaliacao(models.Model):
@@ -642,6 +656,15 @@ class RespostaAvaliacao(models.Model):
     # Para controle de sessão anônima
     session_key = models.CharField(max_length=40, blank=True)
 
+    # Envio a que a resposta pertence (ver SubmissaoAvaliacao)
+    submissao = models.ForeignKey(
+        "SubmissaoAvaliacao",
+        on_delete=models.CASCADE,
+        related_name="respostas",
+        null=True,
+        blank=True,
+    )
+
     class Meta:
         unique_together = ["avaliacao", "aluno", "pergunta", "session_key"]
         ordering = ["data_resposta"]
@@ -679,6 +702,346 @@ class RespostaAvaliacao(models.Model):
             return self.valor_texto or "Sem resposta"
 
 
+class SubmissaoAvaliacao(models.Model):
+    """
+    Envio do formulário de uma avaliação por um aluno.
+
+    A restrição única (avaliacao, chave_aluno) garante no banco um único
+    envio por aluno: o envio grava esta linha antes das respostas, na mesma
+    transação, e um envio concorrente ou repetido falha com IntegrityError
+    em vez de duplicar respostas. chave_aluno é um HMAC (com a SECRET_KEY)
+    de avaliação e aluno, preenchido também nos envios anônimos, que não
+    guardam o aluno. O token vem do formulário (campo oculto), de modo que
+    o reenvio do mesmo formulário é reconhecido como tal.
+
+    As respostas fechadas (likert, nps, sim_nao, multipla_escolha) ficam
+    compactadas na própria submissão: perguntas guarda os ids das perguntas
+    respondidas, na ordem do questionário, e valores os valores na mesma
+    posição (int, bool ou texto da opção). Apenas o texto livre continua em
+    RespostaAvaliacao (busca e comentários). RespostaUnificada expõe as duas
+    formas como uma linha por pergunta; ver avaliacao_docente.submissoes.
+    """
+
+    avaliacao = models.ForeignKey(
+        AvaliacaoDocente, on_delete=models.CASCADE, related_name="submissoes"
+    )
+    aluno = models.ForeignKey(
+        PerfilAluno,
+        on_delete=models.CASCADE,
+        related_name="submissoes",
+        null=True,  # Envios anônimos (sem aluno) não são restringidos
+        blank=True,
+    )
+    # Identifica o aluno sem guardá-lo (ver calcular_chave_aluno); vazio só
+    # nos envios anônimos anteriores a este campo
+    chave_aluno = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    enviada_em = models.DateTimeField(auto_now_add=True)
+    anonima = models.BooleanField(default=False)
+
+    # Respostas fechadas compactadas: valores[i] responde perguntas[i]
+    perguntas = models.JSONField(default=list, blank=True)
+    valores = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["avaliacao", "aluno"], name="submissao_unica_por_aluno"
+            ),
+            models.UniqueConstraint(
+                fields=["avaliacao", "chave_aluno"],
+                condition=models.Q(chave_aluno__isnull=False),
+                name="submissao_unica_por_chave_aluno",
+            ),
+        ]
+        verbose_name = "Submissão de Avaliação"
+        verbose_name_plural = "Submissões de Avaliação"
+
+    def __str__(self):
+        return f"{self.aluno or 'Anônimo'} - {self.avaliacao}"
+
+    @staticmethod
+    def calcular_chave_aluno(avaliacao_id, aluno_id):
+        """HMAC-SHA256 de (avaliação, aluno): não revela o aluno sem a SECRET_KEY"""
+        return salted_hmac(
+            "avaliacao_docente.SubmissaoAvaliacao.chave_aluno",
+            f"{avaliacao_id}:{aluno_id}",
+            algorithm="sha256",
+        ).hexdigest()
+
+    def preencher_chave_aluno(self, aluno=None):
+        """
+        Define chave_aluno a partir do aluno informado (envios anônimos) ou
+        do aluno da submissão.
+        """
+        aluno_id = aluno.pk if aluno is not None else self.aluno_id
+        if aluno_id is not None:
+            self.chave_aluno = self.calcular_chave_aluno(self.avaliacao_id, aluno_id)
+
+    def save(self, *args, **kwargs):
+        if self.chave_aluno is None:
+            self.preencher_chave_aluno()
+        super().save(*args, **kwargs)
+
+
+class RespostaUnificada(models.Model):
+    """
+    Uma linha por pergunta respondida, como em RespostaAvaliacao.
+
+    Modelo somente leitura sobre a view criada pela migration 0017: une as
+    linhas de RespostaAvaliacao (texto livre e respostas ainda não
+    compactadas) às respostas compactadas em SubmissaoAvaliacao, expandidas
+    pelo banco. Código que lê respostas por pergunta (médias, visualização,
+    feed) usa este modelo; a gravação é feita por
+    avaliacao_docente.submissoes.gravar_submissao.
+    """
+
+    # "r<id da resposta>" ou "s<id da submissão>.<posição>"
+    id = models.CharField(max_length=40, primary_key=True)
+    resposta_id = models.BigIntegerField(null=True)
+    submissao = models.ForeignKey(
+        SubmissaoAvaliacao, on_delete=models.DO_NOTHING, related_name="+", null=True
+    )
+    avaliacao = models.ForeignKey(
+        AvaliacaoDocente, on_delete=models.DO_NOTHING, related_name="+"
+    )
+    aluno = models.ForeignKey(
+        PerfilAluno, on_delete=models.DO_NOTHING, related_name="+", null=True
+    )
+    pergunta = models.ForeignKey(
+        PerguntaAvaliacao, on_delete=models.DO_NOTHING, related_name="+"
+    )
+    valor_texto = models.TextField(blank=True)
+    valor_numerico = models.IntegerField(null=True)
+    valor_boolean = models.BooleanField(null=True)
+    data_resposta = models.DateTimeField()
+    anonima = models.BooleanField(default=False)
+
+    class Meta:
+        managed = False
+        db_table = "avaliacao_docente_resposta_unificada"
+        verbose_name = "Resposta (unificada)"
+        verbose_name_plural = "Respostas (unificadas)"
+
+    valor_display = RespostaAvaliacao.valor_display
+
+
+class HistogramaResposta(models.Model):
+    """
+    Histograma agregado das respostas de uma pergunta em uma avaliação.
+
+    Mantido incrementalmente quando respostas são gravadas (ver
+    avaliacao_docente.histogramas) e reconstruível a partir de
+    RespostaAvaliacao pelo comando rebuild_answer_histograms.
+
+    contagens mapeia o valor da resposta para a quantidade:
+        - likert/nps: "1".."5" / "0".."10"
+        - sim_nao: "Sim" / "Não"
+        - multipla_escolha: texto da opção
+        - texto_livre: vazio (apenas total é contabilizado)
+    """
+
+    avaliacao = models.ForeignKey(
+        AvaliacaoDocente, on_delete=models.CASCADE, related_name="histogramas"
+    )
+    pergunta = models.ForeignKey(
+        PerguntaAvaliacao, on_delete=models.CASCADE, related_name="histogramas"
+    )
+    total = models.PositiveIntegerField(default=0)
+    soma = models.BigIntegerField(default=0)  # Soma dos valores numéricos
+    contagens = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        unique_together = ["avaliacao", "pergunta"]
+        verbose_name = "Histograma de Respostas"
+        verbose_name_plural = "Histogramas de Respostas"
+
+    def __str__(self):
+        return f"{self.avaliacao_id}/{self.pergunta_id}: {self.total} respostas"
+
+    def _valores_numericos(self):
+        """Pares (valor, quantidade) numéricos, em ordem crescente de valor"""
+        return sorted(
+            (int(valor), quantidade)
+            for valor, quantidade in self.contagens.items()
+            if valor.lstrip("-").isdigit() and quantidade
+        )
+
+    @property
+    def media(self):
+        """Média dos valores numéricos (None se não houver)"""
+        quantidade = sum(q for _, q in self._valores_numericos())
+        return round(self.soma / quantidade, 2) if quantidade else None
+
+    @property
+    def moda(self):
+        """Valor mais frequente (o menor, em caso de empate)"""
+        if not self.contagens:
+            return None
+        maior = max(self.contagens.values())
+        valores = [v for v, q in self.contagens.items() if q == maior]
+        numericos = [int(v) for v in valores if v.lstrip("-").isdigit()]
+        return min(numericos) if numericos else valores[0]
+
+    @property
+    def mediana(self):
+        """Mediana dos valores numéricos (None se não houver)"""
+        valores = self._valores_numericos()
+        quantidade = sum(q for _, q in valores)
+        if not quantidade:
+            return None
+
+        def elemento(posicao):
+            acumulado = 0
+            for valor, q in valores:
+                acumulado += q
+                if acumulado > posicao:
+                    return valor
+
+        meio = quantidade // 2
+        if quantidade % 2:
+            return elemento(meio)
+        return (elemento(meio - 1) + elemento(meio)) / 2
+
+
+class RelatorioCicloSnapshot(models.Model):
+    """
+    Relatório congelado de um ciclo encerrado.
+
+    Guarda o resumo (linhas e gráficos de relatorio_avaliacoes) e, em
+    separado, os detalhes por avaliação (estatísticas e comentários), ambos
+    como JSON comprimido (zlib). Gerado ao encerrar o ciclo ou na primeira
+    visita ao relatório; ver avaliacao_docente.relatorios.
+    """
+
+    ciclo = models.OneToOneField(
+        CicloAvaliacao, on_delete=models.CASCADE, related_name="relatorio_snapshot"
+    )
+    versao = models.PositiveSmallIntegerField(default=1)
+    dados = models.BinaryField()
+    detalhes = models.BinaryField(default=b"")
+    gerado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Snapshot de Relatório do Ciclo"
+        verbose_name_plural = "Snapshots de Relatórios dos Ciclos"
+
+    def __str__(self):
+        return f"Relatório de {self.ciclo_id} ({len(self.dados)} bytes)"
+
+
+class RankingProfessor(models.Model):
+    """
+    Posição de um professor entre os professores do mesmo curso e período
+    letivo em um ciclo, pela média das respostas numéricas (Likert/NPS).
+
+    Calculado em lote por avaliacao_docente.ranking.calcular_ranking; as
+    páginas de relatório apenas leem esta tabela.
+    """
+
+    ciclo = models.ForeignKey(
+        CicloAvaliacao, on_delete=models.CASCADE, related_name="rankings"
+    )
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name="+")
+    periodo_letivo = models.ForeignKey(
+        PeriodoLetivo, on_delete=models.CASCADE, related_name="+"
+    )
+    professor = models.ForeignKey(
+        PerfilProfessor, on_delete=models.CASCADE, related_name="rankings"
+    )
+    media = models.FloatField()
+    respostas = models.PositiveIntegerField()
+    avaliacoes = models.PositiveIntegerField()
+    # PERCENT_RANK * 100: % de professores do grupo com média menor
+    percentil = models.FloatField()
+    professores_no_grupo = models.PositiveIntegerField()
+    calculado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ["ciclo", "curso", "periodo_letivo", "professor"]
+        indexes = [models.Index(fields=["ciclo", "professor"])]
+        verbose_name = "Ranking de Professor"
+        verbose_name_plural = "Rankings de Professores"
+
+    def __str__(self):
+        return f"{self.professor} - {self.curso} ({self.percentil:.0f}º percentil)"
+
+
+class Job(models.Model):
+    """
+    Tarefa executada em segundo plano pelo worker (manage.py run_jobs).
+
+    A fila é a própria tabela: o worker reserva tarefas pendentes com
+    select_for_update(skip_locked=True), sem broker externo. O arquivo gerado
+    fica no banco, em partes (ParteResultadoJob); ver avaliacao_docente.jobs.
+    """
+
+    STATUS_CHOICES = [
+        ("pendente", "Pendente"),
+        ("executando", "Executando"),
+        ("concluido", "Concluído"),
+        ("falhou", "Falhou"),
+    ]
+
+    tipo = models.CharField(max_length=50)
+    parametros = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=15, choices=STATUS_CHOICES, default="pendente")
+    progresso = models.PositiveSmallIntegerField(default=0)  # 0 a 100
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    erro = models.TextField(blank=True)
+
+    # Resultado (o conteúdo fica em ParteResultadoJob)
+    nome_arquivo = models.CharField(max_length=255, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+
+    # Metadados
+    criado_por = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="jobs"
+    )
+    criado_em = models.DateTimeField(auto_now_add=True)
+    iniciado_em = models.DateTimeField(null=True, blank=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["criado_em"]
+        indexes = [models.Index(fields=["status", "criado_em"])]
+        verbose_name = "Job"
+        verbose_name_plural = "Jobs"
+
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def finalizado(self):
+        return self.status in ("concluido", "falhou")
+
+
+class ParteResultadoJob(models.Model):
+    """
+    Trecho do arquivo gerado por um Job, na ordem de gravação.
+
+    O arquivo é gravado e baixado parte a parte: nem o worker nem a
+    view de download mantêm o arquivo inteiro em memória.
+    """
+
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name="partes")
+    ordem = models.PositiveIntegerField()
+    conteudo = models.BinaryField()
+
+    class Meta:
+        ordering = ["job", "ordem"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["job", "ordem"], name="parte_resultado_job_unica"
+            )
+        ]
+        verbose_name = "Parte do Resultado de Job"
+        verbose_name_plural = "Partes do Resultado de Jobs"
+
+    def __str__(self):
+        return f"Job #{self.job_id} - parte {self.ordem}"
+
+
 class ConfiguracaoSite(models.Model):
     """Modelo para armazenar configurações globais do site. Singleton."""
 
@@ -0,0 +1,255 @@
+"""
+Esquema compilado dos questionários para o formulário de resposta.
+
+Cada GET e POST de responder_avaliacao consultava QuestionarioPergunta e as
+perguntas do questionário, e RespostaAvaliacaoForm montava os campos do zero
+a cada requisição. Este módulo compila uma vez por questionário um esquema
+imutável (perguntas, tipos, obrigatoriedade, opções, faixas de valores e os
+campos do formulário) e o mantém em cache em dois níveis:
+
+    1. Em um dicionário local ao processo (o esquema compilado)
+    2. No backend de cache do Django (os dados das perguntas, compartilhados
+       entre processos)
+
+As entradas são indexadas pela versão do questionário: o campo
+QuestionarioAvaliacao.atualizado_em, lido do banco junto com o ciclo. Os
+signals chamam invalidar_esquema() sempre que as perguntas de um questionário
+mudam (editar_questionario_perguntas, Django admin ou qualquer outro ponto);
+a versão nova é gravada na mesma transação da edição e vale para todos os
+processos a partir do COMMIT, qualquer que seja o backend de cache. Com o
+cache aquecido, exibir e validar um formulário não consulta as perguntas.
+
+Uso:
+    from avaliacao_docente.questionarios import esquema_questionario
+
+    esquema = esquema_questionario(ciclo.questionario)
+    for pergunta in esquema.perguntas:
+        pergunta.enunciado, pergunta.campo, pergunta.faixa
+"""
+
+import copy
+from types import MappingProxyType
+
+from django import forms
+from django.core.cache import cache
+from django.utils import timezone
+
+ESQUEMA_CACHE_TIMEOUT = 60 * 60 * 24
+LOCAL_CACHE_MAX_ENTRIES = 500
+
+# Valores aceitos nas perguntas de escala
+FAIXAS_ESCALA = {"likert": range(1, 6), "nps": range(11)}
+
+ROTULOS_LIKERT = (
+    (1, "1 - Discordo totalmente"),
+    (2, "2 - Discordo parcialmente"),
+    (3, "3 - Neutro"),
+    (4, "4 - Concordo parcialmente"),
+    (5, "5 - Concordo totalmente"),
+)
+
+_CAMPOS_PERGUNTA = (
+    "pergunta_id",
+    "ordem_no_questionario",
+    "pergunta__enunciado",
+    "pergunta__tipo",
+    "pergunta__obrigatoria",
+    "pergunta__categoria_id",
+    "pergunta__categoria__nome",
+    "pergunta__opcoes_multipla_escolha",
+)
+
+_local_cache = {}
+
+
+class _Imutavel:
+    """Base dos objetos do esquema: atributos definidos só na criação"""
+
+    __slots__ = ()
+
+    def _definir(self, **valores):
+        for nome, valor in valores.items():
+            object.__setattr__(self, nome, valor)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} é imutável")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} é imutável")
+
+
+class PerguntaCompilada(_Imutavel):
+    """
+    Pergunta de um questionário, como exibida e validada no formulário.
+
+    faixa: valores aceitos (perguntas de escala) ou None
+    categoria: nome da categoria (vazio se não houver)
+    """
+
+    __slots__ = (
+        "id",
+        "ordem",
+        "enunciado",
+        "tipo",
+        "obrigatoria",
+        "categoria_id",
+        "categoria",
+        "opcoes_multipla_escolha",
+        "campo",
+        "faixa",
+    )
+
+    def __init__(
+        self, id, ordem, enunciado, tipo, obrigatoria, categoria_id, categoria, opcoes
+    ):
+        self._definir(
+            id=id,
+            ordem=ordem,
+            enunciado=enunciado,
+            tipo=tipo,
+            obrigatoria=obrigatoria,
+            categoria_id=categoria_id,
+            categoria=categoria or "",
+            opcoes_multipla_escolha=tuple(opcoes or ()),
+            campo=f"pergunta_{id}",
+            faixa=FAIXAS_ESCALA.get(tipo),
+        )
+
+    def modelo(self):
+        """
+        PerguntaAvaliacao não consultada, com os campos do esquema (para
+        atribuir a RespostaAvaliacao.pergunta). Um objeto novo por chamada.
+        """
+        from .models import PerguntaAvaliacao
+
+        return PerguntaAvaliacao(
+            id=self.id,
+            enunciado=self.enunciado,
+            tipo=self.tipo,
+            obrigatoria=self.obrigatoria,
+            categoria_id=self.categoria_id,
+            opcoes_multipla_escolha=list(self.opcoes_multipla_escolha) or None,
+        )
+
+
+class EsquemaQuestionario(_Imutavel):
+    """
+    Esquema compilado de um questionário.
+
+    perguntas: PerguntaCompilada na ordem do questionário
+    campos: Campos de formulário por nome (protótipos: copiar antes de usar)
+    por_campo: PerguntaCompilada por nome de campo
+    """
+
+    __slots__ = ("questionario_id", "versao", "perguntas", "campos", "por_campo")
+
+    def __init__(self, questionario_id, versao, linhas):
+        perguntas = tuple(PerguntaCompilada(*linha) for linha in linhas)
+        campos = {}
+        for pergunta in perguntas:
+            campo = _campo_formulario(pergunta)
+            if campo is not None:
+                campos[pergunta.campo] = campo
+        self._definir(
+            questionario_id=questionario_id,
+            versao=versao,
+            perguntas=perguntas,
+            campos=MappingProxyType(campos),
+            por_campo=MappingProxyType({p.campo: p for p in perguntas}),
+        )
+
+    def campos_formulario(self):
+        """Cópias dos campos, para os fields de um formulário"""
+        return {nome: copy.deepcopy(campo) for nome, campo in self.campos.items()}
+
+
+def _campo_formulario(pergunta):
+    """Campo de RespostaAvaliacaoForm para a pergunta (ou None)"""
+    if pergunta.tipo == "likert":
+        choices = ROTULOS_LIKERT
+    elif pergunta.tipo == "nps":
+        choices = [(i, str(i)) for i in FAIXAS_ESCALA["nps"]]
+    elif pergunta.tipo == "sim_nao":
+        choices = [("true", "Sim"), ("false", "Não")]
+    elif pergunta.tipo == "multipla_escolha":
+        if not pergunta.opcoes_multipla_escolha:
+            return None
+        choices = [(opcao, opcao) for opcao in pergunta.opcoes_multipla_escolha]
+    else:  # texto_livre
+        return forms.CharField(
+            label=pergunta.enunciado,
+            widget=forms.Textarea(attrs={"class": "form-control", "rows": 3}),
+            required=pergunta.obrigatoria,
+        )
+
+    return forms.ChoiceField(
+        label=pergunta.enunciado,
+        choices=choices,
+        widget=forms.RadioSelect(attrs={"class": "form-check-input"}),
+        required=pergunta.obrigatoria,
+    )
+
+
+def invalidar_esquema(*questionario_ids):
+    """
+    Descarta o esquema compilado dos questionários informados.
+
+    Deve ser chamada sempre que perguntas de um questionário mudarem. A
+    versão (atualizado_em) é gravada na transação corrente: os outros
+    processos passam a compilar o esquema novo assim que ela é confirmada.
+    """
+    from .models import QuestionarioAvaliacao
+
+    questionario_ids = set(questionario_ids)
+    if not questionario_ids:
+        return
+    QuestionarioAvaliacao.objects.filter(pk__in=questionario_ids).update(
+        atualizado_em=timezone.now()
+    )
+    for questionario_id in questionario_ids:
+        _local_cache.pop(questionario_id, None)
+
+
+def _carregar_linhas(questionario_id):
+    """Dados das perguntas do questionário (1 query)"""
+    from .models import QuestionarioPergunta
+
+    return [
+        tuple(linha)
+        for linha in QuestionarioPergunta.objects.filter(
+            questionario_id=questionario_id
+        )
+        .order_by("ordem_no_questionario", "id")
+        .values_list(*_CAMPOS_PERGUNTA)
+    ]
+
+
+def esquema_questionario(questionario):
+    """
+    Retorna o EsquemaQuestionario, consultando as perguntas apenas em cache
+    miss.
+
+    Args:
+        questionario: QuestionarioAvaliacao lido do banco (a versão do
+            esquema é o seu atualizado_em)
+    """
+    questionario_id = questionario.pk
+    versao = questionario.atualizado_em
+    esquema = _local_cache.get(questionario_id)
+    if esquema is not None and esquema.versao == versao:
+        return esquema
+
+    chave = (
+        f"avaliacao_docente:questionarios:{questionario_id}:"
+        f"{versao.timestamp():.6f}"
+    )
+    linhas = cache.get(chave)
+    if linhas is None:
+        linhas = _carregar_linhas(questionario_id)
+        cache.set(chave, linhas, ESQUEMA_CACHE_TIMEOUT)
+
+    esquema = EsquemaQuestionario(questionario_id, versao, linhas)
+    if len(_local_cache) >= LOCAL_CACHE_MAX_ENTRIES:
+        _local_cache.clear()
+    _local_cache[questionario_id] = esquema
+    return esquema
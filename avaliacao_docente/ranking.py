@@ -0,0 +1,141 @@
+"""
+Ranking percentual dos professores dentro do mesmo curso e período letivo.
+
+calcular_ranking() calcula, para um ciclo, a média de cada professor por
+(curso, período letivo) a partir dos histogramas e a posição relativa com
+PERCENT_RANK() OVER (PARTITION BY curso, período ORDER BY média), tudo em
+uma única query. Bancos sem funções de janela usam percentis_rank(), que
+calcula o mesmo valor em Python ordenando cada grupo uma vez.
+
+O resultado é gravado em RankingProfessor (as linhas antigas do ciclo são
+substituídas), e as páginas de relatório só fazem join com essa tabela.
+
+Uso:
+    from avaliacao_docente.ranking import calcular_ranking
+
+    calcular_ranking(ciclo)
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count, F, FloatField, Sum, Window
+from django.db.models.functions import Cast, PercentRank
+
+from .estatisticas import ESCALAS
+
+_PARTICAO = ("curso_id", "periodo_letivo_id")
+
+
+def percentis_rank(medias):
+    """
+    PERCENT_RANK de cada valor: (valores menores) / (n - 1); 0 se n = 1.
+
+    Args:
+        medias: Lista de médias de um grupo
+
+    Retorna:
+        list[float]: Na mesma ordem de medias
+    """
+    if len(medias) < 2:
+        return [0.0] * len(medias)
+    ordenadas = sorted(medias)
+    divisor = len(medias) - 1
+    return [bisect_left(ordenadas, media) / divisor for media in medias]
+
+
+def _medias_por_professor(ciclo):
+    """Média por (curso, período letivo, professor) no ciclo"""
+    from .models import HistogramaResposta
+
+    return (
+        HistogramaResposta.objects.filter(
+            avaliacao__ciclo=ciclo, pergunta__tipo__in=tuple(ESCALAS), total__gt=0
+        )
+        .order_by()
+        .values(
+            curso_id=F("avaliacao__disciplina__curso_id"),
+            periodo_letivo_id=F("avaliacao__disciplina__periodo_letivo_id"),
+            professor_id=F("avaliacao__professor_id"),
+        )
+        .annotate(
+            soma_respostas=Sum("soma"),
+            respostas=Sum("total"),
+            avaliacoes=Count("avaliacao", distinct=True),
+        )
+        .annotate(media=Cast("soma_respostas", FloatField()) / F("respostas"))
+    )
+
+
+def _com_percent_rank(linhas):
+    """PERCENT_RANK e tamanho do grupo calculados pelo banco"""
+    particao = [F(campo) for campo in _PARTICAO]
+    return list(
+        linhas.annotate(
+            percent_rank=Window(
+                PercentRank(), partition_by=particao, order_by=F("media").asc()
+            ),
+            professores_no_grupo=Window(Count("*"), partition_by=particao),
+        )
+    )
+
+
+def _com_percent_rank_python(linhas):
+    """Mesmo resultado de _com_percent_rank, calculado em Python"""
+    linhas = list(linhas)
+    grupos = defaultdict(list)
+    for linha in linhas:
+        grupos[tuple(linha[campo] for campo in _PARTICAO)].append(linha)
+
+    for grupo in grupos.values():
+        ranks = percentis_rank([linha["media"] for linha in grupo])
+        for linha, rank in zip(grupo, ranks):
+            linha["percent_rank"] = rank
+            linha["professores_no_grupo"] = len(grupo)
+    return linhas
+
+
+def calcular_ranking(ciclo):
+    """
+    Recalcula o ranking dos professores de um ciclo.
+
+    Professores sem respostas numéricas no ciclo ficam fora do ranking.
+
+    Retorna:
+        int: Número de linhas gravadas em RankingProfessor
+    """
+    from .models import RankingProfessor
+
+    linhas = _medias_por_professor(ciclo)
+    if connection.features.supports_over_clause:
+        linhas = _com_percent_rank(linhas)
+    else:
+        linhas = _com_percent_rank_python(linhas)
+
+    rankings = [
+        RankingProfessor(
+            ciclo=ciclo,
+            curso_id=linha["curso_id"],
+            periodo_letivo_id=linha["periodo_letivo_id"],
+            professor_id=linha["professor_id"],
+            media=round(linha["media"], 2),
+            respostas=linha["respostas"],
+            avaliacoes=linha["avaliacoes"],
+            percentil=round(linha["percent_rank"] * 100, 2),
+            professores_no_grupo=linha["professores_no_grupo"],
+        )
+        for linha in linhas
+    ]
+
+    with transaction.atomic():
+        RankingProfessor.objects.filter(ciclo=ciclo).delete()
+        RankingProfessor.objects.bulk_create(rankings)
+    return len(rankings)
+
+
+def ranking_job(job):
+    """Job "ranking_professores": recalcula o ranking do ciclo do job"""
+    from .models import CicloAvaliacao
+
+    calcular_ranking(CicloAvaliacao.objects.get(pk=job.parametros["ciclo"]))
@@ -0,0 +1,914 @@
+"""
+Dados do relatório de avaliações (relatorio_avaliacoes) e snapshots de ciclos.
+
+O relatório tem duas partes:
+
+    - resumo: uma linha serializável (dict) por avaliação, paginada na
+      página do relatório, mais os dados dos gráficos por ciclo;
+    - detalhes: estatísticas por pergunta e comentários de uma avaliação,
+      carregados sob demanda (comentários paginados por cursor).
+
+Depois que um ciclo é encerrado as respostas não mudam mais, então as duas
+partes são congeladas em um RelatorioCicloSnapshot (JSON comprimido com
+zlib) e lidas diretamente nas visitas seguintes.
+
+Uso:
+    from avaliacao_docente.relatorios import obter_snapshots
+
+    dados = obter_snapshots([ciclo])[ciclo.id]
+    dados["linhas"], dados["graficos"][""]
+"""
+
+import binascii
+import csv
+import hashlib
+import json
+import zlib
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import Counter, defaultdict
+from datetime import datetime
+from itertools import islice
+
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum, Window
+from django.db.models.functions import RowNumber
+from django.utils.dateparse import parse_datetime
+
+from .estatisticas import ESCALAS, estatisticas_por_pergunta
+
+# Incrementar quando a estrutura das linhas/gráficos mudar: snapshots de
+# versões anteriores são regerados na próxima leitura
+VERSAO_SNAPSHOT = 4
+
+# Chave dos gráficos do ciclo sem filtro de professor
+GRAFICO_GERAL = ""
+
+AVALIACOES_POR_PAGINA = 20
+COMENTARIOS_POR_PAGINA = 20
+
+
+def resumo_avaliacoes(avaliacoes):
+    """
+    Linhas de resumo do relatório (sem estatísticas por pergunta).
+
+    Duas queries, independentemente do número de avaliações: avaliações
+    com participação e soma das respostas numéricas (histogramas).
+
+    Args:
+        avaliacoes: Queryset de AvaliacaoDocente
+
+    Retorna:
+        list[dict]: Uma linha serializável por avaliação
+    """
+    from .models import HistogramaResposta, RankingProfessor
+
+    # Percentil do professor entre os do mesmo curso/período (ver ranking.py)
+    percentil = RankingProfessor.objects.filter(
+        ciclo=OuterRef("ciclo"),
+        professor=OuterRef("professor"),
+        curso=OuterRef("disciplina__curso"),
+        periodo_letivo=OuterRef("disciplina__periodo_letivo"),
+    ).values("percentil")[:1]
+
+    dados = list(
+        avaliacoes.with_participation()
+        .annotate(percentil_curso=Subquery(percentil))
+        .order_by("-data_criacao", "-pk")
+        .values(
+            "id",
+            "ciclo_id",
+            "professor_id",
+            "data_criacao",
+            "professor__user__first_name",
+            "professor__user__last_name",
+            "turma__disciplina__disciplina_nome",
+            "turma__codigo_turma",
+            "turma__disciplina__periodo_letivo__nome",
+            "alunos_aptos_count",
+            "respondentes_count",
+            "percentil_curso",
+        )
+    )
+    if not dados:
+        return []
+
+    # Soma e quantidade das respostas numéricas por avaliação, para a média
+    numericas = {
+        avaliacao_id: (soma, quantidade)
+        for avaliacao_id, soma, quantidade in HistogramaResposta.objects.filter(
+            avaliacao__in=avaliacoes.values("pk"),
+            pergunta__tipo__in=tuple(ESCALAS),
+        )
+        .values("avaliacao_id")
+        .annotate(soma_total=Sum("soma"), quantidade=Sum("total"))
+        .order_by()
+        .values_list("avaliacao_id", "soma_total", "quantidade")
+    }
+
+    linhas = []
+    for linha in dados:
+        respondentes = linha["respondentes_count"]
+        total_alunos = linha["alunos_aptos_count"]
+        taxa_resposta = (respondentes / total_alunos * 100) if total_alunos > 0 else 0
+        nome = "%s %s" % (
+            linha["professor__user__first_name"],
+            linha["professor__user__last_name"],
+        )
+        soma_numerica, qtd_numerica = numericas.get(linha["id"], (0, 0))
+        linhas.append(
+            {
+                "id": linha["id"],
+                "ciclo_id": linha["ciclo_id"],
+                "professor_id": linha["professor_id"],
+                "data_criacao": linha["data_criacao"],
+                "professor_nome": nome.strip(),
+                "disciplina_nome": linha["turma__disciplina__disciplina_nome"],
+                "codigo_turma": linha["turma__codigo_turma"],
+                "periodo_nome": linha["turma__disciplina__periodo_letivo__nome"],
+                "total_alunos": total_alunos,
+                "respondentes": respondentes,
+                "taxa_resposta": round(taxa_resposta, 1),
+                "soma_numerica": soma_numerica,
+                "qtd_numerica": qtd_numerica,
+                "percentil_curso": linha["percentil_curso"],
+            }
+        )
+
+    return linhas
+
+
+def media_geral(linhas, avaliacoes=None):
+    """
+    Média simples das respostas numéricas.
+
+    Args:
+        linhas: Linhas de resumo já montadas (ex.: de snapshots)
+        avaliacoes: Queryset de avaliações a somar em SQL (opcional, 1 query)
+    """
+    from .models import HistogramaResposta
+
+    soma = sum(linha["soma_numerica"] for linha in linhas)
+    quantidade = sum(linha["qtd_numerica"] for linha in linhas)
+    if avaliacoes is not None:
+        totais = HistogramaResposta.objects.filter(
+            avaliacao__in=avaliacoes.values("pk"),
+            pergunta__tipo__in=tuple(ESCALAS),
+        ).aggregate(soma=Sum("soma"), quantidade=Sum("total"))
+        soma += totais["soma"] or 0
+        quantidade += totais["quantidade"] or 0
+
+    if not quantidade:
+        return 0
+    return round(soma / quantidade, 2)
+
+
+def estatisticas_avaliacoes(avaliacoes):
+    """
+    Estatísticas por pergunta de escala de cada avaliação.
+
+    Duas queries: histogramas e perguntas dos questionários.
+
+    Args:
+        avaliacoes: Queryset de AvaliacaoDocente
+
+    Retorna:
+        dict: avaliacao_id -> lista de estatísticas, na ordem do questionário
+    """
+    from .models import QuestionarioPergunta
+
+    questionario_por_avaliacao = dict(
+        avaliacoes.order_by().values_list("id", "ciclo__questionario_id")
+    )
+    stats_perguntas = estatisticas_por_pergunta(avaliacoes.values("pk"))
+
+    perguntas_por_questionario = defaultdict(list)
+    questionarios = QuestionarioPergunta.objects.filter(
+        questionario_id__in=set(questionario_por_avaliacao.values())
+    ).values_list("questionario_id", "pergunta_id", "pergunta__enunciado")
+    for questionario_id, pergunta_id, enunciado in questionarios:
+        perguntas_por_questionario[questionario_id].append((pergunta_id, enunciado))
+
+    resultado = {}
+    for avaliacao_id, questionario_id in questionario_por_avaliacao.items():
+        pergunta_stats = []
+        for pergunta_id, enunciado in perguntas_por_questionario[questionario_id]:
+            stats = stats_perguntas.get((avaliacao_id, pergunta_id))
+            if stats and stats.total:
+                pergunta_stats.append(
+                    {
+                        "enunciado": enunciado,
+                        "media": round(stats.media, 1),
+                        "moda": stats.moda,
+                        "mediana": stats.mediana,
+                        "desvio_padrao": stats.desvio_padrao,
+                        "top2box": stats.top2box,
+                        "nps": stats.nps,
+                        "respostas_count": stats.total,
+                    }
+                )
+        resultado[avaliacao_id] = pergunta_stats
+    return resultado
+
+
+# ============ COMENTÁRIOS (PAGINAÇÃO POR CURSOR) =============
+
+
+def codificar_cursor(comentario):
+    """Cursor opaco apontando para depois do comentário informado"""
+    texto = f"{comentario['data_resposta'].isoformat()}|{comentario['id']}"
+    return urlsafe_b64encode(texto.encode("utf-8")).decode("ascii")
+
+
+def decodificar_cursor(cursor):
+    """
+    Retorna (data_resposta, id) de um cursor de comentários.
+
+    Raises:
+        ValueError: Se o cursor for inválido
+    """
+    try:
+        texto = urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        data, pk = texto.rsplit("|", 1)
+        data_resposta = parse_datetime(data)
+        pk = int(pk)
+    except (ValueError, UnicodeError, binascii.Error) as erro:
+        raise ValueError("Cursor inválido") from erro
+    if data_resposta is None:
+        raise ValueError("Cursor inválido")
+    return data_resposta, pk
+
+
+def pagina_comentarios(comentarios, apos=None, limite=COMENTARIOS_POR_PAGINA):
+    """
+    Página de comentários ordenados por (data_resposta, id), após o cursor.
+
+    Args:
+        comentarios: Queryset de RespostaAvaliacao ou lista de dicts
+            {"id", "valor_texto", "data_resposta"} já ordenada
+        apos: Cursor retornado pela página anterior (opcional)
+        limite: Tamanho da página
+
+    Retorna:
+        tuple: (lista de comentários, cursor da próxima página ou None)
+    """
+    posicao = decodificar_cursor(apos) if apos else None
+
+    if isinstance(comentarios, list):
+        if posicao is not None:
+            comentarios = [
+                c for c in comentarios if (c["data_resposta"], c["id"]) > posicao
+            ]
+        pagina = comentarios[: limite + 1]
+    else:
+        if posicao is not None:
+            data_resposta, pk = posicao
+            comentarios = comentarios.filter(
+                Q(data_resposta__gt=data_resposta)
+                | Q(data_resposta=data_resposta, pk__gt=pk)
+            )
+        pagina = list(
+            comentarios.order_by("data_resposta", "pk").values(
+                "id", "valor_texto", "data_resposta"
+            )[: limite + 1]
+        )
+
+    proximo = codificar_cursor(pagina[limite - 1]) if len(pagina) > limite else None
+    return pagina[:limite], proximo
+
+
+def comentarios_avaliacao(avaliacao):
+    """Queryset dos comentários (respostas com texto) de uma avaliação"""
+    from .models import RespostaAvaliacao
+
+    return RespostaAvaliacao.objects.filter(avaliacao=avaliacao, valor_texto__gt="")
+
+
+# Ordem das perguntas nos gráficos: escalas, múltipla escolha, sim/não, texto
+_ORDEM_TIPOS = ("likert", "nps", "multipla_escolha", "sim_nao", "texto_livre")
+
+
+def _histogramas_graficos(ciclos, professor_id=None):
+    """Histogramas não vazios dos ciclos (1 query)"""
+    from .models import HistogramaResposta
+
+    histogramas = HistogramaResposta.objects.filter(
+        avaliacao__ciclo__in=ciclos, total__gt=0
+    )
+    if professor_id:
+        histogramas = histogramas.filter(avaliacao__professor_id=professor_id)
+    return histogramas.order_by("pergunta_id").values_list(
+        "avaliacao__ciclo_id",
+        "avaliacao__professor_id",
+        "pergunta_id",
+        "pergunta__enunciado",
+        "pergunta__tipo",
+        "total",
+        "soma",
+        "contagens",
+    )
+
+
+def _montar_grafico(ciclo, histogramas):
+    """
+    Soma os histogramas de um ciclo por pergunta e monta os dados do gráfico.
+
+    Retorna None se não houver respostas.
+    """
+    perguntas = {}
+    for _, _, pergunta_id, enunciado, tipo, total, soma, contagens in histogramas:
+        if pergunta_id not in perguntas:
+            perguntas[pergunta_id] = [enunciado, tipo, 0, 0, Counter()]
+        acumulado = perguntas[pergunta_id]
+        acumulado[2] += total
+        acumulado[3] += soma
+        acumulado[4].update(contagens)
+
+    if not perguntas:
+        return None
+
+    perguntas_data = []
+    for pergunta_id, (enunciado, tipo, total, soma, contagens) in sorted(
+        perguntas.items(), key=lambda item: (_ORDEM_TIPOS.index(item[1][1]), item[0])
+    ):
+        media = "N/A"
+        if tipo in ESCALAS:
+            valores = {str(valor): contagens[str(valor)] for valor in ESCALAS[tipo]}
+            media = round(soma / total, 2)
+        elif tipo == "multipla_escolha":
+            valores = Counter()
+            for opcao, quantidade in contagens.items():
+                valores[opcao[:30] + "..." if len(opcao) > 30 else opcao] += quantidade
+            valores = dict(valores)
+        elif tipo == "sim_nao":
+            valores = {"Sim": contagens["Sim"], "Não": contagens["Não"]}
+        else:  # texto_livre
+            valores = {"Total de respostas": total}
+
+        perguntas_data.append(
+            {
+                "id": pergunta_id,
+                "enunciado": enunciado,
+                "tipo": tipo,
+                "contagens": valores,
+                "media": media,
+            }
+        )
+
+    return {"id": ciclo.id, "nome": ciclo.nome, "perguntas": perguntas_data}
+
+
+def graficos_ciclos(ciclos, professor_id=None):
+    """
+    Dados dos gráficos dos ciclos (contagens por valor de cada pergunta).
+
+    Lidos dos histogramas de respostas em uma única query.
+
+    Args:
+        ciclos: Lista de CicloAvaliacao
+        professor_id: Restringe às avaliações do professor (opcional)
+
+    Retorna:
+        dict: ciclo_id -> {"id", "nome", "perguntas"}; ciclos sem respostas
+        ficam de fora
+    """
+    if not ciclos:
+        return {}
+
+    por_ciclo = defaultdict(list)
+    for histograma in _histogramas_graficos(ciclos, professor_id):
+        por_ciclo[histograma[0]].append(histograma)
+
+    resultado = {}
+    for ciclo in ciclos:
+        grafico = _montar_grafico(ciclo, por_ciclo[ciclo.id])
+        if grafico is not None:
+            resultado[ciclo.id] = grafico
+    return resultado
+
+
+# ============ API DE GRÁFICOS POR CICLO =============
+
+# Incrementar quando o formato de grafico_colunar mudar (invalida as ETags)
+VERSAO_GRAFICOS = 1
+
+
+def grafico_colunar(ciclo, grafico):
+    """
+    Converte os dados do gráfico de um ciclo para o formato colunar da API.
+
+    Cada conjunto de rótulos (ex.: 1-5 das perguntas likert) é enviado uma
+    única vez em "rotulos"; cada pergunta guarda apenas o índice do seu
+    conjunto e as contagens como lista de inteiros, na mesma ordem.
+
+    Args:
+        ciclo: CicloAvaliacao
+        grafico: Resultado de _montar_grafico (None se não houver respostas)
+
+    Retorna:
+        dict: {"ciclo": {"id", "nome"}, "rotulos": [[...]], "perguntas":
+        {"id": [...], "enunciado": [...], "tipo": [...], "media": [...],
+        "rotulos": [...], "contagens": [[...]]}}
+    """
+    rotulos = []
+    indices = {}
+    colunas = {
+        campo: [] for campo in ("id", "enunciado", "tipo", "media", "rotulos")
+    }
+    colunas["contagens"] = []
+
+    for pergunta in grafico["perguntas"] if grafico else ():
+        chave = tuple(pergunta["contagens"])
+        if chave not in indices:
+            indices[chave] = len(rotulos)
+            rotulos.append(list(chave))
+        colunas["id"].append(pergunta["id"])
+        colunas["enunciado"].append(pergunta["enunciado"])
+        colunas["tipo"].append(pergunta["tipo"])
+        colunas["media"].append(
+            None if pergunta["media"] == "N/A" else pergunta["media"]
+        )
+        colunas["rotulos"].append(indices[chave])
+        colunas["contagens"].append(list(pergunta["contagens"].values()))
+
+    return {
+        "ciclo": {"id": ciclo.id, "nome": ciclo.nome},
+        "rotulos": rotulos,
+        "perguntas": colunas,
+    }
+
+
+def grafico_ciclo(ciclo, professor_id=None):
+    """
+    Gráfico de um ciclo no formato colunar (ver grafico_colunar).
+
+    Ciclos encerrados são lidos do snapshot; os abertos, dos histogramas.
+    """
+    if ciclo.encerrado:
+        graficos = obter_snapshots([ciclo])[ciclo.id]["graficos"]
+        grafico = graficos.get(str(professor_id) if professor_id else GRAFICO_GERAL)
+    else:
+        grafico = graficos_ciclos([ciclo], professor_id).get(ciclo.id)
+    return grafico_colunar(ciclo, grafico)
+
+
+def etag_grafico_ciclo(ciclo_id, professor_id=None):
+    """
+    ETag do gráfico de um ciclo, derivada do último envio do ciclo.
+
+    Muda quando um envio é gravado ou excluído, quando o snapshot do
+    ciclo é (re)gerado ou descartado e quando o ciclo é renomeado. Ciclos
+    encerrados ainda sem snapshot o geram aqui, para que a ETag já
+    corresponda aos dados congelados. Duas queries, sem montar o gráfico.
+
+    Retorna:
+        str | None: None se o ciclo não existir
+    """
+    from .models import CicloAvaliacao, SubmissaoAvaliacao
+
+    ciclo = (
+        CicloAvaliacao.objects.filter(pk=ciclo_id)
+        .annotate(
+            snapshot_versao=F("relatorio_snapshot__versao"),
+            snapshot_gerado_em=F("relatorio_snapshot__gerado_em"),
+        )
+        .first()
+    )
+    if ciclo is None:
+        return None
+    gerado_em = ciclo.snapshot_gerado_em
+    if ciclo.encerrado and ciclo.snapshot_versao != VERSAO_SNAPSHOT:
+        gerado_em = gerar_snapshot(ciclo).gerado_em
+
+    # Cada envio grava uma submissão (as respostas fechadas ficam nela)
+    envios = SubmissaoAvaliacao.objects.filter(avaliacao__ciclo_id=ciclo_id)
+    if professor_id:
+        envios = envios.filter(avaliacao__professor_id=professor_id)
+    ultima = envios.aggregate(ultima=Max("pk"), total=Count("pk"))
+
+    chave = "|".join(
+        str(parte)
+        for parte in (
+            VERSAO_GRAFICOS,
+            VERSAO_SNAPSHOT,
+            ciclo_id,
+            professor_id,
+            ciclo.nome,
+            gerado_em,
+            ultima["ultima"],
+            ultima["total"],
+        )
+    )
+    return hashlib.sha256(chave.encode("utf-8")).hexdigest()[:32]
+
+
+# ============ SNAPSHOTS DE CICLOS ENCERRADOS =============
+
+
+def _serializar(valor):
+    # isoformat() completo: DjangoJSONEncoder truncaria os microssegundos
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    raise TypeError(f"Valor não serializável no snapshot: {valor!r}")
+
+
+def _comprimir(dados):
+    texto = json.dumps(dados, default=_serializar, separators=(",", ":"))
+    return zlib.compress(texto.encode("utf-8"), level=6)
+
+
+def _descomprimir(dados):
+    dados = json.loads(zlib.decompress(bytes(dados)).decode("utf-8"))
+    # Datas voltam como texto ISO; o template usa o filtro |date
+    for linha in dados.get("linhas", ()):
+        linha["data_criacao"] = parse_datetime(linha["data_criacao"])
+    for detalhe in dados.get("detalhes", {}).values():
+        for comentario in detalhe["comentarios"]:
+            comentario["data_resposta"] = parse_datetime(comentario["data_resposta"])
+    return dados
+
+
+def montar_dados_ciclo(ciclo):
+    """
+    Calcula o relatório completo de um ciclo.
+
+    Retorna:
+        tuple: (resumo, detalhes)
+            - resumo: {"linhas": [...], "graficos": {...}}; os gráficos são
+              gerados para o ciclo inteiro (chave GRAFICO_GERAL) e para cada
+              professor com respostas, indexados pelo id como texto
+            - detalhes: {"detalhes": {avaliacao_id: {"pergunta_stats",
+              "comentarios"}}}, lidos apenas ao expandir uma avaliação
+    """
+    from .models import AvaliacaoDocente, RespostaAvaliacao
+
+    avaliacoes = AvaliacaoDocente.objects.filter(ciclo=ciclo).com_respostas()
+    linhas = resumo_avaliacoes(avaliacoes)
+
+    histogramas = list(_histogramas_graficos([ciclo]))
+    por_professor = defaultdict(list)
+    for histograma in histogramas:
+        por_professor[str(histograma[1])].append(histograma)
+
+    graficos = {}
+    geral = _montar_grafico(ciclo, histogramas)
+    if geral is not None:
+        graficos[GRAFICO_GERAL] = geral
+        for professor_id, histogramas_professor in sorted(por_professor.items()):
+            graficos[professor_id] = _montar_grafico(ciclo, histogramas_professor)
+
+    detalhes = {
+        str(avaliacao_id): {"pergunta_stats": pergunta_stats, "comentarios": []}
+        for avaliacao_id, pergunta_stats in estatisticas_avaliacoes(avaliacoes).items()
+    }
+    comentarios = (
+        RespostaAvaliacao.objects.filter(avaliacao__ciclo=ciclo, valor_texto__gt="")
+        .order_by("data_resposta", "pk")
+        .values_list("avaliacao_id", "id", "valor_texto", "data_resposta")
+    )
+    for avaliacao_id, pk, valor_texto, data_resposta in comentarios:
+        if str(avaliacao_id) in detalhes:
+            detalhes[str(avaliacao_id)]["comentarios"].append(
+                {"id": pk, "valor_texto": valor_texto, "data_resposta": data_resposta}
+            )
+
+    return {"linhas": linhas, "graficos": graficos}, {"detalhes": detalhes}
+
+
+def gerar_snapshot(ciclo):
+    """
+    Gera (ou regera) o snapshot do relatório de um ciclo encerrado.
+
+    O ranking dos professores do ciclo (ranking.calcular_ranking) é
+    recalculado antes, para que os percentis fiquem no snapshot.
+
+    Retorna:
+        RelatorioCicloSnapshot
+
+    Raises:
+        ValueError: Se o ciclo ainda estiver aberto
+    """
+    from .models import RelatorioCicloSnapshot
+    from .ranking import calcular_ranking
+
+    if not ciclo.encerrado:
+        raise ValueError(f"O ciclo '{ciclo.nome}' ainda não foi encerrado.")
+
+    calcular_ranking(ciclo)
+    resumo, detalhes = montar_dados_ciclo(ciclo)
+    snapshot, _ = RelatorioCicloSnapshot.objects.update_or_create(
+        ciclo=ciclo,
+        defaults={
+            "versao": VERSAO_SNAPSHOT,
+            "dados": _comprimir(resumo),
+            "detalhes": _comprimir(detalhes),
+        },
+    )
+    return snapshot
+
+
+def obter_snapshots(ciclos):
+    """
+    Resumo congelado dos ciclos encerrados informados.
+
+    Lê todos os snapshots existentes em uma query (sem os detalhes por
+    avaliação) e gera os que faltam ou que estão em uma versão antiga.
+    Ciclos ainda abertos são ignorados.
+
+    Args:
+        ciclos: Iterável de CicloAvaliacao
+
+    Retorna:
+        dict: ciclo_id -> {"linhas": [...], "graficos": {...}}
+    """
+    from .models import RelatorioCicloSnapshot
+
+    encerrados = {ciclo.id: ciclo for ciclo in ciclos if ciclo.encerrado}
+    if not encerrados:
+        return {}
+
+    resultado = {}
+    for ciclo_id, versao, dados in RelatorioCicloSnapshot.objects.filter(
+        ciclo_id__in=encerrados
+    ).values_list("ciclo_id", "versao", "dados"):
+        if versao == VERSAO_SNAPSHOT:
+            resultado[ciclo_id] = _descomprimir(dados)
+
+    for ciclo_id, ciclo in encerrados.items():
+        if ciclo_id not in resultado:
+            # Relê do formato armazenado para que as duas leituras sejam iguais
+            resultado[ciclo_id] = _descomprimir(gerar_snapshot(ciclo).dados)
+    return resultado
+
+
+def detalhes_snapshot(ciclo, avaliacao_id):
+    """
+    Estatísticas por pergunta e comentários congelados de uma avaliação.
+
+    Retorna:
+        dict: {"pergunta_stats": [...], "comentarios": [...]}, com os
+        comentários ordenados por (data_resposta, id)
+    """
+    from .models import RelatorioCicloSnapshot
+
+    registro = (
+        RelatorioCicloSnapshot.objects.filter(ciclo=ciclo)
+        .values_list("versao", "detalhes")
+        .first()
+    )
+    if registro is None or registro[0] != VERSAO_SNAPSHOT:
+        registro = (VERSAO_SNAPSHOT, gerar_snapshot(ciclo).detalhes)
+
+    detalhes = _descomprimir(registro[1])["detalhes"]
+    return detalhes.get(str(avaliacao_id), {"pergunta_stats": [], "comentarios": []})
+
+
+# ============ EXPORTAÇÃO CSV =============
+
+CABECALHO_CSV = [
+    "Disciplina",
+    "Professor",
+    "Turma",
+    "Período Letivo",
+    "Ciclo",
+    "Total Alunos",
+    "Respondentes",
+    "Taxa de Resposta (%)",
+    "Pergunta",
+    "Tipo Pergunta",
+    "Categoria",
+    "Média",
+    "Moda",
+    "Total Respostas",
+    "Comentários",
+]
+
+# Avaliações lidas por lote; cada lote custa 3 queries auxiliares
+TAMANHO_LOTE_CSV = 200
+
+# Comentários transcritos por avaliação (o restante é apenas contado)
+COMENTARIOS_NO_CSV = 5
+
+
+def _comentarios_csv(ids):
+    """
+    Texto da coluna Comentários de cada avaliação do lote (1 query).
+
+    Usa ROW_NUMBER/COUNT por avaliação para ler apenas os primeiros
+    COMENTARIOS_NO_CSV comentários de cada uma, com o total junto.
+    """
+    from .models import RespostaAvaliacao
+
+    particao = {"partition_by": F("avaliacao_id")}
+    comentarios = (
+        RespostaAvaliacao.objects.filter(avaliacao_id__in=ids, valor_texto__gt="")
+        .annotate(
+            posicao=Window(
+                RowNumber(), order_by=[F("data_resposta"), F("pk")], **particao
+            ),
+            total=Window(Count("pk"), **particao),
+        )
+        .filter(posicao__lte=COMENTARIOS_NO_CSV)
+        .order_by("avaliacao_id", "posicao")
+        .values_list("avaliacao_id", "valor_texto", "total")
+    )
+
+    textos = defaultdict(list)
+    totais = {}
+    for avaliacao_id, valor_texto, total in comentarios:
+        textos[avaliacao_id].append(valor_texto)
+        totais[avaliacao_id] = total
+
+    resultado = {}
+    for avaliacao_id, lista in textos.items():
+        texto = " | ".join(lista)
+        restantes = totais[avaliacao_id] - len(lista)
+        if restantes > 0:
+            texto += f" | ... (+{restantes} comentários)"
+        resultado[avaliacao_id] = texto
+    return resultado
+
+
+def linhas_csv(avaliacoes, tamanho_lote=TAMANHO_LOTE_CSV, ao_concluir_lote=None):
+    """
+    Gera as linhas do CSV do relatório (cabeçalho incluído), sob demanda.
+
+    As avaliações são lidas com iterator(chunk_size) (cursor no servidor no
+    PostgreSQL) e processadas em lotes: para cada lote, estatísticas
+    (histogramas), comentários e perguntas de questionários ainda não vistos
+    são lidos em poucas queries. A memória fica limitada ao tamanho do lote.
+
+    Args:
+        avaliacoes: Queryset de AvaliacaoDocente
+        tamanho_lote: Avaliações por lote
+        ao_concluir_lote: Chamada com o total de avaliações já processadas
+            ao fim de cada lote (progresso de jobs)
+
+    Yields:
+        list: Uma linha do CSV
+    """
+    from .models import PerguntaAvaliacao, QuestionarioPergunta
+
+    yield CABECALHO_CSV
+
+    tipos = dict(PerguntaAvaliacao.TIPO_CHOICES)
+    perguntas_por_questionario = {}
+
+    resumo = (
+        avaliacoes.with_participation()
+        .order_by("-data_criacao", "-pk")
+        .values_list(
+            "id",
+            "turma__disciplina__disciplina_nome",
+            "professor__user__first_name",
+            "professor__user__last_name",
+            "turma__codigo_turma",
+            "turma__disciplina__periodo_letivo__nome",
+            "ciclo__nome",
+            "ciclo__questionario_id",
+            "alunos_aptos_count",
+            "respondentes_count",
+        )
+        .iterator(chunk_size=tamanho_lote)
+    )
+
+    processadas = 0
+    while True:
+        lote = list(islice(resumo, tamanho_lote))
+        if not lote:
+            return
+
+        ids = [linha[0] for linha in lote]
+        stats_perguntas = estatisticas_por_pergunta(ids)
+        comentarios = _comentarios_csv(ids)
+
+        # Perguntas dos questionários ainda não vistos (em geral, só no 1º lote)
+        novos = {linha[7] for linha in lote} - perguntas_por_questionario.keys()
+        if novos:
+            for questionario_id in novos:
+                perguntas_por_questionario[questionario_id] = []
+            perguntas = QuestionarioPergunta.objects.filter(
+                questionario_id__in=novos
+            ).values_list(
+                "questionario_id",
+                "pergunta_id",
+                "pergunta__enunciado",
+                "pergunta__tipo",
+                "pergunta__categoria__nome",
+            )
+            for questionario_id, *pergunta in perguntas:
+                perguntas_por_questionario[questionario_id].append(pergunta)
+
+        for (
+            avaliacao_id,
+            disciplina,
+            primeiro_nome,
+            sobrenome,
+            turma,
+            periodo,
+            ciclo,
+            questionario_id,
+            total_alunos,
+            respondentes,
+        ) in lote:
+            taxa_resposta = (
+                round((respondentes / total_alunos * 100), 1) if total_alunos > 0 else 0
+            )
+            inicio = [
+                disciplina,
+                f"{primeiro_nome} {sobrenome}".strip(),
+                turma,
+                periodo,
+                ciclo,
+                total_alunos,
+                respondentes,
+                taxa_resposta,
+            ]
+            comentarios_texto = comentarios.get(avaliacao_id, "")
+
+            perguntas = perguntas_por_questionario[questionario_id]
+            if not perguntas:
+                # Se não há perguntas, escrever linha básica
+                yield inicio + ["N/A"] * 6 + [comentarios_texto]
+                continue
+
+            for posicao, (pergunta_id, enunciado, tipo, categoria) in enumerate(
+                perguntas
+            ):
+                stats = stats_perguntas.get((avaliacao_id, pergunta_id))
+                if stats and stats.total:
+                    valores = [stats.media, stats.moda, stats.total]
+                else:
+                    # Pergunta sem respostas numéricas
+                    valores = [0, "N/A", 0]
+                linha = inicio + [enunciado, tipos.get(tipo, tipo), categoria]
+                yield linha + valores + [comentarios_texto if posicao == 0 else ""]
+
+        processadas += len(lote)
+        if ao_concluir_lote is not None:
+            ao_concluir_lote(processadas)
+
+
+def avaliacoes_do_relatorio(ciclo_id=None, professor_id=None):
+    """Avaliações com respostas, filtradas como no relatório"""
+    from .models import AvaliacaoDocente
+
+    avaliacoes = AvaliacaoDocente.objects.com_respostas()
+    if ciclo_id:
+        avaliacoes = avaliacoes.filter(ciclo_id=ciclo_id)
+    if professor_id:
+        avaliacoes = avaliacoes.filter(professor_id=professor_id)
+    return avaliacoes
+
+
+def nome_arquivo_csv(ciclo_id=None, professor_id=None):
+    """Nome do arquivo CSV do relatório, com os filtros aplicados"""
+    from .models import CicloAvaliacao, PerfilProfessor
+
+    nome_arquivo = "relatorio_avaliacoes"
+    if ciclo_id:
+        ciclo = CicloAvaliacao.objects.get(id=ciclo_id)
+        nome_arquivo += f"_ciclo_{ciclo.nome.replace(' ', '_')}"
+    if professor_id:
+        professor = PerfilProfessor.objects.select_related("user").get(
+            id=professor_id
+        )
+        nome_professor = (
+            f"{professor.user.first_name}_{professor.user.last_name}".replace(" ", "_")
+        )
+        nome_arquivo += f"_prof_{nome_professor}"
+    return nome_arquivo + f"_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+
+
+def conteudo_csv(avaliacoes, ao_concluir_lote=None):
+    """
+    Texto do CSV do relatório, uma linha por vez (para StreamingHttpResponse
+    ou para as partes de um job); ver linhas_csv().
+    """
+    from .exportacao import _Eco
+
+    writer = csv.writer(_Eco())
+    # BOM para UTF-8 (compatibilidade com Excel)
+    yield "\ufeff"
+    for linha in linhas_csv(avaliacoes, ao_concluir_lote=ao_concluir_lote):
+        yield writer.writerow(linha)
+
+
+def csv_relatorio(job):
+    """
+    Job "relatorio_avaliacoes_csv": CSV do relatório com os filtros do job.
+
+    Parâmetros do job: ciclo e professor (ids, opcionais). O arquivo é
+    gravado em partes à medida que os lotes de avaliações são processados.
+    """
+    from .jobs import atualizar_progresso, em_partes
+
+    ciclo_id = job.parametros.get("ciclo")
+    professor_id = job.parametros.get("professor")
+    avaliacoes = avaliacoes_do_relatorio(ciclo_id, professor_id)
+    nome_arquivo = nome_arquivo_csv(ciclo_id, professor_id)
+    total = avaliacoes.count()
+
+    def progresso(processadas):
+        atualizar_progresso(job, processadas * 100 // total)
+
+    partes = em_partes(conteudo_csv(avaliacoes, ao_concluir_lote=progresso))
+    return partes, nome_arquivo, "text/csv; charset=utf-8"
@@ -0,0 +1,180 @@
+"""
+Máscaras de bits materializadas de roles e permissões (PerfilAcesso).
+
+Cada usuário tem uma linha em PerfilAcesso com duas máscaras:
+
+    - roles: bits de ROLE_BITS (admin, coordenador, professor, aluno)
+    - permissoes: bits de PERMISSION_BITS (permissões de setup/roles.py)
+
+Superusuários recebem o bit de admin e todas as permissões, como no
+has_role/has_permission do rolepermissions.
+
+As máscaras são recalculadas pelos signals de User.groups e
+User.user_permissions, que disparam em todo assign_role/remove_role.
+Para dados anteriores a este módulo, use o comando sync_access_bits.
+
+Uso:
+    from avaliacao_docente.role_bitmask import role_q
+
+    # Matrículas ativas de quem não é admin, em uma única query
+    MatriculaTurma.objects.filter(status="ativa").exclude(
+        role_q("admin", "aluno__user__")
+    )
+"""
+
+from django.db.models import Q
+from rolepermissions.roles import RolesManager
+
+from .role_cache import UserRoles, _load_user_roles, _superuser_superpowers
+
+# Bits fixos: novas roles/permissões devem ser adicionadas ao final
+ROLE_BITS = {
+    "admin": 1 << 0,
+    "coordenador": 1 << 1,
+    "professor": 1 << 2,
+    "aluno": 1 << 3,
+}
+
+PERMISSION_BITS = {
+    "view_avaliacao": 1 << 0,
+    "edit_avaliacao": 1 << 1,
+    "delete_avaliacao": 1 << 2,
+    "add_avaliacao": 1 << 3,
+}
+
+ALL_ROLES = sum(ROLE_BITS.values())
+ALL_PERMISSIONS = sum(PERMISSION_BITS.values())
+
+
+def _to_bits(names, bits):
+    """Converte nomes em máscara (nomes desconhecidos são ignorados)"""
+    mask = 0
+    for name in names:
+        mask |= bits.get(name, 0)
+    return mask
+
+
+def access_bits(user_roles):
+    """
+    Calcula as máscaras (roles, permissoes) a partir de um UserRoles.
+    """
+    if _superuser_superpowers(user_roles):
+        return (
+            _to_bits(user_roles.roles, ROLE_BITS) | ROLE_BITS["admin"],
+            ALL_PERMISSIONS,
+        )
+    return (
+        _to_bits(user_roles.roles, ROLE_BITS),
+        _to_bits(user_roles.permissions, PERMISSION_BITS),
+    )
+
+
+def _values_with_any(mask, total):
+    """
+    Todos os valores possíveis da coluna que contêm algum bit de mask.
+
+    Com poucos bits a lista é curta, e o filtro vira um IN sobre a coluna
+    indexada em vez de uma operação bit a bit (que não usa índice).
+    """
+    return [value for value in range(total + 1) if value & mask]
+
+
+def role_q(roles, prefix=""):
+    """
+    Q para "o usuário possui alguma das roles informadas".
+
+    Args:
+        roles: Nome da role ou lista de nomes
+        prefix: Caminho até o User na query (ex.: "aluno__user__")
+    """
+    if isinstance(roles, str):
+        roles = [roles]
+    mask = _to_bits(roles, ROLE_BITS)
+    return Q(
+        **{f"{prefix}perfil_acesso__roles__in": _values_with_any(mask, ALL_ROLES)}
+    )
+
+
+def permission_q(permission_name, prefix=""):
+    """Q para "o usuário possui a permissão informada" """
+    mask = PERMISSION_BITS.get(permission_name, 0)
+    return Q(
+        **{
+            f"{prefix}perfil_acesso__permissoes__in": _values_with_any(
+                mask, ALL_PERMISSIONS
+            )
+        }
+    )
+
+
+def sync_user_access(user):
+    """
+    Recalcula e grava o PerfilAcesso de um usuário.
+
+    Retorna:
+        PerfilAcesso: Registro atualizado
+    """
+    from .models import PerfilAcesso
+
+    roles, permissoes = access_bits(_load_user_roles(user))
+    perfil, _ = PerfilAcesso.objects.update_or_create(
+        user=user, defaults={"roles": roles, "permissoes": permissoes}
+    )
+    return perfil
+
+
+def expected_access_bits(queryset=None):
+    """
+    Gera (user_id, roles, permissoes) esperados para cada usuário.
+
+    Usa prefetch de grupos e permissões: o custo é fixo em queries,
+    independentemente do número de usuários.
+    """
+    from django.contrib.auth.models import User
+
+    if queryset is None:
+        queryset = User.objects.all()
+
+    role_names = set(RolesManager.get_roles_names())
+    role_perms = {
+        name: set(RolesManager.retrieve_role(name).permission_names_list())
+        for name in role_names
+    }
+
+    users = queryset.only("pk", "is_superuser").prefetch_related(
+        "groups", "user_permissions"
+    )
+    for user in users.iterator(chunk_size=500):
+        roles = {g.name for g in user.groups.all() if g.name in role_names}
+        allowed = set().union(*(role_perms[name] for name in roles))
+        permissions = {
+            p.codename for p in user.user_permissions.all() if p.codename in allowed
+        }
+        user_roles = UserRoles(roles, permissions, is_superuser=user.is_superuser)
+        yield (user.pk, *access_bits(user_roles))
+
+
+def find_inconsistencies(queryset=None):
+    """
+    Compara o PerfilAcesso gravado com o estado real de grupos/permissões.
+
+    Retorna:
+        list: Tuplas (user_id, esperado, encontrado), onde esperado e
+        encontrado são pares (roles, permissoes); encontrado é None quando
+        o usuário não possui PerfilAcesso.
+    """
+    from .models import PerfilAcesso
+
+    stored = {
+        user_id: (roles, permissoes)
+        for user_id, roles, permissoes in PerfilAcesso.objects.values_list(
+            "user_id", "roles", "permissoes"
+        )
+    }
+
+    divergencias = []
+    for user_id, roles, permissoes in expected_access_bits(queryset):
+        found = stored.get(user_id)
+        if found != (roles, permissoes):
+            divergencias.append((user_id, (roles, permissoes), found))
+    return divergencias
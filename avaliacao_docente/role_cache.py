@@ -0,0 +1,283 @@
+"""
+Cache de resolução de roles dos usuários.
+
+Toda decisão de permissão (check_user_permission, get_user_role_name, filtros
+de template) chamava has_role() do rolepermissions, que consulta as tabelas de
+grupos a cada chamada. Este módulo carrega o conjunto de roles e permissões de
+um usuário uma única vez e o mantém em cache em três níveis:
+
+    1. No próprio objeto User (vale para o restante da requisição)
+    2. Em um dicionário local ao processo, por até LOCAL_CACHE_TTL segundos
+    3. No backend de cache do Django (compartilhado entre processos; ver
+       CACHES em setup/settings.py)
+
+As entradas são indexadas por um contador de versão de roles, guardado no
+cache compartilhado. Sempre que uma role é atribuída ou removida,
+bump_role_version() incrementa o contador e todas as entradas antigas deixam
+de ser usadas. Os outros processos releem o contador quando as entradas
+locais expiram: uma role revogada deixa de valer em todos eles em no máximo
+LOCAL_CACHE_TTL segundos.
+
+Uso:
+    from avaliacao_docente.role_cache import user_has_role, bump_role_version
+
+    if user_has_role(request.user, ["coordenador", "admin"]):
+        ...
+
+    assign_role(usuario, "professor")
+    bump_role_version(usuario)
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rolepermissions.roles import RolesManager
+
+ROLE_VERSION_CACHE_KEY = "avaliacao_docente:roles:version"
+ROLE_CACHE_TIMEOUT = 300
+LOCAL_CACHE_TTL = 5  # Segundos até reler a versão do cache compartilhado
+LOCAL_CACHE_MAX_ENTRIES = 5000
+
+# Ordem de precedência das roles (da mais para a menos privilegiada)
+ROLE_PRECEDENCE = ("admin", "coordenador", "professor", "aluno")
+
+_USER_ATTR = "_role_cache_entry"
+_local_cache = {"version": None, "entries": {}, "expires_at": 0.0}
+
+
+class UserRoles:
+    """
+    Conjunto imutável de roles e permissões de um usuário.
+    """
+
+    __slots__ = ("roles", "permissions", "is_superuser")
+
+    def __init__(self, roles=(), permissions=(), is_superuser=False):
+        self.roles = frozenset(roles)
+        self.permissions = frozenset(permissions)
+        self.is_superuser = is_superuser
+
+    def has_role(self, roles):
+        """Verifica se possui alguma das roles informadas"""
+        if _superuser_superpowers(self):
+            return True
+        if isinstance(roles, str):
+            roles = [roles]
+        return any(role in self.roles for role in roles)
+
+    def has_permission(self, permission_name):
+        """Verifica se possui a permissão informada"""
+        if _superuser_superpowers(self):
+            return True
+        return permission_name in self.permissions
+
+    @property
+    def primary_role(self):
+        """Retorna a role de maior precedência (ou None)"""
+        for role in ROLE_PRECEDENCE:
+            if role in self.roles:
+                return role
+        return None
+
+
+ANONYMOUS_ROLES = UserRoles()
+
+
+class RoleFlags:
+    """
+    Flags de roles de um usuário, resolvidas uma única vez para templates.
+
+    Imutável: pode ser compartilhado entre todos os trechos de uma página
+    (ex.: perms.is_admin, perms.can_manage dentro de loops de tabelas).
+    """
+
+    __slots__ = (
+        "is_admin",
+        "is_coordenador",
+        "is_professor",
+        "is_aluno",
+        "is_servidor",
+        "can_manage",
+        "role",
+        "_user_roles",
+    )
+
+    ROLE_NAMES = {
+        "admin": "Administrador",
+        "coordenador": "Coordenador",
+        "professor": "Professor",
+        "aluno": "Aluno",
+    }
+
+    def __init__(self, user_roles):
+        role = user_roles.primary_role
+        if _superuser_superpowers(user_roles):
+            role = "admin"
+
+        values = {
+            "is_admin": user_roles.has_role("admin"),
+            "is_coordenador": user_roles.has_role("coordenador"),
+            "is_professor": user_roles.has_role("professor"),
+            "is_aluno": user_roles.has_role("aluno"),
+            "is_servidor": user_roles.has_role("servidor"),
+            "can_manage": user_roles.has_role(["admin", "coordenador"]),
+            "role": role,
+            "_user_roles": user_roles,
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RoleFlags é imutável")
+
+    def __delattr__(self, name):
+        raise AttributeError("RoleFlags é imutável")
+
+    @property
+    def role_name(self):
+        """Nome de exibição da role principal"""
+        return self.ROLE_NAMES.get(self.role, "Sem role definida")
+
+    @property
+    def role_class(self):
+        """Classe CSS da role principal"""
+        return f"role-{self.role}" if self.role else "role-sem-role"
+
+    def has_role(self, roles):
+        """Verifica se possui alguma das roles informadas"""
+        return self._user_roles.has_role(roles)
+
+    def has_permission(self, permission_name):
+        """Verifica se possui a permissão informada"""
+        return self._user_roles.has_permission(permission_name)
+
+
+def _superuser_superpowers(user_roles):
+    """Replica ROLEPERMISSIONS_SUPERUSER_SUPERPOWERS do rolepermissions"""
+    superpowers = getattr(settings, "ROLEPERMISSIONS_SUPERUSER_SUPERPOWERS", True)
+    return superpowers and user_roles.is_superuser
+
+
+def get_role_version():
+    """
+    Retorna a versão atual das roles.
+
+    O valor inicial é derivado do relógio para que uma chave de versão
+    despejada do cache nunca volte a um número já utilizado.
+    """
+    version = cache.get(ROLE_VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(ROLE_VERSION_CACHE_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(ROLE_VERSION_CACHE_KEY)
+    return version
+
+
+def bump_role_version(*users):
+    """
+    Invalida o cache de roles de todos os usuários.
+
+    Deve ser chamada sempre que roles forem atribuídas ou removidas. Os
+    objetos User informados também têm o cache da requisição descartado.
+    """
+    try:
+        cache.incr(ROLE_VERSION_CACHE_KEY)
+    except ValueError:
+        # Chave ausente (primeiro uso ou despejada): inicializa já incrementada
+        cache.set(ROLE_VERSION_CACHE_KEY, int(time.time() * 1000), timeout=None)
+
+    _local_cache.update(version=None, entries={}, expires_at=0.0)
+
+    for user in users:
+        if user is not None and hasattr(user, _USER_ATTR):
+            delattr(user, _USER_ATTR)
+
+
+def _local_entries():
+    """
+    Retorna (versão, entradas) do cache local ao processo.
+
+    As entradas são descartadas a cada LOCAL_CACHE_TTL segundos, e só então
+    a versão é relida do cache compartilhado: um bump_role_version() feito
+    em outro processo passa a valer aqui dentro desse prazo.
+    """
+    now = time.monotonic()
+    if now >= _local_cache["expires_at"]:
+        _local_cache.update(
+            version=get_role_version(), entries={}, expires_at=now + LOCAL_CACHE_TTL
+        )
+    return _local_cache["version"], _local_cache["entries"]
+
+
+def _load_user_roles(user):
+    """Carrega roles e permissões do banco (2 queries)"""
+    role_names = set(RolesManager.get_roles_names())
+    roles = user.groups.filter(name__in=role_names).values_list("name", flat=True)
+    roles = frozenset(roles)
+
+    permissions = ()
+    if roles:
+        # Mesma regra de available_perm_names(): apenas permissões das roles do usuário
+        role_perms = set()
+        for role_name in roles:
+            role_perms.update(
+                RolesManager.retrieve_role(role_name).permission_names_list()
+            )
+        permissions = user.user_permissions.filter(
+            codename__in=role_perms
+        ).values_list("codename", flat=True)
+
+    return UserRoles(roles, permissions, is_superuser=user.is_superuser)
+
+
+def get_user_roles(user):
+    """
+    Retorna o UserRoles do usuário, consultando o banco apenas em cache miss.
+    """
+    if user is None or not getattr(user, "is_authenticated", False):
+        return ANONYMOUS_ROLES
+
+    cached = getattr(user, _USER_ATTR, None)
+    if cached is not None:
+        return cached
+
+    version, entries = _local_entries()
+    user_roles = entries.get(user.pk)
+    if user_roles is None:
+        cache_key = f"avaliacao_docente:roles:{version}:{user.pk}"
+        user_roles = cache.get(cache_key)
+        if user_roles is None:
+            user_roles = _load_user_roles(user)
+            cache.set(cache_key, user_roles, ROLE_CACHE_TIMEOUT)
+
+        if len(entries) >= LOCAL_CACHE_MAX_ENTRIES:
+            entries.clear()
+        entries[user.pk] = user_roles
+
+    if user_roles.is_superuser != user.is_superuser:
+        # is_superuser vem do próprio User, que pode ter mudado após o cache
+        user_roles = UserRoles(
+            user_roles.roles, user_roles.permissions, is_superuser=user.is_superuser
+        )
+
+    setattr(user, _USER_ATTR, user_roles)
+    return user_roles
+
+
+def get_role_flags(user):
+    """Retorna as RoleFlags do usuário (sem queries após o cache aquecido)"""
+    return RoleFlags(get_user_roles(user))
+
+
+def user_has_role(user, roles):
+    """Equivalente em cache a rolepermissions.checkers.has_role"""
+    if user is None or not getattr(user, "is_authenticated", False):
+        return False
+    return get_user_roles(user).has_role(roles)
+
+
+def user_has_permission(user, permission_name):
+    """Equivalente em cache a rolepermissions.checkers.has_permission"""
+    if user is None or not getattr(user, "is_authenticated", False):
+        return False
+    return get_user_roles(user).has_permission(permission_name)
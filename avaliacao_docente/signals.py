@@ -1,7 +1,20 @@
-from django.db.models.signals import post_save, m2m_changed
+from django.db.models.signals import post_delete, post_save, m2m_changed
 from django.dispatch import receiver
 from django.apps import apps
-from .models import CicloAvaliacao, AvaliacaoDocente
+from django.contrib.auth.models import User
+from .models import (
+    CicloAvaliacao,
+    AvaliacaoDocente,
+    CategoriaPergunta,
+    PerfilAcesso,
+    PerguntaAvaliacao,
+    QuestionarioPergunta,
+    RelatorioCicloSnapshot,
+)
+from .questionarios import invalidar_esquema
+from .role_bitmask import access_bits, sync_user_access
+from .role_cache import UserRoles, bump_role_version
+from .tendencias import invalidar_tendencias
 from .utils import enviar_email_notificacao_avaliacao
 
 
@@ -61,7 +74,9 @@ def criar_avaliacoes_automaticamente(sender, instance, action, pk_set, **kwargs)
                     ciclo=instance, turma_id=turma_id
                 )
                 for avaliacao in avaliacoes:
-                    if not avaliacao.respostas.exists():
+                    if not (
+                        avaliacao.submissoes.exists() or avaliacao.respostas.exists()
+                    ):
                         avaliacao.delete()
             except Exception as e:
                 print(
@@ -99,3 +114,120 @@ def criar_avaliacoes_pos_save(sender, instance, created, **kwargs):
                     status="pendente",
                 )
                 print(f"Avaliação criada via post_save: {avaliacao}")
+
+
+@receiver(post_save, sender=CicloAvaliacao)
+def descartar_snapshot_ciclo_reaberto(
+    sender, instance, created, raw=False, **kwargs
+):
+    """
+    Remove o relatório congelado se o ciclo voltar a aceitar respostas
+    (reativado ou com data_fim prorrogada).
+    """
+    if created or raw or instance.encerrado:
+        return
+    RelatorioCicloSnapshot.objects.filter(ciclo=instance).delete()
+
+
+@receiver(post_save, sender=CicloAvaliacao)
+@receiver(post_delete, sender=CicloAvaliacao)
+@receiver(post_save, sender=AvaliacaoDocente)
+@receiver(post_delete, sender=AvaliacaoDocente)
+@receiver(post_save, sender=RelatorioCicloSnapshot)
+@receiver(post_delete, sender=RelatorioCicloSnapshot)
+def invalidar_cache_tendencias(sender, **kwargs):
+    """
+    Invalida as séries de tendências em cache quando o conjunto de ciclos
+    (ou os dados congelados de um ciclo) muda.
+    """
+    invalidar_tendencias()
+
+
+@receiver(post_save, sender=QuestionarioPergunta)
+@receiver(post_delete, sender=QuestionarioPergunta)
+def invalidar_esquema_questionario(sender, instance, **kwargs):
+    """
+    Invalida o esquema compilado quando perguntas entram, saem ou mudam de
+    ordem em um questionário (editar_questionario_perguntas, inline do admin).
+    """
+    invalidar_esquema(instance.questionario_id)
+
+
+@receiver(post_save, sender=PerguntaAvaliacao)
+@receiver(post_save, sender=CategoriaPergunta)
+def invalidar_esquemas_da_pergunta(sender, instance, **kwargs):
+    """
+    Invalida o esquema compilado dos questionários que usam a pergunta (ou
+    as perguntas da categoria) editada.
+    """
+    filtro = (
+        {"pergunta": instance}
+        if sender is PerguntaAvaliacao
+        else {"pergunta__categoria": instance}
+    )
+    invalidar_esquema(
+        *QuestionarioPergunta.objects.filter(**filtro).values_list(
+            "questionario_id", flat=True
+        )
+    )
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidar_cache_roles(sender, instance, action, reverse, **kwargs):
+    """
+    Invalida o cache de roles quando grupos ou permissões de usuários mudam.
+
+    Cobre assign_role/remove_role chamados em qualquer ponto (inclusive o
+    Django admin), além das chamadas explícitas a bump_role_version().
+    """
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_role_version(instance if not reverse else None)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def sincronizar_perfil_acesso(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Mantém as máscaras de PerfilAcesso em sincronia com grupos e permissões.
+    """
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            sync_user_access(instance)
+        return
+
+    # Alteração feita pelo lado do grupo/permissão (ex.: group.user_set)
+    if action == "pre_clear":
+        instance._perfil_acesso_pks = set(
+            instance.user_set.values_list("pk", flat=True)
+        )
+        return
+    if action == "post_clear":
+        pk_set = getattr(instance, "_perfil_acesso_pks", set())
+    elif action not in ("post_add", "post_remove"):
+        return
+
+    for user in User.objects.filter(pk__in=pk_set or ()):
+        sync_user_access(user)
+
+
+@receiver(post_save, sender=User)
+def criar_perfil_acesso(
+    sender, instance, created, raw=False, update_fields=None, **kwargs
+):
+    """
+    Cria o PerfilAcesso de novos usuários e o atualiza quando is_superuser
+    pode ter mudado (saves parciais, como o de last_login, são ignorados).
+    """
+    if raw:
+        return
+    if created:
+        # Usuário novo ainda não tem grupos: só is_superuser importa
+        roles, permissoes = access_bits(
+            UserRoles(is_superuser=instance.is_superuser)
+        )
+        PerfilAcesso.objects.create(
+            user=instance, roles=roles, permissoes=permissoes
+        )
+    elif update_fields is None or "is_superuser" in update_fields:
+        sync_user_access(instance)
@@ -0,0 +1,338 @@
+"""
+Spool local de envios (write-behind) para picos de respostas.
+
+Com settings.AVALIACAO_SPOOL_ENVIOS apontando para um arquivo, o envio já
+validado de responder_avaliacao é gravado nesse arquivo SQLite local (modo
+WAL, synchronous=FULL: o envio sobrevive a uma queda do processo) e o aluno
+recebe a confirmação sem esperar uma transação no banco principal. O
+comando flush_submission_spool descarrega o spool no banco em lotes: uma
+transação por lote, com a submissão, os textos e os histogramas gravados
+em bulk. Envios descarregados em um ciclo já encerrado descartam o
+relatório congelado do ciclo (snapshot e ranking) e as tendências em cache.
+
+Exatamente uma vez: cada envio carrega o token da SubmissaoAvaliacao
+(único no banco). Se o descarregamento cair entre o COMMIT no banco e a
+remoção do lote do spool, o lote é reprocessado e os tokens já gravados
+são ignorados. No spool, token e (avaliação, aluno) também são únicos, de
+modo que um aluno não acumula dois envios pendentes.
+
+O arquivo é local à máquina: com vários servidores de aplicação, cada um
+tem o seu spool e o seu processo de descarregamento.
+
+Uso:
+    from avaliacao_docente.spool import guardar_envio, spool_ativo
+
+    if spool_ativo():
+        guardar_envio(submissao, respostas)  # como gravar_submissao
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .histogramas import registrar_respostas
+from .submissoes import compactar
+
+logger = logging.getLogger(__name__)
+
+LOTE_SPOOL = 500
+
+_SQL_TABELA = """
+    CREATE TABLE IF NOT EXISTS envios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        token TEXT NOT NULL UNIQUE,
+        avaliacao_id INTEGER NOT NULL,
+        aluno_id INTEGER,
+        dados TEXT NOT NULL,
+        UNIQUE (avaliacao_id, aluno_id)
+    )
+"""
+
+_conexoes = threading.local()
+
+
+def caminho_spool():
+    """Arquivo do spool configurado, ou None (envios gravados no banco)"""
+    return getattr(settings, "AVALIACAO_SPOOL_ENVIOS", "") or None
+
+
+def spool_ativo():
+    return caminho_spool() is not None
+
+
+def _conexao():
+    """Conexão com o spool, uma por thread e por arquivo"""
+    caminho = caminho_spool()
+    conexao = getattr(_conexoes, "conexao", None)
+    if conexao is None or _conexoes.caminho != caminho:
+        # isolation_level=None: cada INSERT/DELETE é sua própria transação,
+        # a não ser dentro de BEGIN explícito
+        conexao = sqlite3.connect(caminho, timeout=30, isolation_level=None)
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute("PRAGMA synchronous=FULL")
+        conexao.execute(_SQL_TABELA)
+        _conexoes.conexao, _conexoes.caminho = conexao, caminho
+    return conexao
+
+
+def fechar_conexao():
+    """Fecha a conexão desta thread com o spool (testes e encerramento)"""
+    conexao = getattr(_conexoes, "conexao", None)
+    if conexao is not None:
+        conexao.close()
+        _conexoes.conexao = None
+
+
+def guardar_envio(submissao, respostas):
+    """
+    Grava um envio no spool (equivalente a gravar_submissao).
+
+    Args:
+        submissao: SubmissaoAvaliacao não salva (avaliação, aluno, token)
+        respostas: RespostaAvaliacao não salvas, já validadas
+
+    Raises:
+        IntegrityError: Se o token ou o aluno já tiverem envio no spool
+    """
+    submissao.preencher_chave_aluno()
+    dados = {
+        "anonima": submissao.anonima,
+        "chave_aluno": submissao.chave_aluno,
+        "enviada_em": timezone.now().isoformat(),
+        "respostas": [
+            [
+                resposta.pergunta_id,
+                resposta.valor_numerico,
+                resposta.valor_boolean,
+                resposta.valor_texto,
+            ]
+            for resposta in respostas
+        ],
+    }
+    try:
+        _conexao().execute(
+            "INSERT INTO envios (token, avaliacao_id, aluno_id, dados) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                str(submissao.token),
+                submissao.avaliacao_id,
+                submissao.aluno_id,
+                json.dumps(dados),
+            ],
+        )
+    except sqlite3.IntegrityError as erro:
+        raise IntegrityError(str(erro)) from erro
+
+
+def envio_pendente(avaliacao_id, aluno_id=None, token=None):
+    """Se há no spool um envio do aluno (ou com o token) ainda não descarregado"""
+    if not spool_ativo():
+        return False
+    if token is not None:
+        sql, parametros = "SELECT 1 FROM envios WHERE token = ?", [str(token)]
+    else:
+        sql = "SELECT 1 FROM envios WHERE avaliacao_id = ? AND aluno_id = ?"
+        parametros = [avaliacao_id, aluno_id]
+    return _conexao().execute(sql, parametros).fetchone() is not None
+
+
+def pendentes():
+    """Número de envios no spool"""
+    if not spool_ativo():
+        return 0
+    return _conexao().execute("SELECT COUNT(*) FROM envios").fetchone()[0]
+
+
+def _montar(linha):
+    """(SubmissaoAvaliacao, [RespostaAvaliacao]) de uma linha do spool"""
+    from .models import RespostaAvaliacao, SubmissaoAvaliacao
+
+    _, token, avaliacao_id, aluno_id, dados = linha
+    dados = json.loads(dados)
+    enviada_em = parse_datetime(dados["enviada_em"])
+    submissao = SubmissaoAvaliacao(
+        avaliacao_id=avaliacao_id,
+        aluno_id=aluno_id,
+        token=token,
+        anonima=dados["anonima"],
+        enviada_em=enviada_em,
+        chave_aluno=dados.get("chave_aluno"),
+    )
+    if submissao.chave_aluno is None:
+        submissao.preencher_chave_aluno()
+    respostas = [
+        RespostaAvaliacao(
+            avaliacao_id=avaliacao_id,
+            aluno_id=aluno_id,
+            pergunta_id=pergunta_id,
+            valor_numerico=valor_numerico,
+            valor_boolean=valor_boolean,
+            valor_texto=valor_texto,
+            anonima=dados["anonima"],
+            data_resposta=enviada_em,
+        )
+        for pergunta_id, valor_numerico, valor_boolean, valor_texto in dados[
+            "respostas"
+        ]
+    ]
+    return submissao, respostas
+
+
+def _descartar_invalidos(envios):
+    """
+    Remove envios já gravados (token ou aluno) ou que apontam para
+    avaliação, aluno ou pergunta excluídos depois do envio.
+    """
+    from .models import (
+        AvaliacaoDocente,
+        PerfilAluno,
+        PerguntaAvaliacao,
+        SubmissaoAvaliacao,
+    )
+
+    avaliacao_ids = {s.avaliacao_id for s, _ in envios}
+    aluno_ids = {s.aluno_id for s, _ in envios if s.aluno_id}
+    tokens_gravados = {
+        str(token)
+        for token in SubmissaoAvaliacao.objects.filter(
+            token__in=[s.token for s, _ in envios]
+        ).values_list("token", flat=True)
+    }
+    chaves_gravadas = set(
+        SubmissaoAvaliacao.objects.filter(
+            chave_aluno__in=[s.chave_aluno for s, _ in envios if s.chave_aluno]
+        ).values_list("avaliacao_id", "chave_aluno")
+    )
+    avaliacoes = set(
+        AvaliacaoDocente.objects.filter(pk__in=avaliacao_ids).values_list(
+            "pk", flat=True
+        )
+    )
+    alunos = set(
+        PerfilAluno.objects.filter(pk__in=aluno_ids).values_list("pk", flat=True)
+    )
+    perguntas = PerguntaAvaliacao.objects.in_bulk(
+        {resposta.pergunta_id for _, respostas in envios for resposta in respostas}
+    )
+
+    validos = []
+    for submissao, respostas in envios:
+        if str(submissao.token) in tokens_gravados:
+            continue  # Já descarregado antes de uma interrupção
+        if (
+            (submissao.avaliacao_id, submissao.chave_aluno) in chaves_gravadas
+            or submissao.avaliacao_id not in avaliacoes
+            or (submissao.aluno_id and submissao.aluno_id not in alunos)
+        ):
+            logger.warning("Envio %s do spool descartado", submissao.token)
+            continue
+        respostas = [r for r in respostas if r.pergunta_id in perguntas]
+        for resposta in respostas:
+            resposta.pergunta = perguntas[resposta.pergunta_id]
+        validos.append((submissao, respostas))
+    return validos
+
+
+def _gravar_lote(envios):
+    """Grava os envios em uma única transação (bulk)"""
+    from .models import RespostaAvaliacao, SubmissaoAvaliacao
+
+    # auto_now_add substitui as datas na inserção; restauradas depois
+    datas = [submissao.enviada_em for submissao, _ in envios]
+
+    with transaction.atomic():
+        textos = [compactar(submissao, respostas) for submissao, respostas in envios]
+        submissoes = SubmissaoAvaliacao.objects.bulk_create(
+            [submissao for submissao, _ in envios]
+        )
+        linhas = []
+        for submissao, data, textos_envio in zip(submissoes, datas, textos):
+            submissao.enviada_em = data
+            for resposta in textos_envio:
+                resposta.submissao = submissao
+                linhas.append(resposta)
+        RespostaAvaliacao.objects.bulk_create(linhas)
+
+        for resposta in linhas:
+            resposta.data_resposta = resposta.submissao.enviada_em
+        SubmissaoAvaliacao.objects.bulk_update(submissoes, ["enviada_em"])
+        RespostaAvaliacao.objects.bulk_update(linhas, ["data_resposta"])
+
+        registrar_respostas(
+            [resposta for _, respostas in envios for resposta in respostas]
+        )
+        _descongelar_ciclos({submissao.avaliacao_id for submissao, _ in envios})
+
+
+def _descongelar_ciclos(avaliacao_ids):
+    """
+    Descarta o relatório congelado dos ciclos já encerrados que receberam
+    envios (aceitos com o ciclo aberto, descarregados depois do
+    encerramento): snapshot e ranking são regerados na próxima leitura do
+    relatório, e as tendências em cache são invalidadas após o COMMIT.
+    """
+    from .models import (
+        AvaliacaoDocente,
+        CicloAvaliacao,
+        RankingProfessor,
+        RelatorioCicloSnapshot,
+    )
+    from .tendencias import invalidar_tendencias
+
+    ciclos = CicloAvaliacao.objects.filter(
+        pk__in=AvaliacaoDocente.objects.filter(pk__in=avaliacao_ids).values("ciclo")
+    )
+    encerrados = [ciclo.pk for ciclo in ciclos if ciclo.encerrado]
+    if not encerrados:
+        return
+    RelatorioCicloSnapshot.objects.filter(ciclo_id__in=encerrados).delete()
+    RankingProfessor.objects.filter(ciclo_id__in=encerrados).delete()
+    transaction.on_commit(invalidar_tendencias)
+
+
+def descarregar(lote=LOTE_SPOOL):
+    """
+    Descarrega no banco até `lote` envios do spool, os mais antigos primeiro.
+
+    Retorna:
+        int: Envios lidos do spool (gravados ou descartados); 0 se vazio
+    """
+    if not spool_ativo():
+        return 0
+    conexao = _conexao()
+    linhas = conexao.execute(
+        "SELECT id, token, avaliacao_id, aluno_id, dados FROM envios "
+        "ORDER BY id LIMIT ?",
+        [lote],
+    ).fetchall()
+    if not linhas:
+        return 0
+
+    envios = _descartar_invalidos([_montar(linha) for linha in linhas])
+    try:
+        _gravar_lote(envios)
+    except IntegrityError:
+        # Envio direto concorrente (fora do spool): grava um a um. Cada envio
+        # é montado de novo a partir do spool, pois o lote que falhou deixou
+        # chaves primárias e datas (auto_now_add) atribuídas aos objetos
+        for linha in linhas:
+            for envio in _descartar_invalidos([_montar(linha)]):
+                try:
+                    _gravar_lote([envio])
+                except IntegrityError:
+                    logger.warning("Envio %s do spool descartado", envio[0].token)
+
+    # Só depois do COMMIT no banco: uma interrupção aqui reprocessa o lote,
+    # e os tokens já gravados são ignorados
+    conexao.execute("BEGIN")
+    conexao.executemany(
+        "DELETE FROM envios WHERE id = ?", [(linha[0],) for linha in linhas]
+    )
+    conexao.execute("COMMIT")
+    return len(linhas)
@@ -0,0 +1,335 @@
+"""
+Armazenamento compactado das respostas: uma linha por envio.
+
+Cada envio do formulário é uma SubmissaoAvaliacao. As respostas fechadas
+(likert, nps, sim_nao, multipla_escolha) são gravadas nela, em dois arrays
+JSON alinhados na ordem do questionário:
+
+    perguntas = [12, 13, 15]
+    valores   = [4, 9, true]
+
+Perguntas sem resposta ficam de fora. Só o texto livre continua em
+RespostaAvaliacao (uma linha por comentário, indexada pela busca), ligado
+à submissão. Um envio de ~20 perguntas passa de ~20 linhas (e ~20 entradas
+em cada índice de RespostaAvaliacao) para uma linha, mais os comentários.
+
+Leitura por pergunta: a view avaliacao_docente_resposta_unificada (modelo
+RespostaUnificada) une as linhas de RespostaAvaliacao às respostas
+compactadas, expandidas pelo banco:
+
+    - PostgreSQL: ROWS FROM (jsonb_array_elements...) WITH ORDINALITY
+    - SQLite: json_each()
+
+A view é criada pela migration 0017; manage.py compact_answers compacta
+as respostas gravadas antes dela (RespostaUnificada as expõe nas duas
+formas durante a transição) e --recriar-view recria a view. No SQLite, uma
+migration que recrie a tabela de RespostaAvaliacao ou de SubmissaoAvaliacao
+falha com a view presente: ela deve remover a view antes e recriá-la depois
+(RunPython com uma cópia do SQL da view, como a 0017; migrations não
+importam este módulo).
+
+Uso:
+    from avaliacao_docente.submissoes import gravar_submissao
+
+    submissao = SubmissaoAvaliacao(avaliacao=avaliacao, aluno=aluno)
+    gravar_submissao(submissao, respostas)  # RespostaAvaliacao não salvas
+"""
+
+from django.db import NotSupportedError, transaction
+from django.db.models import Exists, Min, OuterRef, Subquery
+
+from .histogramas import registrar_respostas
+
+TIPOS_COMPACTADOS = ("likert", "nps", "sim_nao", "multipla_escolha")
+
+NOME_VIEW = "avaliacao_docente_resposta_unificada"
+
+LOTE_COMPACTACAO = 500
+
+# Linhas de RespostaAvaliacao, com as colunas da view
+_SQL_LINHAS = """
+    SELECT 'r' || r.id AS id, r.id AS resposta_id, r.submissao_id,
+        r.avaliacao_id, r.aluno_id, r.pergunta_id, r.valor_texto,
+        r.valor_numerico, r.valor_boolean, r.data_resposta, r.anonima
+    FROM avaliacao_docente_respostaavaliacao r
+"""
+
+_SQL_COMPACTADAS = {
+    "postgresql": """
+    SELECT 's' || s.id || '.' || e.posicao, NULL, s.id,
+        s.avaliacao_id, s.aluno_id, e.pergunta::bigint,
+        CASE WHEN jsonb_typeof(e.valor) = 'string'
+            THEN e.valor #>> '{}' ELSE '' END,
+        CASE WHEN jsonb_typeof(e.valor) = 'number'
+            THEN (e.valor #>> '{}')::integer END,
+        CASE WHEN jsonb_typeof(e.valor) = 'boolean'
+            THEN (e.valor #>> '{}')::boolean END,
+        s.enviada_em, s.anonima
+    FROM avaliacao_docente_submissaoavaliacao s
+    CROSS JOIN LATERAL ROWS FROM (
+        jsonb_array_elements_text(s.perguntas), jsonb_array_elements(s.valores)
+    ) WITH ORDINALITY AS e(pergunta, valor, posicao)
+    """,
+    "sqlite": """
+    SELECT 's' || s.id || '.' || p.key, NULL, s.id,
+        s.avaliacao_id, s.aluno_id, p.value,
+        CASE WHEN v.type = 'text' THEN v.value ELSE '' END,
+        CASE WHEN v.type = 'integer' THEN v.value END,
+        CASE v.type WHEN 'true' THEN 1 WHEN 'false' THEN 0 END,
+        s.enviada_em, s.anonima
+    FROM avaliacao_docente_submissaoavaliacao s
+    JOIN json_each(s.perguntas) p
+    JOIN json_each(s.valores) v ON v.key = p.key
+    """,
+}
+
+
+def criar_view(conexao):
+    """
+    Cria (ou recria) a view de RespostaUnificada.
+
+    Args:
+        conexao: Conexão do banco (connection ou schema_editor.connection)
+
+    Raises:
+        NotSupportedError: Se o banco não for PostgreSQL nem SQLite
+    """
+    if conexao.vendor not in _SQL_COMPACTADAS:
+        raise NotSupportedError(
+            f"Respostas compactadas não suportadas em {conexao.vendor}"
+        )
+    remover_view(conexao)
+    with conexao.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIEW {NOME_VIEW} AS {_SQL_LINHAS} UNION ALL "
+            f"{_SQL_COMPACTADAS[conexao.vendor]}"
+        )
+
+
+def remover_view(conexao):
+    """Remove a view de RespostaUnificada, se existir"""
+    with conexao.cursor() as cursor:
+        cursor.execute(f"DROP VIEW IF EXISTS {NOME_VIEW}")
+
+
+def valor_compactado(tipo, valor_numerico=None, valor_boolean=None, valor_texto=""):
+    """
+    Valor de uma resposta fechada no array valores.
+
+    Retorna None quando a resposta não tem valor (não é gravada).
+    """
+    if tipo in ("likert", "nps"):
+        return valor_numerico
+    if tipo == "sim_nao":
+        return valor_boolean
+    return valor_texto or None
+
+
+def _ordenar(pares, ordem):
+    """Pares (pergunta_id, valor) na ordem do questionário"""
+    return sorted(
+        pares, key=lambda par: (ordem.get(par[0], len(ordem)), par[0])
+    )
+
+
+def compactar(submissao, respostas):
+    """
+    Grava na submissão (sem salvar) as respostas fechadas.
+
+    Args:
+        submissao: SubmissaoAvaliacao
+        respostas: RespostaAvaliacao não salvas, na ordem do questionário
+
+    Retorna:
+        list: As respostas que continuam em RespostaAvaliacao (texto livre)
+    """
+    pares = []
+    linhas = []
+    for resposta in respostas:
+        tipo = resposta.pergunta.tipo
+        if tipo not in TIPOS_COMPACTADOS:
+            linhas.append(resposta)
+            continue
+        valor = valor_compactado(
+            tipo, resposta.valor_numerico, resposta.valor_boolean, resposta.valor_texto
+        )
+        if valor is not None:
+            pares.append((resposta.pergunta_id, valor))
+
+    submissao.perguntas = [pergunta_id for pergunta_id, _ in pares]
+    submissao.valores = [valor for _, valor in pares]
+    return linhas
+
+
+def gravar_submissao(submissao, respostas):
+    """
+    Grava um envio: a submissão (com as respostas fechadas compactadas), os
+    textos livres e os incrementos dos histogramas, na mesma transação.
+
+    Args:
+        submissao: SubmissaoAvaliacao ainda não salva
+        respostas: RespostaAvaliacao não salvas, com a pergunta carregada
+
+    Raises:
+        IntegrityError: Se o aluno já tiver enviado (nada é gravado)
+    """
+    from .models import RespostaAvaliacao
+
+    with transaction.atomic():
+        linhas = compactar(submissao, respostas)
+        submissao.save()
+        for resposta in linhas:
+            resposta.submissao = submissao
+        RespostaAvaliacao.objects.bulk_create(linhas)
+        registrar_respostas(respostas)
+    return submissao
+
+
+def vincular_respostas():
+    """
+    Liga a uma submissão as respostas gravadas sem ela.
+
+    Respostas com aluno vão para a submissão (avaliação, aluno), criada se
+    necessário; respostas sem aluno são agrupadas por (avaliação,
+    session_key).
+
+    Retorna:
+        int: Número de respostas vinculadas
+    """
+    from .models import RespostaAvaliacao, SubmissaoAvaliacao
+
+    avulsas = RespostaAvaliacao.objects.filter(submissao__isnull=True)
+
+    pares = (
+        avulsas.filter(aluno__isnull=False)
+        .order_by()
+        .values_list("avaliacao_id", "aluno_id")
+        .distinct()
+    )
+    SubmissaoAvaliacao.objects.bulk_create(
+        (
+            SubmissaoAvaliacao(
+                avaliacao_id=avaliacao_id,
+                aluno_id=aluno_id,
+                chave_aluno=SubmissaoAvaliacao.calcular_chave_aluno(
+                    avaliacao_id, aluno_id
+                ),
+            )
+            for avaliacao_id, aluno_id in pares.iterator()
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    vinculadas = avulsas.filter(aluno__isnull=False).update(
+        submissao=Subquery(
+            SubmissaoAvaliacao.objects.filter(
+                avaliacao_id=OuterRef("avaliacao_id"), aluno_id=OuterRef("aluno_id")
+            ).values("pk")[:1]
+        )
+    )
+
+    grupos = (
+        avulsas.filter(aluno__isnull=True)
+        .order_by()
+        .values_list("avaliacao_id", "session_key")
+        .distinct()
+    )
+    for avaliacao_id, session_key in list(grupos):
+        submissao = SubmissaoAvaliacao.objects.create(
+            avaliacao_id=avaliacao_id, anonima=True
+        )
+        vinculadas += avulsas.filter(
+            avaliacao_id=avaliacao_id, aluno__isnull=True, session_key=session_key
+        ).update(submissao=submissao)
+
+    # auto_now_add preencheu enviada_em com a data atual
+    respostas = RespostaAvaliacao.objects.filter(submissao=OuterRef("pk"))
+    SubmissaoAvaliacao.objects.filter(
+        Exists(respostas.filter(data_resposta__lt=OuterRef("enviada_em")))
+    ).update(
+        enviada_em=Subquery(
+            respostas.order_by()
+            .values("submissao")
+            .annotate(primeira=Min("data_resposta"))
+            .values("primeira")
+        )
+    )
+    SubmissaoAvaliacao.objects.filter(anonima=False).filter(
+        Exists(respostas.filter(anonima=True))
+    ).update(anonima=True)
+    return vinculadas
+
+
+def compactar_respostas_antigas(lote=LOTE_COMPACTACAO):
+    """
+    Move para as submissões as respostas fechadas gravadas em linhas.
+
+    Processa `lote` submissões por transação; pode ser interrompida e
+    executada de novo. Os histogramas não mudam (os valores são os mesmos).
+
+    Retorna:
+        tuple: (submissões compactadas, linhas removidas de RespostaAvaliacao)
+    """
+    from .models import QuestionarioPergunta, RespostaAvaliacao, SubmissaoAvaliacao
+
+    vincular_respostas()
+
+    fechadas = RespostaAvaliacao.objects.filter(
+        submissao__isnull=False, pergunta__tipo__in=TIPOS_COMPACTADOS
+    )
+    total_submissoes = total_linhas = 0
+    while True:
+        ids = list(
+            fechadas.order_by("submissao_id")
+            .values_list("submissao_id", flat=True)
+            .distinct()[:lote]
+        )
+        if not ids:
+            return total_submissoes, total_linhas
+
+        with transaction.atomic():
+            submissoes = SubmissaoAvaliacao.objects.select_for_update().in_bulk(ids)
+            questionarios = dict(
+                SubmissaoAvaliacao.objects.filter(pk__in=ids).values_list(
+                    "pk", "avaliacao__ciclo__questionario_id"
+                )
+            )
+            ordens = {}
+            for questionario_id, pergunta_id, ordem in (
+                QuestionarioPergunta.objects.filter(
+                    questionario_id__in=set(questionarios.values())
+                ).values_list("questionario_id", "pergunta_id", "ordem_no_questionario")
+            ):
+                ordens.setdefault(questionario_id, {})[pergunta_id] = ordem
+
+            pares = {
+                pk: list(zip(submissao.perguntas, submissao.valores))
+                for pk, submissao in submissoes.items()
+            }
+            linhas = fechadas.filter(submissao_id__in=ids).values_list(
+                "pk",
+                "submissao_id",
+                "pergunta_id",
+                "pergunta__tipo",
+                "valor_numerico",
+                "valor_boolean",
+                "valor_texto",
+            )
+            removidas = []
+            for resposta_id, submissao_id, pergunta_id, tipo, *valores in linhas:
+                removidas.append(resposta_id)
+                valor = valor_compactado(tipo, *valores)
+                if valor is not None:
+                    pares[submissao_id].append((pergunta_id, valor))
+
+            for pk, submissao in submissoes.items():
+                ordenados = _ordenar(pares[pk], ordens.get(questionarios[pk], {}))
+                submissao.perguntas = [pergunta_id for pergunta_id, _ in ordenados]
+                submissao.valores = [valor for _, valor in ordenados]
+            SubmissaoAvaliacao.objects.bulk_update(
+                submissoes.values(), ["perguntas", "valores"]
+            )
+            RespostaAvaliacao.objects.filter(pk__in=removidas).delete()
+
+        total_submissoes += len(submissoes)
+        total_linhas += len(removidas)
@@ -1,5 +1,5 @@
 from django import template
-from rolepermissions.checkers import has_role as check_role, has_permission
+from avaliacao_docente.role_cache import get_role_flags
 
 register = template.Library()
 
@@ -8,38 +8,20 @@ register = template.Library()
 def get_user_role(user):
     """
     Template filter para obter a role do usuário
+
+    Prefira {{ perms.role_name }} (context processor role_flags).
     """
-    if check_role(user, "admin"):
-        return "Administrador"
-    elif check_role(user, "coordenador"):
-        return "Coordenador"
-    elif check_role(user, "professor"):
-        return "Professor"
-    elif check_role(user, "aluno"):
-        return "Aluno"
-    elif check_role(user, "servidor"):
-        return "Servidor (Técnico-Administrativo)"
-    else:
-        return "Sem role definida"
+    return get_role_flags(user).role_name
 
 
 @register.filter
 def get_user_role_class(user):
     """
     Template filter para obter a classe CSS baseada na role do usuário
+
+    Prefira {{ perms.role_class }} (context processor role_flags).
     """
-    if check_role(user, "admin"):
-        return "role-admin"
-    elif check_role(user, "coordenador"):
-        return "role-coordenador"
-    elif check_role(user, "professor"):
-        return "role-professor"
-    elif check_role(user, "aluno"):
-        return "role-aluno"
-    elif check_role(user, "servidor"):
-        return "role-servidor"
-    else:
-        return "role-sem-role"
+    return get_role_flags(user).role_class
 
 
 @register.filter
@@ -53,11 +35,12 @@ def get_user_profile_type(user):
     elif hasattr(user, "perfil_aluno"):
         return "Aluno"
     # Para usuários sem perfil específico, verificar roles administrativas
-    elif check_role(user, "admin"):
+    flags = get_role_flags(user)
+    if flags.is_admin:
         return "Administrador do Sistema"
-    elif check_role(user, "coordenador"):
+    elif flags.is_coordenador:
         return "Coordenador Acadêmico"
-    elif check_role(user, "servidor"):
+    elif flags.is_servidor:
         return "Servidor (Técnico-Administrativo)"
     else:
         return "Usuário do Sistema"
@@ -68,7 +51,7 @@ def has_user_role(user, role):
     """
     Template filter para verificar se o usuário tem uma role específica
     """
-    return check_role(user, role)
+    return get_role_flags(user).has_role(role)
 
 
 @register.filter
@@ -76,7 +59,7 @@ def has_role(user, role):
     """
     Template filter para verificar se o usuário tem uma role específica
     """
-    return check_role(user, role)
+    return get_role_flags(user).has_role(role)
 
 
 @register.simple_tag
@@ -97,9 +80,7 @@ def has_permission(user, permission):
     """
     Template filter para verificar se o usuário tem uma permissão específica
     """
-    from rolepermissions.checkers import has_permission as check_permission
-
-    return check_permission(user, permission)
+    return get_role_flags(user).has_permission(permission)
 
 
 @register.filter
@@ -107,7 +88,7 @@ def can_access_admin(user):
     """
     Template filter para verificar se o usuário pode acessar funcionalidades administrativas
     """
-    return check_role(user, "admin") or check_role(user, "coordenador")
+    return get_role_flags(user).can_manage
 
 
 @register.filter
@@ -115,7 +96,7 @@ def is_admin(user):
     """
     Template filter para verificar se o usuário é admin
     """
-    return check_role(user, "admin")
+    return get_role_flags(user).is_admin
 
 
 @register.filter
@@ -123,7 +104,7 @@ def is_coordenador(user):
     """
     Template filter para verificar se o usuário é coordenador
     """
-    return check_role(user, "coordenador")
+    return get_role_flags(user).is_coordenador
 
 
 @register.filter
@@ -131,7 +112,7 @@ def is_professor(user):
     """
     Template filter para verificar se o usuário é professor
     """
-    return check_role(user, "professor")
+    return get_role_flags(user).is_professor
 
 
 @register.filter
@@ -139,7 +120,7 @@ def is_aluno(user):
     """
     Template filter para verificar se o usuário é aluno
     """
-    return check_role(user, "aluno")
+    return get_role_flags(user).is_aluno
 
 
 @register.filter
@@ -147,4 +128,4 @@ def is_servidor(user):
     """
     Template filter para verificar se o usuário é servidor
     """
-    return check_role(user, "servidor")
+    return get_role_flags(user).is_servidor
@@ -0,0 +1,257 @@
+"""
+Tendências entre ciclos: média e taxa de resposta por professor e por
+disciplina em todos os ciclos de avaliação.
+
+As séries saem de uma única query agrupada por (ciclo, professor,
+disciplina) sobre AvaliacaoDocente, com a participação (with_participation)
+e a soma das respostas numéricas (histogramas) como subqueries
+correlacionadas. Os totais por professor e por disciplina são somados em
+Python a partir dessas linhas.
+
+Ciclos encerrados não mudam mais (ver relatorios.py), então as linhas deles
+ficam em cache, indexadas pela versão do conjunto de ciclos: o contador
+VERSAO_CACHE_KEY (incrementado pelos signals quando ciclos, avaliações ou
+snapshots mudam) mais os ids dos ciclos encerrados. Só os ciclos abertos são
+consultados a cada requisição.
+
+O contador e as linhas ficam apenas no cache do Django, sem cópia local ao
+processo: a invalidação feita por um processo vale para todos desde que o
+backend seja compartilhado (CACHES em setup/settings.py; o padrão é o
+DatabaseCache). Com um LocMemCache, cada processo teria o próprio contador.
+
+Uso:
+    from avaliacao_docente.tendencias import tendencias
+
+    dados = tendencias(professor_id=3)
+    dados["ciclos"], dados["professores"][0]["serie"]
+"""
+
+import hashlib
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .estatisticas import ESCALAS
+
+# Contador de versão no cache compartilhado (ver CACHES); nunca guardado em
+# variáveis do módulo, para que invalidar_tendencias() valha em todos os
+# processos
+VERSAO_CACHE_KEY = "avaliacao_docente:tendencias:versao"
+TENDENCIAS_CACHE_TIMEOUT = 60 * 60 * 24
+
+_CAMPOS_CICLO = (
+    "ciclo_id",
+    "ciclo__nome",
+    "ciclo__data_inicio",
+    "ciclo__periodo_letivo__ano",
+    "ciclo__periodo_letivo__semestre",
+)
+_CAMPOS_GRUPO = _CAMPOS_CICLO + (
+    "professor_id",
+    "professor__user__first_name",
+    "professor__user__last_name",
+    "disciplina_id",
+    "disciplina__disciplina_nome",
+)
+
+
+def invalidar_tendencias():
+    """Descarta as séries em cache (ciclos, avaliações ou snapshots mudaram)"""
+    try:
+        cache.incr(VERSAO_CACHE_KEY)
+    except ValueError:
+        # Chave ausente (primeiro uso ou despejada): inicializa já incrementada
+        cache.set(VERSAO_CACHE_KEY, int(time.time() * 1000), timeout=None)
+
+
+def _versao():
+    return cache.get_or_set(
+        VERSAO_CACHE_KEY, lambda: int(time.time() * 1000), timeout=None
+    )
+
+
+def _q_encerrados():
+    """Mesmo critério de CicloAvaliacao.encerrado, em SQL"""
+    return Q(ativo=False) | Q(data_fim__lt=timezone.now())
+
+
+def linhas_tendencia(ciclos):
+    """
+    Totais por (ciclo, professor, disciplina) dos ciclos informados.
+
+    Uma única query, independentemente do número de ciclos e avaliações.
+
+    Args:
+        ciclos: Queryset de CicloAvaliacao
+
+    Retorna:
+        list[dict]: Uma linha por grupo, com avaliacoes, previstos,
+            respondentes, soma e respostas (numéricas)
+    """
+    from .models import AvaliacaoDocente, HistogramaResposta
+
+    def soma_histogramas(campo):
+        subquery = (
+            HistogramaResposta.objects.filter(
+                avaliacao=OuterRef("pk"), pergunta__tipo__in=tuple(ESCALAS)
+            )
+            .order_by()
+            .values("avaliacao")
+            .annotate(total=Sum(campo))
+            .values("total")
+        )
+        return Coalesce(Subquery(subquery, output_field=IntegerField()), Value(0))
+
+    return list(
+        AvaliacaoDocente.objects.filter(ciclo__in=ciclos)
+        .with_participation()
+        .annotate(
+            soma_numerica=soma_histogramas("soma"),
+            qtd_numerica=soma_histogramas("total"),
+        )
+        .order_by()
+        .values(*_CAMPOS_GRUPO)
+        .annotate(
+            avaliacoes=Count("pk"),
+            previstos=Sum("alunos_aptos_count"),
+            respondentes=Sum("respondentes_count"),
+            soma=Sum("soma_numerica"),
+            respostas=Sum("qtd_numerica"),
+        )
+    )
+
+
+def _linhas_encerrados(ids_encerrados):
+    """Linhas dos ciclos encerrados, em cache pela versão do conjunto"""
+    from .models import CicloAvaliacao
+
+    if not ids_encerrados:
+        return []
+
+    conjunto = hashlib.md5(
+        ",".join(map(str, ids_encerrados)).encode("ascii")
+    ).hexdigest()
+    chave = f"avaliacao_docente:tendencias:{_versao()}:{conjunto}"
+    linhas = cache.get(chave)
+    if linhas is None:
+        linhas = linhas_tendencia(CicloAvaliacao.objects.filter(id__in=ids_encerrados))
+        cache.set(chave, linhas, TENDENCIAS_CACHE_TIMEOUT)
+    return linhas
+
+
+def _nome_professor(linha):
+    nome = "%s %s" % (
+        linha["professor__user__first_name"],
+        linha["professor__user__last_name"],
+    )
+    return nome.strip()
+
+
+def _nome_disciplina(linha):
+    return linha["disciplina__disciplina_nome"]
+
+
+def _ponto(ciclo_id, totais):
+    previstos = totais["previstos"]
+    respostas = totais["respostas"]
+    return {
+        "ciclo_id": ciclo_id,
+        "avaliacoes": totais["avaliacoes"],
+        "respondentes": totais["respondentes"],
+        "previstos": previstos,
+        "respostas": respostas,
+        "media": round(totais["soma"] / respostas, 2) if respostas else None,
+        "taxa_resposta": (
+            round(totais["respondentes"] / previstos * 100, 1) if previstos else 0
+        ),
+    }
+
+
+def _series(linhas, chave, nome, ordem_ciclos):
+    """Soma as linhas por entidade (professor ou disciplina) e ciclo"""
+    totais = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+    nomes = {}
+    for linha in linhas:
+        entidade = linha[chave]
+        nomes[entidade] = nome(linha)
+        acumulado = totais[entidade][linha["ciclo_id"]]
+        for campo in ("avaliacoes", "previstos", "respondentes", "soma", "respostas"):
+            acumulado[campo] += linha[campo] or 0
+
+    series = [
+        {
+            "id": entidade,
+            "nome": nomes[entidade],
+            "serie": [
+                _ponto(ciclo_id, por_ciclo[ciclo_id])
+                for ciclo_id in sorted(por_ciclo, key=ordem_ciclos.__getitem__)
+            ],
+        }
+        for entidade, por_ciclo in totais.items()
+    ]
+    series.sort(key=lambda item: item["nome"])
+    return series
+
+
+def tendencias(professor_id=None, disciplina_id=None):
+    """
+    Séries de média e taxa de resposta por professor e por disciplina.
+
+    Args:
+        professor_id: Restringe às avaliações do professor (id, opcional)
+        disciplina_id: Restringe às avaliações da disciplina (id, opcional)
+
+    Retorna:
+        dict: {
+            "ciclos": [{"id", "nome", "data_inicio", "ano", "semestre"}],
+            "professores": [{"id", "nome", "serie": [ponto, ...]}],
+            "disciplinas": [{"id", "nome", "serie": [ponto, ...]}],
+        }
+        Cada ponto tem ciclo_id, media, taxa_resposta, avaliacoes,
+        respondentes, previstos e respostas; os ciclos vêm em ordem
+        cronológica e cada série só tem os ciclos em que a entidade aparece.
+    """
+    from .models import CicloAvaliacao
+
+    ids_encerrados = sorted(
+        CicloAvaliacao.objects.filter(_q_encerrados()).values_list("id", flat=True)
+    )
+    linhas = _linhas_encerrados(ids_encerrados) + linhas_tendencia(
+        CicloAvaliacao.objects.exclude(_q_encerrados())
+    )
+
+    if professor_id:
+        linhas = [linha for linha in linhas if linha["professor_id"] == professor_id]
+    if disciplina_id:
+        linhas = [
+            linha for linha in linhas if linha["disciplina_id"] == disciplina_id
+        ]
+
+    ciclos = {}
+    for linha in linhas:
+        ciclos[linha["ciclo_id"]] = {
+            "id": linha["ciclo_id"],
+            "nome": linha["ciclo__nome"],
+            "data_inicio": linha["ciclo__data_inicio"],
+            "ano": linha["ciclo__periodo_letivo__ano"],
+            "semestre": linha["ciclo__periodo_letivo__semestre"],
+        }
+    cronologia = sorted(
+        ciclos.values(),
+        key=lambda c: (c["ano"], c["semestre"], c["data_inicio"], c["id"]),
+    )
+    ordem_ciclos = {ciclo["id"]: posicao for posicao, ciclo in enumerate(cronologia)}
+
+    return {
+        "ciclos": cronologia,
+        "professores": _series(
+            linhas, "professor_id", _nome_professor, ordem_ciclos
+        ),
+        "disciplinas": _series(
+            linhas, "disciplina_id", _nome_disciplina, ordem_ciclos
+        ),
+    }
@@ -0,0 +1,105 @@
+"""
+Testes da busca textual nos comentários.
+
+Validações principais:
+1. O índice (FTS5 no SQLite) acompanha inserções, edições e exclusões
+2. A busca ignora acentos e ordena pela relevância
+3. Filtros por ciclo e professor; resultados paginados
+4. O endpoint exige coordenador/admin e não expõe o aluno
+"""
+
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+
+from avaliacao_docente.busca import _consulta_fts, buscar_comentarios
+from avaliacao_docente.models import PerfilProfessor, RespostaAvaliacao
+from avaliacao_docente.tests_participacao import CicloAvaliacaoTestBase
+
+
+class BuscaComentariosTests(CicloAvaliacaoTestBase):
+    """Testes de buscar_comentarios"""
+
+    def setUp(self):
+        super().setUp()
+        self.avaliacao = self.criar_avaliacao()
+        self.comentar(self.avaliacao, "Ótima didática e aulas organizadas")
+        self.comentar(
+            self.avaliacao, "Didática boa, mas a didática nas provas é confusa"
+        )
+        self.comentar(self.avaliacao, "Provas muito longas")
+
+    def comentar(self, avaliacao, texto):
+        self.responder(avaliacao, self.matricular(avaliacao), texto=texto)
+
+    def textos(self, termo, **filtros):
+        return [r.valor_texto for r in buscar_comentarios(termo, **filtros)]
+
+    def test_ignora_acentos_e_ordena_por_relevancia(self):
+        textos = self.textos("didatica")
+        self.assertEqual(len(textos), 2)
+        if connection.vendor != "sqlite":
+            return
+        self.assertTrue(textos[0].startswith("Didática boa"))
+
+    def test_todas_as_palavras_sao_obrigatorias(self):
+        self.assertEqual(
+            self.textos("provas didática"),
+            ["Didática boa, mas a didática nas provas é confusa"],
+        )
+        self.assertEqual(self.textos("inexistente"), [])
+        self.assertEqual(self.textos("  ?! "), [])
+
+    def test_indice_acompanha_edicao_e_exclusao(self):
+        resposta = RespostaAvaliacao.objects.get(valor_texto="Provas muito longas")
+        resposta.valor_texto = "Listas muito longas"
+        resposta.save()
+        self.assertEqual(self.textos("listas"), ["Listas muito longas"])
+        self.assertEqual(len(self.textos("provas")), 1)
+
+        resposta.delete()
+        self.assertEqual(self.textos("listas"), [])
+
+    def test_filtros(self):
+        outro = PerfilProfessor.objects.create(
+            user=User.objects.create_user(username="prof_busca"),
+            registro_academico="PROF900",
+        )
+        outro_ciclo = self.criar_ciclo("Ciclo busca")
+        self.comentar(self.criar_avaliacao(professor=outro), "Didática excelente")
+        self.comentar(self.criar_avaliacao(ciclo=outro_ciclo), "Didática regular")
+
+        self.assertEqual(len(self.textos("didática")), 4)
+        self.assertEqual(
+            self.textos("didática", professor_id=outro.id), ["Didática excelente"]
+        )
+        self.assertEqual(
+            self.textos("didática", ciclo_id=outro_ciclo.id), ["Didática regular"]
+        )
+
+    def test_reconstrucao_do_indice(self):
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(len(self.textos("didática")), 2)
+
+    def test_consulta_fts_sem_operadores(self):
+        self.assertEqual(_consulta_fts('aula OR "prova*'), '"aula" "OR" "prova"')
+
+    def test_endpoint(self):
+        url = reverse("buscar_comentarios_api")
+        self.client.force_login(self.professor.user)
+        self.assertEqual(self.client.get(url, {"q": "provas"}).status_code, 403)
+
+        self.client.force_login(self.admin_user)
+        self.assertEqual(self.client.get(url).status_code, 400)
+
+        dados = self.client.get(
+            url, {"q": "provas", "ciclo": self.ciclo.id, "page": 1}
+        ).json()
+        self.assertEqual(dados["total"], 2)
+        self.assertEqual(dados["total_paginas"], 1)
+        resultado = dados["resultados"][0]
+        self.assertEqual(resultado["professor"], "Ana Souza")
+        self.assertNotIn("aluno", resultado)
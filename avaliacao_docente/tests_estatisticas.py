@@ -0,0 +1,106 @@
+"""
+Testes do módulo de estatísticas de escalas (Likert/NPS).
+
+Validações principais:
+1. Média, mediana, percentis, desvio padrão, top-2-box e NPS corretos
+2. Vários histogramas processados em lote
+3. estatisticas_por_pergunta() lê os histogramas em uma única query
+4. O relatório exibe as novas estatísticas por pergunta
+"""
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from avaliacao_docente.estatisticas import (
+    calcular_estatisticas,
+    estatisticas_por_pergunta,
+    vetor_contagens,
+)
+from avaliacao_docente.models import AvaliacaoDocente
+from avaliacao_docente.tests_participacao import CicloAvaliacaoTestBase
+
+
+class CalcularEstatisticasTests(SimpleTestCase):
+    """Testes das estatísticas a partir de vetores de contagens"""
+
+    def test_likert(self):
+        # Valores: 1, 2, 4, 4, 5, 5
+        (stats,) = calcular_estatisticas("likert", [[1, 1, 0, 2, 2]])
+        self.assertEqual(stats.total, 6)
+        self.assertEqual(stats.media, 3.5)
+        self.assertEqual(stats.mediana, 4)
+        self.assertEqual(stats.moda, 4)
+        self.assertEqual(stats.percentis[25], 2)
+        self.assertEqual(stats.percentis[90], 5)
+        self.assertEqual(stats.desvio_padrao, 1.5)
+        self.assertEqual(stats.top2box, 66.67)
+        self.assertIsNone(stats.nps)
+
+    def test_mediana_com_total_par_entre_valores(self):
+        (stats,) = calcular_estatisticas("likert", [[0, 0, 1, 1, 0]])
+        self.assertEqual(stats.mediana, 3.5)
+
+    def test_nps(self):
+        # 2 detratores (0 e 6), 1 neutro (8), 3 promotores (9, 10, 10)
+        vetor = vetor_contagens("nps", {"0": 1, "6": 1, "8": 1, "9": 1, "10": 2})
+        (stats,) = calcular_estatisticas("nps", [vetor])
+        self.assertEqual(stats.nps, 16.67)
+        self.assertEqual(stats.top2box, 50.0)
+
+    def test_vetor_vazio(self):
+        (stats,) = calcular_estatisticas("nps", [[0] * 11])
+        self.assertEqual(stats.total, 0)
+        self.assertIsNone(stats.media)
+        self.assertIsNone(stats.percentis[50])
+
+    def test_lote(self):
+        vetores = [[i % 3, 1, 0, 2, i % 5] for i in range(2000)]
+        resultados = calcular_estatisticas("likert", vetores)
+        self.assertEqual(len(resultados), 2000)
+        self.assertEqual(resultados[7].contagens, [1, 1, 0, 2, 2])
+
+    def test_tamanho_invalido(self):
+        with self.assertRaises(ValueError):
+            calcular_estatisticas("likert", [[1, 2, 3]])
+
+
+class EstatisticasPorPerguntaTests(CicloAvaliacaoTestBase):
+    """Testes da leitura dos histogramas e do relatório"""
+
+    def setUp(self):
+        super().setUp()
+        self.avaliacoes = [self.criar_avaliacao() for _ in range(3)]
+        for avaliacao in self.avaliacoes:
+            for likert, nps in [(5, 10), (3, 4)]:
+                aluno = self.matricular(avaliacao)
+                self.client.force_login(aluno.user)
+                self.client.post(
+                    reverse("responder_avaliacao", args=[avaliacao.id]),
+                    {
+                        f"pergunta_{self.perguntas['likert'].id}": likert,
+                        f"pergunta_{self.perguntas['nps'].id}": nps,
+                        f"pergunta_{self.perguntas['texto_livre'].id}": "ok",
+                    },
+                )
+
+    def test_uma_query(self):
+        with self.assertNumQueries(1):
+            stats = estatisticas_por_pergunta(AvaliacaoDocente.objects.values("pk"))
+        self.assertEqual(len(stats), 6)
+        likert = stats[(self.avaliacoes[0].id, self.perguntas["likert"].id)]
+        self.assertEqual((likert.total, likert.media, likert.mediana), (2, 4.0, 4.0))
+
+    def test_agrupado_por_pergunta(self):
+        stats = estatisticas_por_pergunta(
+            AvaliacaoDocente.objects.values("pk"), agrupar_por_avaliacao=False
+        )
+        nps = stats[self.perguntas["nps"].id]
+        self.assertEqual(nps.total, 6)
+        self.assertEqual(nps.nps, 0.0)
+
+    def test_relatorio_exibe_estatisticas(self):
+        self.client.force_login(self.admin_user)
+        response = self.client.get(reverse("relatorio_avaliacoes"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Mediana")
+        self.assertContains(response, "NPS")
@@ -0,0 +1,207 @@
+"""
+Testes das exportações do admin hub (exportacao.Exportacao).
+
+Validações principais:
+1. CSV com BOM, cabeçalhos e contagens anotadas em SQL
+2. JSON Lines com ?formato=jsonl
+3. Número de queries não cresce com o número de linhas
+4. Contagens de turmas e avaliações por período letivo
+5. Feed incremental de respostas (endpoint e comando) por cursor
+"""
+
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from avaliacao_docente.exportacao import (
+    Coluna,
+    Exportacao,
+    decodificar_cursor_feed,
+    feed_respostas,
+)
+from avaliacao_docente.models import Curso
+from avaliacao_docente.tests_participacao import CicloAvaliacaoTestBase
+
+EXPORTACOES = [
+    "exportar_usuarios_csv",
+    "exportar_cursos_csv",
+    "exportar_disciplinas_csv",
+    "exportar_turmas_csv",
+    "exportar_periodos_csv",
+]
+
+
+class ExportacaoAdminHubTests(CicloAvaliacaoTestBase):
+    """Testes das cinco exportações do admin hub"""
+
+    def setUp(self):
+        super().setUp()
+        self.avaliacao = self.criar_avaliacao()
+        self.matricular(self.avaliacao)
+        self.client.force_login(self.admin_user)
+
+    def baixar(self, nome, **params):
+        response = self.client.get(reverse(nome), params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode("utf-8")
+
+    def test_csv_periodos(self):
+        self.criar_avaliacao()
+        conteudo = self.baixar("exportar_periodos_csv")
+        self.assertTrue(conteudo.startswith("\ufeffID,Nome do Período"))
+        linha = conteudo.splitlines()[1].split(",")
+        # 2 turmas e 2 avaliações no período
+        self.assertEqual(linha[1:3], ["2024.1", "2024.1"])
+        self.assertEqual(linha[4:6], ["2", "2"])
+
+    def test_csv_turmas_e_disciplinas(self):
+        turmas = self.baixar("exportar_turmas_csv").splitlines()
+        self.assertIn("Ana Souza", turmas[1])
+        self.assertTrue(turmas[1].endswith(",1,1,Ativa"))
+
+        disciplinas = self.baixar("exportar_disciplinas_csv").splitlines()
+        self.assertIn(",1,Ana Souza,N/A", disciplinas[1])
+
+    def test_jsonl(self):
+        conteudo = self.baixar("exportar_cursos_csv", formato="jsonl")
+        (registro,) = [json.loads(linha) for linha in conteudo.splitlines()]
+        self.assertEqual(registro["nome_do_curso"], "Informática")
+        self.assertEqual(registro["coordenador"], "Ana Souza")
+        self.assertEqual(registro["total_de_turmas"], 1)
+
+    def test_formato_invalido(self):
+        response = self.client.get(reverse("exportar_cursos_csv"), {"formato": "xls"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_queries_nao_crescem_com_as_linhas(self):
+        def contar():
+            totais = []
+            for nome in EXPORTACOES:
+                with CaptureQueriesContext(connection) as queries:
+                    self.baixar(nome)
+                totais.append(len(queries))
+            return totais
+
+        antes = contar()
+        for _ in range(4):
+            self.matricular(self.criar_avaliacao())
+        self.assertEqual(contar(), antes)
+
+    def test_sem_permissao(self):
+        self.client.force_login(self.professor.user)
+        for nome in EXPORTACOES:
+            response = self.client.get(reverse(nome))
+            self.assertEqual(response.status_code, 302)
+
+
+class ExportacaoTests(CicloAvaliacaoTestBase):
+    """Testes do motor de exportação"""
+
+    def test_colunas_e_uma_query(self):
+        exportacao = Exportacao(
+            "cursos",
+            Curso.objects.order_by("pk"),
+            [
+                Coluna("Sigla", "curso_sigla"),
+                Coluna(
+                    "Descrição",
+                    "curso_sigla",
+                    "curso_nome",
+                    formatar=lambda sigla, nome: f"{sigla} - {nome}",
+                ),
+                Coluna("Fixo", formatar=lambda: "N/A"),
+            ],
+            tamanho_lote=1,
+        )
+        self.assertEqual(exportacao.campos(), ["curso_sigla", "curso_nome"])
+        with self.assertNumQueries(1):
+            linhas = list(exportacao.linhas())
+        self.assertEqual(linhas, [["INF", "INF - Informática", "N/A"]])
+
+    def test_coluna_sem_campos(self):
+        with self.assertRaises(ValueError):
+            Coluna("Vazia")
+
+
+class FeedRespostasTests(CicloAvaliacaoTestBase):
+    """Testes do feed incremental de respostas"""
+
+    def setUp(self):
+        super().setUp()
+        self.avaliacao = self.criar_avaliacao()
+        for nota in (5, 4, 3):
+            self.responder(self.avaliacao, self.matricular(self.avaliacao), nota)
+        self.client.force_login(self.admin_user)
+
+    def ler(self, **params):
+        response = self.client.get(reverse("feed_respostas_ndjson"), params)
+        self.assertEqual(response.status_code, 200)
+        conteudo = b"".join(response.streaming_content).decode("utf-8")
+        linhas = [json.loads(linha) for linha in conteudo.splitlines()]
+        return linhas, response["X-Proximo-Cursor"]
+
+    def test_lotes_por_cursor(self):
+        primeiro, cursor = self.ler(limite=2)
+        self.assertEqual([r["valor_numerico"] for r in primeiro], [5, 4])
+        self.assertEqual(primeiro[0]["ciclo_id"], self.ciclo.id)
+        self.assertEqual(primeiro[0]["professor_id"], self.professor.id)
+        self.assertEqual(primeiro[0]["pergunta_tipo"], "likert")
+        self.assertNotIn("aluno_id", primeiro[0])
+
+        segundo, cursor = self.ler(apos=cursor, limite=2)
+        self.assertEqual([r["valor_numerico"] for r in segundo], [3])
+
+        # Sem respostas novas, o cursor não muda
+        vazio, mesmo_cursor = self.ler(apos=cursor)
+        self.assertEqual((vazio, mesmo_cursor), ([], cursor))
+
+        self.responder(self.avaliacao, self.matricular(self.avaliacao), 1)
+        novas, _ = self.ler(apos=cursor)
+        self.assertEqual([r["valor_numerico"] for r in novas], [1])
+
+    def test_queries_constantes(self):
+        exportacao, _ = feed_respostas(limite=2)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(list(exportacao.linhas())), 2)
+
+    def test_cursor_invalido(self):
+        response = self.client.get(reverse("feed_respostas_ndjson"), {"apos": "x"})
+        self.assertEqual(response.status_code, 400)
+        with self.assertRaises(ValueError):
+            decodificar_cursor_feed("cHJvZnw1")
+
+    def test_sem_permissao(self):
+        self.client.force_login(self.professor.user)
+        response = self.client.get(reverse("feed_respostas_ndjson"))
+        self.assertEqual(response.status_code, 403)
+
+    def test_comando_com_arquivo_de_cursor(self):
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        caminho = os.path.join(diretorio.name, "cursor")
+
+        saida = StringIO()
+        call_command(
+            "export_answer_feed",
+            limite=2,
+            arquivo_cursor=caminho,
+            stdout=saida,
+            stderr=StringIO(),
+        )
+        self.assertEqual(len(saida.getvalue().splitlines()), 2)
+
+        saida = StringIO()
+        call_command(
+            "export_answer_feed",
+            arquivo_cursor=caminho,
+            stdout=saida,
+            stderr=StringIO(),
+        )
+        (registro,) = [json.loads(linha) for linha in saida.getvalue().splitlines()]
+        self.assertEqual(registro["valor_numerico"], 3)
@@ -0,0 +1,102 @@
+"""
+Testes dos histogramas de respostas (HistogramaResposta).
+
+Validações principais:
+1. responder_avaliacao e RespostaAvaliacaoForm.save atualizam os histogramas
+2. A reconstrução do zero produz o mesmo resultado que os incrementos
+3. Média, moda e mediana saem diretamente do histograma
+"""
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+
+from avaliacao_docente.forms import RespostaAvaliacaoForm
+from avaliacao_docente.histogramas import reconstruir_histogramas
+from avaliacao_docente.models import HistogramaResposta
+from avaliacao_docente.tests_participacao import CicloAvaliacaoTestBase
+
+
+class HistogramaRespostaTests(CicloAvaliacaoTestBase):
+    """Testes de manutenção incremental e reconstrução dos histogramas"""
+
+    def setUp(self):
+        super().setUp()
+        self.avaliacao = self.criar_avaliacao()
+
+    def _histogramas(self):
+        return {
+            h.pergunta.tipo: (h.total, h.soma, h.contagens)
+            for h in HistogramaResposta.objects.filter(
+                avaliacao=self.avaliacao
+            ).select_related("pergunta")
+        }
+
+    def _responder_via_view(self, aluno, likert, nps, texto):
+        self.client.force_login(aluno.user)
+        return self.client.post(
+            reverse("responder_avaliacao", args=[self.avaliacao.id]),
+            {
+                f"pergunta_{self.perguntas['likert'].id}": likert,
+                f"pergunta_{self.perguntas['nps'].id}": nps,
+                f"pergunta_{self.perguntas['texto_livre'].id}": texto,
+            },
+        )
+
+    def test_responder_avaliacao_atualiza_histograma(self):
+        self._responder_via_view(self.matricular(self.avaliacao), "5", "9", "Boa")
+        self._responder_via_view(self.matricular(self.avaliacao), "5", "0", "Ok")
+
+        self.assertEqual(
+            self._histogramas(),
+            {
+                "likert": (2, 10, {"5": 2}),
+                "nps": (2, 9, {"9": 1, "0": 1}),
+                "texto_livre": (2, 0, {}),
+            },
+        )
+
+    def test_form_save_atualiza_histograma(self):
+        aluno = self.matricular(self.avaliacao)
+        form = RespostaAvaliacaoForm(
+            self.avaliacao,
+            data={
+                f"pergunta_{self.perguntas['likert'].id}": "3",
+                f"pergunta_{self.perguntas['nps'].id}": "10",
+                f"pergunta_{self.perguntas['texto_livre'].id}": "Comentário",
+            },
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save(aluno=aluno)
+
+        self.assertEqual(self._histogramas()["likert"], (1, 3, {"3": 1}))
+        self.assertEqual(self._histogramas()["nps"], (1, 10, {"10": 1}))
+
+    def test_reconstrucao_igual_aos_incrementos(self):
+        for likert, nps in [(1, 7), (4, 9), (4, 10)]:
+            self._responder_via_view(
+                self.matricular(self.avaliacao), str(likert), str(nps), "x"
+            )
+        incremental = self._histogramas()
+
+        HistogramaResposta.objects.all().delete()
+        call_command("rebuild_answer_histograms", stdout=StringIO())
+        self.assertEqual(self._histogramas(), incremental)
+
+        HistogramaResposta.objects.filter(avaliacao=self.avaliacao).update(total=0)
+        reconstruir_histogramas([self.avaliacao.pk])
+        self.assertEqual(self._histogramas(), incremental)
+
+    def test_estatisticas_do_histograma(self):
+        histograma = HistogramaResposta(
+            total=6, soma=22, contagens={"2": 1, "4": 3, "5": 2}
+        )
+        self.assertEqual(histograma.media, 3.67)
+        self.assertEqual(histograma.moda, 4)
+        self.assertEqual(histograma.mediana, 4)
+
+        histograma = HistogramaResposta(total=2, soma=8, contagens={"3": 1, "5": 1})
+        self.assertEqual(histograma.mediana, 4)
+        self.assertEqual(histograma.moda, 3)
+        self.assertIsNone(HistogramaResposta().media)
@@ -0,0 +1,173 @@
+"""
+Testes dos jobs em segundo plano (fila no banco).
+
+Validações principais:
+1. Jobs são reservados em ordem e executados uma única vez
+2. Falhas ficam registradas no job, sem interromper o worker
+3. Jobs abandonados voltam para a fila até o limite de tentativas; o
+   progresso renova a reserva, e o worker que a perde não altera o job
+4. Apenas o criador (ou um admin) acompanha e baixa o resultado
+"""
+
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from avaliacao_docente.jobs import (
+    MAX_TENTATIVAS,
+    PRAZO_EXECUCAO,
+    atualizar_progresso,
+    enfileirar,
+    executar_job,
+    executar_pendentes,
+    reservar_job,
+)
+from avaliacao_docente.models import Job
+from avaliacao_docente.tests_participacao import CicloAvaliacaoTestBase
+
+TAREFAS = {
+    "relatorio_avaliacoes_csv": "avaliacao_docente.relatorios.csv_relatorio",
+    "teste_falha": "avaliacao_docente.tests_jobs.tarefa_com_falha",
+    "teste_reservado": "avaliacao_docente.tests_jobs.tarefa_reservada_por_outro",
+}
+
+
+def tarefa_com_falha(job):
+    raise RuntimeError("falha proposital")
+
+
+def tarefa_reservada_por_outro(job):
+    def partes():
+        yield b"primeira"
+        # O worker parece parado e outro reserva o job
+        Job.objects.filter(pk=job.pk).update(
+            iniciado_em=timezone.now() - PRAZO_EXECUCAO * 2
+        )
+        reservar_job()
+        yield b"segunda"
+
+    return partes(), "teste.bin", "application/octet-stream"
+
+
+class JobTests(CicloAvaliacaoTestBase):
+    """Testes do ciclo de vida de um job"""
+
+    def test_reserva_em_ordem(self):
+        primeiro = enfileirar("relatorio_avaliacoes_csv")
+        segundo = enfileirar("relatorio_avaliacoes_csv")
+
+        self.assertEqual(reservar_job(), primeiro)
+        self.assertEqual(reservar_job(), segundo)
+        self.assertIsNone(reservar_job())
+
+        primeiro.refresh_from_db()
+        self.assertEqual((primeiro.status, primeiro.tentativas), ("executando", 1))
+
+    def test_tipo_desconhecido(self):
+        with self.assertRaises(ValueError):
+            enfileirar("inexistente")
+
+    @patch("avaliacao_docente.jobs.TAREFAS", TAREFAS)
+    def test_falha_registrada(self):
+        falha = enfileirar("teste_falha")
+        ok = enfileirar("relatorio_avaliacoes_csv")
+
+        with self.assertLogs("avaliacao_docente.jobs", "ERROR"):
+            self.assertEqual(executar_pendentes(), 2)
+        falha.refresh_from_db()
+        ok.refresh_from_db()
+        self.assertEqual(falha.status, "falhou")
+        self.assertIn("falha proposital", falha.erro)
+        self.assertEqual(ok.status, "concluido")
+        self.assertFalse(falha.partes.exists())
+        primeira = bytes(ok.partes.get(ordem=0).conteudo)
+        self.assertTrue(primeira.startswith("\ufeff".encode("utf-8")))
+
+    @patch("avaliacao_docente.jobs.TAMANHO_PARTE", 64)
+    def test_resultado_gravado_em_partes(self):
+        avaliacao = self.criar_avaliacao()
+        for _ in range(3):
+            self.responder(avaliacao, self.matricular(avaliacao), 4, texto="Ok")
+        job = enfileirar("relatorio_avaliacoes_csv", usuario=self.admin_user)
+        executar_pendentes()
+
+        self.assertGreater(job.partes.count(), 1)
+        self.client.force_login(self.admin_user)
+        response = self.client.get(reverse("baixar_job", args=[job.id]))
+        self.assertTrue(response.streaming)
+        conteudo = b"".join(response.streaming_content)
+        self.assertEqual(
+            conteudo,
+            b"".join(bytes(parte.conteudo) for parte in job.partes.order_by("ordem")),
+        )
+        self.assertIn("Pergunta likert".encode("utf-8"), conteudo)
+
+    def test_job_abandonado(self):
+        job = enfileirar("relatorio_avaliacoes_csv")
+        reservar_job()
+        self.assertIsNone(reservar_job())
+
+        # Worker interrompido: o job volta para a fila depois do prazo
+        Job.objects.filter(pk=job.pk).update(
+            iniciado_em=timezone.now() - PRAZO_EXECUCAO * 2
+        )
+        self.assertEqual(reservar_job(), job)
+
+        Job.objects.filter(pk=job.pk).update(
+            iniciado_em=timezone.now() - PRAZO_EXECUCAO * 2,
+            tentativas=MAX_TENTATIVAS,
+        )
+        self.assertIsNone(reservar_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, "falhou")
+
+    def test_progresso_renova_a_reserva(self):
+        enfileirar("relatorio_avaliacoes_csv")
+        job = reservar_job()
+        Job.objects.filter(pk=job.pk).update(
+            iniciado_em=timezone.now() - PRAZO_EXECUCAO * 2
+        )
+        atualizar_progresso(job, 40)
+        self.assertIsNone(reservar_job())
+        job.refresh_from_db()
+        self.assertEqual((job.progresso, job.tentativas), (40, 1))
+
+    @patch("avaliacao_docente.jobs.TAREFAS", TAREFAS)
+    def test_reserva_perdida_durante_a_execucao(self):
+        enfileirar("teste_reservado")
+        job = reservar_job()
+        with self.assertLogs("avaliacao_docente.jobs", "WARNING"):
+            executar_job(job)
+
+        # O novo dono (tentativa 2) segue com o job, que não foi finalizado;
+        # a parte gravada antes da perda é descartada quando ele começa
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.tentativas), ("executando", 2))
+        self.assertEqual(
+            [bytes(parte.conteudo) for parte in job.partes.all()], [b"primeira"]
+        )
+
+    def test_comando_uma_vez(self):
+        enfileirar("relatorio_avaliacoes_csv")
+        saida = StringIO()
+        call_command("run_jobs", uma_vez=True, stdout=saida)
+        self.assertIn("Total de jobs executados: 1", saida.getvalue())
+        self.assertFalse(Job.objects.exclude(status="concluido").exists())
+
+    def test_acesso_ao_resultado(self):
+        job = enfileirar("relatorio_avaliacoes_csv", usuario=self.admin_user)
+        self.client.force_login(self.professor.user)
+        self.assertEqual(
+            self.client.get(reverse("status_job", args=[job.id])).status_code, 403
+        )
+
+        self.client.force_login(self.admin_user)
+        url = reverse("baixar_job", args=[job.id])
+        self.assertEqual(self.client.get(url).status_code, 409)
+        executar_pendentes()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("attachment", response["Content-Disposition"])
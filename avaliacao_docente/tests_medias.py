@@ -0,0 +1,103 @@
+"""
+Testes das médias de respostas calculadas em SQL.
+
+Validações principais:
+1. media_geral e get_media_por_categoria usam AVG sobre valor_numerico
+2. with_scores() e medias_por_categoria() calculam uma página inteira
+   de avaliações sem queries por linha
+3. O changelist do admin não cresce em queries com o número de avaliações
+"""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from avaliacao_docente.models import (
+    AvaliacaoDocente,
+    CategoriaPergunta,
+    PerguntaAvaliacao,
+    QuestionarioPergunta,
+    RespostaAvaliacao,
+)
+from avaliacao_docente.tests_participacao import CicloAvaliacaoTestBase
+
+
+class MediasAvaliacaoTests(CicloAvaliacaoTestBase):
+    """Testes de media_geral, get_media_por_categoria e do annotator em lote"""
+
+    def setUp(self):
+        super().setUp()
+        self.avaliacao = self.criar_avaliacao()
+        aluno1 = self.matricular(self.avaliacao)
+        aluno2 = self.matricular(self.avaliacao)
+        self.responder(self.avaliacao, aluno1, likert=5, nps=0, texto="Ótimo")
+        self.responder(self.avaliacao, aluno2, likert=4, nps=6)
+
+        # Categoria com pergunta própria e categoria inativa (ignorada)
+        self.cat_postura = CategoriaPergunta.objects.create(nome="Postura", ordem=2)
+        inativa = CategoriaPergunta.objects.create(nome="Antiga", ordem=3, ativa=False)
+        for categoria, valor in [(self.cat_postura, 3), (inativa, 1)]:
+            pergunta = PerguntaAvaliacao.objects.create(
+                enunciado=categoria.nome, tipo="likert", categoria=categoria
+            )
+            QuestionarioPergunta.objects.create(
+                questionario=self.questionario, pergunta=pergunta
+            )
+            RespostaAvaliacao.objects.create(
+                avaliacao=self.avaliacao,
+                aluno=aluno1,
+                pergunta=pergunta,
+                valor_numerico=valor,
+            )
+
+    def test_media_geral(self):
+        # (5 + 0 + 4 + 6 + 3 + 1) / 6; NPS 0 também conta
+        self.assertEqual(self.avaliacao.media_geral(), 3.17)
+
+    def test_media_geral_sem_respostas(self):
+        self.assertIsNone(self.criar_avaliacao().media_geral())
+
+    def test_media_por_categoria(self):
+        self.assertEqual(
+            self.avaliacao.get_media_por_categoria(),
+            {"Didática": 3.75, "Postura": 3.0},
+        )
+        self.assertEqual(
+            list(self.avaliacao.get_media_por_categoria()), ["Didática", "Postura"]
+        )
+
+    def test_pagina_de_avaliacoes_em_queries_fixas(self):
+        outras = [self.criar_avaliacao() for _ in range(5)]
+        for avaliacao in outras:
+            self.responder(avaliacao, self.matricular(avaliacao), likert=2)
+
+        with self.assertNumQueries(2):
+            avaliacoes = list(AvaliacaoDocente.objects.with_scores())
+            medias = AvaliacaoDocente.objects.all().medias_por_categoria()
+            for avaliacao in avaliacoes:
+                avaliacao.media_geral()
+
+        por_id = {av.pk: av for av in avaliacoes}
+        self.assertEqual(por_id[self.avaliacao.pk].media_geral(), 3.17)
+        self.assertEqual(por_id[outras[0].pk].media_geral(), 2.0)
+        self.assertEqual(medias[outras[0].pk], {"Didática": 2.0})
+
+    def test_changelist_do_admin(self):
+        self.admin_user.is_staff = True
+        self.admin_user.is_superuser = True
+        self.admin_user.save()
+        self.client.force_login(self.admin_user)
+        url = reverse("admin:avaliacao_docente_avaliacaodocente_changelist")
+
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as antes:
+            self.client.get(url)
+        for _ in range(5):
+            avaliacao = self.criar_avaliacao()
+            self.responder(avaliacao, self.matricular(avaliacao), likert=3)
+        with CaptureQueriesContext(connection) as depois:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "3.17")
+        self.assertLessEqual(len(depois), len(antes) + 1)
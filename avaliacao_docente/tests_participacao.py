@@ -0,0 +1,202 @@
+"""
+Testes das estatísticas de participação calculadas em SQL.
+
+Validações principais:
+1. with_participation() calcula previstos, respondentes e percentual
+2. Admins matriculados não contam como alunos previstos
+3. Vários ciclos são anotados em uma única query
+4. Os métodos dos models delegam para with_participation()
+"""
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rolepermissions.roles import assign_role
+
+from avaliacao_docente.models import (
+    AvaliacaoDocente,
+    CategoriaPergunta,
+    CicloAvaliacao,
+    Curso,
+    Disciplina,
+    MatriculaTurma,
+    PerfilAluno,
+    PerfilProfessor,
+    PerguntaAvaliacao,
+    PeriodoLetivo,
+    QuestionarioAvaliacao,
+    QuestionarioPergunta,
+    RespostaAvaliacao,
+    SubmissaoAvaliacao,
+    Turma,
+)
+
+
+class CicloAvaliacaoTestBase(TestCase):
+    """
+    Base com um ciclo, um questionário e helpers para turmas, alunos e
+    respostas.
+    """
+
+    def setUp(self):
+        self.admin_user = User.objects.create_user(username="admin", password="x")
+        assign_role(self.admin_user, "admin")
+
+        prof_user = User.objects.create_user(
+            username="prof", first_name="Ana", last_name="Souza"
+        )
+        assign_role(prof_user, "professor")
+        self.professor = PerfilProfessor.objects.create(
+            user=prof_user, registro_academico="PROF001"
+        )
+        self.curso = Curso.objects.create(
+            curso_nome="Informática",
+            curso_sigla="INF",
+            coordenador_curso=self.professor,
+        )
+        self.periodo = PeriodoLetivo.objects.create(
+            nome="2024.1", ano=2024, semestre=1
+        )
+
+        self.categoria = CategoriaPergunta.objects.create(nome="Didática", ordem=1)
+        self.questionario = QuestionarioAvaliacao.objects.create(
+            titulo="Questionário", criado_por=self.admin_user
+        )
+        self.perguntas = {}
+        for ordem, tipo in enumerate(["likert", "nps", "texto_livre"], start=1):
+            pergunta = PerguntaAvaliacao.objects.create(
+                enunciado=f"Pergunta {tipo}", tipo=tipo, categoria=self.categoria
+            )
+            QuestionarioPergunta.objects.create(
+                questionario=self.questionario,
+                pergunta=pergunta,
+                ordem_no_questionario=ordem,
+            )
+            self.perguntas[tipo] = pergunta
+
+        self.ciclo = self.criar_ciclo("Ciclo 2024.1")
+        self._turmas = 0
+        self._alunos = 0
+
+    def criar_ciclo(self, nome, **kwargs):
+        inicio = timezone.now() - timedelta(days=1)
+        dados = {
+            "nome": nome,
+            "periodo_letivo": self.periodo,
+            "data_inicio": inicio,
+            "data_fim": inicio + timedelta(days=30),
+            "questionario": self.questionario,
+            "criado_por": self.admin_user,
+            "enviar_lembrete_email": False,
+        }
+        dados.update(kwargs)
+        return CicloAvaliacao.objects.create(**dados)
+
+    def criar_avaliacao(self, ciclo=None, professor=None):
+        """Cria disciplina + turma e a avaliação correspondente no ciclo"""
+        self._turmas += 1
+        disciplina = Disciplina.objects.create(
+            disciplina_nome=f"Disciplina {self._turmas}",
+            disciplina_sigla=f"D{self._turmas}",
+            disciplina_tipo="Obrigatória",
+            curso=self.curso,
+            professor=professor or self.professor,
+            periodo_letivo=self.periodo,
+        )
+        turma = Turma.objects.create(disciplina=disciplina, turno="matutino")
+        return AvaliacaoDocente.objects.create(
+            ciclo=ciclo or self.ciclo,
+            turma=turma,
+            professor=disciplina.professor,
+            disciplina=disciplina,
+        )
+
+    def matricular(self, avaliacao, role="aluno"):
+        """Cria um aluno (com a role informada) matriculado na turma"""
+        self._alunos += 1
+        user = User.objects.create_user(username=f"aluno{self._alunos}")
+        assign_role(user, role)
+        aluno = PerfilAluno.objects.create(user=user)
+        MatriculaTurma.objects.create(
+            aluno=aluno, turma=avaliacao.turma, status="ativa"
+        )
+        return aluno
+
+    def responder(self, avaliacao, aluno, likert=None, nps=None, texto=""):
+        """Registra as respostas de um aluno às perguntas do questionário"""
+        valores = [
+            ("likert", likert, ""),
+            ("nps", nps, ""),
+            ("texto_livre", None, texto),
+        ]
+        # Gravadas uma por linha, como os envios anteriores à compactação
+        submissao, _ = SubmissaoAvaliacao.objects.get_or_create(
+            avaliacao=avaliacao, aluno=aluno, defaults={"anonima": True}
+        )
+        for tipo, numero, valor_texto in valores:
+            if numero is None and not valor_texto:
+                continue
+            RespostaAvaliacao.objects.create(
+                avaliacao=avaliacao,
+                aluno=aluno,
+                pergunta=self.perguntas[tipo],
+                valor_numerico=numero,
+                valor_texto=valor_texto,
+                anonima=True,
+                submissao=submissao,
+            )
+
+
+class ParticipacaoCicloTests(CicloAvaliacaoTestBase):
+    """Testes de CicloAvaliacao.objects.with_participation()"""
+
+    def setUp(self):
+        super().setUp()
+        self.av1 = self.criar_avaliacao()
+        self.av2 = self.criar_avaliacao()
+        alunos1 = [self.matricular(self.av1) for _ in range(3)]
+        self.matricular(self.av1, role="admin")
+        alunos2 = [self.matricular(self.av2) for _ in range(2)]
+
+        self.responder(self.av1, alunos1[0], likert=5, nps=9)
+        self.responder(self.av1, alunos1[1], likert=4)
+        self.responder(self.av2, alunos2[0], likert=3, texto="Bom")
+
+    def test_participacao_agregada(self):
+        ciclo = CicloAvaliacao.objects.with_participation().get(pk=self.ciclo.pk)
+        self.assertEqual(ciclo.alunos_previstos, 5)
+        self.assertEqual(ciclo.alunos_respondentes, 3)
+        self.assertEqual(ciclo.participacao_percentual, 60.0)
+
+    def test_participacao_por_avaliacao(self):
+        avaliacoes = {
+            av.pk: av for av in AvaliacaoDocente.objects.with_participation()
+        }
+        self.assertEqual(avaliacoes[self.av1.pk].alunos_aptos_count, 3)
+        self.assertEqual(avaliacoes[self.av1.pk].respondentes_count, 2)
+        self.assertEqual(avaliacoes[self.av1.pk].participacao_percentual, 66.67)
+        self.assertEqual(avaliacoes[self.av2.pk].participacao_percentual, 50.0)
+
+    def test_varios_ciclos_em_uma_query(self):
+        vazio = self.criar_ciclo("Ciclo vazio")
+        for _ in range(3):
+            self.criar_avaliacao(ciclo=self.criar_ciclo("Outro"))
+
+        with self.assertNumQueries(1):
+            ciclos = {c.pk: c for c in CicloAvaliacao.objects.with_participation()}
+            for ciclo in ciclos.values():
+                ciclo.percentual_participacao()
+
+        self.assertEqual(len(ciclos), 5)
+        self.assertEqual(ciclos[vazio.pk].alunos_previstos, 0)
+        self.assertEqual(ciclos[vazio.pk].percentual_participacao(), 0)
+
+    def test_metodos_do_model_delegam(self):
+        ciclo = CicloAvaliacao.objects.get(pk=self.ciclo.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(ciclo.total_avaliacoes_previstas(), 5)
+        self.assertEqual(ciclo.total_avaliacoes_respondidas(), 3)
+        self.assertEqual(ciclo.percentual_participacao(), 60.0)
+        self.assertEqual(self.av1.percentual_participacao(), 66.67)
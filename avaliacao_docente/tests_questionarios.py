@@ -0,0 +1,163 @@
+"""
+Testes do esquema compilado dos questionários (questionarios.py).
+
+Validações principais:
+1. Com o cache aquecido, exibir e validar o formulário de resposta não
+   consulta o questionário nem as perguntas
+2. O esquema é compartilhado pelo cache do Django entre processos
+3. Editar perguntas, categorias ou a composição do questionário invalida
+   o esquema, também o compilado antes por outro processo
+4. O esquema é imutável; os formulários recebem cópias dos campos
+"""
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from avaliacao_docente import questionarios
+from avaliacao_docente.forms import RespostaAvaliacaoForm
+from avaliacao_docente.models import (
+    AvaliacaoDocente,
+    PerguntaAvaliacao,
+    QuestionarioAvaliacao,
+    QuestionarioPergunta,
+)
+from avaliacao_docente.questionarios import esquema_questionario
+from avaliacao_docente.tests_respostas import EnvioTestBase
+
+TABELAS_QUESTIONARIO = (
+    "avaliacao_docente_questionariopergunta",
+    "avaliacao_docente_perguntaavaliacao",
+    "avaliacao_docente_categoriapergunta",
+)
+
+
+class EsquemaQuestionarioTests(EnvioTestBase):
+    """Testes do esquema compilado e da sua invalidação"""
+
+    def setUp(self):
+        cache.clear()
+        questionarios._local_cache.clear()
+        super().setUp()
+
+    def consultas_ao_questionario(self, queries):
+        return [
+            q["sql"]
+            for q in queries
+            if any(tabela in q["sql"] for tabela in TABELAS_QUESTIONARIO)
+        ]
+
+    def esquema(self):
+        # Relido a cada chamada, como em cada requisição
+        return esquema_questionario(
+            QuestionarioAvaliacao.objects.get(pk=self.questionario.pk)
+        )
+
+    def test_formulario_sem_consultar_o_questionario(self):
+        aluno = self.matricular(self.avaliacao)
+        self.client.force_login(aluno.user)
+        url = reverse("responder_avaliacao", args=[self.avaliacao.id])
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            self.assertContains(response, "Pergunta likert")
+            # Lida como em responder_avaliacao, com a versão do questionário
+            avaliacao = AvaliacaoDocente.objects.select_related(
+                "ciclo__questionario"
+            ).get(pk=self.avaliacao.pk)
+            form = RespostaAvaliacaoForm(
+                avaliacao,
+                data={
+                    f"pergunta_{self.perguntas['likert'].id}": "4",
+                    f"pergunta_{self.perguntas['nps'].id}": "8",
+                    f"pergunta_{self.perguntas['texto_livre'].id}": "Ok",
+                },
+            )
+            self.assertTrue(form.is_valid())
+            self._enviar(aluno, likert="5", nps="9", texto_livre="Ok")
+        self.assertEqual(self.consultas_ao_questionario(queries), [])
+        self.assertEqual(
+            self.avaliacao.submissoes.get().perguntas,
+            [self.perguntas["likert"].id, self.perguntas["nps"].id],
+        )
+
+    def test_esquema_compartilhado_pelo_cache(self):
+        esquema = self.esquema()
+        self.assertEqual(
+            [pergunta.tipo for pergunta in esquema.perguntas],
+            ["likert", "nps", "texto_livre"],
+        )
+
+        # Outro processo: sem o cache local, o esquema vem do cache do Django
+        questionarios._local_cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            compartilhado = self.esquema()
+        self.assertEqual(self.consultas_ao_questionario(queries), [])
+        self.assertIsNot(compartilhado, esquema)
+        self.assertEqual(
+            [p.enunciado for p in compartilhado.perguntas],
+            [p.enunciado for p in esquema.perguntas],
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.assertIs(self.esquema(), compartilhado)
+        self.assertEqual(self.consultas_ao_questionario(queries), [])
+
+    def test_edicao_invalida_o_esquema(self):
+        self.esquema()
+        likert = self.perguntas["likert"]
+        likert.enunciado = "Enunciado revisado"
+        likert.obrigatoria = False
+        likert.save()
+        pergunta = self.esquema().por_campo[f"pergunta_{likert.id}"]
+        self.assertEqual(pergunta.enunciado, "Enunciado revisado")
+        self.assertFalse(self.esquema().campos[pergunta.campo].required)
+
+        self.categoria.nome = "Metodologia"
+        self.categoria.save()
+        self.assertEqual(self.esquema().perguntas[0].categoria, "Metodologia")
+
+        nova = PerguntaAvaliacao.objects.create(
+            enunciado="Nova", tipo="sim_nao", categoria=self.categoria
+        )
+        QuestionarioPergunta.objects.create(
+            questionario=self.questionario, pergunta=nova, ordem_no_questionario=9
+        )
+        self.assertEqual(self.esquema().perguntas[-1].id, nova.id)
+
+        # Remoção como em editar_questionario_perguntas
+        self.client.force_login(self.admin_user)
+        self.client.post(
+            reverse("editar_questionario_perguntas", args=[self.questionario.id]),
+            {"remover_pergunta": "1", "pergunta_id": nova.id},
+        )
+        self.assertNotIn(nova.id, [p.id for p in self.esquema().perguntas])
+
+    def test_edicao_vista_por_outro_processo(self):
+        antigo = self.esquema()
+        likert = self.perguntas["likert"]
+        likert.obrigatoria = False
+        likert.save()
+
+        # O cache local de outro processo ainda guarda o esquema antigo
+        questionarios._local_cache[self.questionario.pk] = antigo
+        campo = f"pergunta_{likert.id}"
+        self.assertFalse(self.esquema().campos[campo].required)
+        aluno = self.matricular(self.avaliacao)
+        self.client.force_login(aluno.user)
+        self._enviar(aluno, nps="9", texto_livre="Ok")
+        self.assertTrue(self.avaliacao.submissoes.exists())
+
+    def test_esquema_imutavel(self):
+        esquema = self.esquema()
+        with self.assertRaises(AttributeError):
+            esquema.perguntas = ()
+        with self.assertRaises(AttributeError):
+            esquema.perguntas[0].obrigatoria = False
+
+        form = RespostaAvaliacaoForm(self.avaliacao)
+        campo = f"pergunta_{self.perguntas['nps'].id}"
+        form.fields[campo].required = False
+        self.assertTrue(esquema.campos[campo].required)
+        self.assertTrue(RespostaAvaliacaoForm(self.avaliacao).fields[campo].required)
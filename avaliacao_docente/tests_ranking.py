@@ -0,0 +1,103 @@
+"""
+Testes do ranking percentual dos professores por curso e período letivo.
+
+Validações principais:
+1. PERCENT_RANK calculado pelo banco igual ao cálculo em Python
+2. Grupos separados por curso; empates recebem o mesmo percentil
+3. O ranking é gravado em lote e recalculado por job
+4. O relatório exibe o percentil do professor
+"""
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from avaliacao_docente.histogramas import reconstruir_histogramas
+from avaliacao_docente.jobs import enfileirar, executar_pendentes
+from avaliacao_docente.models import Curso, PerfilProfessor, RankingProfessor
+from avaliacao_docente.ranking import (
+    _com_percent_rank,
+    _com_percent_rank_python,
+    _medias_por_professor,
+    calcular_ranking,
+    percentis_rank,
+)
+from avaliacao_docente.tests_participacao import CicloAvaliacaoTestBase
+
+
+class PercentisRankTests(SimpleTestCase):
+    """Testes do cálculo de PERCENT_RANK em Python"""
+
+    def test_percentis(self):
+        self.assertEqual(percentis_rank([3.0, 1.0, 5.0]), [0.5, 0.0, 1.0])
+
+    def test_empates_e_grupo_unitario(self):
+        self.assertEqual(percentis_rank([2.0, 4.0, 4.0]), [0.0, 0.5, 0.5])
+        self.assertEqual(percentis_rank([4.0]), [0.0])
+
+
+class CalcularRankingTests(CicloAvaliacaoTestBase):
+    """Testes do ranking gravado em RankingProfessor"""
+
+    def setUp(self):
+        super().setUp()
+        self.professores = [self.professor] + [
+            PerfilProfessor.objects.create(
+                user=User.objects.create_user(username=f"prof{i}"),
+                registro_academico=f"PROF10{i}",
+            )
+            for i in range(3)
+        ]
+        outro_curso = Curso.objects.create(
+            curso_nome="Matemática",
+            curso_sigla="MAT",
+            coordenador_curso=self.professor,
+        )
+
+        # Informática: médias 4, 2 e 5; Matemática: um único professor
+        for professor, notas in zip(self.professores, [(5, 3), (2, 2), (5, 5)]):
+            avaliacao = self.criar_avaliacao(professor=professor)
+            for nota in notas:
+                self.responder(avaliacao, self.matricular(avaliacao), nota)
+        avaliacao = self.criar_avaliacao(professor=self.professores[3])
+        avaliacao.disciplina.curso = outro_curso
+        avaliacao.disciplina.save()
+        self.responder(avaliacao, self.matricular(avaliacao), 1)
+        reconstruir_histogramas()
+
+    def test_ranking(self):
+        self.assertEqual(calcular_ranking(self.ciclo), 4)
+        percentis = {
+            r.professor_id: (r.media, r.percentil, r.professores_no_grupo)
+            for r in RankingProfessor.objects.filter(ciclo=self.ciclo)
+        }
+        ana, segundo, terceiro, quarto = (p.id for p in self.professores)
+        self.assertEqual(percentis[ana], (4.0, 50.0, 3))
+        self.assertEqual(percentis[segundo], (2.0, 0.0, 3))
+        self.assertEqual(percentis[terceiro], (5.0, 100.0, 3))
+        self.assertEqual(percentis[quarto], (1.0, 0.0, 1))
+
+    def test_banco_e_python_iguais(self):
+        linhas = _medias_por_professor(self.ciclo)
+
+        def chave(linha):
+            return linha["professor_id"]
+
+        self.assertEqual(
+            sorted(_com_percent_rank(linhas), key=chave),
+            sorted(_com_percent_rank_python(linhas), key=chave),
+        )
+
+    def test_recalculo_substitui_linhas(self):
+        calcular_ranking(self.ciclo)
+        calcular_ranking(self.ciclo)
+        self.assertEqual(RankingProfessor.objects.filter(ciclo=self.ciclo).count(), 4)
+
+    def test_job_e_relatorio(self):
+        enfileirar("ranking_professores", {"ciclo": self.ciclo.id})
+        self.assertEqual(executar_pendentes(), 1)
+        self.assertTrue(RankingProfessor.objects.filter(ciclo=self.ciclo).exists())
+
+        self.client.force_login(self.admin_user)
+        response = self.client.get(reverse("relatorio_avaliacoes"))
+        self.assertContains(response, "Percentil no curso")
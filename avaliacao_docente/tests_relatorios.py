@@ -0,0 +1,423 @@
+"""
+Testes dos snapshots de relatório de ciclos encerrados.
+
+Validações principais:
+1. Encerrar um ciclo congela o relatório
+2. Ciclos com data_fim passada geram o snapshot na primeira visita
+3. O relatório de um ciclo encerrado não é recalculado a cada visita
+4. A ação do admin regera o snapshot; reabrir o ciclo o descarta
+5. O número de queries do relatório não cresce com o número de avaliações
+6. Resumo paginado; estatísticas e comentários vêm do endpoint JSON, com
+   paginação por cursor
+7. Exportação CSV (transmitida ou gerada por job), com cabeçalho e linhas
+   do mesmo tamanho
+8. Gráficos por ciclo em formato colunar, com ETag e 304 na revalidação
+"""
+
+import csv
+import io
+import json
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+
+from avaliacao_docente.histogramas import reconstruir_histogramas
+from avaliacao_docente.jobs import executar_pendentes
+from avaliacao_docente.models import (
+    AvaliacaoDocente,
+    PerfilProfessor,
+    RelatorioCicloSnapshot,
+)
+from avaliacao_docente.ranking import calcular_ranking
+from avaliacao_docente.relatorios import (
+    detalhes_snapshot,
+    linhas_csv,
+    obter_snapshots,
+)
+from avaliacao_docente.tests_participacao import CicloAvaliacaoTestBase
+
+
+class RelatorioCicloSnapshotTests(CicloAvaliacaoTestBase):
+    """Testes de geração e uso dos snapshots no relatório"""
+
+    def setUp(self):
+        super().setUp()
+        self.avaliacao = self.criar_avaliacao()
+        self.responder(self.avaliacao, self.matricular(self.avaliacao), 5, 10, "Ótimo")
+        self.responder(self.avaliacao, self.matricular(self.avaliacao), 3, 6)
+        reconstruir_histogramas()
+        self.client.force_login(self.admin_user)
+
+    def _relatorio(self, **params):
+        response = self.client.get(reverse("relatorio_avaliacoes"), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_encerrar_ciclo_gera_snapshot(self):
+        self.client.post(reverse("encerrar_ciclo", args=[self.ciclo.id]))
+
+        snapshot = RelatorioCicloSnapshot.objects.get(ciclo=self.ciclo)
+        (linha,) = obter_snapshots([snapshot.ciclo])[self.ciclo.id]["linhas"]
+        self.assertEqual(linha["respondentes"], 2)
+
+        detalhes = detalhes_snapshot(snapshot.ciclo, self.avaliacao.id)
+        self.assertEqual(detalhes["comentarios"][0]["valor_texto"], "Ótimo")
+        self.assertEqual(
+            [s["respostas_count"] for s in detalhes["pergunta_stats"]], [2, 2]
+        )
+
+    def test_relatorio_igual_ao_calculado_na_hora(self):
+        url_detalhes = reverse("relatorio_avaliacao_detalhes", args=[self.avaliacao.id])
+        # O snapshot recalcula o ranking; no ciclo aberto ele vem do job
+        calcular_ranking(self.ciclo)
+        aberto = self._relatorio()
+        detalhes_aberto = self.client.get(url_detalhes).json()
+        self.assertFalse(RelatorioCicloSnapshot.objects.exists())
+
+        self.ciclo.ativo = False
+        self.ciclo.save()
+        congelado = self._relatorio()
+        self.assertTrue(RelatorioCicloSnapshot.objects.filter(ciclo=self.ciclo).exists())
+
+        for chave in ("avaliacoes", "media_geral", "ciclos_graficos_json"):
+            self.assertEqual(aberto.context[chave], congelado.context[chave], chave)
+        self.assertEqual(aberto.context["media_geral"], 6.0)
+
+        detalhes_congelado = self.client.get(url_detalhes).json()
+        self.assertEqual(detalhes_aberto, detalhes_congelado)
+        self.assertEqual(detalhes_congelado["comentarios"][0]["valor_texto"], "Ótimo")
+
+    def test_data_fim_passada_gera_snapshot_sob_demanda(self):
+        passado = timezone.now() - timedelta(days=60)
+        ciclo = self.criar_ciclo(
+            "Ciclo 2023.2", data_inicio=passado, data_fim=passado + timedelta(days=30)
+        )
+        avaliacao = self.criar_avaliacao(ciclo=ciclo)
+        self.responder(avaliacao, self.matricular(avaliacao), 4)
+        reconstruir_histogramas()
+
+        response = self._relatorio(ciclo=ciclo.id)
+        self.assertTrue(RelatorioCicloSnapshot.objects.filter(ciclo=ciclo).exists())
+        self.assertEqual(response.context["total_avaliacoes"], 1)
+
+        # Respostas gravadas depois do encerramento não alteram o relatório
+        self.responder(avaliacao, self.matricular(avaliacao), 1)
+        reconstruir_histogramas()
+        response = self._relatorio(ciclo=ciclo.id)
+        self.assertEqual(response.context["avaliacoes"][0]["respondentes"], 1)
+        (grafico,) = json.loads(response.context["ciclos_graficos_json"])
+        dados = self.client.get(grafico["url"]).json()
+        self.assertEqual(dados["rotulos"][0][0], "1")
+        self.assertEqual(dados["perguntas"]["contagens"][0][0], 0)
+
+    def test_filtro_de_professor_no_snapshot(self):
+        outro = PerfilProfessor.objects.create(
+            user=User.objects.create_user(username="prof2"),
+            registro_academico="PROF002",
+        )
+        avaliacao = self.criar_avaliacao(professor=outro)
+        self.responder(avaliacao, self.matricular(avaliacao), 1)
+        reconstruir_histogramas()
+        self.ciclo.ativo = False
+        self.ciclo.save()
+
+        response = self._relatorio(professor=outro.id)
+        self.assertEqual(
+            [linha["id"] for linha in response.context["avaliacoes"]], [avaliacao.id]
+        )
+        self.assertEqual(response.context["media_geral"], 1.0)
+        (grafico,) = json.loads(response.context["ciclos_graficos_json"])
+        dados = self.client.get(grafico["url"]).json()
+        self.assertEqual(dados["rotulos"][0], ["1", "2", "3", "4", "5"])
+        self.assertEqual(dados["perguntas"]["contagens"][0], [1, 0, 0, 0, 0])
+
+        self.assertEqual(self._relatorio().context["total_avaliacoes"], 2)
+
+    def test_acao_do_admin_regera_snapshot(self):
+        self.ciclo.ativo = False
+        self.ciclo.save()
+        self._relatorio()
+        self.responder(self.avaliacao, self.matricular(self.avaliacao), 4)
+        reconstruir_histogramas()
+
+        aberto = self.criar_ciclo("Ciclo aberto")
+        self.client.force_login(
+            User.objects.create_superuser(username="root", password="x")
+        )
+        self.client.post(
+            reverse("admin:avaliacao_docente_cicloavaliacao_changelist"),
+            {
+                "action": "regenerar_relatorio",
+                "_selected_action": [self.ciclo.pk, aberto.pk],
+            },
+        )
+
+        self.assertEqual(
+            self._relatorio().context["avaliacoes"][0]["respondentes"], 3
+        )
+        self.assertFalse(RelatorioCicloSnapshot.objects.filter(ciclo=aberto).exists())
+
+    def test_reabrir_ciclo_descarta_snapshot(self):
+        self.ciclo.ativo = False
+        self.ciclo.save()
+        self._relatorio()
+        self.assertTrue(RelatorioCicloSnapshot.objects.exists())
+
+        self.ciclo.ativo = True
+        self.ciclo.save()
+        self.assertFalse(RelatorioCicloSnapshot.objects.exists())
+
+
+
+class RelatorioNumeroDeQueriesTests(CicloAvaliacaoTestBase):
+    """O custo em queries do relatório não cresce com o volume de dados"""
+
+    def _popular(self, ciclo, quantidade):
+        for _ in range(quantidade):
+            avaliacao = self.criar_avaliacao(ciclo=ciclo)
+            for likert in (2, 5):
+                aluno = self.matricular(avaliacao)
+                self.responder(avaliacao, aluno, likert, likert * 2, "Comentário")
+
+    def test_numero_de_queries_constante(self):
+        pequeno = self.criar_ciclo("Ciclo pequeno")
+        grande = self.criar_ciclo("Ciclo grande")
+        self._popular(pequeno, 1)
+        self._popular(grande, 6)
+        reconstruir_histogramas()
+
+        self.client.force_login(self.admin_user)
+        url = reverse("relatorio_avaliacoes")
+        self.client.get(url)
+
+        for ciclo, avaliacoes in ((pequeno, 1), (grande, 6)):
+            with self.assertNumQueries(9):
+                response = self.client.get(url, {"ciclo": ciclo.id})
+            self.assertEqual(len(response.context["avaliacoes"]), avaliacoes)
+
+        with self.assertNumQueries(9):
+            response = self.client.get(url)
+        self.assertEqual(response.context["total_avaliacoes"], 7)
+
+        # Ciclo encerrado: lido do snapshot, sem recalcular as estatísticas
+        grande.ativo = False
+        grande.save()
+        self.client.get(url, {"ciclo": grande.id})
+        with self.assertNumQueries(8):
+            response = self.client.get(url, {"ciclo": grande.id})
+        self.assertEqual(len(response.context["avaliacoes"]), 6)
+
+
+class RelatorioPaginadoTests(CicloAvaliacaoTestBase):
+    """Testes da paginação do resumo e dos endpoints de detalhes"""
+
+    def setUp(self):
+        super().setUp()
+        self.avaliacao = self.criar_avaliacao()
+        for numero in range(5):
+            aluno = self.matricular(self.avaliacao)
+            self.responder(self.avaliacao, aluno, texto=f"Comentário {numero}")
+        self.responder(self.avaliacao, self.matricular(self.avaliacao), 4, 9)
+        reconstruir_histogramas()
+        self.client.force_login(self.admin_user)
+
+    def _comentarios(self, url, limite=2):
+        textos, apos = [], None
+        with patch("avaliacao_docente.relatorios.COMENTARIOS_POR_PAGINA", limite):
+            while True:
+                params = {"apos": apos} if apos else {}
+                dados = self.client.get(url, params).json()
+                textos.extend(c["valor_texto"] for c in dados["comentarios"])
+                apos = dados["proximo"]
+                if apos is None:
+                    return textos
+
+    def test_resumo_paginado(self):
+        for _ in range(3):
+            avaliacao = self.criar_avaliacao()
+            self.responder(avaliacao, self.matricular(avaliacao), 5)
+
+        with patch("avaliacao_docente.views.AVALIACOES_POR_PAGINA", 3):
+            url = reverse("relatorio_avaliacoes")
+            primeira = self.client.get(url, {"ciclo": self.ciclo.id})
+            segunda = self.client.get(url, {"ciclo": self.ciclo.id, "page": 2})
+
+        self.assertEqual(primeira.context["total_avaliacoes"], 4)
+        self.assertEqual(len(primeira.context["avaliacoes"]), 3)
+        self.assertEqual(
+            [linha["id"] for linha in segunda.context["avaliacoes"]],
+            [self.avaliacao.id],
+        )
+        self.assertContains(primeira, f"ciclo={self.ciclo.id}&page=2")
+        self.assertNotContains(primeira, "Comentário 0")
+
+    def test_detalhes_e_comentarios_por_cursor(self):
+        url = reverse("relatorio_avaliacao_detalhes", args=[self.avaliacao.id])
+        dados = self.client.get(url).json()
+        self.assertEqual(
+            [s["enunciado"] for s in dados["pergunta_stats"]],
+            ["Pergunta likert", "Pergunta nps"],
+        )
+
+        url = reverse("relatorio_avaliacao_comentarios", args=[self.avaliacao.id])
+        esperado = [f"Comentário {numero}" for numero in range(5)]
+        self.assertEqual(self._comentarios(url), esperado)
+
+        # O mesmo percurso sobre o snapshot de um ciclo encerrado
+        self.ciclo.ativo = False
+        self.ciclo.save()
+        self.assertEqual(self._comentarios(url), esperado)
+
+    def test_cursor_invalido_e_permissao(self):
+        url = reverse("relatorio_avaliacao_comentarios", args=[self.avaliacao.id])
+        self.assertEqual(self.client.get(url, {"apos": "xyz"}).status_code, 400)
+
+        self.client.force_login(self.professor.user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+
+class ExportacaoCsvTests(CicloAvaliacaoTestBase):
+    """Testes da exportação CSV do relatório (transmitida ou em segundo plano)"""
+
+    def setUp(self):
+        super().setUp()
+        self.avaliacoes = [self.criar_avaliacao() for _ in range(3)]
+        for avaliacao in self.avaliacoes:
+            for numero, likert in enumerate((4, 4, 2, 5, 1, 3, 4)):
+                aluno = self.matricular(avaliacao)
+                self.responder(avaliacao, aluno, likert, texto=f"Texto {numero}")
+        reconstruir_histogramas()
+        self.client.force_login(self.admin_user)
+
+    def _exportar(self, **params):
+        response = self.client.get(
+            reverse("relatorio_avaliacoes"),
+            {"formato": "csv", "segundo_plano": "1", **params},
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(executar_pendentes(), 1)
+
+        job = self.client.get(response.json()["status_url"]).json()
+        self.assertEqual((job["status"], job["progresso"]), ("concluido", 100))
+        download = self.client.get(job["download_url"])
+        return self._ler_csv(download)
+
+    def _ler_csv(self, response):
+        self.assertTrue(response.streaming)
+        conteudo = b"".join(response.streaming_content).decode("utf-8")
+        return list(csv.reader(io.StringIO(conteudo.lstrip("\ufeff"))))
+
+    def test_colunas_e_valores(self):
+        cabecalho, *linhas = self._exportar(ciclo=self.ciclo.id)
+
+        self.assertEqual(len(linhas), 9)  # 3 avaliações x 3 perguntas
+        self.assertTrue(all(len(linha) == len(cabecalho) for linha in linhas))
+
+        likert = dict(zip(cabecalho, linhas[0]))
+        self.assertEqual(likert["Pergunta"], "Pergunta likert")
+        self.assertEqual(likert["Respondentes"], "7")
+        self.assertEqual((likert["Média"], likert["Moda"]), ("3.29", "4"))
+        self.assertEqual(likert["Total Respostas"], "7")
+        self.assertTrue(likert["Comentários"].startswith("Texto 0 | Texto 1"))
+        self.assertTrue(likert["Comentários"].endswith("(+2 comentários)"))
+
+        nps = dict(zip(cabecalho, linhas[1]))
+        self.assertEqual(
+            (nps["Média"], nps["Moda"], nps["Comentários"]), ("0", "N/A", "")
+        )
+
+    def test_link_direto_transmite_o_csv(self):
+        response = self.client.get(
+            reverse("relatorio_avaliacoes"), {"formato": "csv", "ciclo": self.ciclo.id}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("attachment", response["Content-Disposition"])
+        self.assertEqual(self._ler_csv(response), self._exportar(ciclo=self.ciclo.id))
+
+        # Filtro inválido é ignorado, como nas demais views do relatório
+        response = self.client.get(
+            reverse("relatorio_avaliacoes"), {"formato": "csv", "ciclo": "abc"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self._ler_csv(response)), 1 + 9)
+
+    def test_queries_por_lote(self):
+        avaliacoes = AvaliacaoDocente.objects.all()
+        # Avaliações lidas por um único cursor; por lote, estatísticas e
+        # comentários (as perguntas do questionário só no 1º lote)
+        with self.assertNumQueries(1 + 3 + 2):
+            linhas = list(linhas_csv(avaliacoes, tamanho_lote=2))
+        self.assertEqual(len(linhas), 1 + 9)
+
+
+class GraficosCicloApiTests(CicloAvaliacaoTestBase):
+    """Testes do endpoint de gráficos por ciclo (formato colunar e ETag)"""
+
+    def setUp(self):
+        super().setUp()
+        self.avaliacao = self.criar_avaliacao()
+        self.responder(self.avaliacao, self.matricular(self.avaliacao), 5, 10, "Ok")
+        self.responder(self.avaliacao, self.matricular(self.avaliacao), 4, 10)
+        reconstruir_histogramas()
+        self.url = reverse("graficos_ciclo_api", args=[self.ciclo.id])
+        self.client.force_login(self.admin_user)
+
+    def test_formato_colunar(self):
+        dados = self.client.get(self.url).json()
+        self.assertEqual(dados["ciclo"], {"id": self.ciclo.id, "nome": self.ciclo.nome})
+        self.assertEqual(
+            dados["rotulos"],
+            [
+                ["1", "2", "3", "4", "5"],
+                [str(valor) for valor in range(11)],
+                ["Total de respostas"],
+            ],
+        )
+        perguntas = dados["perguntas"]
+        self.assertEqual(perguntas["tipo"], ["likert", "nps", "texto_livre"])
+        self.assertEqual(perguntas["rotulos"], [0, 1, 2])
+        self.assertEqual(perguntas["contagens"][0], [0, 0, 0, 1, 1])
+        self.assertEqual(perguntas["contagens"][2], [1])
+        self.assertEqual(perguntas["media"], [4.5, 10.0, None])
+
+    def test_etag_e_304(self):
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('"'))
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        with self.assertNumQueries(4):
+            revalidacao = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(revalidacao.status_code, 304)
+        self.assertEqual(revalidacao.content, b"")
+
+        # Uma nova resposta muda a ETag
+        self.responder(self.avaliacao, self.matricular(self.avaliacao), 1)
+        reconstruir_histogramas()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["perguntas"]["contagens"][0][0], 1)
+
+    def test_etag_por_professor_e_snapshot(self):
+        etag = self.client.get(self.url)["ETag"]
+        filtrada = self.client.get(self.url, {"professor": self.professor.id})
+        self.assertNotEqual(filtrada["ETag"], etag)
+
+        self.ciclo.ativo = False
+        self.ciclo.save()
+        congelado = self.client.get(self.url)
+        self.assertEqual(congelado.json(), self.client.get(self.url).json())
+        self.assertEqual(self.client.get(self.url)["ETag"], congelado["ETag"])
+        self.assertNotEqual(congelado["ETag"], etag)
+
+    def test_permissao_e_ciclo_inexistente(self):
+        self.client.force_login(self.professor.user)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        self.client.force_login(self.admin_user)
+        url = reverse("graficos_ciclo_api", args=[self.ciclo.id + 100])
+        self.assertEqual(self.client.get(url).status_code, 404)
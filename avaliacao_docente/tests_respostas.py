@@ -0,0 +1,297 @@
+"""
+Testes do envio de respostas (responder_avaliacao e RespostaAvaliacaoForm).
+
+Validações principais:
+1. Envio com erro não grava nenhuma resposta (tudo ou nada)
+2. O número de queries do envio não cresce com o número de perguntas
+3. O formulário compacta as respostas fechadas na submissão
+4. Um único envio por aluno (inclusive anônimo), garantido pelo banco; o
+   reenvio do mesmo formulário (mesmo token) é idempotente
+"""
+
+import uuid
+
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from avaliacao_docente.forms import RespostaAvaliacaoForm
+from avaliacao_docente.models import (
+    AvaliacaoDocente,
+    PerguntaAvaliacao,
+    QuestionarioPergunta,
+    RespostaAvaliacao,
+    RespostaUnificada,
+    SubmissaoAvaliacao,
+)
+from avaliacao_docente.tests_participacao import CicloAvaliacaoTestBase
+
+
+class EnvioTestBase(CicloAvaliacaoTestBase):
+    """Avaliação do ciclo e envio do formulário pela view"""
+
+    def setUp(self):
+        super().setUp()
+        self.avaliacao = self.criar_avaliacao()
+
+    def _enviar(self, aluno, token=None, **valores):
+        dados = {
+            f"pergunta_{self.perguntas[tipo].id}": valor
+            for tipo, valor in valores.items()
+        }
+        if token:
+            dados["token_envio"] = token
+        self.client.force_login(aluno.user)
+        return self.client.post(
+            reverse("responder_avaliacao", args=[self.avaliacao.id]), dados
+        )
+
+
+class ResponderAvaliacaoTests(EnvioTestBase):
+    """Testes do envio pela view responder_avaliacao"""
+
+    def test_pergunta_obrigatoria_sem_resposta_nao_grava_nada(self):
+        response = self._enviar(self.matricular(self.avaliacao), likert="4", nps="")
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Pergunta nps")
+        self.assertFalse(RespostaAvaliacao.objects.exists())
+
+    def test_valor_invalido_nao_grava_nada(self):
+        aluno = self.matricular(self.avaliacao)
+        for likert in ("9", "abc"):
+            self._enviar(aluno, likert=likert, nps="7", texto_livre="Ok")
+        self.assertFalse(RespostaAvaliacao.objects.exists())
+
+    def test_envio_valido(self):
+        aluno = self.matricular(self.avaliacao)
+        response = self._enviar(aluno, likert="4", nps="7", texto_livre="Ok")
+        self.assertRedirects(
+            response,
+            reverse("visualizar_avaliacao", args=[self.avaliacao.id]),
+            fetch_redirect_response=False,
+        )
+        self.assertEqual(
+            sorted(
+                RespostaUnificada.objects.filter(aluno=aluno).values_list(
+                    "valor_numerico", "valor_texto"
+                ),
+                key=str,
+            ),
+            sorted([(4, ""), (7, ""), (None, "Ok")], key=str),
+        )
+
+    def test_queries_nao_crescem_com_as_perguntas(self):
+        def contar_queries():
+            aluno = self.matricular(self.avaliacao)
+            dados = {f"pergunta_{p.id}": "" for p in PerguntaAvaliacao.objects.all()}
+            dados.update(
+                {
+                    f"pergunta_{pergunta.id}": "3" if pergunta.tipo != "nps" else "8"
+                    for pergunta in PerguntaAvaliacao.objects.all()
+                }
+            )
+            self.client.force_login(aluno.user)
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(
+                    reverse("responder_avaliacao", args=[self.avaliacao.id]), dados
+                )
+            self.assertTrue(RespostaUnificada.objects.filter(aluno=aluno).exists())
+            return len(queries)
+
+        antes = contar_queries()
+        for ordem in range(4, 10):
+            pergunta = PerguntaAvaliacao.objects.create(
+                enunciado=f"Extra {ordem}", tipo="likert", categoria=self.categoria
+            )
+            QuestionarioPergunta.objects.create(
+                questionario=self.questionario,
+                pergunta=pergunta,
+                ordem_no_questionario=ordem,
+            )
+        self.assertEqual(contar_queries(), antes)
+
+
+class SubmissaoUnicaTests(EnvioTestBase):
+    """Testes do envio único por aluno (SubmissaoAvaliacao)"""
+
+    def _mensagens(self, response):
+        return [str(m) for m in response.wsgi_request._messages]
+
+    def test_reenvio_com_mesmo_token_e_idempotente(self):
+        aluno = self.matricular(self.avaliacao)
+        self.client.force_login(aluno.user)
+        formulario = self.client.get(
+            reverse("responder_avaliacao", args=[self.avaliacao.id])
+        )
+        token = str(formulario.context["token_envio"])
+        self.assertContains(formulario, f'value="{token}"')
+
+        for _ in range(2):
+            response = self._enviar(aluno, token, likert="4", nps="7", texto_livre="Ok")
+            self.assertEqual(response.status_code, 302)
+            self.assertIn("Avaliação respondida com sucesso!", self._mensagens(response))
+
+        self.assertEqual(
+            RespostaUnificada.objects.filter(aluno=aluno).count(), 3
+        )
+        submissao = SubmissaoAvaliacao.objects.get(aluno=aluno)
+        self.assertEqual(str(submissao.token), token)
+
+    def test_segundo_envio_e_recusado(self):
+        aluno = self.matricular(self.avaliacao)
+        self._enviar(aluno, likert="4", nps="7", texto_livre="Ok")
+        response = self._enviar(aluno, likert="1", nps="0", texto_livre="Outro")
+        self.assertIn("Esta avaliação já foi respondida.", self._mensagens(response))
+        self.assertEqual(
+            list(
+                RespostaUnificada.objects.filter(
+                    aluno=aluno, valor_numerico__isnull=False
+                ).values_list("valor_numerico", flat=True)
+            ),
+            [4, 7],
+        )
+
+        # Depois do envio o formulário não é mais exibido
+        response = self.client.get(
+            reverse("responder_avaliacao", args=[self.avaliacao.id])
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_restricao_no_banco(self):
+        aluno = self.matricular(self.avaliacao)
+        SubmissaoAvaliacao.objects.create(avaliacao=self.avaliacao, aluno=aluno)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            SubmissaoAvaliacao.objects.create(avaliacao=self.avaliacao, aluno=aluno)
+
+        # Envio anônimo do mesmo aluno: a chave do aluno também é única
+        anonima = SubmissaoAvaliacao(avaliacao=self.avaliacao, anonima=True)
+        anonima.preencher_chave_aluno(aluno)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            anonima.save()
+
+        # Envios anônimos antigos, sem chave, não são restringidos
+        for _ in range(2):
+            SubmissaoAvaliacao.objects.create(avaliacao=self.avaliacao)
+
+
+class RespostaAvaliacaoFormTests(CicloAvaliacaoTestBase):
+    """Testes de RespostaAvaliacaoForm.save"""
+
+    def test_save_compacta_as_respostas_fechadas(self):
+        avaliacao = self.criar_avaliacao()
+        self.perguntas["texto_livre"].obrigatoria = False
+        self.perguntas["texto_livre"].save()
+        form = RespostaAvaliacaoForm(
+            avaliacao,
+            data={
+                f"pergunta_{self.perguntas['likert'].id}": "2",
+                f"pergunta_{self.perguntas['nps'].id}": "9",
+            },
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+
+        # Perguntas (1) + submissão (1) + histogramas; sem texto livre,
+        # nenhuma linha em RespostaAvaliacao
+        with CaptureQueriesContext(connection) as queries:
+            respostas = form.save(aluno=self.matricular(avaliacao))
+        inserts = [q for q in queries if q["sql"].startswith("INSERT INTO")]
+        self.assertEqual(len(respostas), 2)
+        self.assertFalse(
+            any('"avaliacao_docente_respostaavaliacao"' in q["sql"] for q in inserts)
+        )
+        submissao = SubmissaoAvaliacao.objects.get()
+        self.assertEqual(
+            submissao.perguntas,
+            [self.perguntas["likert"].id, self.perguntas["nps"].id],
+        )
+        self.assertEqual(submissao.valores, [2, 9])
+        self.assertEqual(RespostaUnificada.objects.count(), 2)
+
+    def test_save_repetido_nao_grava_nada(self):
+        avaliacao = self.criar_avaliacao()
+        aluno = self.matricular(avaliacao)
+        dados = {
+            f"pergunta_{self.perguntas['likert'].id}": "2",
+            f"pergunta_{self.perguntas['nps'].id}": "9",
+            f"pergunta_{self.perguntas['texto_livre'].id}": "Ok",
+        }
+        token = uuid.uuid4()
+        form = RespostaAvaliacaoForm(avaliacao, data=dados)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save(aluno=aluno, token=token)
+
+        form = RespostaAvaliacaoForm(avaliacao, data=dados)
+        self.assertTrue(form.is_valid(), form.errors)
+        with self.assertRaises(IntegrityError):
+            form.save(aluno=aluno)
+        self.assertEqual(RespostaAvaliacao.objects.count(), 1)
+        self.assertEqual(RespostaUnificada.objects.count(), 3)
+        self.assertEqual(SubmissaoAvaliacao.objects.get().token, token)
+
+    def _enviar_anonimo_pelo_formulario(self, avaliacao, aluno):
+        form = RespostaAvaliacaoForm(
+            avaliacao,
+            data={
+                f"pergunta_{self.perguntas['likert'].id}": "4",
+                f"pergunta_{self.perguntas['nps'].id}": "8",
+                f"pergunta_{self.perguntas['texto_livre'].id}": "Ok",
+            },
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save(aluno=aluno, anonima=True)
+
+    def test_listagem_apos_envio_anonimo(self):
+        avaliacao = self.criar_avaliacao()
+        aluno = self.matricular(avaliacao)
+        self.client.force_login(aluno.user)
+        response = self.client.get(reverse("listar_avaliacoes"))
+        self.assertIn(avaliacao, response.context["avaliacoes"])
+
+        self._enviar_anonimo_pelo_formulario(avaliacao, aluno)
+
+        response = self.client.get(reverse("listar_avaliacoes"))
+        self.assertNotIn(avaliacao, response.context["avaliacoes"])
+        response = self.client.get(reverse("minhas_avaliacoes"))
+        self.assertIn(avaliacao, response.context["avaliacoes"])
+
+    def test_total_respostas_com_envio_anonimo(self):
+        avaliacao = self.criar_avaliacao()
+        self._enviar_anonimo_pelo_formulario(avaliacao, self.matricular(avaliacao))
+        self.responder(avaliacao, self.matricular(avaliacao), 3, 7)
+
+        anotada = AvaliacaoDocente.objects.with_participation().get(pk=avaliacao.pk)
+        self.assertEqual(anotada.total_respostas(), 2)
+        self.assertEqual(
+            AvaliacaoDocente.objects.get(pk=avaliacao.pk).total_respostas(), 2
+        )
+
+    def test_save_anonimo_repetido_e_recusado(self):
+        avaliacao = self.criar_avaliacao()
+        aluno = self.matricular(avaliacao)
+        dados = {
+            f"pergunta_{self.perguntas['likert'].id}": "2",
+            f"pergunta_{self.perguntas['nps'].id}": "9",
+            f"pergunta_{self.perguntas['texto_livre'].id}": "Ok",
+        }
+        form = RespostaAvaliacaoForm(avaliacao, data=dados)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save(aluno=aluno, anonima=True)
+        submissao = SubmissaoAvaliacao.objects.get()
+        self.assertIsNone(submissao.aluno)
+        self.assertEqual(
+            submissao.chave_aluno,
+            SubmissaoAvaliacao.calcular_chave_aluno(avaliacao.id, aluno.id),
+        )
+
+        form = RespostaAvaliacaoForm(avaliacao, data=dados)
+        self.assertTrue(form.is_valid(), form.errors)
+        with self.assertRaises(IntegrityError):
+            form.save(aluno=aluno, anonima=True)
+        self.assertEqual(SubmissaoAvaliacao.objects.count(), 1)
+
+        # A view também reconhece o envio anônimo do aluno
+        self.client.force_login(aluno.user)
+        response = self.client.get(reverse("responder_avaliacao", args=[avaliacao.id]))
+        self.assertRedirects(
+            response, reverse("visualizar_avaliacao", args=[avaliacao.id])
+        )
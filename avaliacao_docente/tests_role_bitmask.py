@@ -0,0 +1,177 @@
+"""
+Testes das máscaras de roles materializadas (PerfilAcesso).
+
+Validações principais:
+1. assign_role/remove_role mantêm as máscaras em sincronia
+2. Filtros de role viram predicados sobre a coluna de máscara
+3. Turma.count_alunos_matriculados não cresce em queries com as matrículas
+4. O comando sync_access_bits detecta e corrige divergências
+5. A migration preenche PerfilAcesso para os usuários já existentes
+"""
+
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from rolepermissions.roles import assign_role, remove_role
+
+from avaliacao_docente.models import (
+    Curso,
+    Disciplina,
+    MatriculaTurma,
+    PerfilAcesso,
+    PerfilAluno,
+    PerfilProfessor,
+    PeriodoLetivo,
+    Turma,
+)
+from avaliacao_docente.role_bitmask import (
+    ALL_PERMISSIONS,
+    PERMISSION_BITS,
+    ROLE_BITS,
+    find_inconsistencies,
+    role_q,
+)
+
+
+class PerfilAcessoSyncTests(TestCase):
+    """Testes de sincronização das máscaras com grupos e permissões"""
+
+    def _acesso(self, user):
+        return PerfilAcesso.objects.get(user=user)
+
+    def test_usuario_novo_sem_roles(self):
+        user = User.objects.create_user(username="novo", password="x")
+        acesso = self._acesso(user)
+        self.assertEqual((acesso.roles, acesso.permissoes), (0, 0))
+
+    def test_assign_e_remove_role(self):
+        user = User.objects.create_user(username="prof", password="x")
+        assign_role(user, "professor")
+
+        acesso = self._acesso(user)
+        self.assertEqual(acesso.roles, ROLE_BITS["professor"])
+        self.assertTrue(acesso.permissoes & PERMISSION_BITS["edit_avaliacao"])
+        self.assertFalse(acesso.permissoes & PERMISSION_BITS["delete_avaliacao"])
+
+        remove_role(user, "professor")
+        acesso = self._acesso(user)
+        self.assertEqual((acesso.roles, acesso.permissoes), (0, 0))
+
+    def test_superusuario_conta_como_admin(self):
+        user = User.objects.create_superuser(username="root", password="x")
+        acesso = self._acesso(user)
+        self.assertEqual(acesso.roles, ROLE_BITS["admin"])
+        self.assertEqual(acesso.permissoes, ALL_PERMISSIONS)
+
+        user.is_superuser = False
+        user.save()
+        self.assertEqual(self._acesso(user).roles, 0)
+
+    def test_role_q_filtra_pela_mascara(self):
+        for role in ["admin", "aluno"]:
+            assign_role(User.objects.create_user(username=role), role)
+        assign_role(User.objects.get(username="aluno"), "professor")
+
+        alunos = User.objects.filter(role_q("aluno"))
+        self.assertEqual([u.username for u in alunos], ["aluno"])
+        nao_admins = User.objects.exclude(role_q("admin"))
+        self.assertEqual([u.username for u in nao_admins], ["aluno"])
+
+
+class AlunosMatriculadosTests(TestCase):
+    """Testes das contagens de alunos que excluem admins"""
+
+    def setUp(self):
+        prof_user = User.objects.create_user(username="prof")
+        professor = PerfilProfessor.objects.create(
+            user=prof_user, registro_academico="PROF001"
+        )
+        curso = Curso.objects.create(
+            curso_nome="Informática", curso_sigla="INF", coordenador_curso=professor
+        )
+        periodo = PeriodoLetivo.objects.create(nome="2024.1", ano=2024, semestre=1)
+        disciplina = Disciplina.objects.create(
+            disciplina_nome="Algoritmos",
+            disciplina_sigla="ALG",
+            disciplina_tipo="Obrigatória",
+            curso=curso,
+            professor=professor,
+            periodo_letivo=periodo,
+        )
+        self.turma = Turma.objects.create(disciplina=disciplina, turno="matutino")
+
+    def _matricular(self, username, role):
+        user = User.objects.create_user(username=username)
+        assign_role(user, role)
+        aluno = PerfilAluno.objects.create(user=user)
+        MatriculaTurma.objects.create(aluno=aluno, turma=self.turma, status="ativa")
+
+    def test_admins_nao_contam(self):
+        self._matricular("aluno1", "aluno")
+        self._matricular("admin1", "admin")
+        self.assertEqual(self.turma.count_alunos_matriculados(), 1)
+
+    def test_queries_constantes(self):
+        self._matricular("aluno0", "aluno")
+        with self.assertNumQueries(1):
+            self.turma.count_alunos_matriculados()
+
+        for i in range(1, 15):
+            self._matricular(f"aluno{i}", "aluno")
+            self._matricular(f"admin{i}", "admin")
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.turma.count_alunos_matriculados(), 15)
+
+
+class SyncAccessBitsCommandTests(TestCase):
+    """Testes do comando de backfill/verificação"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="aluno")
+        assign_role(self.user, "aluno")
+
+    def test_consistente_apos_signals(self):
+        self.assertEqual(find_inconsistencies(), [])
+        call_command("sync_access_bits", "--check", stdout=StringIO())
+
+    def test_corrige_divergencias(self):
+        PerfilAcesso.objects.filter(user=self.user).update(roles=0)
+        outro = User.objects.create_user(username="sem.perfil")
+        PerfilAcesso.objects.filter(user=outro).delete()
+
+        with self.assertRaises(CommandError):
+            call_command("sync_access_bits", "--check", stdout=StringIO())
+
+        call_command("sync_access_bits", stdout=StringIO())
+
+        self.assertEqual(find_inconsistencies(), [])
+        self.assertEqual(
+            PerfilAcesso.objects.get(user=self.user).roles, ROLE_BITS["aluno"]
+        )
+        self.assertTrue(PerfilAcesso.objects.filter(user=outro).exists())
+
+    def test_migration_preenche_perfis_existentes(self):
+        admin = User.objects.create_user(username="admin")
+        assign_role(admin, "admin")
+        professor = User.objects.create_user(username="prof")
+        assign_role(professor, "professor")
+        User.objects.create_superuser(username="root", password="x")
+        User.objects.create_user(username="sem.role")
+
+        # Usuários anteriores à tabela: nenhum PerfilAcesso
+        PerfilAcesso.objects.all().delete()
+        migration = import_module("avaliacao_docente.migrations.0009_perfilacesso")
+        migration.preencher_perfis_acesso(apps, None)
+
+        self.assertEqual(PerfilAcesso.objects.count(), User.objects.count())
+        self.assertEqual(find_inconsistencies(), [])
+        admins = User.objects.filter(role_q("admin")).order_by("username")
+        self.assertEqual(
+            list(admins.values_list("username", flat=True)), ["admin", "root"]
+        )
@@ -0,0 +1,252 @@
+"""
+Testes do cache de roles (avaliacao_docente.role_cache).
+
+Validações principais:
+1. O resultado é equivalente ao has_role do rolepermissions
+2. Após o aquecimento, verificações de role não consultam o banco
+3. Atribuir ou remover roles invalida o cache (contador de versão), também
+   nos outros processos, quando as entradas locais expiram
+4. with_roles() anota a role principal em uma única query
+5. Os managers non_admin excluem admins no próprio SQL
+6. Templates resolvem as flags de roles (perms.*) uma vez por requisição
+"""
+
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.template import RequestContext, Template
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rolepermissions.roles import assign_role, remove_role
+
+from avaliacao_docente.models import PerfilAluno, PerfilProfessor, with_roles
+from avaliacao_docente.role_cache import (
+    LOCAL_CACHE_TTL,
+    ROLE_VERSION_CACHE_KEY,
+    bump_role_version,
+    get_role_flags,
+    get_role_version,
+    get_user_roles,
+    user_has_permission,
+    user_has_role,
+)
+from avaliacao_docente.utils import check_user_permission, get_user_role_name
+
+
+class RoleCacheTests(TestCase):
+    """Testes para o cache de roles com invalidação versionada"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="cache.user", password="x")
+        assign_role(self.user, "professor")
+
+    def _fresh(self, user):
+        """Retorna uma nova instância (sem o cache da requisição)"""
+        return User.objects.get(pk=user.pk)
+
+    def test_resultado_equivalente_ao_rolepermissions(self):
+        user = self._fresh(self.user)
+        self.assertTrue(user_has_role(user, "professor"))
+        self.assertTrue(user_has_role(user, ["admin", "professor"]))
+        self.assertFalse(user_has_role(user, "admin"))
+        self.assertFalse(user_has_role(user, "servidor"))
+        self.assertTrue(user_has_permission(user, "edit_avaliacao"))
+        self.assertFalse(user_has_permission(user, "delete_avaliacao"))
+        self.assertEqual(get_user_role_name(user), "Professor")
+
+    def test_sem_queries_apos_aquecimento(self):
+        check_user_permission(self._fresh(self.user), ["coordenador", "admin"])
+
+        # Nova instância (nova requisição): resolvida pelo cache do processo
+        user = self._fresh(self.user)
+        with self.assertNumQueries(0):
+            for _ in range(20):
+                check_user_permission(user, ["coordenador", "admin"])
+                get_user_role_name(user)
+
+    def test_assign_role_invalida_cache(self):
+        user = self._fresh(self.user)
+        self.assertFalse(user_has_role(user, "coordenador"))
+
+        versao = get_role_version()
+        assign_role(self.user, "coordenador")
+        self.assertNotEqual(get_role_version(), versao)
+
+        self.assertTrue(user_has_role(self._fresh(self.user), "coordenador"))
+
+    def test_remove_role_invalida_cache(self):
+        self.assertTrue(user_has_role(self._fresh(self.user), "professor"))
+        remove_role(self.user, "professor")
+        self.assertFalse(user_has_role(self._fresh(self.user), "professor"))
+
+    def test_revogacao_em_outro_processo_expira_o_cache_local(self):
+        self.assertTrue(user_has_role(self._fresh(self.user), "professor"))
+
+        # Outro processo: só o contador compartilhado é incrementado
+        with mock.patch(
+            "avaliacao_docente.signals.bump_role_version",
+            lambda *users: cache.incr(ROLE_VERSION_CACHE_KEY),
+        ):
+            remove_role(self.user, "professor")
+        self.assertTrue(user_has_role(self._fresh(self.user), "professor"))
+
+        # Expiradas as entradas locais, a versão nova é relida
+        agora = time.monotonic() + LOCAL_CACHE_TTL
+        with mock.patch("avaliacao_docente.role_cache.time.monotonic", lambda: agora):
+            self.assertFalse(user_has_role(self._fresh(self.user), "professor"))
+
+    def test_bump_descarta_cache_da_instancia(self):
+        user = self._fresh(self.user)
+        get_user_roles(user)
+        self.user.groups.clear()
+        bump_role_version(user)
+        self.assertFalse(user_has_role(user, "professor"))
+
+    def test_superusuario_tem_todas_as_roles(self):
+        admin = User.objects.create_superuser(username="root", password="x")
+        self.assertTrue(user_has_role(admin, "admin"))
+        self.assertTrue(user_has_permission(admin, "delete_avaliacao"))
+
+
+class WithRolesQuerySetTests(TestCase):
+    """Testes para a anotação de roles em lote (with_roles)"""
+
+    def setUp(self):
+        cache.clear()
+        for role in ["admin", "coordenador", "professor", "aluno"]:
+            user = User.objects.create_user(username=f"user.{role}", password="x")
+            assign_role(user, role)
+        # Coordenador também professor: prevalece coordenador
+        assign_role(User.objects.get(username="user.coordenador"), "professor")
+        User.objects.create_user(username="user.semrole", password="x")
+        User.objects.create_superuser(username="user.super", password="x")
+
+    def test_role_principal_por_precedencia(self):
+        roles = {u.username: u.role_principal for u in with_roles()}
+        self.assertEqual(roles["user.admin"], "admin")
+        self.assertEqual(roles["user.coordenador"], "coordenador")
+        self.assertEqual(roles["user.professor"], "professor")
+        self.assertEqual(roles["user.aluno"], "aluno")
+        self.assertEqual(roles["user.semrole"], "")
+        self.assertEqual(roles["user.super"], "admin")
+
+    def test_listagem_em_uma_query(self):
+        with self.assertNumQueries(1):
+            usuarios = list(with_roles().order_by("username"))
+        self.assertEqual(len(usuarios), 6)
+
+    def test_filtro_por_role_no_sql(self):
+        alunos = with_roles().filter(is_aluno=True)
+        self.assertEqual([u.username for u in alunos], ["user.aluno"])
+
+    def test_gerenciar_usuarios_nao_cresce_com_usuarios(self):
+        admin = User.objects.get(username="user.admin")
+        self.client.force_login(admin)
+        url = reverse("gerenciar_usuarios")
+        self.client.get(url)  # aquece a sessão
+
+        # Nas duas medições o cache de roles do usuário logado é recarregado
+        bump_role_version()
+        with CaptureQueriesContext(connection) as antes:
+            self.client.get(url)
+        for i in range(10):
+            assign_role(User.objects.create_user(username=f"extra{i}"), "aluno")
+        with CaptureQueriesContext(connection) as depois:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(depois), len(antes))
+
+
+class NonAdminManagerTests(TestCase):
+    """Testes para os managers non_admin de PerfilAluno e PerfilProfessor"""
+
+    def _criar_usuario(self, username, role=None, **kwargs):
+        user = User.objects.create_user(username=username, password="x", **kwargs)
+        if role:
+            assign_role(user, role)
+        PerfilAluno.objects.create(user=user)
+        PerfilProfessor.objects.create(user=user)
+        return user
+
+    def setUp(self):
+        self._criar_usuario("perfil.aluno", "aluno")
+        self._criar_usuario("perfil.professor", "professor")
+        self._criar_usuario("perfil.admin", "admin")
+        self._criar_usuario("perfil.super", is_superuser=True)
+
+    def test_exclui_admins_e_superusuarios(self):
+        esperados = ["perfil.aluno", "perfil.professor"]
+        for model in (PerfilAluno, PerfilProfessor):
+            usernames = model.non_admin.order_by("user__username").values_list(
+                "user__username", flat=True
+            )
+            self.assertEqual(list(usernames), esperados)
+
+    def test_query_constante_com_crescimento_de_usuarios(self):
+        with CaptureQueriesContext(connection) as antes:
+            total_antes = len(PerfilAluno.non_admin.all())
+
+        for i in range(25):
+            self._criar_usuario(f"extra.aluno{i}", "aluno")
+            self._criar_usuario(f"extra.admin{i}", "admin")
+
+        with CaptureQueriesContext(connection) as depois:
+            total_depois = len(PerfilAluno.non_admin.all())
+
+        self.assertEqual(len(antes), 1)
+        self.assertEqual(len(depois), 1)
+        self.assertEqual(total_depois, total_antes + 25)
+
+
+class RoleFlagsTemplateTests(TestCase):
+    """Testes das flags de roles expostas aos templates (perms.*)"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="coord", password="x")
+        assign_role(self.user, "coordenador")
+
+    def _render(self, source, **context):
+        request = RequestFactory().get("/")
+        request.user = User.objects.get(pk=self.user.pk)
+        return Template(source).render(RequestContext(request, context))
+
+    def test_flags_imutaveis(self):
+        flags = get_role_flags(self.user)
+        self.assertTrue(flags.can_manage)
+        self.assertFalse(flags.is_admin)
+        self.assertEqual(flags.role_name, "Coordenador")
+        self.assertEqual(flags.role_class, "role-coordenador")
+        with self.assertRaises(AttributeError):
+            flags.is_admin = True
+
+    def test_perms_no_template(self):
+        html = self._render(
+            "{% if perms.can_manage %}gestor{% endif %}"
+            "{% if perms.is_admin %}admin{% endif %}"
+            "|{{ perms.role_name }}"
+            "|{% if perms.avaliacao_docente %}app{% endif %}"
+        )
+        self.assertEqual(html, "gestor|Coordenador|")
+
+    def test_queries_nao_crescem_com_linhas(self):
+        source = (
+            "{% load user_tags %}{% for i in linhas %}"
+            "{% if perms.can_manage %}x{% endif %}"
+            "{% if user|has_role:'aluno' %}y{% endif %}"
+            "{% endfor %}"
+        )
+        with CaptureQueriesContext(connection) as poucas:
+            self._render(source, linhas=range(2))
+        bump_role_version()
+        with CaptureQueriesContext(connection) as muitas:
+            html = self._render(source, linhas=range(200))
+
+        self.assertEqual(html, "x" * 200)
+        self.assertEqual(len(muitas), len(poucas))
@@ -0,0 +1,215 @@
+"""
+Testes do spool local de envios (write-behind).
+
+Validações principais:
+1. Com o spool ativo, o envio não grava nada no banco principal
+2. flush_submission_spool grava os envios em lote, com as datas do envio
+3. Exatamente uma vez: reprocessar um envio já gravado não duplica nada
+4. Reenvio com o mesmo token é aceito; um segundo envio do aluno, não
+5. Descarregar em um ciclo encerrado descarta o snapshot, o ranking e as
+   tendências em cache do ciclo
+6. Com um envio direto concorrente, o lote é regravado envio a envio
+"""
+
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from avaliacao_docente import spool
+from avaliacao_docente.histogramas import reconstruir_histogramas
+from avaliacao_docente.models import (
+    HistogramaResposta,
+    RankingProfessor,
+    RelatorioCicloSnapshot,
+    RespostaUnificada,
+    SubmissaoAvaliacao,
+)
+from avaliacao_docente.relatorios import obter_snapshots
+from avaliacao_docente.tendencias import tendencias
+from avaliacao_docente.tests_respostas import EnvioTestBase
+
+
+class SpoolEnviosTests(EnvioTestBase):
+    """Testes do envio pelo spool e do descarregamento"""
+
+    def setUp(self):
+        super().setUp()
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        configuracao = override_settings(
+            AVALIACAO_SPOOL_ENVIOS=os.path.join(diretorio.name, "spool.sqlite3")
+        )
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.addCleanup(spool.fechar_conexao)
+
+    def descarregar(self):
+        call_command("flush_submission_spool", uma_vez=True, stdout=StringIO())
+
+    def test_envio_vai_para_o_spool(self):
+        aluno = self.matricular(self.avaliacao)
+        # O aluno abre o formulário antes de enviar (esquema já em cache)
+        self.client.force_login(aluno.user)
+        self.client.get(reverse("responder_avaliacao", args=[self.avaliacao.id]))
+        with CaptureQueriesContext(connection) as queries:
+            response = self._enviar(aluno, likert="4", nps="7", texto_livre="Ok")
+        self.assertRedirects(
+            response, reverse("listar_avaliacoes"), fetch_redirect_response=False
+        )
+        self.assertFalse(
+            [
+                q
+                for q in queries
+                if q["sql"].startswith(("INSERT", "UPDATE"))
+                and '"avaliacao_docente_' in q["sql"]
+            ]
+        )
+        self.assertEqual(spool.pendentes(), 1)
+        self.assertFalse(SubmissaoAvaliacao.objects.exists())
+
+        # Enquanto está no spool, o formulário não é exibido de novo
+        response = self.client.get(
+            reverse("responder_avaliacao", args=[self.avaliacao.id])
+        )
+        self.assertRedirects(
+            response, reverse("listar_avaliacoes"), fetch_redirect_response=False
+        )
+
+    def test_descarregamento_em_lote(self):
+        alunos = [self.matricular(self.avaliacao) for _ in range(3)]
+        for nota, aluno in enumerate(alunos, start=2):
+            self._enviar(aluno, likert=str(nota), nps="9", texto_livre=f"Nota {nota}")
+        enviado_em = spool._montar(
+            spool._conexao().execute("SELECT * FROM envios").fetchone()
+        )[0].enviada_em
+
+        self.descarregar()
+
+        self.assertEqual(spool.pendentes(), 0)
+        self.assertEqual(SubmissaoAvaliacao.objects.count(), 3)
+        self.assertEqual(
+            sorted(
+                RespostaUnificada.objects.filter(
+                    pergunta=self.perguntas["likert"]
+                ).values_list("valor_numerico", flat=True)
+            ),
+            [2, 3, 4],
+        )
+        histograma = HistogramaResposta.objects.get(pergunta=self.perguntas["nps"])
+        self.assertEqual((histograma.total, histograma.soma), (3, 27))
+        primeira = SubmissaoAvaliacao.objects.get(aluno=alunos[0])
+        self.assertEqual(primeira.enviada_em, enviado_em)
+        self.assertEqual(primeira.respostas.get().data_resposta, enviado_em)
+
+        # Depois de descarregado, o aluno vê o próprio envio
+        response = self.client.get(
+            reverse("visualizar_avaliacao", args=[self.avaliacao.id])
+        )
+        self.assertContains(response, "Nota 4")
+
+    def test_reprocessamento_nao_duplica(self):
+        aluno = self.matricular(self.avaliacao)
+        token = "0" * 32
+        self._enviar(aluno, token, likert="5", nps="9", texto_livre="Ok")
+        linha = spool._conexao().execute("SELECT * FROM envios").fetchone()
+        self.descarregar()
+
+        # Interrupção entre o COMMIT no banco e a remoção do spool
+        spool._conexao().execute("INSERT INTO envios VALUES (?, ?, ?, ?, ?)", linha)
+        self.descarregar()
+
+        self.assertEqual(spool.pendentes(), 0)
+        submissao = SubmissaoAvaliacao.objects.get()
+        self.assertEqual(submissao.token.hex, token)
+        histograma = HistogramaResposta.objects.get(pergunta=self.perguntas["likert"])
+        self.assertEqual(histograma.total, 1)
+
+    def test_reenvio_e_segundo_envio(self):
+        aluno = self.matricular(self.avaliacao)
+        token = "1" * 32
+        for _ in range(2):
+            response = self._enviar(aluno, token, likert="4", nps="7", texto_livre="A")
+            self.assertIn(
+                "Avaliação respondida com sucesso!",
+                [str(m) for m in response.wsgi_request._messages],
+            )
+        response = self._enviar(aluno, likert="1", nps="0", texto_livre="B")
+        self.assertIn(
+            "Esta avaliação já foi respondida.",
+            [str(m) for m in response.wsgi_request._messages],
+        )
+        self.assertEqual(spool.pendentes(), 1)
+
+        # Já no banco, um novo envio nem chega ao spool
+        self.descarregar()
+        response = self._enviar(aluno, likert="1", nps="0", texto_livre="B")
+        self.assertEqual(spool.pendentes(), 0)
+        self.assertEqual(
+            list(
+                RespostaUnificada.objects.filter(
+                    pergunta=self.perguntas["likert"]
+                ).values_list("valor_numerico", flat=True)
+            ),
+            [4],
+        )
+
+    def test_descarregamento_em_ciclo_encerrado(self):
+        self.responder(self.avaliacao, self.matricular(self.avaliacao), 2, 6)
+        reconstruir_histogramas()
+        aluno = self.matricular(self.avaliacao)
+        self._enviar(aluno, likert="4", nps="8", texto_livre="Ok")
+        self.ciclo.ativo = False
+        self.ciclo.save()
+        obter_snapshots([self.ciclo])
+        self.assertTrue(RankingProfessor.objects.filter(ciclo=self.ciclo).exists())
+        serie = tendencias()["professores"][0]["serie"]
+        self.assertEqual(serie[0]["respondentes"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.descarregar()
+
+        self.assertFalse(
+            RelatorioCicloSnapshot.objects.filter(ciclo=self.ciclo).exists()
+        )
+        self.assertFalse(RankingProfessor.objects.filter(ciclo=self.ciclo).exists())
+        (linha,) = obter_snapshots([self.ciclo])[self.ciclo.id]["linhas"]
+        self.assertEqual(linha["respondentes"], 2)
+        serie = tendencias()["professores"][0]["serie"]
+        self.assertEqual((serie[0]["respondentes"], serie[0]["media"]), (2, 5.0))
+
+    def test_envio_direto_concorrente(self):
+        alunos = [self.matricular(self.avaliacao) for _ in range(2)]
+        for aluno in alunos:
+            self._enviar(aluno, likert="4", nps="8", texto_livre="Ok")
+        linhas = spool._conexao().execute("SELECT * FROM envios").fetchall()
+        enviado_em = spool._montar(linhas[1])[0].enviada_em
+        gravar_lote = spool._gravar_lote
+
+        def gravar_com_concorrente(envios):
+            if len(envios) > 1:
+                SubmissaoAvaliacao.objects.create(
+                    avaliacao=self.avaliacao, aluno=alunos[0]
+                )
+            return gravar_lote(envios)
+
+        with patch.object(spool, "_gravar_lote", gravar_com_concorrente):
+            with self.assertLogs("avaliacao_docente.spool", "WARNING"):
+                self.descarregar()
+
+        self.assertEqual(spool.pendentes(), 0)
+        # Regravado a partir do spool, não dos objetos alterados pelo lote
+        submissao = SubmissaoAvaliacao.objects.get(aluno=alunos[1])
+        self.assertEqual(submissao.enviada_em, enviado_em)
+        self.assertEqual(submissao.respostas.get().data_resposta, enviado_em)
+        self.assertEqual(
+            RespostaUnificada.objects.filter(submissao=submissao).count(), 3
+        )
+        histograma = HistogramaResposta.objects.get(pergunta=self.perguntas["likert"])
+        self.assertEqual(histograma.total, 1)
@@ -0,0 +1,254 @@
+"""
+Testes do armazenamento compactado das respostas (uma linha por envio).
+
+Validações principais:
+1. Respostas fechadas gravadas na submissão; só o texto livre vira linha
+2. RespostaUnificada expõe as duas formas como uma linha por pergunta
+3. compact_answers converte os dados antigos sem alterar médias e
+   histogramas, e vincula respostas gravadas sem submissão
+4. O feed entrega as respostas compactadas por envio
+5. Reverter a migration 0017 devolve as respostas compactadas às linhas
+"""
+
+import json
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+from django.core.management import call_command
+
+from avaliacao_docente.exportacao import feed_respostas
+from avaliacao_docente.histogramas import reconstruir_histogramas
+from avaliacao_docente.models import (
+    AvaliacaoDocente,
+    HistogramaResposta,
+    PerguntaAvaliacao,
+    QuestionarioPergunta,
+    RespostaAvaliacao,
+    RespostaUnificada,
+    SubmissaoAvaliacao,
+)
+from avaliacao_docente.submissoes import gravar_submissao
+from avaliacao_docente.tests_participacao import CicloAvaliacaoTestBase
+
+
+class SubmissaoCompactadaTests(CicloAvaliacaoTestBase):
+    """Testes de gravar_submissao e de RespostaUnificada"""
+
+    def setUp(self):
+        super().setUp()
+        for ordem, tipo in enumerate(["sim_nao", "multipla_escolha"], start=4):
+            pergunta = PerguntaAvaliacao.objects.create(
+                enunciado=f"Pergunta {tipo}", tipo=tipo, categoria=self.categoria
+            )
+            QuestionarioPergunta.objects.create(
+                questionario=self.questionario,
+                pergunta=pergunta,
+                ordem_no_questionario=ordem,
+            )
+            self.perguntas[tipo] = pergunta
+        self.avaliacao = self.criar_avaliacao()
+
+    def gravar(self, aluno, **valores):
+        campos = {
+            "likert": "valor_numerico",
+            "nps": "valor_numerico",
+            "sim_nao": "valor_boolean",
+            "multipla_escolha": "valor_texto",
+            "texto_livre": "valor_texto",
+        }
+        respostas = [
+            RespostaAvaliacao(
+                avaliacao=self.avaliacao,
+                aluno=aluno,
+                pergunta=self.perguntas[tipo],
+                anonima=True,
+                **{campos[tipo]: valor},
+            )
+            for tipo, valor in valores.items()
+        ]
+        return gravar_submissao(
+            SubmissaoAvaliacao(avaliacao=self.avaliacao, aluno=aluno, anonima=True),
+            respostas,
+        )
+
+    def test_respostas_fechadas_na_submissao(self):
+        aluno = self.matricular(self.avaliacao)
+        submissao = self.gravar(
+            aluno,
+            likert=4,
+            nps=0,
+            sim_nao=False,
+            multipla_escolha="Às vezes",
+            texto_livre="Muito bom",
+        )
+
+        submissao.refresh_from_db()
+        self.assertEqual(
+            submissao.perguntas,
+            [
+                self.perguntas[tipo].id
+                for tipo in ("likert", "nps", "sim_nao", "multipla_escolha")
+            ],
+        )
+        self.assertEqual(submissao.valores, [4, 0, False, "Às vezes"])
+        (texto,) = RespostaAvaliacao.objects.all()
+        self.assertEqual((texto.valor_texto, texto.submissao), ("Muito bom", submissao))
+
+        linhas = {
+            resposta.pergunta.tipo: resposta
+            for resposta in RespostaUnificada.objects.filter(
+                avaliacao=self.avaliacao, aluno=aluno
+            ).select_related("pergunta")
+        }
+        self.assertEqual(len(linhas), 5)
+        self.assertEqual(linhas["likert"].valor_numerico, 4)
+        self.assertEqual(linhas["nps"].valor_numerico, 0)
+        self.assertIs(linhas["sim_nao"].valor_boolean, False)
+        self.assertIsNone(linhas["sim_nao"].valor_numerico)
+        self.assertEqual(linhas["multipla_escolha"].valor_texto, "Às vezes")
+        self.assertEqual(linhas["texto_livre"].valor_texto, "Muito bom")
+        self.assertEqual(linhas["likert"].data_resposta, submissao.enviada_em)
+        self.assertEqual(linhas["likert"].valor_display(), "4 - Concordo parcialmente")
+
+    def test_reverter_migration_desempacota_respostas(self):
+        migration = import_module(
+            "avaliacao_docente.migrations.0017_respostas_compactadas"
+        )
+        aluno = self.matricular(self.avaliacao)
+        submissao = self.gravar(
+            aluno, likert=4, sim_nao=True, multipla_escolha="Sempre", texto_livre="Ok"
+        )
+        esperadas = sorted(
+            RespostaUnificada.objects.values_list(
+                "pergunta_id", "valor_numerico", "valor_boolean", "valor_texto"
+            )
+        )
+
+        migration.desempacotar_respostas(apps, None)
+        SubmissaoAvaliacao.objects.update(perguntas=[], valores=[])
+
+        linhas = RespostaAvaliacao.objects.filter(submissao=submissao)
+        self.assertEqual(
+            sorted(
+                linhas.values_list(
+                    "pergunta_id", "valor_numerico", "valor_boolean", "valor_texto"
+                )
+            ),
+            esperadas,
+        )
+        self.assertEqual(set(linhas.values_list("aluno", flat=True)), {aluno.pk})
+        self.assertEqual(
+            linhas.get(pergunta=self.perguntas["likert"]).data_resposta,
+            submissao.enviada_em,
+        )
+
+    def test_medias_participacao_e_histogramas(self):
+        self.gravar(self.matricular(self.avaliacao), likert=5, nps=8)
+        self.gravar(self.matricular(self.avaliacao), likert=2, sim_nao=True)
+
+        avaliacao = (
+            AvaliacaoDocente.objects.with_participation()
+            .with_scores()
+            .get(pk=self.avaliacao.pk)
+        )
+        self.assertEqual(avaliacao.total_respostas(), 2)
+        self.assertEqual(avaliacao.media_geral(), 5.0)
+
+        def histogramas():
+            return sorted(
+                HistogramaResposta.objects.values_list(
+                    "pergunta_id", "total", "soma", "contagens"
+                )
+            )
+
+        incrementais = histogramas()
+        reconstruir_histogramas()
+        self.assertEqual(histogramas(), incrementais)
+
+    def test_feed_entrega_linhas_por_envio(self):
+        self.gravar(self.matricular(self.avaliacao), likert=5, texto_livre="Ok")
+        submissao = self.gravar(self.matricular(self.avaliacao), nps=9)
+
+        def registros(exportacao):
+            linhas = "".join(exportacao.jsonl()).splitlines()
+            return [json.loads(linha) for linha in linhas]
+
+        exportacao, cursor = feed_respostas(limite=1)
+        self.assertEqual(
+            sorted(
+                (r["pergunta_tipo"], r["valor_texto"]) for r in registros(exportacao)
+            ),
+            [("likert", ""), ("texto_livre", "Ok")],
+        )
+
+        exportacao, _ = feed_respostas(cursor)
+        (registro,) = registros(exportacao)
+        self.assertEqual(registro["submissao_id"], submissao.id)
+        self.assertEqual(registro["valor_numerico"], 9)
+
+
+class CompactarRespostasTests(CicloAvaliacaoTestBase):
+    """Testes do comando compact_answers (dados gravados uma por linha)"""
+
+    def setUp(self):
+        super().setUp()
+        self.avaliacao = self.criar_avaliacao()
+        for likert, nps in ((5, 7), (3, None)):
+            self.responder(
+                self.avaliacao, self.matricular(self.avaliacao), likert, nps, "Ok"
+            )
+        reconstruir_histogramas()
+
+    def _estado(self):
+        linhas = sorted(
+            RespostaUnificada.objects.values_list(
+                "aluno_id", "pergunta_id", "valor_numerico", "valor_texto"
+            ),
+            key=str,
+        )
+        histogramas = sorted(
+            HistogramaResposta.objects.values_list("pergunta_id", "total", "soma")
+        )
+        return linhas, histogramas, self.avaliacao.media_geral()
+
+    def test_compactacao_preserva_os_dados(self):
+        antes = self._estado()
+        call_command("compact_answers", lote=1, stdout=StringIO())
+
+        self.assertEqual(RespostaAvaliacao.objects.count(), 2)
+        self.assertFalse(
+            RespostaAvaliacao.objects.exclude(pergunta__tipo="texto_livre").exists()
+        )
+        self.assertEqual(
+            sorted(SubmissaoAvaliacao.objects.values_list("valores", flat=True)),
+            [[3], [5, 7]],
+        )
+        reconstruir_histogramas()
+        self.assertEqual(self._estado(), antes)
+
+        # Executar de novo não altera nada
+        call_command("compact_answers", stdout=StringIO())
+        self.assertEqual(self._estado(), antes)
+
+    def test_respostas_sem_submissao_sao_vinculadas(self):
+        for pergunta, valor in (("likert", 4), ("nps", 10)):
+            RespostaAvaliacao.objects.create(
+                avaliacao=self.avaliacao,
+                pergunta=self.perguntas[pergunta],
+                valor_numerico=valor,
+                anonima=True,
+                session_key="sessao",
+            )
+
+        call_command("compact_answers", stdout=StringIO())
+
+        anonima = SubmissaoAvaliacao.objects.get(aluno__isnull=True)
+        self.assertTrue(anonima.anonima)
+        self.assertEqual(
+            (anonima.perguntas, anonima.valores),
+            ([self.perguntas["likert"].id, self.perguntas["nps"].id], [4, 10]),
+        )
+        self.assertFalse(
+            RespostaAvaliacao.objects.filter(submissao__isnull=True).exists()
+        )
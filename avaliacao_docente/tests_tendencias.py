@@ -0,0 +1,115 @@
+"""
+Testes das tendências entre ciclos (média e taxa de resposta).
+
+Validações principais:
+1. Séries por professor e por disciplina em ordem cronológica
+2. Número de queries não cresce com o número de ciclos
+3. Ciclos encerrados ficam em cache até o conjunto de ciclos mudar; a
+   invalidação vale para todos os processos (cache compartilhado)
+4. API e página restritas a coordenadores e admins
+"""
+
+from django.core.cache import cache, caches
+from django.db.models import F
+from django.test import override_settings
+from django.urls import reverse
+
+from avaliacao_docente.histogramas import reconstruir_histogramas
+from avaliacao_docente.models import HistogramaResposta, PeriodoLetivo
+from avaliacao_docente.tendencias import VERSAO_CACHE_KEY, tendencias
+from avaliacao_docente.tests_participacao import CicloAvaliacaoTestBase
+
+
+class TendenciasTests(CicloAvaliacaoTestBase):
+    """Testes das séries de tendências"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+        # 2024.1 (encerrado): média 4, 2 de 2 alunos responderam
+        self.ciclo.ativo = False
+        self.ciclo.save()
+        anterior = self.criar_avaliacao()
+        for likert in (5, 3):
+            self.responder(anterior, self.matricular(anterior), likert)
+
+        # 2024.2 (aberto): média 2, 1 de 2 alunos respondeu
+        periodo = PeriodoLetivo.objects.create(nome="2024.2", ano=2024, semestre=2)
+        self.atual = self.criar_ciclo("Ciclo 2024.2", periodo_letivo=periodo)
+        avaliacao = self.criar_avaliacao(ciclo=self.atual)
+        self.responder(avaliacao, self.matricular(avaliacao), 2)
+        self.matricular(avaliacao)
+        reconstruir_histogramas()
+
+    def test_series(self):
+        dados = tendencias()
+        self.assertEqual(
+            [ciclo["nome"] for ciclo in dados["ciclos"]],
+            ["Ciclo 2024.1", "Ciclo 2024.2"],
+        )
+
+        (professor,) = dados["professores"]
+        self.assertEqual(professor["nome"], "Ana Souza")
+        self.assertEqual(
+            [(p["media"], p["taxa_resposta"]) for p in professor["serie"]],
+            [(4.0, 100.0), (2.0, 50.0)],
+        )
+        self.assertEqual(len(dados["disciplinas"]), 2)
+
+    def test_filtro_por_disciplina(self):
+        disciplina = tendencias()["disciplinas"][1]
+        dados = tendencias(disciplina_id=disciplina["id"])
+        self.assertEqual([c["id"] for c in dados["ciclos"]], [self.atual.id])
+        self.assertEqual(dados["disciplinas"], [disciplina])
+
+    # Conta só as queries da aplicação: cache em memória, não no banco
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    )
+    def test_cache_dos_ciclos_encerrados(self):
+        # Ids dos ciclos encerrados + ciclos encerrados + ciclos abertos
+        with self.assertNumQueries(3):
+            tendencias()
+        for _ in range(3):
+            self.criar_ciclo("Outro", ativo=False)
+        with self.assertNumQueries(3):
+            tendencias()
+
+        # Conjunto de ciclos inalterado: só os abertos são consultados
+        with self.assertNumQueries(2):
+            tendencias()
+
+        self.atual.ativo = False
+        self.atual.save()
+        with self.assertNumQueries(3):
+            dados = tendencias()
+        self.assertEqual(len(dados["ciclos"]), 2)
+
+    def test_invalidacao_vista_por_outro_processo(self):
+        def media_encerrado():
+            return tendencias()["professores"][0]["serie"][0]["media"]
+
+        self.assertEqual(media_encerrado(), 4.0)
+        HistogramaResposta.objects.filter(avaliacao__ciclo=self.ciclo).update(
+            soma=F("soma") + 2
+        )
+        self.assertEqual(media_encerrado(), 4.0)
+
+        # Outro processo (outra conexão ao backend) invalida as séries
+        caches.create_connection("default").incr(VERSAO_CACHE_KEY)
+        self.assertEqual(media_encerrado(), 5.0)
+
+    def test_api(self):
+        url = reverse("tendencias_avaliacoes_api")
+        self.client.force_login(self.professor.user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(self.admin_user)
+        response = self.client.get(url, {"professor": self.professor.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["professores"][0]["serie"]), 2)
+
+        pagina = self.client.get(reverse("tendencias_avaliacoes"))
+        self.assertContains(pagina, "Tendências entre Ciclos")
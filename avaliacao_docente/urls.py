@@ -101,6 +101,12 @@ urlpatterns = [
         views.exportar_periodos_csv,
         name="exportar_periodos_csv",
     ),
+    # Feed incremental de respostas (JSON Lines) para BI
+    path(
+        "api/respostas/feed/",
+        views.feed_respostas_ndjson,
+        name="feed_respostas_ndjson",
+    ),
     # URLs para Avaliação Docente
     path("avaliacoes/", views.listar_avaliacoes, name="listar_avaliacoes"),
     path("minhas-avaliacoes/", views.minhas_avaliacoes, name="minhas_avaliacoes"),
@@ -149,6 +155,16 @@ urlpatterns = [
         views.relatorio_avaliacoes,
         name="relatorio_avaliacoes",
     ),
+    path(
+        "avaliacoes/relatorios/<int:avaliacao_id>/detalhes/",
+        views.relatorio_avaliacao_detalhes,
+        name="relatorio_avaliacao_detalhes",
+    ),
+    path(
+        "avaliacoes/relatorios/<int:avaliacao_id>/comentarios/",
+        views.relatorio_avaliacao_comentarios,
+        name="relatorio_avaliacao_comentarios",
+    ),
     # URLs para CRUD de categorias
     path("categorias/", views.gerenciar_categorias, name="gerenciar_categorias"),
     path(
@@ -177,6 +193,29 @@ urlpatterns = [
         views.excluir_categoria,
         name="excluir_categoria",
     ),
+    path(
+        "avaliacoes/tendencias/",
+        views.tendencias_avaliacoes,
+        name="tendencias_avaliacoes",
+    ),
+    path(
+        "api/tendencias/",
+        views.tendencias_avaliacoes_api,
+        name="tendencias_avaliacoes_api",
+    ),
+    path(
+        "api/ciclos/<int:ciclo_id>/graficos/",
+        views.graficos_ciclo_api,
+        name="graficos_ciclo_api",
+    ),
+    path(
+        "api/comentarios/busca/",
+        views.buscar_comentarios_api,
+        name="buscar_comentarios_api",
+    ),
+    # Jobs em segundo plano (exportações)
+    path("jobs/<int:job_id>/", views.status_job, name="status_job"),
+    path("jobs/<int:job_id>/download/", views.baixar_job, name="baixar_job"),
     # URLs para CRUD de ciclos
     path("ciclos/", views.gerenciar_ciclos, name="gerenciar_ciclos"),
     path(
@@ -1,17 +1,30 @@
-from rolepermissions.checkers import has_role
+from .role_cache import user_has_role as has_role
 
 
 def check_user_permission(user, roles):
     """
     Verifica se o usuário tem uma das roles especificadas
+    (usa o cache de roles, sem consultar o banco após o aquecimento)
     """
     if not user.is_authenticated:
         return False
 
-    for role in roles:
-        if has_role(user, role):
-            return True
-    return False
+    return has_role(user, list(roles))
+
+
+ROLE_DISPLAY_NAMES = {
+    "admin": "Administrador",
+    "coordenador": "Coordenador",
+    "professor": "Professor",
+    "aluno": "Aluno",
+}
+
+
+def get_role_display_name(role):
+    """
+    Retorna o nome de exibição de uma role (ex: valor anotado por with_roles())
+    """
+    return ROLE_DISPLAY_NAMES.get(role, "Sem role")
 
 
 def get_user_role_name(user):
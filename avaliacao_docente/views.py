@@ -1,13 +1,19 @@
+import uuid
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic.edit import CreateView, FormView
 from django.views.generic import TemplateView
+from django.views.decorators.http import condition
 from django.urls import reverse_lazy, reverse
-from django.db.models import Q
-from django.http import JsonResponse, HttpResponse
-import csv
-from datetime import datetime
+from django.db import IntegrityError
+from django.db.models import Count, Q
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.formats import date_format
+from urllib.parse import urlencode
 from .models import (
     PerfilAluno,
     PerfilProfessor,
@@ -19,8 +25,12 @@ from .models import (
     PerguntaAvaliacao,
     AvaliacaoDocente,
     RespostaAvaliacao,
+    RespostaUnificada,
+    SubmissaoAvaliacao,
     CicloAvaliacao,
     ConfiguracaoSite,
+    Job,
+    with_roles,
 )
 from .models import (
     QuestionarioAvaliacao,
@@ -30,12 +40,43 @@ from .models import (
 from django.contrib.auth.models import User
 from rolepermissions.roles import assign_role, remove_role
 from rolepermissions.checkers import has_role
+from .busca import RESULTADOS_POR_PAGINA as RESULTADOS_BUSCA_POR_PAGINA
+from .busca import buscar_comentarios
+from .exportacao import FORMATOS as FORMATOS_EXPORTACAO
+from .exportacao import (
+    LIMITE_FEED,
+    Coluna,
+    Exportacao,
+    contagem,
+    feed_respostas,
+)
+from .jobs import enfileirar, partes_do_resultado
+from .relatorios import (
+    AVALIACOES_POR_PAGINA,
+    avaliacoes_do_relatorio,
+    comentarios_avaliacao,
+    conteudo_csv,
+    detalhes_snapshot,
+    estatisticas_avaliacoes,
+    etag_grafico_ciclo,
+    gerar_snapshot,
+    grafico_ciclo,
+    media_geral,
+    nome_arquivo_csv,
+    obter_snapshots,
+    pagina_comentarios,
+    resumo_avaliacoes,
+)
+from .questionarios import esquema_questionario
+from .role_cache import bump_role_version, user_has_role
+from .spool import envio_pendente, guardar_envio, spool_ativo
+from .submissoes import gravar_submissao
+from .tendencias import tendencias
 from .utils import (
     check_user_permission,
-    get_user_role_name,
+    get_role_display_name,
     mark_role_manually_changed,
     reset_role_manual_flag,
-    is_role_manually_changed,
 )
 from django.contrib import messages
 from django.core.paginator import Paginator
@@ -93,6 +134,7 @@ def gerenciar_roles(request):
 
             # Atribui a nova role
             assign_role(usuario, nova_role)
+            bump_role_version(usuario)
 
             # Marcar que a role foi alterada manualmente para evitar sobrescrita no próximo login
             mark_role_manually_changed(usuario)
@@ -112,17 +154,18 @@ def gerenciar_roles(request):
     else:
         form = GerenciarRoleForm()
 
-    # Obter todos os usuários e suas roles
-    usuarios_queryset = User.objects.all().order_by("username")
+    # Obter todos os usuários com roles anotadas (uma única query)
+    usuarios_queryset = with_roles().order_by("username")
 
     # Lista todos os usuários com suas roles
     usuarios_com_roles = []
     for user in usuarios_queryset:
-        role_atual = get_user_role_name(user)
-        role_manual = is_role_manually_changed(user)
-
         usuarios_com_roles.append(
-            {"usuario": user, "role": role_atual, "role_manual": role_manual}
+            {
+                "usuario": user,
+                "role": get_role_display_name(user.role_principal),
+                "role_manual": user.role_manual,
+            }
         )
 
     context = {
@@ -188,6 +231,7 @@ def gerenciar_usuarios(request):
 
             # Atribui a nova role
             assign_role(usuario, nova_role)
+            bump_role_version(usuario)
 
             # Marcar que a role foi alterada manualmente para evitar sobrescrita no próximo login
             mark_role_manually_changed(usuario)
@@ -207,18 +251,26 @@ def gerenciar_usuarios(request):
     else:
         form = GerenciarRoleForm()
 
-    # Obter todos os usuários ordenados
-    usuarios_queryset = User.objects.all().order_by("username")
+    # Obter todos os usuários ordenados, com roles e perfis em uma única query
+    usuarios_queryset = (
+        with_roles()
+        .select_related("perfil_aluno", "perfil_professor")
+        .order_by("username")
+    )
 
     # Lista todos os usuários com suas roles
     usuarios_detalhados = []
     for user in usuarios_queryset:
-        role_atual = get_user_role_name(user)
-
         usuarios_detalhados.append(
             {
                 "usuario": user,
-                "role": role_atual,
+                "role": get_role_display_name(user.role_principal),
+                "role_class": (
+                    f"role-{user.role_principal}"
+                    if user.role_principal
+                    else "role-sem-role"
+                ),
+                "role_manual": user.role_manual,
                 "nome_completo": f"{user.first_name} {user.last_name}",
                 "status": "Ativo" if user.is_active else "Inativo",
             }
@@ -335,7 +387,9 @@ def excluir_usuario(request, usuario_id):
                 return redirect("gerenciar_usuarios")
 
             # Não permite desativar usuários admin se não for admin
-            if has_role(usuario, "admin") and not has_role(request.user, "admin"):
+            if user_has_role(usuario, "admin") and not user_has_role(
+                request.user, "admin"
+            ):
                 messages.error(
                     request,
                     "Apenas administradores podem desativar outros administradores",
@@ -364,6 +418,7 @@ def excluir_usuario(request, usuario_id):
                         remove_role(usuario, role_name)
                 except Exception:
                     pass
+            bump_role_version(usuario)
 
             usuario.save()
 
@@ -399,7 +454,9 @@ def resetar_senha_usuario(request, usuario_id):
                 )
 
             # Não permite resetar senha de admin se não for admin
-            if has_role(usuario, "admin") and not has_role(request.user, "admin"):
+            if user_has_role(usuario, "admin") and not user_has_role(
+                request.user, "admin"
+            ):
                 return JsonResponse(
                     {
                         "error": "Apenas administradores podem resetar senha de outros administradores"
@@ -1118,9 +1175,7 @@ class AdminHubView(LoginRequiredMixin, TemplateView):
 
         # Avaliaições realizadas - contar respostas únicas
 
-        context["total_avaliacoes"] = (
-            RespostaAvaliacao.objects.values("avaliacao").distinct().count()
-        )
+        context["total_avaliacoes"] = AvaliacaoDocente.objects.com_respostas().count()
 
         return context
 
@@ -1446,8 +1501,7 @@ def listar_avaliacoes(request):
                 turma_id__in=turmas_aluno,
                 status__in=["pendente", "em_andamento"],
             )
-            .exclude(respostas__aluno=request.user.perfil_aluno)
-            .distinct()
+            .respondidas_por(request.user.perfil_aluno, respondidas=False)
             .order_by("-data_criacao")
         )
 
@@ -1740,9 +1794,7 @@ def detalhe_ciclo_avaliacao(request, ciclo_id):
     total_avaliacoes = avaliacoes_docentes.count()
 
     # Contar avaliações que têm pelo menos uma resposta
-    avaliacoes_com_respostas = (
-        avaliacoes_docentes.filter(respostas__isnull=False).distinct().count()
-    )
+    avaliacoes_com_respostas = avaliacoes_docentes.com_respostas().count()
 
     context = {
         "ciclo": ciclo,
@@ -1759,12 +1811,83 @@ def detalhe_ciclo_avaliacao(request, ciclo_id):
     return render(request, "avaliacoes/detalhe_ciclo.html", context)
 
 
+def _respostas_do_envio(avaliacao, aluno, esquema, dados):
+    """
+    Valida um envio de responder_avaliacao e monta as respostas, sem gravar.
+
+    Args:
+        avaliacao: AvaliacaoDocente respondida
+        aluno: PerfilAluno que respondeu
+        esquema: EsquemaQuestionario do questionário do ciclo
+        dados: request.POST
+
+    Retorna:
+        tuple: (lista de RespostaAvaliacao não salvas, lista de mensagens
+        de erro); as respostas só devem ser gravadas se não houver erros
+    """
+    respostas = []
+    erros = []
+
+    for pergunta in esquema.perguntas:
+        valor = dados.get(pergunta.campo, "").strip()
+
+        if not valor:
+            if pergunta.obrigatoria:
+                erros.append(f'A pergunta "{pergunta.enunciado}" é obrigatória.')
+            continue
+
+        # Agora sempre anônima conforme nova regra
+        resposta = RespostaAvaliacao(
+            avaliacao=avaliacao, aluno=aluno, pergunta=pergunta.modelo(), anonima=True
+        )
+        if pergunta.faixa is not None:
+            try:
+                resposta.valor_numerico = int(valor)
+            except ValueError:
+                resposta.valor_numerico = None
+            if resposta.valor_numerico not in pergunta.faixa:
+                erros.append(f'Valor inválido para a pergunta "{pergunta.enunciado}".')
+                continue
+        elif pergunta.tipo == "sim_nao":
+            resposta.valor_boolean = valor.lower() == "sim"
+        else:
+            resposta.valor_texto = valor
+        respostas.append(resposta)
+
+    return respostas, erros
+
+
+_MENSAGEM_ENVIO_NO_SPOOL = (
+    "Sua avaliação foi recebida e estará disponível para visualização "
+    "em instantes."
+)
+
+
+def _redirecionar_apos_envio(avaliacao, aluno):
+    """Visualização do envio; a lista de avaliações enquanto ele está no spool"""
+    if envio_pendente(avaliacao.id, aluno.id):
+        return redirect("listar_avaliacoes")
+    return redirect("visualizar_avaliacao", avaliacao_id=avaliacao.id)
+
+
+def _token_envio(valor):
+    """Token de envio do formulário (UUID); um novo se ausente ou inválido"""
+    try:
+        return uuid.UUID(valor)
+    except (TypeError, ValueError, AttributeError):
+        return uuid.uuid4()
+
+
 @login_required
 def responder_avaliacao(request, avaliacao_id):
     """
     View para um aluno responder uma avaliação docente
     """
-    avaliacao = get_object_or_404(AvaliacaoDocente, id=avaliacao_id)
+    # O questionário traz a versão do esquema compilado (atualizado_em)
+    avaliacao = get_object_or_404(
+        AvaliacaoDocente.objects.select_related("ciclo__questionario"),
+        id=avaliacao_id,
+    )
 
     # Verificar se o usuário pode responder esta avaliação
     if not hasattr(request.user, "perfil_aluno"):
@@ -1778,14 +1901,21 @@ def responder_avaliacao(request, avaliacao_id):
         messages.error(request, "Você não está matriculado na turma desta avaliação.")
         return redirect("listar_avaliacoes")
 
-    # Verificar se a avaliação já foi respondida
-    respostas_existentes = RespostaAvaliacao.objects.filter(
-        avaliacao=avaliacao, aluno=request.user.perfil_aluno
-    ).exists()
+    aluno = request.user.perfil_aluno
+    # Também identifica os envios anônimos do aluno (ver SubmissaoAvaliacao)
+    envios_do_aluno = SubmissaoAvaliacao.objects.filter(
+        avaliacao=avaliacao,
+        chave_aluno=SubmissaoAvaliacao.calcular_chave_aluno(avaliacao.id, aluno.id),
+    )
 
-    if respostas_existentes:
+    # Verificar se a avaliação já foi respondida. No POST quem decide é a
+    # restrição única de SubmissaoAvaliacao, na gravação (sem consulta prévia)
+    if request.method != "POST" and envios_do_aluno.exists():
         messages.warning(request, "Esta avaliação já foi respondida.")
         return redirect("visualizar_avaliacao", avaliacao_id=avaliacao.id)
+    if request.method != "POST" and envio_pendente(avaliacao.id, aluno.id):
+        messages.info(request, _MENSAGEM_ENVIO_NO_SPOOL)
+        return redirect("listar_avaliacoes")
 
     from django.utils import timezone
 
@@ -1801,52 +1931,50 @@ def responder_avaliacao(request, avaliacao_id):
         )
         return redirect("listar_avaliacoes")
 
-    # Pegar perguntas do questionário
-    perguntas_questionario = QuestionarioPergunta.objects.filter(
-        questionario=avaliacao.ciclo.questionario
-    ).order_by("ordem_no_questionario")
-
-    if request.method == "POST":
-        # Processar respostas
-        respostas_validas = True
-
-        for qp in perguntas_questionario:
-            campo_resposta = f"pergunta_{qp.pergunta.id}"
-            valor_resposta = request.POST.get(campo_resposta)
+    # Esquema compilado do questionário (validação e template), em cache
+    esquema = esquema_questionario(avaliacao.ciclo.questionario)
 
-            if not valor_resposta and qp.pergunta.obrigatoria:
-                messages.error(
-                    request, f'A pergunta "{qp.pergunta.enunciado}" é obrigatória.'
-                )
-                respostas_validas = False
-                continue
+    token_envio = _token_envio(request.POST.get("token_envio"))
 
-            if valor_resposta:
-                # Criar resposta baseada no tipo
-                resposta_data = {
-                    "avaliacao": avaliacao,
-                    "aluno": request.user.perfil_aluno,
-                    "pergunta": qp.pergunta,
-                    # Agora sempre anônima conforme nova regra
-                    "anonima": True,
-                }
+    if request.method == "POST":
+        # Valida o envio inteiro antes de gravar: com qualquer erro nenhuma
+        # resposta é gravada
+        respostas, erros = _respostas_do_envio(
+            avaliacao, aluno, esquema, request.POST
+        )
+        for erro in erros:
+            messages.error(request, erro)
 
-                if qp.pergunta.tipo in ["likert", "nps"]:
-                    resposta_data["valor_numerico"] = int(valor_resposta)
-                elif qp.pergunta.tipo == "sim_nao":
-                    resposta_data["valor_boolean"] = valor_resposta.lower() == "sim"
+        if not erros:
+            submissao = SubmissaoAvaliacao(
+                avaliacao=avaliacao, aluno=aluno, token=token_envio, anonima=True
+            )
+            try:
+                # Falha com IntegrityError se o aluno já enviou
+                if spool_ativo():
+                    # O descarregamento descartaria um envio já gravado no banco
+                    if envios_do_aluno.exists():
+                        raise IntegrityError("Envio já registrado")
+                    guardar_envio(submissao, respostas)
                 else:
-                    resposta_data["valor_texto"] = valor_resposta
-
-                RespostaAvaliacao.objects.create(**resposta_data)
+                    gravar_submissao(submissao, respostas)
+            except IntegrityError:
+                # Reenvio do mesmo formulário (ex.: clique duplo) ou envio
+                # concorrente: nada foi gravado por esta requisição
+                mesmo_envio = envios_do_aluno.filter(token=token_envio).exists()
+                if mesmo_envio or envio_pendente(avaliacao.id, token=token_envio):
+                    messages.success(request, "Avaliação respondida com sucesso!")
+                else:
+                    messages.warning(request, "Esta avaliação já foi respondida.")
+                return _redirecionar_apos_envio(avaliacao, aluno)
 
-        if respostas_validas:
             messages.success(request, "Avaliação respondida com sucesso!")
-            return redirect("visualizar_avaliacao", avaliacao_id=avaliacao.id)
+            return _redirecionar_apos_envio(avaliacao, aluno)
 
     context = {
         "avaliacao": avaliacao,
-        "perguntas_questionario": perguntas_questionario,
+        "perguntas_questionario": esquema.perguntas,
+        "token_envio": token_envio,
         "titulo": f"Responder Avaliação - {avaliacao.professor.user.get_full_name()}",
     }
     return render(request, "avaliacoes/responder_avaliacao.html", context)
@@ -1862,9 +1990,12 @@ def visualizar_avaliacao(request, avaliacao_id):
     # Verificar permissões
     pode_visualizar = False
     if hasattr(request.user, "perfil_aluno"):
-        # Verificar se o aluno está matriculado na turma e se há respostas do aluno para esta avaliação
-        respostas_aluno = RespostaAvaliacao.objects.filter(
-            avaliacao=avaliacao, aluno=request.user.perfil_aluno
+        # Verificar se o aluno está matriculado na turma e se já enviou esta avaliação
+        respostas_aluno = SubmissaoAvaliacao.objects.filter(
+            avaliacao=avaliacao,
+            chave_aluno=SubmissaoAvaliacao.calcular_chave_aluno(
+                avaliacao.id, request.user.perfil_aluno.id
+            ),
         ).exists()
 
         matricula_ativa = request.user.perfil_aluno.matriculas.filter(
@@ -1887,12 +2018,12 @@ def visualizar_avaliacao(request, avaliacao_id):
         )
         return redirect("listar_avaliacoes")
 
-    # Pegar respostas
+    # Pegar respostas (uma por pergunta, inclusive as compactadas)
     # Ajuste: alunos só podem visualizar as PRÓPRIAS respostas; demais perfis (professor da avaliação,
     # coordenador, admin) continuam podendo ver o conjunto completo.
     if hasattr(request.user, "perfil_aluno"):
         respostas = (
-            RespostaAvaliacao.objects.filter(
+            RespostaUnificada.objects.filter(
                 avaliacao=avaliacao, aluno=request.user.perfil_aluno
             )
             .select_related("pergunta")
@@ -1902,7 +2033,7 @@ def visualizar_avaliacao(request, avaliacao_id):
         )
     else:
         respostas = (
-            RespostaAvaliacao.objects.filter(avaliacao=avaliacao)
+            RespostaUnificada.objects.filter(avaliacao=avaliacao)
             .select_related("pergunta")
             .filter(pergunta__questionarios__questionario=avaliacao.ciclo.questionario)
             .order_by("pergunta__questionarios__ordem_no_questionario")
@@ -1922,10 +2053,6 @@ def relatorio_avaliacoes(request):
     View para gerar relatórios de avaliações
     Apenas coordenadores e admins podem acessar
     """
-    from django.db.models import (
-        Avg,
-        Count,
-    )  # Import no início para evitar UnboundLocalError
     import json
 
     if not (check_user_permission(request.user, ["coordenador", "admin"])):
@@ -1936,475 +2063,387 @@ def relatorio_avaliacoes(request):
     formato = request.GET.get("formato")
 
     ciclos = CicloAvaliacao.objects.all().order_by("-data_inicio")
-    professores = PerfilProfessor.objects.all().order_by("user__first_name")
+    professores = PerfilProfessor.objects.select_related("user").order_by(
+        "user__first_name"
+    )
 
     # Filtros
     ciclo_selecionado = request.GET.get("ciclo")
     professor_selecionado = request.GET.get("professor")
 
-    # Buscar avaliações que têm respostas
-    avaliacoes = AvaliacaoDocente.objects.filter(respostas__isnull=False).distinct()
-
-    if ciclo_selecionado:
-        avaliacoes = avaliacoes.filter(ciclo_id=ciclo_selecionado)
-
-    if professor_selecionado:
-        avaliacoes = avaliacoes.filter(professor_id=professor_selecionado)
-
-    # Se for solicitação de exportação CSV, gerar e retornar o arquivo
+    # Exportação CSV. A página gera o arquivo em segundo plano (segundo_plano=1,
+    # ver jobs.py): o navegador acompanha o job e baixa o arquivo quando
+    # estiver pronto. Sem o parâmetro, o CSV é transmitido diretamente.
     if formato == "csv":
-        return gerar_csv_avaliacoes(
-            avaliacoes, ciclo_selecionado, professor_selecionado
-        )
+        ciclo_id = _id_do_filtro(ciclo_selecionado)
+        professor_id = _id_do_filtro(professor_selecionado)
+        if request.GET.get("segundo_plano"):
+            parametros = {"ciclo": ciclo_id, "professor": professor_id}
+            job = enfileirar("relatorio_avaliacoes_csv", parametros, request.user)
+            return JsonResponse(_job_json(job), status=202)
+        return gerar_csv_avaliacoes(ciclo_id, professor_id)
 
-    # Estatísticas
-    total_avaliacoes = avaliacoes.count()
+    # Buscar avaliações que têm respostas
+    avaliacoes = avaliacoes_do_relatorio(ciclo_selecionado, professor_selecionado)
 
-    # Calcular dados adicionais para cada avaliação
-    avaliacoes_com_stats = []
-    for avaliacao in avaliacoes:
-        # Contar respondentes únicos
-        respondentes = (
-            RespostaAvaliacao.objects.filter(avaliacao=avaliacao)
-            .values("aluno")
-            .distinct()
-            .count()
+    # Ciclos considerados conforme filtros aplicados
+    if ciclo_selecionado:
+        ciclos_iter = list(ciclos.filter(id=ciclo_selecionado))
+    else:
+        # Apenas ciclos que aparecem nas avaliacoes filtradas
+        ciclos_iter = list(
+            ciclos.filter(
+                id__in=avaliacoes.values_list("ciclo_id", flat=True).distinct()
+            )
         )
 
-        # Calcular taxa de resposta
-        total_alunos = avaliacao.turma.matriculas.filter(status="ativa").count()
-        taxa_resposta = (respondentes / total_alunos * 100) if total_alunos > 0 else 0
-
-        # Calcular estatísticas por pergunta
-        pergunta_stats = []
-        perguntas_questionario = avaliacao.ciclo.questionario.perguntas.all()
-
-        for pergunta_questionario in perguntas_questionario:
-            pergunta = pergunta_questionario.pergunta
-            respostas_pergunta = RespostaAvaliacao.objects.filter(
-                avaliacao__ciclo=avaliacao.ciclo,
-                avaliacao__professor=avaliacao.professor,
-                avaliacao__turma=avaliacao.turma,
-                pergunta=pergunta,
-                valor_numerico__isnull=False,
+    # Ciclos encerrados são lidos do snapshot; os abertos, calculados na hora
+    snapshots = obter_snapshots(ciclos_iter)
+
+    congeladas = [
+        linha
+        for dados in snapshots.values()
+        for linha in dados["linhas"]
+        if not professor_selecionado
+        or str(linha["professor_id"]) == professor_selecionado
+    ]
+    abertas = avaliacoes.exclude(ciclo_id__in=list(snapshots))
+
+    # Ordena apenas as chaves; o resumo das abertas é calculado por página
+    chaves = [(linha["data_criacao"], linha["id"], linha) for linha in congeladas]
+    chaves.extend(
+        (data_criacao, pk, None)
+        for pk, data_criacao in abertas.values_list("pk", "data_criacao")
+    )
+    chaves.sort(key=lambda chave: chave[:2], reverse=True)
+
+    paginator = Paginator(chaves, AVALIACOES_POR_PAGINA)
+    page_obj = paginator.get_page(request.GET.get("page"))
+
+    ids_abertas = [pk for _, pk, linha in page_obj if linha is None]
+    resumo = {}
+    if ids_abertas:
+        resumo = {
+            linha["id"]: linha
+            for linha in resumo_avaliacoes(
+                AvaliacaoDocente.objects.filter(pk__in=ids_abertas)
             )
+        }
+    linhas = [linha or resumo[pk] for _, pk, linha in page_obj]
 
-            if respostas_pergunta.exists():
-                # Calcular média
-                media = (
-                    respostas_pergunta.aggregate(media=Avg("valor_numerico"))["media"]
-                    or 0
-                )
+    # Gráficos por ciclo: carregados sob demanda (ver graficos_ciclo_api)
+    parametros_grafico = urlencode(
+        {"professor": professor_selecionado} if professor_selecionado else {}
+    )
+    ciclos_para_graficos = [
+        {
+            "id": ciclo.id,
+            "nome": ciclo.nome,
+            "url": reverse("graficos_ciclo_api", args=[ciclo.id])
+            + (f"?{parametros_grafico}" if parametros_grafico else ""),
+        }
+        for ciclo in ciclos_iter
+    ]
 
-                # Calcular moda (valor mais frequente)
-                valores = (
-                    respostas_pergunta.values("valor_numerico")
-                    .annotate(count=Count("valor_numerico"))
-                    .order_by("-count")
+    context = {
+        "ciclos": ciclos,
+        "professores": professores,
+        "avaliacoes": linhas,
+        "page_obj": page_obj,
+        "filtros_query": urlencode(
+            {
+                chave: valor
+                for chave, valor in (
+                    ("ciclo", ciclo_selecionado),
+                    ("professor", professor_selecionado),
                 )
-                moda = valores[0]["valor_numerico"] if valores else 0
+                if valor
+            }
+        ),
+        "total_avaliacoes": paginator.count,
+        "media_geral": media_geral(congeladas, abertas),
+        "ciclo_selecionado": ciclo_selecionado,
+        "professor_selecionado": professor_selecionado,
+        "titulo": "Relatórios de Avaliação",
+        "ciclos_graficos_json": json.dumps(ciclos_para_graficos),
+    }
+    return render(request, "avaliacoes/relatorio_avaliacoes.html", context)
 
-                # Contar respostas
-                respostas_count = respostas_pergunta.count()
 
-                pergunta_stats.append(
-                    {
-                        "pergunta": pergunta,
-                        "media": round(media, 1),
-                        "moda": moda,
-                        "respostas_count": respostas_count,
-                    }
-                )
+def _comentarios_json(comentarios):
+    return [
+        {
+            "id": comentario["id"],
+            "valor_texto": comentario["valor_texto"],
+            "data_resposta": comentario["data_resposta"].isoformat(),
+            "data_formatada": date_format(
+                timezone.localtime(comentario["data_resposta"]), "d/m/Y H:i"
+            ),
+        }
+        for comentario in comentarios
+    ]
 
-        # Buscar comentários da avaliação (anônimos)
-        comentarios = (
-            RespostaAvaliacao.objects.filter(
-                avaliacao=avaliacao, valor_texto__isnull=False, valor_texto__gt=""
-            )
-            .exclude(valor_texto="")
-            .only("valor_texto", "data_resposta")
-        )
 
-        # Adicionar dados calculados à avaliação
-        avaliacao.respondentes = respondentes
-        avaliacao.total_alunos = total_alunos
-        avaliacao.taxa_resposta = round(taxa_resposta, 1)
-        avaliacao.pergunta_stats = pergunta_stats
-        avaliacao.comentarios = comentarios
+def _avaliacao_do_relatorio(request, avaliacao_id):
+    """Avaliação pedida pelo relatório; None se o usuário não tiver permissão"""
+    if not check_user_permission(request.user, ["coordenador", "admin"]):
+        return None
+    return get_object_or_404(
+        AvaliacaoDocente.objects.select_related("ciclo"), id=avaliacao_id
+    )
 
-        avaliacoes_com_stats.append(avaliacao)
 
-    # Calcular média simples das respostas numéricas
-    media_geral = 0
-    if total_avaliacoes > 0:
-        respostas_numericas = RespostaAvaliacao.objects.filter(
-            avaliacao__in=avaliacoes, valor_numerico__isnull=False
-        )
-        if respostas_numericas.exists():
-            media_geral = (
-                respostas_numericas.aggregate(media=Avg("valor_numerico"))["media"] or 0
-            )
-
-    # ================= Geração de dados para gráficos por ciclo =================
+@login_required
+def relatorio_avaliacao_detalhes(request, avaliacao_id):
+    """
+    JSON com as estatísticas por pergunta e a primeira página de comentários
+    de uma avaliação (carregado ao expandir o card no relatório).
 
-    ciclos_para_graficos = []
+    Ciclos encerrados são lidos do snapshot; os abertos, calculados na hora.
+    """
+    avaliacao = _avaliacao_do_relatorio(request, avaliacao_id)
+    if avaliacao is None:
+        return JsonResponse({"error": "Permissão negada"}, status=403)
 
-    # Ciclos considerados conforme filtros aplicados
-    if ciclo_selecionado:
-        ciclos_iter = ciclos.filter(id=ciclo_selecionado)
+    if avaliacao.ciclo.encerrado:
+        detalhes = detalhes_snapshot(avaliacao.ciclo, avaliacao.id)
+        pergunta_stats = detalhes["pergunta_stats"]
+        comentarios = detalhes["comentarios"]
     else:
-        # Apenas ciclos que aparecem nas avaliacoes filtradas
-        ciclos_iter = ciclos.filter(
-            id__in=avaliacoes.values_list("ciclo_id", flat=True).distinct()
-        )
+        pergunta_stats = estatisticas_avaliacoes(
+            AvaliacaoDocente.objects.filter(pk=avaliacao.pk)
+        ).get(avaliacao.pk, [])
+        comentarios = comentarios_avaliacao(avaliacao)
+
+    pagina, proximo = pagina_comentarios(comentarios)
+    return JsonResponse(
+        {
+            "pergunta_stats": pergunta_stats,
+            "comentarios": _comentarios_json(pagina),
+            "proximo": proximo,
+        }
+    )
 
-    for ciclo in ciclos_iter:
-        # Base de todas as respostas dentro do ciclo e filtros de professor se houver
-        respostas_base = RespostaAvaliacao.objects.filter(
-            avaliacao__ciclo=ciclo,
-        )
-        if professor_selecionado:
-            respostas_base = respostas_base.filter(
-                avaliacao__professor_id=professor_selecionado
-            )
 
-        if not respostas_base.exists():
-            continue
+@login_required
+def relatorio_avaliacao_comentarios(request, avaliacao_id):
+    """
+    JSON com uma página de comentários de uma avaliação.
 
-        # Separar respostas por tipo para processamento específico
-        respostas_numericas = respostas_base.filter(
-            pergunta__tipo__in=["likert", "nps"],
-            valor_numerico__isnull=False,
-        )
+    Paginação por cursor (keyset em data_resposta, id): ?apos=<proximo da
+    página anterior>.
+    """
+    avaliacao = _avaliacao_do_relatorio(request, avaliacao_id)
+    if avaliacao is None:
+        return JsonResponse({"error": "Permissão negada"}, status=403)
 
-        respostas_multipla_escolha = respostas_base.filter(
-            pergunta__tipo="multipla_escolha",
-            valor_texto__isnull=False,
-        ).exclude(valor_texto="")
+    if avaliacao.ciclo.encerrado:
+        comentarios = detalhes_snapshot(avaliacao.ciclo, avaliacao.id)["comentarios"]
+    else:
+        comentarios = comentarios_avaliacao(avaliacao)
 
-        respostas_sim_nao = respostas_base.filter(
-            pergunta__tipo="sim_nao",
-            valor_boolean__isnull=False,
-        )
+    try:
+        pagina, proximo = pagina_comentarios(comentarios, request.GET.get("apos"))
+    except ValueError as erro:
+        return JsonResponse({"error": str(erro)}, status=400)
+    return JsonResponse({"comentarios": _comentarios_json(pagina), "proximo": proximo})
 
-        respostas_texto_livre = respostas_base.filter(
-            pergunta__tipo="texto_livre",
-            valor_texto__isnull=False,
-        ).exclude(valor_texto="")
-
-        # Processar perguntas numéricas (Likert e NPS)
-        contagens_numericas = respostas_numericas.values(
-            "pergunta_id",
-            "pergunta__enunciado",
-            "pergunta__tipo",
-            "valor_numerico",
-        ).annotate(qtd=Count("id"))
-
-        # Processar perguntas de múltipla escolha
-        contagens_multipla = respostas_multipla_escolha.values(
-            "pergunta_id",
-            "pergunta__enunciado",
-            "pergunta__tipo",
-            "valor_texto",
-        ).annotate(qtd=Count("id"))
-
-        # Processar perguntas sim/não
-        contagens_sim_nao = respostas_sim_nao.values(
-            "pergunta_id",
-            "pergunta__enunciado",
-            "pergunta__tipo",
-            "valor_boolean",
-        ).annotate(qtd=Count("id"))
-
-        # Processar perguntas de texto livre (apenas contagem)
-        contagens_texto = respostas_texto_livre.values(
-            "pergunta_id",
-            "pergunta__enunciado",
-            "pergunta__tipo",
-        ).annotate(qtd=Count("id"))
-
-        # Médias para perguntas numéricas
-        medias_numericas = respostas_numericas.values("pergunta_id").annotate(
-            media=Avg("valor_numerico")
-        )
-        medias_map = {m["pergunta_id"]: m["media"] for m in medias_numericas}
-
-        perguntas_data = {}
-
-        # Processar perguntas numéricas (Likert e NPS)
-        for item in contagens_numericas:
-            pid = item["pergunta_id"]
-            if pid not in perguntas_data:
-                # Inicializa estrutura conforme o tipo
-                if item["pergunta__tipo"] == "likert":
-                    escala_default = {str(i): 0 for i in range(1, 6)}
-                else:  # nps
-                    escala_default = {str(i): 0 for i in range(0, 11)}
-                perguntas_data[pid] = {
-                    "id": pid,
-                    "enunciado": item["pergunta__enunciado"],
-                    "tipo": item["pergunta__tipo"],
-                    "contagens": escala_default,
-                    "media": round(medias_map.get(pid) or 0, 2),
-                }
-            perguntas_data[pid]["contagens"][str(item["valor_numerico"])] = item["qtd"]
-
-        # Processar perguntas de múltipla escolha
-        for item in contagens_multipla:
-            pid = item["pergunta_id"]
-            if pid not in perguntas_data:
-                perguntas_data[pid] = {
-                    "id": pid,
-                    "enunciado": item["pergunta__enunciado"],
-                    "tipo": item["pergunta__tipo"],
-                    "contagens": {},
-                    "media": "N/A",
-                }
-            valor = (
-                item["valor_texto"][:30] + "..."
-                if len(item["valor_texto"]) > 30
-                else item["valor_texto"]
-            )
-            perguntas_data[pid]["contagens"][valor] = item["qtd"]
-
-        # Processar perguntas sim/não
-        for item in contagens_sim_nao:
-            pid = item["pergunta_id"]
-            if pid not in perguntas_data:
-                perguntas_data[pid] = {
-                    "id": pid,
-                    "enunciado": item["pergunta__enunciado"],
-                    "tipo": item["pergunta__tipo"],
-                    "contagens": {"Sim": 0, "Não": 0},
-                    "media": "N/A",
-                }
-            valor = "Sim" if item["valor_boolean"] else "Não"
-            perguntas_data[pid]["contagens"][valor] = item["qtd"]
-
-        # Processar perguntas de texto livre
-        for item in contagens_texto:
-            pid = item["pergunta_id"]
-            if pid not in perguntas_data:
-                perguntas_data[pid] = {
-                    "id": pid,
-                    "enunciado": item["pergunta__enunciado"],
-                    "tipo": item["pergunta__tipo"],
-                    "contagens": {"Total de respostas": item["qtd"]},
-                    "media": "N/A",
-                }
 
-        ciclos_para_graficos.append(
-            {
-                "id": ciclo.id,
-                "nome": ciclo.nome,
-                "perguntas": list(perguntas_data.values()),
-            }
-        )
+def _id_do_filtro(valor):
+    """Id de um filtro da query string (None se ausente ou inválido)"""
+    try:
+        return int(valor) if valor else None
+    except ValueError:
+        return None
+
+
+@login_required
+def tendencias_avaliacoes(request):
+    """
+    Página de tendências entre ciclos (média e taxa de resposta) por
+    professor e por disciplina. Os dados vêm de tendencias_avaliacoes_api.
+    """
+    if not check_user_permission(request.user, ["coordenador", "admin"]):
+        messages.error(request, "Você não tem permissão para acessar relatórios.")
+        return redirect("listar_avaliacoes")
 
     context = {
-        "ciclos": ciclos,
-        "professores": professores,
-        "avaliacoes": avaliacoes_com_stats,
-        "total_avaliacoes": total_avaliacoes,
-        "media_geral": round(media_geral, 2),
-        "ciclo_selecionado": ciclo_selecionado,
-        "professor_selecionado": professor_selecionado,
-        "titulo": "Relatórios de Avaliação",
-        "ciclos_graficos_json": json.dumps(ciclos_para_graficos),
+        "professores": PerfilProfessor.objects.select_related("user").order_by(
+            "user__first_name"
+        ),
+        "disciplinas": Disciplina.objects.order_by("disciplina_nome"),
+        "professor_selecionado": request.GET.get("professor", ""),
+        "disciplina_selecionada": request.GET.get("disciplina", ""),
     }
-    return render(request, "avaliacoes/relatorio_avaliacoes.html", context)
+    return render(request, "avaliacoes/tendencias_avaliacoes.html", context)
 
 
-def gerar_csv_avaliacoes(
-    avaliacoes, ciclo_selecionado=None, professor_selecionado=None
-):
+@login_required
+def tendencias_avaliacoes_api(request):
     """
-    Função para gerar arquivo CSV com dados das avaliações
+    JSON com as séries de média e taxa de resposta de todos os ciclos, por
+    professor e por disciplina (ver tendencias.tendencias).
+
+    Filtros opcionais: ?professor=<id>&disciplina=<id>
     """
-    from django.db.models import Avg, Count
+    if not check_user_permission(request.user, ["coordenador", "admin"]):
+        return JsonResponse({"error": "Permissão negada"}, status=403)
 
-    # Preparar resposta HTTP para CSV
-    response = HttpResponse(content_type="text/csv; charset=utf-8")
+    dados = tendencias(
+        professor_id=_id_do_filtro(request.GET.get("professor")),
+        disciplina_id=_id_do_filtro(request.GET.get("disciplina")),
+    )
+    return JsonResponse(dados)
 
-    # Nome do arquivo com filtros aplicados
-    nome_arquivo = "relatorio_avaliacoes"
-    if ciclo_selecionado:
-        ciclo = CicloAvaliacao.objects.get(id=ciclo_selecionado)
-        nome_arquivo += f"_ciclo_{ciclo.nome.replace(' ', '_')}"
-    if professor_selecionado:
-        professor = PerfilProfessor.objects.get(id=professor_selecionado)
-        nome_professor = (
-            f"{professor.user.first_name}_{professor.user.last_name}".replace(" ", "_")
-        )
-        nome_arquivo += f"_prof_{nome_professor}"
 
-    nome_arquivo += f"_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    response["Content-Disposition"] = f'attachment; filename="{nome_arquivo}"'
+def _etag_graficos_ciclo(request, ciclo_id):
+    # Sem permissão não há ETag: a view responde 403 em vez de 304
+    if not check_user_permission(request.user, ["coordenador", "admin"]):
+        return None
+    return etag_grafico_ciclo(ciclo_id, _id_do_filtro(request.GET.get("professor")))
 
-    # Criar writer CSV
-    writer = csv.writer(response)
 
-    # Escrever BOM para UTF-8 (compatibilidade com Excel)
-    response.write("\ufeff")
+@login_required
+@condition(etag_func=_etag_graficos_ciclo)
+def graficos_ciclo_api(request, ciclo_id):
+    """
+    Dados dos gráficos de um ciclo em formato colunar (ver
+    relatorios.grafico_colunar), carregados pela página de relatórios
+    apenas para o ciclo visível.
+
+    A resposta leva uma ETag forte derivada da última resposta do ciclo;
+    revalidações com If-None-Match recebem 304 Not Modified.
 
-    # Cabeçalhos principais
-    writer.writerow(
-        [
-            "Disciplina",
-            "Professor",
-            "Turma",
-            "Período Letivo",
-            "Ciclo",
-            "Total Alunos",
-            "Respondentes",
-            "Taxa de Resposta (%)",
-            "Tipo Pergunta",
-            "Categoria",
-            "Média",
-            "Moda",
-            "Total Respostas",
-            "Comentários",
-        ]
+    Filtro opcional: ?professor=<id>
+    """
+    if not check_user_permission(request.user, ["coordenador", "admin"]):
+        return JsonResponse({"error": "Permissão negada"}, status=403)
+
+    ciclo = get_object_or_404(CicloAvaliacao, pk=ciclo_id)
+    response = JsonResponse(
+        grafico_ciclo(ciclo, _id_do_filtro(request.GET.get("professor")))
     )
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
-    # Processar cada avaliação
-    for avaliacao in avaliacoes:
-        # Dados básicos da avaliação
-        disciplina = avaliacao.turma.disciplina.disciplina_nome
-        professor = avaliacao.professor.user.get_full_name()
-        turma = avaliacao.turma.codigo_turma
-        periodo = avaliacao.turma.disciplina.periodo_letivo.nome
-        ciclo = avaliacao.ciclo.nome
-
-        # Contar respondentes únicos
-        respondentes = (
-            RespostaAvaliacao.objects.filter(avaliacao=avaliacao)
-            .values("aluno")
-            .distinct()
-            .count()
-        )
 
-        # Calcular taxa de resposta
-        total_alunos = avaliacao.turma.matriculas.filter(status="ativa").count()
-        taxa_resposta = (
-            round((respondentes / total_alunos * 100), 1) if total_alunos > 0 else 0
-        )
+@login_required
+def buscar_comentarios_api(request):
+    """
+    Busca textual nos comentários das avaliações, dos mais aos menos
+    relevantes, paginada (ver busca.buscar_comentarios).
 
-        # Buscar comentários da avaliação
-        comentarios = RespostaAvaliacao.objects.filter(
-            avaliacao=avaliacao, valor_texto__isnull=False, valor_texto__gt=""
-        ).exclude(valor_texto="")
-
-        comentarios_texto = " | ".join(
-            [c.valor_texto for c in comentarios[:5]]
-        )  # Máximo 5 comentários
-        if comentarios.count() > 5:
-            comentarios_texto += f" | ... (+{comentarios.count() - 5} comentários)"
-
-        # Processar estatísticas por pergunta
-        perguntas_questionario = avaliacao.ciclo.questionario.perguntas.all()
-
-        if not perguntas_questionario.exists():
-            # Se não há perguntas, escrever linha básica
-            writer.writerow(
-                [
-                    disciplina,
-                    professor,
-                    turma,
-                    periodo,
-                    ciclo,
-                    total_alunos,
-                    respondentes,
-                    taxa_resposta,
-                    "N/A",
-                    "N/A",
-                    "N/A",
-                    "N/A",
-                    "N/A",
-                    "N/A",
-                    comentarios_texto,
-                ]
-            )
-        else:
-            # Para cada pergunta do questionário
-            for pergunta_questionario in perguntas_questionario:
-                pergunta = pergunta_questionario.pergunta
-                respostas_pergunta = RespostaAvaliacao.objects.filter(
-                    avaliacao=avaliacao,
-                    pergunta=pergunta,
-                    valor_numerico__isnull=False,
-                )
+    Parâmetros: ?q=<termo> (obrigatório), ?ciclo=<id>, ?professor=<id>,
+    ?page=<n>. Os resultados não identificam o aluno.
+    """
+    if not check_user_permission(request.user, ["coordenador", "admin"]):
+        return JsonResponse({"error": "Permissão negada"}, status=403)
 
-                if respostas_pergunta.exists():
-                    # Calcular estatísticas
-                    media = (
-                        respostas_pergunta.aggregate(media=Avg("valor_numerico"))[
-                            "media"
-                        ]
-                        or 0
-                    )
+    termo = request.GET.get("q", "").strip()
+    if not termo:
+        return JsonResponse({"error": "Informe o termo da busca (q)"}, status=400)
+
+    comentarios = buscar_comentarios(
+        termo,
+        ciclo_id=_id_do_filtro(request.GET.get("ciclo")),
+        professor_id=_id_do_filtro(request.GET.get("professor")),
+    ).select_related(
+        "avaliacao__ciclo",
+        "avaliacao__disciplina",
+        "avaliacao__professor__user",
+        "pergunta",
+    )
+    paginator = Paginator(comentarios, RESULTADOS_BUSCA_POR_PAGINA)
+    page_obj = paginator.get_page(request.GET.get("page"))
+
+    resultados = [
+        {
+            "id": resposta.id,
+            "comentario": resposta.valor_texto,
+            "pergunta": resposta.pergunta.enunciado,
+            "data_resposta": resposta.data_resposta,
+            "avaliacao_id": resposta.avaliacao_id,
+            "ciclo": resposta.avaliacao.ciclo.nome,
+            "disciplina": resposta.avaliacao.disciplina.disciplina_nome,
+            "professor": resposta.avaliacao.professor.user.get_full_name(),
+            "relevancia": round(resposta.relevancia, 4),
+        }
+        for resposta in page_obj
+    ]
+    return JsonResponse(
+        {
+            "termo": termo,
+            "resultados": resultados,
+            "pagina": page_obj.number,
+            "total_paginas": paginator.num_pages,
+            "total": paginator.count,
+        }
+    )
 
-                    # Calcular moda (valor mais frequente)
-                    valores = (
-                        respostas_pergunta.values("valor_numerico")
-                        .annotate(count=Count("valor_numerico"))
-                        .order_by("-count")
-                    )
-                    moda = valores[0]["valor_numerico"] if valores else 0
-
-                    respostas_count = respostas_pergunta.count()
-
-                    writer.writerow(
-                        [
-                            disciplina,
-                            professor,
-                            turma,
-                            periodo,
-                            ciclo,
-                            total_alunos,
-                            respondentes,
-                            taxa_resposta,
-                            pergunta.enunciado,
-                            pergunta.get_tipo_display(),
-                            pergunta.categoria.nome if pergunta.categoria else "N/A",
-                            round(media, 2),
-                            moda,
-                            respostas_count,
-                            (
-                                comentarios_texto
-                                if pergunta_questionario
-                                == perguntas_questionario.first()
-                                else ""
-                            ),
-                        ]
-                    )
-                else:
-                    # Pergunta sem respostas
-                    writer.writerow(
-                        [
-                            disciplina,
-                            professor,
-                            turma,
-                            periodo,
-                            ciclo,
-                            total_alunos,
-                            respondentes,
-                            taxa_resposta,
-                            pergunta.enunciado,
-                            pergunta.get_tipo_display(),
-                            pergunta.categoria.nome if pergunta.categoria else "N/A",
-                            0,
-                            "N/A",
-                            0,
-                            (
-                                comentarios_texto
-                                if pergunta_questionario
-                                == perguntas_questionario.first()
-                                else ""
-                            ),
-                        ]
-                    )
 
+def gerar_csv_avaliacoes(ciclo_id=None, professor_id=None):
+    """
+    CSV do relatório transmitido (StreamingHttpResponse) à medida que as
+    linhas são geradas por relatorios.linhas_csv, em lotes de avaliações.
+    """
+    avaliacoes = avaliacoes_do_relatorio(ciclo_id, professor_id)
+    response = StreamingHttpResponse(
+        conteudo_csv(avaliacoes), content_type="text/csv; charset=utf-8"
+    )
+    nome_arquivo = nome_arquivo_csv(ciclo_id, professor_id)
+    response["Content-Disposition"] = f'attachment; filename="{nome_arquivo}"'
+    return response
+
+
+def _job_json(job):
+    """Status de um job para o acompanhamento no navegador"""
+    dados = {
+        "id": job.id,
+        "status": job.status,
+        "progresso": job.progresso,
+        "status_url": reverse("status_job", args=[job.id]),
+    }
+    if job.status == "concluido" and job.nome_arquivo:
+        dados["download_url"] = reverse("baixar_job", args=[job.id])
+    elif job.status == "falhou":
+        dados["error"] = "Não foi possível gerar o arquivo."
+    return dados
+
+
+def _job_do_usuario(request, job_id):
+    """Job criado pelo usuário (admins acessam qualquer job)"""
+    job = get_object_or_404(Job, id=job_id)
+    if job.criado_por_id != request.user.id and not check_user_permission(
+        request.user, ["admin"]
+    ):
+        return None
+    return job
+
+
+@login_required
+def status_job(request, job_id):
+    """JSON com o status e o progresso de um job"""
+    job = _job_do_usuario(request, job_id)
+    if job is None:
+        return JsonResponse({"error": "Permissão negada"}, status=403)
+    return JsonResponse(_job_json(job))
+
+
+@login_required
+def baixar_job(request, job_id):
+    """Arquivo gerado por um job concluído"""
+    job = _job_do_usuario(request, job_id)
+    if job is None:
+        return JsonResponse({"error": "Permissão negada"}, status=403)
+    if job.status != "concluido":
+        return JsonResponse(_job_json(job), status=409)
+    if not job.nome_arquivo:
+        return JsonResponse({"error": "Este job não gera arquivo"}, status=404)
+
+    response = StreamingHttpResponse(
+        partes_do_resultado(job), content_type=job.content_type
+    )
+    response["Content-Disposition"] = f'attachment; filename="{job.nome_arquivo}"'
     return response
 
 
@@ -2714,10 +2753,9 @@ def minhas_avaliacoes(request):
     # Buscar avaliações que o aluno já respondeu das suas turmas
     avaliacoes_respondidas = (
         AvaliacaoDocente.objects.filter(
-            respostas__aluno=request.user.perfil_aluno,
             turma_id__in=turmas_aluno,  # Apenas das turmas em que o aluno está/esteve matriculado
         )
-        .distinct()
+        .respondidas_por(request.user.perfil_aluno)
         .order_by("-data_criacao")
     )
 
@@ -2826,9 +2864,9 @@ def excluir_ciclo(request, ciclo_id):
     if request.method == "POST":
         avaliacoes = ciclo.avaliacoes.all()
         total_avaliacoes = avaliacoes.count()
-        total_respostas = 0
-        for a in avaliacoes:
-            total_respostas += a.respostas.count()
+        total_respostas = RespostaUnificada.objects.filter(
+            avaliacao__ciclo=ciclo
+        ).count()
 
         confirm_cascade = request.POST.get("confirm_cascade") == "1"
 
@@ -2889,6 +2927,8 @@ def encerrar_ciclo(request, ciclo_id):
         else:
             ciclo.ativo = False
             ciclo.save(update_fields=["ativo"])
+            # As respostas não mudam mais: congela o relatório do ciclo
+            gerar_snapshot(ciclo)
             messages.success(request, f"Ciclo '{ciclo.nome}' encerrado com sucesso.")
         return redirect("detalhe_ciclo_avaliacao", ciclo_id=ciclo.id)
     messages.error(request, "Método inválido.")
@@ -2923,384 +2963,270 @@ def encerrar_avaliacao(request, avaliacao_id):
 # ============ FUNÇÕES DE EXPORTAÇÃO CSV PARA ADMIN HUB ============
 
 
+def _sim_nao(valor):
+    return "Sim" if valor else "Não"
+
+
+def _nome_completo(first_name, last_name):
+    return f"{first_name} {last_name}".strip()
+
+
+def _data_hora(valor, vazio=""):
+    return valor.strftime("%d/%m/%Y %H:%M") if valor else vazio
+
+
+def _role_principal(role_principal, is_coordenador, professor, aluno):
+    # Admin/coordenador prevalecem sobre o perfil
+    if role_principal == "admin":
+        return "Admin"
+    if is_coordenador:
+        return "Coordenador"
+    if professor:
+        return "Professor"
+    if aluno:
+        return "Aluno"
+    return "N/A"
+
+
+def _exportar(request, exportacao):
+    """
+    Responde com a exportação no formato de ?formato= (csv ou jsonl)
+    """
+    formato = request.GET.get("formato", "csv")
+    if formato not in FORMATOS_EXPORTACAO:
+        return HttpResponse("Formato de exportação inválido.", status=400)
+    return exportacao.resposta(formato)
+
+
 @login_required
 def exportar_usuarios_csv(request):
     """
-    Exporta lista de usuários em formato CSV
+    Exporta lista de usuários em formato CSV (ou JSON Lines)
     """
     if not check_user_permission(request.user, ["coordenador", "admin"]):
         messages.error(request, "Você não tem permissão para acessar esta página.")
         return redirect("inicio")
 
-    # Preparar resposta HTTP para CSV
-    response = HttpResponse(content_type="text/csv; charset=utf-8")
-    nome_arquivo = f"usuarios_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    response["Content-Disposition"] = f'attachment; filename="{nome_arquivo}"'
-
-    # Escrever BOM para UTF-8 (compatibilidade com Excel)
-    response.write("\ufeff")
-
-    # Criar writer CSV
-    writer = csv.writer(response)
-
-    # Cabeçalhos
-    writer.writerow(
+    exportacao = Exportacao(
+        "usuarios",
+        # Roles e perfis anotados (uma única query)
+        with_roles().order_by("date_joined"),
         [
-            "ID",
-            "Nome Completo",
-            "Email",
-            "Username",
-            "Role Principal",
-            "É Professor",
-            "É Aluno",
-            "Data de Cadastro",
-            "Último Login",
-            "Ativo",
-        ]
+            Coluna("ID", "id"),
+            Coluna(
+                "Nome Completo",
+                "first_name",
+                "last_name",
+                formatar=_nome_completo,
+            ),
+            Coluna("Email", "email"),
+            Coluna("Username", "username"),
+            Coluna(
+                "Role Principal",
+                "role_principal",
+                "is_coordenador",
+                "tem_perfil_professor",
+                "tem_perfil_aluno",
+                formatar=_role_principal,
+            ),
+            Coluna("É Professor", "tem_perfil_professor", formatar=_sim_nao),
+            Coluna("É Aluno", "tem_perfil_aluno", formatar=_sim_nao),
+            Coluna("Data de Cadastro", "date_joined", formatar=_data_hora),
+            Coluna(
+                "Último Login",
+                "last_login",
+                formatar=lambda valor: _data_hora(valor, "Nunca"),
+            ),
+            Coluna("Ativo", "is_active", formatar=_sim_nao),
+        ],
     )
-
-    # Buscar usuários com prefetch das roles
-    usuarios = (
-        User.objects.select_related()
-        .prefetch_related("perfil_professor", "perfil_aluno")
-        .order_by("date_joined")
-    )
-
-    for usuario in usuarios:
-        # Determinar role principal
-        role_principal = "N/A"
-        if hasattr(usuario, "perfil_professor") and usuario.perfil_professor:
-            role_principal = "Professor"
-        elif hasattr(usuario, "perfil_aluno") and usuario.perfil_aluno:
-            role_principal = "Aluno"
-
-        # Verificar se é admin ou coordenador usando has_role
-        from rolepermissions.checkers import has_role
-
-        if has_role(usuario, "admin"):
-            role_principal = "Admin"
-        elif has_role(usuario, "coordenador"):
-            role_principal = "Coordenador"
-
-        writer.writerow(
-            [
-                usuario.id,
-                usuario.get_full_name()
-                or f"{usuario.first_name} {usuario.last_name}".strip(),
-                usuario.email,
-                usuario.username,
-                role_principal,
-                (
-                    "Sim"
-                    if hasattr(usuario, "perfil_professor") and usuario.perfil_professor
-                    else "Não"
-                ),
-                (
-                    "Sim"
-                    if hasattr(usuario, "perfil_aluno") and usuario.perfil_aluno
-                    else "Não"
-                ),
-                (
-                    usuario.date_joined.strftime("%d/%m/%Y %H:%M")
-                    if usuario.date_joined
-                    else ""
-                ),
-                (
-                    usuario.last_login.strftime("%d/%m/%Y %H:%M")
-                    if usuario.last_login
-                    else "Nunca"
-                ),
-                "Sim" if usuario.is_active else "Não",
-            ]
-        )
-
-    return response
+    return _exportar(request, exportacao)
 
 
 @login_required
 def exportar_cursos_csv(request):
     """
-    Exporta lista de cursos em formato CSV
+    Exporta lista de cursos em formato CSV (ou JSON Lines)
     """
     if not check_user_permission(request.user, ["coordenador", "admin"]):
         messages.error(request, "Você não tem permissão para acessar esta página.")
         return redirect("inicio")
 
-    # Preparar resposta HTTP para CSV
-    response = HttpResponse(content_type="text/csv; charset=utf-8")
-    nome_arquivo = f"cursos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    response["Content-Disposition"] = f'attachment; filename="{nome_arquivo}"'
-
-    # Escrever BOM para UTF-8
-    response.write("\ufeff")
+    cursos = Curso.objects.annotate(
+        total_disciplinas=contagem(Disciplina.objects.all(), "curso"),
+        total_turmas=contagem(Turma.objects.all(), "disciplina__curso"),
+    ).order_by("curso_nome")
 
-    # Criar writer CSV
-    writer = csv.writer(response)
-
-    # Cabeçalhos
-    writer.writerow(
+    exportacao = Exportacao(
+        "cursos",
+        cursos,
         [
-            "ID",
-            "Nome do Curso",
-            "Sigla",  # Corrigido
-            "Coordenador",
-            "Email Coordenador",
-            "Total de Disciplinas",
-            "Total de Turmas",
-            "Observações",  # Corrigido
-            "Informações Adicionais",  # Corrigido
-        ]
-    )
-
-    # Buscar cursos com related data
-    cursos = (
-        Curso.objects.select_related("coordenador_curso__user")
-        .prefetch_related("disciplinas", "disciplinas__turmas")
-        .order_by("curso_nome")
+            Coluna("ID", "id"),
+            Coluna("Nome do Curso", "curso_nome"),
+            Coluna("Sigla", "curso_sigla"),
+            Coluna(
+                "Coordenador",
+                "coordenador_curso__user__first_name",
+                "coordenador_curso__user__last_name",
+                formatar=_nome_completo,
+            ),
+            Coluna("Email Coordenador", "coordenador_curso__user__email"),
+            Coluna("Total de Disciplinas", "total_disciplinas"),
+            Coluna("Total de Turmas", "total_turmas"),
+            # Não há campo ativo nem data_criacao no modelo Curso
+            Coluna("Observações", formatar=lambda: "N/A"),
+            Coluna("Informações Adicionais", formatar=lambda: "N/A"),
+        ],
     )
-
-    for curso in cursos:
-        # Contar disciplinas e turmas
-        total_disciplinas = curso.disciplinas.count()
-        total_turmas = sum(
-            disciplina.turmas.count() for disciplina in curso.disciplinas.all()
-        )
-
-        writer.writerow(
-            [
-                curso.id,
-                curso.curso_nome,
-                curso.curso_sigla,  # Corrigido: era codigo_curso
-                (
-                    curso.coordenador_curso.user.get_full_name()  # Corrigido: era coordenador
-                    if curso.coordenador_curso
-                    else "Não definido"
-                ),
-                (
-                    curso.coordenador_curso.user.email
-                    if curso.coordenador_curso
-                    else ""
-                ),  # Corrigido: era coordenador
-                total_disciplinas,
-                total_turmas,
-                "N/A",  # Não há campo ativo no modelo Curso
-                "N/A",  # Não há campo data_criacao no modelo Curso
-            ]
-        )
-
-    return response
+    return _exportar(request, exportacao)
 
 
 @login_required
 def exportar_disciplinas_csv(request):
     """
-    Exporta lista de disciplinas em formato CSV
+    Exporta lista de disciplinas em formato CSV (ou JSON Lines)
     """
     if not check_user_permission(request.user, ["coordenador", "admin"]):
         messages.error(request, "Você não tem permissão para acessar esta página.")
         return redirect("inicio")
 
-    # Preparar resposta HTTP para CSV
-    response = HttpResponse(content_type="text/csv; charset=utf-8")
-    nome_arquivo = f"disciplinas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    response["Content-Disposition"] = f'attachment; filename="{nome_arquivo}"'
-
-    # Escrever BOM para UTF-8
-    response.write("\ufeff")
+    disciplinas = Disciplina.objects.annotate(
+        total_turmas=contagem(Turma.objects.all(), "disciplina")
+    ).order_by("curso__curso_nome", "disciplina_nome")
 
-    # Criar writer CSV
-    writer = csv.writer(response)
+    def professores_atuais(total_turmas, first_name, last_name):
+        # O professor das turmas é o professor da disciplina
+        return _nome_completo(first_name, last_name) if total_turmas else "Nenhum"
 
-    # Cabeçalhos
-    writer.writerow(
+    exportacao = Exportacao(
+        "disciplinas",
+        disciplinas,
         [
-            "ID",
-            "Nome da Disciplina",
-            "Sigla",  # Corrigido
-            "Curso",
-            "Tipo",  # Corrigido
-            "Total de Turmas",
-            "Professores Atuais",
-            "Observações",  # Corrigido
-        ]
+            Coluna("ID", "id"),
+            Coluna("Nome da Disciplina", "disciplina_nome"),
+            Coluna("Sigla", "disciplina_sigla"),
+            Coluna("Curso", "curso__curso_nome"),
+            Coluna("Tipo", "disciplina_tipo"),
+            Coluna("Total de Turmas", "total_turmas"),
+            Coluna(
+                "Professores Atuais",
+                "total_turmas",
+                "professor__user__first_name",
+                "professor__user__last_name",
+                formatar=professores_atuais,
+            ),
+            Coluna("Observações", formatar=lambda: "N/A"),
+        ],
     )
-
-    # Buscar disciplinas com related data
-    disciplinas = (
-        Disciplina.objects.select_related("curso")
-        .prefetch_related("turmas__professor__user")
-        .order_by("curso__curso_nome", "disciplina_nome")
-    )
-
-    for disciplina in disciplinas:
-        # Contar turmas
-        total_turmas = disciplina.turmas.count()
-
-        # Listar professores únicos
-        professores = set()
-        for turma in disciplina.turmas.all():
-            if turma.professor:
-                professores.add(turma.professor.user.get_full_name())
-
-        professores_str = ", ".join(sorted(professores)) if professores else "Nenhum"
-
-        writer.writerow(
-            [
-                disciplina.id,
-                disciplina.disciplina_nome,
-                disciplina.disciplina_sigla,  # Corrigido: era disciplina_codigo
-                disciplina.curso.curso_nome,
-                disciplina.disciplina_tipo,  # Adicionado: tipo da disciplina
-                total_turmas,
-                professores_str,
-                "N/A",  # Observações
-            ]
-        )
-
-    return response
+    return _exportar(request, exportacao)
 
 
 @login_required
 def exportar_turmas_csv(request):
     """
-    Exporta lista de turmas em formato CSV
+    Exporta lista de turmas em formato CSV (ou JSON Lines)
     """
     if not check_user_permission(request.user, ["coordenador", "admin"]):
         messages.error(request, "Você não tem permissão para acessar esta página.")
         return redirect("inicio")
 
-    # Preparar resposta HTTP para CSV
-    response = HttpResponse(content_type="text/csv; charset=utf-8")
-    nome_arquivo = f"turmas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    response["Content-Disposition"] = f'attachment; filename="{nome_arquivo}"'
-
-    # Escrever BOM para UTF-8
-    response.write("\ufeff")
-
-    # Criar writer CSV
-    writer = csv.writer(response)
-
-    # Cabeçalhos
-    writer.writerow(
-        [
-            "ID",
-            "Código da Turma",
-            "Disciplina",
-            "Curso",
-            "Professor",
-            "Email Professor",
-            "Período Letivo",
-            "Total de Alunos",
-            "Alunos Ativos",
-            "Ativa",
-        ]
+    turmas = Turma.objects.annotate(
+        total_alunos=Count("matriculas"),
+        alunos_ativos=Count("matriculas", filter=Q(matriculas__status="ativa")),
+    ).order_by(
+        "disciplina__periodo_letivo__nome",
+        "disciplina__curso__curso_nome",
+        "codigo_turma",
     )
 
-    # Buscar turmas com related data
-    turmas = (
-        Turma.objects.select_related(
-            "disciplina__curso",
-            "disciplina__professor__user",
-            "disciplina__periodo_letivo",
-        )
-        .prefetch_related("matriculas")
-        .order_by(
-            "disciplina__periodo_letivo__nome",
-            "disciplina__curso__curso_nome",
-            "codigo_turma",
-        )
+    exportacao = Exportacao(
+        "turmas",
+        turmas,
+        [
+            Coluna("ID", "id"),
+            Coluna("Código da Turma", "codigo_turma"),
+            Coluna("Disciplina", "disciplina__disciplina_nome"),
+            Coluna("Curso", "disciplina__curso__curso_nome"),
+            Coluna(
+                "Professor",
+                "disciplina__professor__user__first_name",
+                "disciplina__professor__user__last_name",
+                formatar=_nome_completo,
+            ),
+            Coluna("Email Professor", "disciplina__professor__user__email"),
+            Coluna("Período Letivo", "disciplina__periodo_letivo__nome"),
+            Coluna("Total de Alunos", "total_alunos"),
+            Coluna("Alunos Ativos", "alunos_ativos"),
+            Coluna(
+                "Ativa",
+                "status",
+                formatar=lambda status: "Ativa" if status == "ativa" else "Finalizada",
+            ),
+        ],
     )
-
-    for turma in turmas:
-        # Contar alunos
-        total_alunos = turma.matriculas.count()
-        alunos_ativos = turma.matriculas.filter(status="ativa").count()
-
-        writer.writerow(
-            [
-                turma.id,
-                turma.codigo_turma,
-                turma.disciplina.disciplina_nome,
-                turma.disciplina.curso.curso_nome,
-                (
-                    turma.disciplina.professor.user.get_full_name()
-                    if turma.disciplina.professor
-                    else "Não definido"
-                ),
-                (
-                    turma.disciplina.professor.user.email
-                    if turma.disciplina.professor
-                    else ""
-                ),
-                turma.disciplina.periodo_letivo.nome,
-                total_alunos,
-                alunos_ativos,
-                (
-                    "Ativa" if turma.status == "ativa" else "Finalizada"
-                ),  # Corrigido: era turma.ativa
-            ]
-        )
-
-    return response
+    return _exportar(request, exportacao)
 
 
 @login_required
 def exportar_periodos_csv(request):
     """
-    Exporta lista de períodos letivos em formato CSV
+    Exporta lista de períodos letivos em formato CSV (ou JSON Lines)
     """
     if not check_user_permission(request.user, ["coordenador", "admin"]):
         messages.error(request, "Você não tem permissão para acessar esta página.")
         return redirect("inicio")
 
-    # Preparar resposta HTTP para CSV
-    response = HttpResponse(content_type="text/csv; charset=utf-8")
-    nome_arquivo = f"periodos_letivos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    response["Content-Disposition"] = f'attachment; filename="{nome_arquivo}"'
-
-    # Escrever BOM para UTF-8
-    response.write("\ufeff")
-
-    # Criar writer CSV
-    writer = csv.writer(response)
+    periodos = PeriodoLetivo.objects.annotate(
+        total_turmas=contagem(Turma.objects.all(), "disciplina__periodo_letivo"),
+        total_avaliacoes=contagem(
+            AvaliacaoDocente.objects.all(), "ciclo__periodo_letivo"
+        ),
+    ).order_by("-ano", "-semestre")
 
-    # Cabeçalhos
-    writer.writerow(
+    exportacao = Exportacao(
+        "periodos_letivos",
+        periodos,
         [
-            "ID",
-            "Nome do Período",
-            "Ano/Semestre",  # Corrigido
-            "Informações",  # Corrigido
-            "Total de Turmas",
-            "Total de Avaliações",
-            "Observações",  # Corrigido
-        ]
+            Coluna("ID", "id"),
+            Coluna("Nome do Período", "nome"),
+            Coluna(
+                "Ano/Semestre",
+                "ano",
+                "semestre",
+                formatar=lambda ano, semestre: f"{ano}.{semestre}",
+            ),
+            Coluna("Informações", formatar=lambda: "Período letivo acadêmico"),
+            Coluna("Total de Turmas", "total_turmas"),
+            Coluna("Total de Avaliações", "total_avaliacoes"),
+            Coluna("Observações", formatar=lambda: "N/A"),
+        ],
     )
+    return _exportar(request, exportacao)
 
-    # Buscar períodos com related data
-    periodos = PeriodoLetivo.objects.prefetch_related(
-        "turmas", "ciclos_avaliacao"
-    ).order_by(
-        "-ano", "-semestre"
-    )  # Corrigido: era data_inicio
-
-    for periodo in periodos:
-        # Contar turmas e avaliações
-        total_turmas = periodo.turmas.count()
-        total_avaliacoes = sum(
-            ciclo.avaliacoes.count() for ciclo in periodo.ciclos_avaliacao.all()
-        )
 
-        writer.writerow(
-            [
-                periodo.id,
-                periodo.nome,
-                f"{periodo.ano}.{periodo.semestre}",  # Corrigido: não há data_inicio
-                "Período letivo acadêmico",  # Informações descritivas
-                total_turmas,
-                total_avaliacoes,
-                "N/A",  # Observações
-            ]
-        )
+@login_required
+def feed_respostas_ndjson(request):
+    """
+    Feed incremental de respostas em JSON Lines, em ordem de envio.
 
+    ?apos=<cursor> retorna apenas as respostas dos envios gravados depois
+    do cursor; o cursor seguinte vem no cabeçalho X-Proximo-Cursor (igual ao
+    enviado quando não há envios novos). ?limite= limita o número de envios
+    do lote.
+    """
+    if not check_user_permission(request.user, ["coordenador", "admin"]):
+        return JsonResponse({"error": "Permissão negada"}, status=403)
+
+    try:
+        limite = min(int(request.GET.get("limite", LIMITE_FEED)), LIMITE_FEED)
+        if limite < 1:
+            raise ValueError("Limite inválido")
+        exportacao, proximo = feed_respostas(request.GET.get("apos"), limite)
+    except ValueError as erro:
+        return JsonResponse({"error": str(erro)}, status=400)
+
+    response = StreamingHttpResponse(
+        exportacao.jsonl(), content_type="application/x-ndjson; charset=utf-8"
+    )
+    response["X-Proximo-Cursor"] = proximo
     return response
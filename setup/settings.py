@@ -79,6 +79,7 @@ TEMPLATES = [
                 "django.contrib.messages.context_processors.messages",
                 "social_django.context_processors.backends",
                 "social_django.context_processors.login_redirect",
+                "avaliacao_docente.context_processors.role_flags",
             ],
         },
     },
@@ -238,6 +239,29 @@ LOGGING = {
 
 ROLEPERMISSIONS_MODULE = "setup.roles"  # Define o módulo de permissões de função
 
+# ============ CACHE ============
+
+# Cache compartilhado entre os processos (workers e instâncias da Vercel): as
+# versões dos caches de roles, questionários e tendências precisam ser vistas
+# por todos eles, o que o LocMemCache padrão (um por processo) não garante.
+# O padrão usa o próprio banco; a tabela é criada pelo migrate (migration
+# 0021_criar_tabela_cache). Se CACHE_LOCATION mudar depois, crie a nova com
+#     python manage.py createcachetable
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.db.DatabaseCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default="avaliacao_docente_cache"),
+    }
+}
+
+# ============ SPOOL DE ENVIOS DE AVALIAÇÕES ============
+
+# Arquivo SQLite local que recebe os envios de respostas nos picos; o comando
+# flush_submission_spool os grava no banco. Vazio = gravação direta no banco
+AVALIACAO_SPOOL_ENVIOS = config("AVALIACAO_SPOOL_ENVIOS", default="")
+
 # ============ CONFIGURAÇÕES ESPECÍFICAS PARA VERCEL ============
 
 # Configurações de segurança para produção